@@ -10,6 +10,7 @@ const STATE = {
   lastUpdate: null,
   version: null,
   build: null,
+  dated: null,
 };
 
 const TIER_LABEL = { hot: 'da chiamare', warm: 'da seguire', cold: 'bassa priorità' };
@@ -93,6 +94,150 @@ function refreshSaveBtn(){
   b.innerHTML = `${on?'★':'☆'} <span class="lbl">${on?'Salvato':'Salva'}</span>`;
 }
 
+/* ============ FEED (manifest + delta JSON Patch) ============ */
+// La pipeline scrive, per shards/ (indice leggero) e feed/ (documento
+// intero), un manifest, la versione per contenuto e i delta RFC 6902 tra
+// versioni (src/data_feed.py). Il documento resta nella Cache API: al giro
+// dopo si scaricano solo i delta. Qualunque intoppo → file intero; nessun
+// manifest → data.json.
+const FEED_CACHE = 'ob1-feed';
+
+async function fetchJson(url){
+  const r = await fetch(url);
+  if (!r.ok) throw new Error(`HTTP ${r.status}`);
+  return r.json();
+}
+
+function ptr(path){
+  return path.split('/').slice(1).map(p => p.replace(/~1/g,'/').replace(/~0/g,'~'));
+}
+
+function applyPatch(doc, ops){
+  const walk = (path) => {
+    const parts = ptr(path); let parent = doc;
+    for (const p of parts.slice(0,-1)) parent = parent[Array.isArray(parent) ? +p : p];
+    return [parent, parts[parts.length-1]];
+  };
+  for (const op of ops){
+    let value = op.value;
+    if (op.op === 'move'){
+      const [src, k] = walk(op.from);
+      value = Array.isArray(src) ? src.splice(+k,1)[0] : src[k];
+      if (!Array.isArray(src)) delete src[k];
+    }
+    const [parent, key] = walk(op.path);
+    if (op.op === 'test'){
+      const cur = Array.isArray(parent) ? parent[+key] : parent[key];
+      if (JSON.stringify(cur) !== JSON.stringify(value)) throw new Error('patch test failed');
+    } else if (op.op === 'remove'){
+      if (Array.isArray(parent)) parent.splice(+key,1); else delete parent[key];
+    } else if (Array.isArray(parent)){
+      if (op.op === 'replace') parent[+key] = value;
+      else if (key === '-') parent.push(value);
+      else parent.splice(+key,0,value);
+    } else {
+      parent[key] = value;
+    }
+  }
+  return doc;
+}
+
+async function loadFeed(base){
+  let manifest = null;
+  try { manifest = await fetchJson(base+'manifest.json?t='+Date.now()); } catch(_){}
+  if (!manifest || !('caches' in window)) return null;
+
+  const key = base+'current';
+  let cache = null, doc = null, have = null;
+  try {
+    cache = await caches.open(FEED_CACHE);
+    const hit = await cache.match(key);
+    if (hit) { have = hit.headers.get('X-OB1-Version'); doc = await hit.json(); }
+  } catch(_){ doc = null; }
+  if (doc && have === manifest.version) return doc;
+
+  if (doc && have){
+    try {
+      while (have !== manifest.version){
+        const d = (manifest.deltas||[]).find(x => x.from === have);
+        if (!d) throw new Error('no delta chain');
+        doc = applyPatch(doc, await fetchJson(base+d.file));
+        have = d.to;
+      }
+    } catch(_){ doc = null; }
+  } else {
+    doc = null;
+  }
+  if (!doc) doc = await fetchJson(base+manifest.file);
+  if (cache){
+    try {
+      await cache.put(key, new Response(JSON.stringify(doc), {
+        headers: { 'Content-Type': 'application/json', 'X-OB1-Version': manifest.version },
+      }));
+    } catch(_){}
+  }
+  return doc;
+}
+
+/* ============ SHARDS (indice leggero + dettagli su richiesta) ============ */
+// Dall'indice di shards/ ogni record ha solo i campi di card e filtri, più
+// `detail`: il file con il resto del record, che cambia solo con i fatti.
+// Quello che cambia con la data (breakdown, perché sì/no, segnali di
+// scadenza...) sta in `data.dated`, un file per giro: si scarica alla prima
+// scheda aperta e resta in memoria. Il service worker precarica i
+// segmenti HOT e WARM (un file per classificazione, spacchettato nei singoli
+// dettagli); gli altri dettagli arrivano quando si apre la scheda. In memoria
+// restano l'indice e le schede aperte.
+async function loadData(){
+  try { const d = await loadFeed('shards/'); if (d) return d; } catch(_){}
+  try { const d = await loadFeed('feed/'); if (d) return d; } catch(_){}
+  return fetchJson('data.json?t='+Date.now());
+}
+
+function prefetchShards(data){
+  const seg = data.segments;
+  if (!seg || !('serviceWorker' in navigator)) return;
+  const msg = {
+    type: 'prefetch-shards',
+    base: 'shards/',
+    segments: ['hot', 'warm'].map(c => seg[c]).filter(Boolean),
+    live: [...Object.values(seg), ...(data.opportunities||[]).map(o => o.detail).filter(Boolean)],
+  };
+  const ctl = navigator.serviceWorker.controller;
+  if (ctl) ctl.postMessage(msg);
+  else navigator.serviceWorker.ready.then(reg => reg.active && reg.active.postMessage(msg)).catch(()=>{});
+}
+
+let DATED = null;                   // {file, promise} del segmento datato del giro
+function datedFields(name){
+  if (!name) return Promise.resolve({});
+  if (!DATED || DATED.file !== name) {
+    DATED = { file: name, promise: fetchJson('shards/'+name).catch(() => { DATED = null; return {}; }) };
+  }
+  return DATED.promise;
+}
+
+async function withDetail(o){
+  if (!o.detail) return o;          // feed intero: il record è già completo
+  const [facts, dated] = await Promise.all([fetchJson('shards/'+o.detail),
+                                            datedFields(STATE.dated)]);
+  const {detail, ...row} = o;
+  const extra = dated[detail] || {};
+  const merged = {...facts, ...extra, ...row};
+  if (facts.intel || extra.intel) merged.intel = {...facts.intel, ...extra.intel};
+  const full = decorate(merged);
+  const i = STATE.all.indexOf(o);
+  if (i >= 0) STATE.all[i] = full;
+  return full;
+}
+
+async function showPlayer(o){
+  let full = o;
+  try { full = await withDetail(o); }
+  catch(err){ console.error('[OB1] detail fetch failed:', err); }
+  openDrawer(full);
+}
+
 // Service worker registration lives in index.html (avoids double-registering).
 
 document.addEventListener('DOMContentLoaded', init);
@@ -112,13 +257,13 @@ async function init(){
   el('#grid').innerHTML = '<div class="empty" style="display:block"><div class="big" style="font-size:16px;color:var(--ink-mute)">caricamento…</div></div>';
 
   try {
-    const r = await fetch('data.json?t='+Date.now());
-    if (!r.ok) throw new Error(`HTTP ${r.status}`);
-    const data = await r.json();
+    const data = await loadData();
     STATE.all = (data.opportunities||[]).map(decorate);
+    prefetchShards(data);
     STATE.lastUpdate = data.last_update;
     STATE.version = data.version || null;
     STATE.build = data.build || null;
+    STATE.dated = data.dated || null;
   } catch(err) {
     el('#grid').innerHTML = `
       <div class="empty" style="display:block">
@@ -147,7 +292,7 @@ function openFromUrl(){
   const id = new URLSearchParams(location.search).get('player');
   if (!id) return;
   const o = STATE.all.find(x => String(x.id) === String(id));
-  if (o) openDrawer(o);
+  if (o) showPlayer(o);
 }
 
 /* ============ DECORATE ============ */
@@ -276,8 +421,8 @@ function paintGrid(){
   empty.style.display = 'none';
   g.innerHTML = STATE.filtered.map(card).join('');
   els('.card', g).forEach(c=>{
-    c.addEventListener('click',  ()=>{ const o=STATE.all.find(x=>x.id===c.dataset.id); if(o) openDrawer(o); });
-    c.addEventListener('keydown', e=>{ if(e.key==='Enter'||e.key===' '){ e.preventDefault(); const o=STATE.all.find(x=>x.id===c.dataset.id); if(o) openDrawer(o); }});
+    c.addEventListener('click',  ()=>{ const o=STATE.all.find(x=>x.id===c.dataset.id); if(o) showPlayer(o); });
+    c.addEventListener('keydown', e=>{ if(e.key==='Enter'||e.key===' '){ e.preventDefault(); const o=STATE.all.find(x=>x.id===c.dataset.id); if(o) showPlayer(o); }});
   });
 }
 
@@ -1,8 +1,12 @@
 /**
  * OB1 Lega Pro — Service Worker (PWA)
- * Network-first for app shell; data.json always network-only.
+ * Network-first for app shell; data.json, feed/ and the shard index always
+ * network-only (app.js keeps them in its own cache and applies the deltas).
+ * Player detail shards are content-addressed: cache-first, and prefetched
+ * HOT then WARM when the app sends 'prefetch-shards'.
  */
-const CACHE_NAME = 'ob1-legapro-v14';
+const CACHE_NAME = 'ob1-legapro-v18';
+const SHARD_CACHE = 'ob1-shards';
 const STATIC_ASSETS = [
   './',
   './index.html',
@@ -13,7 +17,7 @@ const STATIC_ASSETS = [
   './icons/apple-touch-icon.png',
 ];
 
-const NEVER_CACHE = ['data.json'];
+const NEVER_CACHE = ['data.json', '/feed/', '/shards/'];
 
 self.addEventListener('install', (event) => {
   event.waitUntil(
@@ -27,7 +31,9 @@ self.addEventListener('activate', (event) => {
   event.waitUntil(
     caches.keys()
       .then((keys) =>
-        Promise.all(keys.filter((k) => k !== CACHE_NAME).map((k) => caches.delete(k)))
+        // Only old app-shell caches: the feed and shard caches outlive a SW update
+        Promise.all(keys.filter((k) => k.startsWith('ob1-legapro-') && k !== CACHE_NAME)
+          .map((k) => caches.delete(k)))
       )
       .then(() => self.clients.claim())
   );
@@ -37,6 +43,19 @@ self.addEventListener('fetch', (event) => {
   if (event.request.method !== 'GET') return;
   if (!event.request.url.startsWith(self.location.origin)) return;
 
+  // Player detail shard: immutable, from the prefetched cache when there
+  if (event.request.url.includes('/shards/p.')) {
+    event.respondWith(
+      caches.open(SHARD_CACHE).then((cache) =>
+        cache.match(event.request).then((hit) => hit || fetch(event.request).then((response) => {
+          if (response && response.ok) cache.put(event.request, response.clone());
+          return response;
+        }))
+      )
+    );
+    return;
+  }
+
   // Live data — never cache
   if (NEVER_CACHE.some((f) => event.request.url.includes(f))) {
     event.respondWith(fetch(event.request));
@@ -64,6 +83,41 @@ self.addEventListener('fetch', (event) => {
   );
 });
 
+// Segments are {detail file: record}: one request per classification,
+// unpacked into the per-player URLs the app asks for. Whatever the current
+// index no longer lists is evicted first.
+async function prefetchShards(base, segments, live) {
+  const cache = await caches.open(SHARD_CACHE);
+  const abs = (f) => new URL(base + f, self.registration.scope).href;
+  const keep = new Set(live.map(abs));
+  for (const req of await cache.keys()) {
+    if (!keep.has(req.url)) await cache.delete(req);
+  }
+  for (const seg of segments) {
+    const url = abs(seg);
+    if (await cache.match(url)) continue;   // already unpacked
+    try {
+      const response = await fetch(url);
+      if (!response.ok) continue;
+      const records = await response.json();
+      await Promise.all(Object.entries(records).map(([name, record]) =>
+        cache.put(abs(name), new Response(JSON.stringify(record), {
+          headers: { 'Content-Type': 'application/json' },
+        }))
+      ));
+      await cache.put(url, new Response('{}'));
+    } catch (_) {
+      // offline or interrupted: the next app start asks again
+    }
+  }
+}
+
+self.addEventListener('message', (event) => {
+  const msg = event.data || {};
+  if (msg.type !== 'prefetch-shards') return;
+  event.waitUntil(prefetchShards(msg.base || 'shards/', msg.segments || [], msg.live || []));
+});
+
 self.addEventListener('notificationclick', (event) => {
   event.notification.close();
   const url = event.notification.data || './';
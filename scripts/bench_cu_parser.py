@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+ARCH-003 — Benchmark del parser dei CU: classificatore contro scansione completa.
+
+parse_cu_text prova per ogni riga solo le regex che gli indizi della riga
+rendono possibili; qui accanto c'è la versione che le provava tutte in fila,
+tenuta come RIFERIMENTO: stesso input, stesso output, campo per campo. Il
+benchmark misura entrambe e si ferma con errore se gli esiti divergono —
+una velocità ottenuta perdendo una sanzione non è una velocità.
+
+Uso:
+    # corpus sintetico (righe nel formato del CU 146 CRER, rimescolate)
+    python scripts/bench_cu_parser.py --lines 200000
+
+    # CU veri: PDF (percorso o URL) o testo già estratto
+    python scripts/bench_cu_parser.py data/cu/*.pdf data/cu/*.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cu_parser import (RE_AMMENDA, RE_AMMON, RE_CATEGORY, RE_GARE_DEL, RE_GIRONE,
+                           RE_META, RE_PAGE_ARTIFACT, RE_PERSON, RE_RESULT, RE_ROLE,
+                           RE_SQUAL_DATE, RE_SQUAL_GARE, _clean_date, parse_cu_text,
+                           read_pdf)
+
+
+def _mostly_upper(line: str) -> bool:
+    letters = [c for c in line if c.isalpha()]
+    if not letters:
+        return False
+    return sum(1 for c in letters if c.isupper()) / len(letters) > 0.8
+
+
+def legacy_parse_cu_text(text: str) -> dict:
+    """La macchina a stati prima del classificatore, come riferimento."""
+    meta = {"cu_number": None, "cu_date": None}
+    m = RE_META.search(text or "")
+    if m:
+        meta["cu_number"] = int(m.group(1))
+        meta["cu_date"] = _clean_date(m.group(2))
+
+    results, sanctions = [], []
+    category = match_date = girone = giornata = None
+    role = kind = detail = None
+
+    for raw in (text or "").splitlines():
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line or RE_PAGE_ARTIFACT.match(line):
+            continue
+
+        g = RE_GARE_DEL.search(line)
+        if g:
+            match_date = _clean_date(g.group(1))
+            continue
+
+        c = RE_CATEGORY.search(line)
+        if c and _mostly_upper(line) and not RE_RESULT.match(line):
+            category = c.group(1).upper().replace("  ", " ")
+
+        gi = RE_GIRONE.match(line)
+        if gi:
+            girone, giornata = gi.group(1), int(gi.group(2))
+            continue
+
+        r = RE_RESULT.match(line)
+        if r and not RE_PERSON.search(line):
+            results.append({
+                "category": category, "match_date": match_date,
+                "girone": girone, "giornata": giornata,
+                "home": r.group(1).strip(), "away": r.group(2).strip(),
+                "home_goals": int(r.group(3)), "away_goals": int(r.group(4)),
+                "note": (r.group(5) or "").strip() or None,
+            })
+            continue
+
+        ro = RE_ROLE.match(line)
+        if ro:
+            role, kind, detail = ro.group(1).upper(), None, None
+            continue
+
+        sd = RE_SQUAL_DATE.search(line)
+        if sd:
+            kind, detail = "SQUALIFICA_FINO_AL", _clean_date(sd.group(1))
+            continue
+        sg = RE_SQUAL_GARE.search(line)
+        if sg:
+            kind, detail = "SQUALIFICA_GARE", sg.group(1).upper()
+            continue
+        am = RE_AMMON.match(line)
+        if am:
+            kind = "AMMONIZIONE"
+            detail = am.group(1).upper() + ("_DIFFIDA" if am.group(2) else "")
+            continue
+        if RE_AMMENDA.match(line):
+            kind, detail = "AMMENDA", None
+            continue
+
+        if kind and _mostly_upper(line):
+            people = RE_PERSON.findall(line)
+            if people:
+                for person, club in people:
+                    sanctions.append({
+                        "category": category, "match_date": match_date,
+                        "role": role, "kind": kind, "detail": detail,
+                        "person": person.strip(), "club": club.strip(),
+                        "reason": None,
+                    })
+                continue
+
+        if (sanctions and kind and kind.startswith("SQUALIFICA")
+                and not _mostly_upper(line) and len(line) > 20):
+            prev = sanctions[-1]
+            prev["reason"] = ((prev["reason"] + " ") if prev["reason"] else "") + line
+
+    return {"meta": meta, "results": results, "sanctions": sanctions}
+
+
+# Righe nel formato del CU 146 CRER, più i casi di confine che il
+# classificatore deve riconoscere come la scansione completa: categorie in
+# minuscolo, risultati con un tesserato dentro, ruoli con la punteggiatura,
+# numeri romani minuscoli, la 'İ' turca, spazi non-ASCII.
+LINES = [
+    "COMUNICATO UFFICIALE N. 146 DEL 13/4/2026",
+    "FASI FINALI UNDER 19 ELITE", "ECCELLENZA", "PROMOZIONE GIRONE B",
+    "PRIMA  CATEGORIA", "Coppa Italia Promozione", "COPPA ITALIA ECCELLENZA 2 - 1",
+    "GARE DEL 11/ 4/2026", "gare del 4/ 5/2026", "RISULTATI GARE DEL 18/ 4/2026",
+    "PROVVEDIMENTI DISCIPLINARI",
+    "In base alle risultanze degli atti ufficiali sono state deliberate le seguenti sanzioni disciplinari.",
+    "DIRIGENTI", "CALCIATORI ESPULSI", "CALCIATORI NON ESPULSI", "ALLENATORI",
+    "MASSAGGIATORI:", "Calciatori", "ASSISTENTI ARBITRO",
+    "I AMMONIZIONE DIFFIDA", "II AMMONIZIONE (DIFFIDA)", "IV AMMONIZIONE", "v ammonizione",
+    "İ AMMONIZIONE DIFFIDA", "VI AMMONIZIONE", "AMMENDA", "Ammenda di euro 150,00",
+    "AMMENDA: EURO 100,00 (CASTENASO CALCIO)",
+    "SQUALIFICA FINO AL 18/ 5/2026", "SQUALIFICA PER DUE GARE EFFETTIVE",
+    "SQUALIFICA PER UNA GARA EFFETTIVA", "squalifica per tre gare effettive",
+    "SQUALİFICA FINO AL 2/ 6/2026",
+    "VIGHI ALESSIO (NOCETO)    VIGHI MATTEO (NOCETO)",
+    "RANIERI RICCARDO (NOCETO)", "CANOVA GIANMARCO (CASTENASO CALCIO)",
+    "PELLEGRI FILIPPO (VIANESE CALCIO SSDARL)",
+    "BARATTINI LORENZO (CASTENASO CALCIO)    DASCIA TOMMASO (CASTENASO CALCIO)",
+    "SPADONI LUCA (MEDICINA FOSSATONE S.S.D.)    ALINOVI SEBASTIANO (NOCETO)",
+    "D'ANGELO PIER-LUIGI (U.S. SAN FELICE)",
+    "Per gravi proteste nei confronti dell'Arbitro Per aver rivolto gravi proteste e frasi offensive nei confronti",
+    "dell'arbitro.", "nei confronti dell'Arbitro (art. 36)",
+    "GIRONE A - 12 Giornata - R", "GIRONE X - 1 Giornata - A", "girone b - 3 giornata",
+    "GIRONE UNICO",
+    "SORAGNA 1921 - PONTENURESE - D",
+    "CASTENASO CALCIO - NOCETO 5 - 6 dcr",
+    "FIORENZUOLA 1922 SSD ARL - REAL FORMIGINE 3 - 1",
+    "TERRE DI CASTELLI 1907 - SAVIGNANESE 4 - 3  dcr",
+    "Bagnolese - Luzzara 0 - 0 dts", "ROSSI MARIO (NOCETO) - BIANCHI 1 - 2",
+    "UNDER 17 - JUNIORES 2 - 2", "NOCETO - FIDENZA 1 - 0",
+    " 5036 5036", "12 13", "", "   ", "\t",
+]
+
+
+def synthetic_cu(n_lines: int, seed: int = 146) -> str:
+    """Un CU finto di n_lines righe: le LINES rimescolate, con la testata in cima."""
+    rnd = random.Random(seed)
+    return "\n".join([LINES[0]] + [rnd.choice(LINES) for _ in range(n_lines - 1)])
+
+
+def _load(source: str) -> str:
+    if source.lower().endswith(".txt"):
+        return Path(source).read_text(encoding="utf-8")
+    return read_pdf(source)
+
+
+def _best_of(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark del parser dei Comunicati Ufficiali")
+    ap.add_argument("sources", nargs="*", help="CU veri: PDF (percorso/URL) o .txt estratti")
+    ap.add_argument("--lines", type=int, default=100_000,
+                    help="righe del corpus sintetico, se non si passano CU")
+    ap.add_argument("--repeat", type=int, default=3, help="ripetizioni, vale la migliore")
+    args = ap.parse_args()
+
+    texts = [_load(s) for s in args.sources] or [synthetic_cu(args.lines)]
+    n_lines = sum(t.count("\n") + 1 for t in texts)
+    for i, t in enumerate(texts):
+        if parse_cu_text(t) != legacy_parse_cu_text(t):
+            print(f"DIVERGENZA su {args.sources[i] if args.sources else 'corpus sintetico'}")
+            return 1
+
+    old = _best_of(legacy_parse_cu_text, texts, args.repeat)
+    new = _best_of(parse_cu_text, texts, args.repeat)
+    print(f"{len(texts)} CU, {n_lines} righe — esiti identici")
+    print(f"  scansione completa: {old:8.3f}s  {n_lines / old:12,.0f} righe/s")
+    print(f"  classificatore:     {new:8.3f}s  {n_lines / new:12,.0f} righe/s")
+    print(f"  speedup:            {old / new:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
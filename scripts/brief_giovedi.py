@@ -21,13 +21,21 @@ Uso:
     # giro completo: scopre, ingerisce, manda
     python scripts/brief_giovedi.py --club "NOCETO" --avversario "CASTENASO CALCIO"
 
+    # tutti gli abbonati del comitato in un giro (un messaggio per società)
+    python scripts/brief_giovedi.py --abbonati data/abbonati.json
+
     # solo ingestione, senza brief (per riempire lo storico)
     python scripts/brief_giovedi.py --solo-ingest
 
+    # tutta la stagione in un colpo, riprendibile (vedi src/cu_backfill.py)
+    python -m src.cu_backfill --canale figccrer
+
 Configurazione (.env o environment):
-    OB1_CU_CHANNEL     handle del canale del comitato (default: figccrer)
+    OB1_CU_CHANNEL     handle del canale del comitato (default: lndemiliaromagna);
+                       più comitati separati da virgola, un giro solo
     OB1_CLUB           società del DS
     OB1_AVVERSARIO     prossimo avversario (facoltativo)
+    OB1_ABBONATI       file JSON degli abbonati: [{"club", "opponent", "chat_ids"}]
     TELEGRAM_BOT_TOKEN token di BotFather
     TELEGRAM_CHAT_ID   chat del DS (o TELEGRAM_CHAT_IDS per più destinatari)
 """
@@ -35,6 +43,7 @@ Configurazione (.env o environment):
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import sys
 from datetime import date
@@ -42,9 +51,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.brief import build_brief, format_telegram
-from src.cu_feed import new_cu_links
-from src.cu_parser import CUStore, parse_cu_text, read_pdf
+from src.brief import build_brief, build_briefs, format_telegram
+from src.cu_feed import ChannelCrawler, new_cu_links_many
+from src.cu_parser import CUStore, parse_cu_pages
+from src.cu_pdf import pdf_pages
 from src.watch.seen import SeenStore
 
 # Verificato vivo il 07/08/2026: 17 comunicati in anteprima, l'ultimo dello
@@ -54,14 +64,23 @@ from src.watch.seen import SeenStore
 DEFAULT_CHANNEL = "lndemiliaromagna"
 
 
-def ingest_new(store: CUStore, seen: SeenStore, channel: str, limit: int = 5) -> dict:
+def channels_of(value: str) -> list:
+    """'crer, marche' -> ['crer', 'marche']: --canale accetta più comitati."""
+    return [h.strip().lstrip("@") for h in (value or "").split(",") if h.strip()]
+
+
+def ingest_new(store: CUStore, seen: SeenStore, channel: str, limit: int = 5,
+               crawler: ChannelCrawler = None) -> dict:
     """
-    Scarica e ingerisce i CU non ancora visti. Il limite esiste perché al
+    Scarica e ingerisce i CU non ancora visti di uno o più comitati
+    (`channel` separati da virgola): un crawler e un solo see_batch per
+    tutti, via new_cu_links_many. Il limite, per canale, esiste perché al
     primo giro un canale può avere venti comunicati in anteprima: scaricarli
     tutti insieme è inutile (il brief guarda le ultime settimane) e maleducato
     verso il sito del comitato.
     """
-    if not channel:
+    channels = channels_of(channel)
+    if not channels:
         # Non dovrebbe più accadere (vedi il commento su --canale in main()),
         # ma se accade di nuovo per un'altra via va gridato, non stampato
         # come "nessun comunicato nuovo" — quello sembra un canale pulito,
@@ -70,15 +89,17 @@ def ingest_new(store: CUStore, seen: SeenStore, channel: str, limit: int = 5) ->
               "OB1_CU_CHANNEL o --canale")
         return {"cu": 0, "new_sanctions": 0, "new_results": 0}
 
-    links = new_cu_links(channel, seen=seen)
-    if not links:
-        print(f"@{channel}: nessun comunicato nuovo")
-        return {"cu": 0, "new_sanctions": 0, "new_results": 0}
-
+    found = new_cu_links_many(channels, seen=seen, crawler=crawler)
     totals = {"cu": 0, "new_sanctions": 0, "new_results": 0}
-    for item in links[-limit:]:
+    links = []
+    for handle in channels:
+        new = found.get(handle) or []
+        if not new:
+            print(f"@{handle}: nessun comunicato nuovo")
+        links.extend(new[-limit:])
+    for item in links:
         try:
-            parsed = parse_cu_text(read_pdf(item["url"]))
+            parsed = parse_cu_pages(pdf_pages(item["url"]))
         except Exception as exc:                      # PDF rotto o rete giù
             print(f"  [SALTATO] {item['url']}: {exc}")
             continue
@@ -92,6 +113,78 @@ def ingest_new(store: CUStore, seen: SeenStore, channel: str, limit: int = 5) ->
     return totals
 
 
+def load_subscribers(path: Path | str) -> list:
+    """
+    Abbonati del comitato: una lista JSON di {club, opponent, chat_ids}.
+    opponent è facoltativo; chat_ids può essere un id solo o una lista.
+    """
+    subs = json.loads(Path(path).read_text(encoding="utf-8"))
+    out = []
+    for sub in subs:
+        ids = sub.get("chat_ids") or []
+        out.append({"club": sub["club"], "opponent": sub.get("opponent") or None,
+                    "chat_ids": [str(i) for i in (ids if isinstance(ids, list) else [ids])]})
+    return out
+
+
+def resolve_subscribers(store: CUStore, subscribers: list) -> tuple:
+    """
+    Nomi digitati -> nomi dei CU, come per --club. Un abbonato configurato
+    male si segnala e si salta: non deve costare il brief agli altri.
+    Ritorna (risolti, scartati).
+    """
+    resolved, rejected = [], []
+    for sub in subscribers:
+        club, candidates = store.resolve_club(sub["club"])
+        opponent = None
+        if club is not None and sub["opponent"]:
+            opponent, candidates = store.resolve_club(sub["opponent"])
+        if club is None or (sub["opponent"] and opponent is None):
+            bad = sub["club"] if club is None else sub["opponent"]
+            print(f"  [SCARTATO] '{bad}' non corrisponde a nessuna società vista "
+                  f"nei CU. Più vicine: {', '.join(candidates[:5]) or '-'}")
+            rejected.append(sub)
+            continue
+        resolved.append({**sub, "club": club, "opponent": opponent})
+    return resolved, rejected
+
+
+def brief_batch(store: CUStore, subscribers: list, on_date: str, dry_run: bool = False,
+                notifier=None) -> int:
+    """Il brief di tutti gli abbonati: poche query, un messaggio per coppia
+    (società, avversario), un solo lotto al notifier."""
+    resolved, rejected = resolve_subscribers(store, subscribers)
+    deliveries = build_briefs(store, on_date, resolved)
+    batch = []
+    for d in deliveries:
+        if d["message"] is None:
+            print(f"Nessun provvedimento per {d['club']}: brief non inviato.")
+        elif not d["chat_ids"]:
+            print(f"  [SCARTATO] {d['club']}: nessun chat_id configurato")
+        else:
+            batch.append(d)
+    print(f"{len(subscribers)} abbonati, {len(deliveries)} brief, {len(batch)} da inviare")
+    code = 2 if rejected else 0
+
+    if dry_run:
+        for d in batch:
+            print(f"\n--- {d['club']} -> {', '.join(d['chat_ids'])} ---")
+            print(d["message"])
+        return code
+    if not batch:
+        return code
+
+    if notifier is None:
+        from src.notifier import TelegramNotifier
+        notifier = TelegramNotifier()
+    if not notifier.enabled:
+        print("Telegram non configurato: manca TELEGRAM_BOT_TOKEN.")
+        return 1
+    sent = notifier.send_batch(batch)
+    print(f"inviati {sent['sent']}, falliti {sent['failed']}")
+    return 1 if sent["failed"] else code
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Brief del giovedì per il DS")
     ap.add_argument("--club", default=os.getenv("OB1_CLUB"))
@@ -103,18 +196,21 @@ def main() -> int:
     # solo l'assenza totale della chiave lo fa. Bug vero, trovato dal primo
     # run reale: canale="" -> fetch di "t.me/s/" -> 404 silenzioso -> "nessun
     # comunicato nuovo", indistinguibile da un canale controllato e pulito.
-    ap.add_argument("--canale", default=os.getenv("OB1_CU_CHANNEL") or DEFAULT_CHANNEL)
+    ap.add_argument("--canale", default=os.getenv("OB1_CU_CHANNEL") or DEFAULT_CHANNEL,
+                    help="canale del comitato; più comitati separati da virgola")
     ap.add_argument("--data", default=date.today().isoformat(),
                     help="data del brief (default: oggi)")
     ap.add_argument("--db", default="data/ob1.db")
     ap.add_argument("--facts", default="data/cu_facts.json",
-                    help="memoria versionata: si legge all'avvio, si riscrive alla fine")
+                    help="manifest della memoria versionata (segmenti in data/cu_facts/)")
     ap.add_argument("--dry-run", action="store_true",
                     help="stampa il messaggio invece di inviarlo")
     ap.add_argument("--no-fetch", action="store_true",
                     help="usa solo quello che è già nel db")
     ap.add_argument("--solo-ingest", action="store_true",
                     help="ingerisce i nuovi CU senza produrre il brief")
+    ap.add_argument("--abbonati", default=os.getenv("OB1_ABBONATI") or None,
+                    help="file JSON degli abbonati: un brief per ognuno, al posto di --club")
     args = ap.parse_args()
 
     store = CUStore(args.db)
@@ -128,8 +224,10 @@ def main() -> int:
               f"+{restored['results']} risultati da {args.facts}")
 
     if not args.no_fetch:
-        with SeenStore(args.db) as seen:
-            ingest_new(store, seen, args.canale)
+        # Il crawler guarda solo oltre il cursore del canale (in args.db):
+        # un giovedì senza comunicati nuovi è una GET condizionale.
+        with SeenStore(args.db) as seen, ChannelCrawler(args.db) as crawler:
+            ingest_new(store, seen, args.canale, crawler=crawler)
         totals = store.export_facts(args.facts)
         print(f"memoria aggiornata: {totals['sanctions']} sanzioni, "
               f"{totals['results']} risultati in {args.facts}")
@@ -138,6 +236,18 @@ def main() -> int:
         store.close()
         return 0
 
+    if args.abbonati:
+        if not store.clubs():
+            print("Nessuna società ancora nei CU ingeriti (pre-stagione): "
+                  "nessun brief inviato.")
+            store.close()
+            return 0
+        try:
+            return brief_batch(store, load_subscribers(args.abbonati), args.data,
+                               dry_run=args.dry_run)
+        finally:
+            store.close()
+
     if not args.club:
         print("Serve --club (o OB1_CLUB). Società presenti nel db:")
         for c in store.clubs():
@@ -6,23 +6,36 @@ src/quality_gate.py, allineato a global-scout v2: publishable richiede
 identity_complete AND corroborated, hard-gate).
 
 Pubblica solo profili publishable (nome+età+club+fonte). Tracking in stats.
+
+Build incrementale: ogni record ha un'impronta dei suoi campi, e la riga
+derivata (gate, score, INTEL, raccomandazione) resta in data/dashboard_rows.json.
+Un giro rifà per intero solo i record nuovi o cambiati; per gli altri ricalcola
+i soli campi che dipendono dalla data (freshness e totale, giorni senza
+contratto, segnali di scadenza, perché sì / no). OB1_DASHBOARD_CACHE=0 per il
+ricalcolo completo. Il file è derivato: sta nel .gitignore, e in CI torna
+dalla cache di Actions (ingest.yml).
 """
 
+import hashlib
 import json
+import os
 import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 REPO_ROOT = Path(__file__).parent.parent
 
 # Add src to path for scoring module
 sys.path.insert(0, str(REPO_ROOT / 'src'))
 
-from scoring import OB1Scorer, assess_follow
-from minutaggio import genera_intel_badge
-from quality_gate import apply_gate, normalize_age
+from scoring import FACTORS, OB1Scorer, ScoreColumns, assess_follow, classify_score
+from minutaggio import check_contract_signals, genera_intel_badge
+from quality_gate import apply_gate, normalize_age, reconcile_opportunity_type
 from tm_url import clean as clean_tm_url
+from entity_resolution import PlayerRegistry, record_tm_id, resolution_enabled
+from data_feed import publish as publish_feed, publish_shards
 
 
 def _version_and_build() -> tuple:
@@ -145,6 +158,308 @@ def generate_recommendation(opp: dict) -> str:
     return '. '.join(parts[:3]) + '.' if parts else ''
 
 
+def dedupe_players(opportunities, registry=None):
+    """Keep the first record per player; identity via entity_resolution."""
+    own = registry is None and resolution_enabled()
+    if own:
+        registry = PlayerRegistry(REPO_ROOT / 'data' / 'ob1.db')
+    seen_keys = set()
+    deduped = []
+    try:
+        for opp in opportunities:
+            name = (opp.get('player_name') or '').strip()
+            if not name:
+                continue
+            key = None
+            if registry is not None:
+                key = registry.resolve(name, tm_player_id=record_tm_id(opp))
+            key = key or name.lower()
+            if key not in seen_keys:
+                seen_keys.add(key)
+                deduped.append(opp)
+    finally:
+        if own:
+            registry.close()
+    print(f"Dedup: {len(deduped)} unique players (removed {len(opportunities) - len(deduped)} duplicates)")
+    return deduped
+
+
+# Codici ruolo → nome leggibile, per le schede senza role_name
+ROLE_MAP = {
+    'PO': 'Portiere', 'DC': 'Difensore Centrale', 'TD': 'Terzino Destro',
+    'TS': 'Terzino Sinistro', 'CC': 'Centrocampista', 'ED': 'Esterno Destro',
+    'ES': 'Esterno Sinistro', 'TQ': 'Trequartista', 'AT': 'Attaccante',
+    'AD': 'Ala Destra', 'AS': 'Ala Sinistra', 'MED': 'Mediano',
+    'REG': 'Regista', 'PC': 'Punta Centrale',
+}
+
+
+# Righe di dashboard già calcolate, per impronta del record. Non è in git
+# (.gitignore): ingest.yml la salva e la ripristina con actions/cache, così
+# sopravvive al runner da un giro di 6 ore all'altro. Se manca, si ricalcola
+# tutto e basta.
+ROWS_CACHE = REPO_ROOT / 'data' / 'dashboard_rows.json'
+
+# Il codice che decide il contenuto di una riga. Se uno di questi file
+# cambia (pesi, soglie, gate, lessico club), le righe in cache non valgono più.
+_ROW_CODE = (
+    Path(__file__),
+    REPO_ROOT / 'src' / 'scoring.py',
+    REPO_ROOT / 'src' / 'quality_gate.py',
+    REPO_ROOT / 'src' / 'minutaggio.py',
+    REPO_ROOT / 'src' / 'tm_url.py',
+    REPO_ROOT / 'src' / 'club_lexicon.py',
+    REPO_ROOT / 'config' / 'clubs.yaml',
+)
+
+
+def rows_cache_enabled() -> bool:
+    """OB1_DASHBOARD_CACHE=0: ogni riga ricalcolata da zero, come prima."""
+    return os.getenv('OB1_DASHBOARD_CACHE', '1') != '0'
+
+
+def rows_cache_salt(now: Optional[datetime] = None) -> str:
+    """
+    Versione della cache: il codice di _ROW_CODE più l'anno in corso (età da
+    anno di nascita e ROI minutaggio contano l'anno, non il giorno).
+    """
+    h = hashlib.sha1(str((now or datetime.now()).year).encode())
+    for path in _ROW_CODE:
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def record_fingerprint(opp: dict) -> str:
+    """sha1 di tutti i campi del record: qualunque modifica lo ricalcola."""
+    blob = json.dumps(opp, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+def load_rows_cache(path: Path, salt: str) -> dict:
+    """Le righe in cache, o {} se mancano, sono illeggibili o di un'altra versione."""
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('salt') != salt:
+        return {}
+    return data.get('rows') or {}
+
+
+def save_rows_cache(path: Path, salt: str, rows: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'salt': salt, 'rows': rows}, ensure_ascii=False,
+                                   separators=(',', ':'), sort_keys=True),
+                        encoding='utf-8')
+    except OSError:
+        pass
+
+
+def _static_row(opp: dict, score_result: dict) -> dict:
+    """
+    La riga di dashboard di un record già passato dal gate, senza i campi
+    che dipendono dalla data di oggi (li mette _dated_row).
+    """
+    # Helper to get data from root or player_profile
+    profile = opp.get('player_profile', {}) or {}
+
+    dashboard_opp = {
+        'id': opp.get('id', f"opp_{hash(opp.get('player_name', '')) % 10000:04d}"),
+        'player_name': opp.get('player_name', 'N/D'),
+        'age': opp.get('age') or calculate_age(opp.get('birth_year')),
+        'role': opp.get('role', ''),
+        'role_name': opp.get('role_name', opp.get('role', '')),
+        'opportunity_type': opp.get('opportunity_type', 'mercato').lower(),
+        'reported_date': opp.get('discovered_at', datetime.now().isoformat())[:10],
+        'source_name': opp.get('source_name', 'N/D'),
+        'source_url': opp.get('source_url', ''),
+        'previous_clubs': opp.get('previous_clubs', []),
+        'current_club': opp.get('current_club', ''),
+        # Fiducia: una statistica ignota resta null, non diventa 0. Un "0
+        # presenze" inventato si legge come "non ha mai giocato" — e chi
+        # scopre una volta che il numero era finto non torna più.
+        'appearances': _first(opp.get('appearances'), profile.get('appearances')),
+        'goals': _first(opp.get('goals'), profile.get('goals')),
+        'assists': _first(opp.get('assists'), profile.get('assists')),
+        'minutes_played': _first(opp.get('minutes_played'), profile.get('minutes_played')),
+        'summary': opp.get('summary', ''),
+
+        # DATA-001: New enriched fields
+        'nationality': opp.get('nationality') or profile.get('nationality'),
+        'second_nationality': opp.get('second_nationality') or profile.get('second_nationality'),
+        'foot': opp.get('foot') or profile.get('foot'),
+        'market_value': opp.get('market_value') or profile.get('market_value'),
+        'market_value_formatted': opp.get('market_value_formatted') or profile.get('market_value_formatted'),
+        'player_image_url': opp.get('player_image_url') or profile.get('player_image_url'),
+
+        # DATA-003 QW-1: Agent field
+        'agent': opp.get('agent') or profile.get('agent'),
+
+        # Link Transfermarkt verificabile (vale solo un url TM vero) e il
+        # flag che la UI usa per separare i dati controllabili dalle stime.
+        # È il gate delle due fonti reso visibile sulla singola scheda.
+        'tm_url': _tm_url(opp.get('tm_url') or profile.get('tm_url'),
+                          opp.get('player_name')),
+        'data_verified': bool(_tm_url(opp.get('tm_url') or profile.get('tm_url'),
+                                      opp.get('player_name'))),
+
+        # Discovered timestamp (for stale detection)
+        'discovered_at': opp.get('discovered_at', ''),
+
+        # SCORE-003
+        'ob1_score': score_result['ob1_score'],
+        'classification': score_result['classification'],
+        'score_breakdown': score_result['score_breakdown'],
+
+        # Quality gate — nomi storici, mantenuti per compatibilità con
+        # chi legge già data.json così com'è (nessun consumer in docs/
+        # li usa oggi, verificato, ma restano per chi guarda il JSON
+        # a mano). Stesso nome di campo e stessa soglia di OB1 Global:
+        # publishable = identity_complete AND corroborated (hard-gate,
+        # vedi src/quality_gate.py). I market_* sotto sono lo stesso
+        # dato con un nome che lo dice da solo, senza dover aprire
+        # quality_gate.py per scoprirlo.
+        'identity_complete': opp.get('identity_complete', False),
+        'corroborated': opp.get('corroborated', False),
+        'publishable': opp.get('publishable', False),
+        'review_flags': opp.get('review_flags', ''),
+        'n_sources': opp.get('n_sources', 1),
+        'out_of_scope': opp.get('out_of_scope', False),
+        'out_of_scope_reason': opp.get('out_of_scope_reason', ''),
+
+        # Stessi valori, nome che porta il significato (dossier
+        # "identità distinte": non toglie i campi storici sopra, li
+        # affianca)
+        'market_identity_complete': opp.get('identity_complete', False),
+        'market_corroborated': opp.get('corroborated', False),
+        'market_publishable': opp.get('publishable', False),
+        'market_n_sources': opp.get('n_sources', 1),
+
+        # Auto-generated recommendation
+        'recommendation': generate_recommendation(opp),
+    }
+
+    # ── INTEL Engine: ROI Minutaggio + Traffic Light FIGC + Signals ──
+    intel_input = dict(dashboard_opp)
+    intel_input['contract_expires'] = opp.get('contract_expires') or profile.get('contract_expires', '')
+    intel = genera_intel_badge(intel_input, league='serie_c')
+    dashboard_opp['intel'] = intel
+    dashboard_opp['contract_expires'] = intel_input.get('contract_expires', '')
+
+    # Fix missing/bad role names - map codes to readable names
+    role_name = dashboard_opp['role_name']
+    if not role_name or role_name.lower() in ('non specificato', '', 'n/d'):
+        role_code = dashboard_opp.get('role', '')
+        dashboard_opp['role_name'] = ROLE_MAP.get(role_code.upper(), role_code or 'N/D')
+    elif role_name.upper() in ROLE_MAP:
+        dashboard_opp['role_name'] = ROLE_MAP[role_name.upper()]
+
+    return dashboard_opp
+
+
+def _dated_row(entry: dict, breakdown: dict, score: int, now: datetime) -> dict:
+    """
+    I campi che cambiano col passare dei giorni, su una copia della riga in
+    cache: freshness e totale, giorni senza contratto, segnali di scadenza,
+    perché sì / no. Niente gate, niente regex, niente registry.
+    """
+    row = dict(entry['row'])
+    today = now.date()
+    if entry['undated']:
+        row['reported_date'] = now.isoformat()[:10]
+    score_result = {
+        'ob1_score': score,
+        'classification': classify_score(score),
+        'score_breakdown': breakdown,
+    }
+    row.update(score_result)
+    intel = dict(row['intel'])
+    intel['signals'] = check_contract_signals(row, league='serie_c', now=now)['signals']
+    row['intel'] = intel
+
+    # DATA-003 QW-4: Calculate days_without_contract for svincolati/rescissioni
+    opp_type = row['opportunity_type']
+    if opp_type in ('svincolato', 'rescissione'):
+        discovered = row.get('discovered_at', '')
+        if discovered:
+            try:
+                discovered_date = datetime.fromisoformat(discovered.replace('Z', '+00:00')).date() if 'T' in discovered else datetime.strptime(discovered[:10], '%Y-%m-%d').date()
+                days = (today - discovered_date).days
+                row['days_without_contract'] = max(0, days)
+            except (ValueError, TypeError):
+                row['days_without_contract'] = 0
+        else:
+            row['days_without_contract'] = 0
+
+        # Flag stale free agent: >30 days without contract AND appearances >= 10
+        appearances = row.get('appearances', 0) or 0
+        days_wc = row.get('days_without_contract', 0)
+        row['stale_free_agent'] = (days_wc > 30 and appearances >= 10)
+    else:
+        row['days_without_contract'] = 0
+        row['stale_free_agent'] = False
+
+    # Perché sì / no — after days_without_contract is known (no LLM)
+    row['assessment'] = assess_follow(row, score_result)
+    return row
+
+
+def build_rows(opportunities: list, cache: Optional[dict] = None,
+               now: Optional[datetime] = None) -> list:
+    """
+    Le righe di dashboard, ricalcolando per intero solo i record cambiati.
+
+    L'impronta di un record è lo sha1 dei suoi campi dopo la riconciliazione
+    del tipo (che dipende dalla scadenza del contratto rispetto a oggi: se
+    scatta, l'impronta cambia da sola). Impronta nota => gate, score, INTEL e
+    raccomandazione vengono dalla cache; per tutte le righe si rifanno solo i
+    campi datati in _dated_row. `cache` viene aggiornata sul posto e alla fine
+    contiene solo le impronte di questo giro.
+    """
+    now = now or datetime.now()
+    cache = {} if cache is None else cache
+    scorer = OB1Scorer()
+
+    keyed = []
+    for opp in opportunities:
+        opp = reconcile_opportunity_type(opp, now=now)
+        keyed.append((record_fingerprint(opp), opp))
+    stale = {fp: opp for fp, opp in keyed if fp not in cache}
+    if stale:
+        gated = [apply_gate(opp, now=now) for opp in stale.values()]
+        scores = scorer.score_batch(gated, today=now.date())
+        for (fp, raw), opp, score_result in zip(stale.items(), gated, scores):
+            get = opp.get
+            date_str = get('reported_date') or get('discovered_at', '')
+            if isinstance(date_str, str) and 'T' in date_str:
+                date_str = date_str.split('T')[0]
+            cache[fp] = {
+                'row': _static_row(opp, score_result),
+                'freshness': [date_str, (get('opportunity_type') or 'altro').lower()],
+                'undated': 'discovered_at' not in opp,
+            }
+    print(f"Incremental: {len(stale)} rebuilt, {len(keyed) - len(stale)} from cache")
+
+    # Percorso economico per tutti: solo la freshness va ricalcolata, gli
+    # altri sei fattori sono quelli in cache; stessa somma di score_batch.
+    entries = [cache[fp] for fp, _ in keyed]
+    columns = {k: [e['row']['score_breakdown'][k] for e in entries] for k in FACTORS}
+    columns['freshness'] = [scorer._calc_freshness(*e['freshness'], today=now.date())
+                            for e in entries]
+    table = ScoreColumns(FACTORS, columns)
+    rows = [_dated_row(e, table.breakdown(i), score, now)
+            for i, (e, score) in enumerate(zip(entries, table.totals(scorer.WEIGHTS)))]
+
+    used = {fp for fp, _ in keyed}
+    for fp in [fp for fp in cache if fp not in used]:
+        del cache[fp]
+    return rows
+
+
 def main():
     print("Generating dashboard data with SCORE-003 scoring...")
 
@@ -213,153 +528,19 @@ def main():
           f"{skipped_foreign} foreign league, {skipped_no_entity} non-entity removed")
     opportunities = filtered
 
-    # === DEDUP: by normalized player_name (keep first = most recent) ===
-    seen_names = set()
-    deduped = []
-    for opp in opportunities:
-        name_key = opp.get('player_name', '').strip().lower()
-        if name_key and name_key not in seen_names:
-            seen_names.add(name_key)
-            deduped.append(opp)
-    print(f"Dedup: {len(deduped)} unique players (removed {len(opportunities) - len(deduped)} duplicates)")
-    opportunities = deduped
-
-    # Initialize scorer
-    scorer = OB1Scorer()
-
-    # Transform + score + quality gate
-    all_scored = []
-    for opp in opportunities:
-        opp = apply_gate(opp)
-        score_result = scorer.score(opp)
-
-        # Helper to get data from root or player_profile
-        profile = opp.get('player_profile', {}) or {}
-
-        dashboard_opp = {
-            'id': opp.get('id', f"opp_{hash(opp.get('player_name', '')) % 10000:04d}"),
-            'player_name': opp.get('player_name', 'N/D'),
-            'age': opp.get('age') or calculate_age(opp.get('birth_year')),
-            'role': opp.get('role', ''),
-            'role_name': opp.get('role_name', opp.get('role', '')),
-            'opportunity_type': opp.get('opportunity_type', 'mercato').lower(),
-            'reported_date': opp.get('discovered_at', datetime.now().isoformat())[:10],
-            'source_name': opp.get('source_name', 'N/D'),
-            'source_url': opp.get('source_url', ''),
-            'previous_clubs': opp.get('previous_clubs', []),
-            'current_club': opp.get('current_club', ''),
-            # Fiducia: una statistica ignota resta null, non diventa 0. Un "0
-            # presenze" inventato si legge come "non ha mai giocato" — e chi
-            # scopre una volta che il numero era finto non torna più.
-            'appearances': _first(opp.get('appearances'), profile.get('appearances')),
-            'goals': _first(opp.get('goals'), profile.get('goals')),
-            'assists': _first(opp.get('assists'), profile.get('assists')),
-            'minutes_played': _first(opp.get('minutes_played'), profile.get('minutes_played')),
-            'summary': opp.get('summary', ''),
-
-            # DATA-001: New enriched fields
-            'nationality': opp.get('nationality') or profile.get('nationality'),
-            'second_nationality': opp.get('second_nationality') or profile.get('second_nationality'),
-            'foot': opp.get('foot') or profile.get('foot'),
-            'market_value': opp.get('market_value') or profile.get('market_value'),
-            'market_value_formatted': opp.get('market_value_formatted') or profile.get('market_value_formatted'),
-            'player_image_url': opp.get('player_image_url') or profile.get('player_image_url'),
-
-            # DATA-003 QW-1: Agent field
-            'agent': opp.get('agent') or profile.get('agent'),
-
-            # Link Transfermarkt verificabile (vale solo un url TM vero) e il
-            # flag che la UI usa per separare i dati controllabili dalle stime.
-            # È il gate delle due fonti reso visibile sulla singola scheda.
-            'tm_url': _tm_url(opp.get('tm_url') or profile.get('tm_url'),
-                              opp.get('player_name')),
-            'data_verified': bool(_tm_url(opp.get('tm_url') or profile.get('tm_url'),
-                                          opp.get('player_name'))),
-
-            # Discovered timestamp (for stale detection)
-            'discovered_at': opp.get('discovered_at', ''),
-
-            # SCORE-003
-            'ob1_score': score_result['ob1_score'],
-            'classification': score_result['classification'],
-            'score_breakdown': score_result['score_breakdown'],
-
-            # Quality gate — nomi storici, mantenuti per compatibilità con
-            # chi legge già data.json così com'è (nessun consumer in docs/
-            # li usa oggi, verificato, ma restano per chi guarda il JSON
-            # a mano). Stesso nome di campo e stessa soglia di OB1 Global:
-            # publishable = identity_complete AND corroborated (hard-gate,
-            # vedi src/quality_gate.py). I market_* sotto sono lo stesso
-            # dato con un nome che lo dice da solo, senza dover aprire
-            # quality_gate.py per scoprirlo.
-            'identity_complete': opp.get('identity_complete', False),
-            'corroborated': opp.get('corroborated', False),
-            'publishable': opp.get('publishable', False),
-            'review_flags': opp.get('review_flags', ''),
-            'n_sources': opp.get('n_sources', 1),
-            'out_of_scope': opp.get('out_of_scope', False),
-            'out_of_scope_reason': opp.get('out_of_scope_reason', ''),
-
-            # Stessi valori, nome che porta il significato (dossier
-            # "identità distinte": non toglie i campi storici sopra, li
-            # affianca)
-            'market_identity_complete': opp.get('identity_complete', False),
-            'market_corroborated': opp.get('corroborated', False),
-            'market_publishable': opp.get('publishable', False),
-            'market_n_sources': opp.get('n_sources', 1),
-
-            # Auto-generated recommendation
-            'recommendation': generate_recommendation(opp),
-        }
-
-        # ── INTEL Engine: ROI Minutaggio + Traffic Light FIGC + Signals ──
-        intel_input = dict(dashboard_opp)
-        intel_input['contract_expires'] = opp.get('contract_expires') or profile.get('contract_expires', '')
-        intel = genera_intel_badge(intel_input, league='serie_c')
-        dashboard_opp['intel'] = intel
-        dashboard_opp['contract_expires'] = intel_input.get('contract_expires', '')
-
-        # Fix missing/bad role names - map codes to readable names
-        ROLE_MAP = {
-            'PO': 'Portiere', 'DC': 'Difensore Centrale', 'TD': 'Terzino Destro',
-            'TS': 'Terzino Sinistro', 'CC': 'Centrocampista', 'ED': 'Esterno Destro',
-            'ES': 'Esterno Sinistro', 'TQ': 'Trequartista', 'AT': 'Attaccante',
-            'AD': 'Ala Destra', 'AS': 'Ala Sinistra', 'MED': 'Mediano',
-            'REG': 'Regista', 'PC': 'Punta Centrale',
-        }
-        role_name = dashboard_opp['role_name']
-        if not role_name or role_name.lower() in ('non specificato', '', 'n/d'):
-            role_code = dashboard_opp.get('role', '')
-            dashboard_opp['role_name'] = ROLE_MAP.get(role_code.upper(), role_code or 'N/D')
-        elif role_name.upper() in ROLE_MAP:
-            dashboard_opp['role_name'] = ROLE_MAP[role_name.upper()]
-
-        # DATA-003 QW-4: Calculate days_without_contract for svincolati/rescissioni
-        opp_type = dashboard_opp['opportunity_type']
-        if opp_type in ('svincolato', 'rescissione'):
-            discovered = opp.get('discovered_at', '')
-            if discovered:
-                try:
-                    discovered_date = datetime.fromisoformat(discovered.replace('Z', '+00:00')).date() if 'T' in discovered else datetime.strptime(discovered[:10], '%Y-%m-%d').date()
-                    days = (datetime.now().date() - discovered_date).days
-                    dashboard_opp['days_without_contract'] = max(0, days)
-                except (ValueError, TypeError):
-                    dashboard_opp['days_without_contract'] = 0
-            else:
-                dashboard_opp['days_without_contract'] = 0
-
-            # Flag stale free agent: >30 days without contract AND appearances >= 10
-            appearances = dashboard_opp.get('appearances', 0) or 0
-            days_wc = dashboard_opp.get('days_without_contract', 0)
-            dashboard_opp['stale_free_agent'] = (days_wc > 30 and appearances >= 10)
-        else:
-            dashboard_opp['days_without_contract'] = 0
-            dashboard_opp['stale_free_agent'] = False
-
-        # Perché sì / no — after days_without_contract is known (no LLM)
-        dashboard_opp['assessment'] = assess_follow(dashboard_opp, score_result)
+    # === DEDUP: by resolved player identity (keep first = most recent) ===
+    # "Rossi Mattia", "ROSSI MATTIA", "Matia Rossi" → same canonical id; two
+    # namesakes with different TM ids stay apart.
+    opportunities = dedupe_players(opportunities)
 
-        all_scored.append(dashboard_opp)
+    # Quality gate, score, INTEL: per intero solo sui record cambiati
+    now = datetime.now()
+    cache_on = rows_cache_enabled()
+    salt = rows_cache_salt(now)
+    cache = load_rows_cache(ROWS_CACHE, salt) if cache_on else {}
+    all_scored = build_rows(opportunities, cache, now=now)
+    if cache_on:
+        save_rows_cache(ROWS_CACHE, salt, cache)
 
     tracking_total = len(all_scored)
     # out_of_scope: giocatore vero ma fuori fascia Serie C (es. valore 35 mln €).
@@ -379,7 +560,7 @@ def main():
     hot_count = sum(1 for o in dashboard_opportunities if o['classification'] == 'hot')
     warm_count = sum(1 for o in dashboard_opportunities if o['classification'] == 'warm')
     cold_count = sum(1 for o in dashboard_opportunities if o['classification'] == 'cold')
-    today = datetime.now().strftime('%Y-%m-%d')
+    today = now.strftime('%Y-%m-%d')
     today_count = sum(1 for o in dashboard_opportunities if o['reported_date'] == today)
     stale_count = sum(1 for o in dashboard_opportunities if o.get('stale_free_agent'))
     svincolati_count = sum(1 for o in dashboard_opportunities if o['opportunity_type'] in ('svincolato', 'rescissione'))
@@ -418,10 +599,17 @@ def main():
         'quality_gate': 'identity_complete+corroborated',
     }
 
-    # Write data.json to docs folder
-    data_json_path = docs_dir / 'data.json'
-    data_json_path.write_text(json.dumps(dashboard_data, indent=2, ensure_ascii=False), encoding='utf-8')
-    print(f"Dashboard data generated: {data_json_path}")
+    # Write data.json (compact + .gz/.br), the versioned feed and its delta,
+    # then the lazy-load shards the PWA starts from
+    feed = publish_feed(docs_dir, dashboard_data)
+    index = publish_shards(docs_dir, dashboard_data)
+    latest = feed['deltas'][0] if feed['deltas'] and feed['deltas'][0]['to'] == feed['version'] else None
+    print(f"Dashboard data generated: {docs_dir / 'data.json'} "
+          f"({feed['bytes'] // 1024} KB, gzip {feed['gzip_bytes'] // 1024} KB, version {feed['version']})")
+    if latest:
+        print(f"   Delta from {latest['from']}: {latest['bytes']} bytes, {latest['ops']} ops")
+    print(f"   Shards: index {index['bytes'] // 1024} KB (gzip {index['gzip_bytes'] // 1024} KB), "
+          f"{len(dashboard_opportunities)} player details")
     print(f"   Tracking: {tracking_total} | Publishable: {len(dashboard_opportunities)} "
           f"(gated {tracking_only}) | Corroborated: {corroborated_count}")
     print(f"   Public: HOT {hot_count}, WARM {warm_count}, COLD {cold_count}")
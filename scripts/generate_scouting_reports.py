@@ -15,6 +15,8 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.club_lexicon import SERIE_C, lexicon
+from src.entity_resolution import PlayerRegistry, resolution_enabled
 from src.scoring import OB1Scorer
 
 DATA_DIR = Path(__file__).parent.parent / 'data'
@@ -454,6 +456,25 @@ SCORE_FACTOR_LABELS = {
 }
 
 
+def attach_cu_presence(players, registry):
+    """
+    Provvedimenti dei Comunicati Ufficiali per giocatore, dal registro
+    (PlayerRegistry.cu_presence: il join sta su player_cu, niente scansioni).
+    Un ammonito era in campo: per chi gioca in D o in Eccellenza è l'unica
+    traccia pubblica. Ritorna quanti giocatori ne hanno almeno uno.
+    """
+    found = 0
+    for p in players:
+        rows = registry.cu_presence(p.get('player_name') or '')
+        if not rows:
+            continue
+        last = rows[-1]
+        p['cu_presence'] = {'provvedimenti': len(rows), 'ultimo': last['match_date'],
+                            'club': last['club'], 'tipo': last['kind']}
+        found += 1
+    return found
+
+
 def build_score_bars_html(breakdown):
     if not breakdown:
         return ''
@@ -522,6 +543,10 @@ def generate_individual_report(opp, date_str):
         info_items.append(('Valore TM', mv))
     if agent and agent.lower() not in ('null', 'none', ''):
         info_items.append(('Agente', agent))
+    cu = opp.get('cu_presence')
+    if cu:
+        info_items.append(('Provvedimenti CU',
+                           f"{cu['provvedimenti']} · ultimo {cu['ultimo']} ({cu['club']})"))
 
     # Stats section
     stats_items = []
@@ -833,24 +858,11 @@ def main():
     u23_with_stats = [o for o in u23 if o.get('appearances') and o['appearances'] > 0]
     print(f"U23 with stats: {len(u23_with_stats)}")
 
-    # Filter: only Serie C clubs (exclude Serie D, foreign, retired)
-    serie_c_clubs = [
-        'cesena', 'atalanta u23', 'pontedera', 'lumezzane', 'altamura', 'team altamura',
-        'messina', 'acr messina', 'cavese', 'pescara', 'torres', 'arezzo', 'perugia',
-        'vis pesaro', 'gubbio', 'spal', 'rimini', 'ascoli', 'virtus entella',
-        'pianese', 'pineto', 'campobasso', 'carpi', 'milan futuro', 'juventus next gen',
-        'avellino', 'benevento', 'catania', 'cerignola', 'crotone', 'foggia',
-        'giugliano', 'latina', 'monopoli', 'potenza', 'sorrento', 'taranto',
-        'trapani', 'turris', 'casertana', 'siracusa', 'triestina', 'feralpisalo',
-        'pro vercelli', 'novara', 'pro patria', 'albinoleffe', 'lecco',
-        'padova', 'trento', 'vicenza', 'union clodiense', 'arzignano',
-        'caldiero terme', 'giana erminio', 'pergolettese', 'renate',
-        'alcione milano', 'lc legnago', 'sestri levante',
-    ]
+    # Filter: only Serie C clubs (exclude Serie D, foreign, retired) — config/clubs.yaml
+    clubs = lexicon()
     u23_serie_c = []
     for o in u23_with_stats:
-        club = (o.get('current_club', '') or '').lower()
-        if any(sc in club for sc in serie_c_clubs):
+        if clubs.has_league([o.get('current_club')], SERIE_C):
             u23_serie_c.append(o)
         else:
             print(f"  Excluded (not Serie C): {o.get('player_name')} — {o.get('current_club')}")
@@ -875,6 +887,13 @@ def main():
         print("ERROR: No players with age data available. Cannot generate reports.")
         return
 
+    # Presenze dai Comunicati Ufficiali, se il db della stagione c'è
+    db = DATA_DIR / 'ob1.db'
+    if resolution_enabled() and db.exists():
+        with PlayerRegistry(db) as registry:
+            n = attach_cu_presence(top, registry)
+        print(f"Presenze CU: {n}/{len(top)} giocatori con provvedimenti nei CU")
+
     # Create output directory
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
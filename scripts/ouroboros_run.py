@@ -7,8 +7,7 @@ import os
 import sys
 import json
 import hashlib
-import re
-import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -32,7 +31,11 @@ _root = str(Path(__file__).parent.parent)
 sys.path.insert(0, _root)
 sys.path.insert(0, os.path.join(_root, 'src'))
 
-from src.entity_gate import classify_name
+from src.club_lexicon import UPPER_LEAGUES, lexicon
+from src.entity_gate import classify_name, junk_match
+from src.entity_resolution import PlayerRegistry, record_tm_id, resolution_enabled
+from src.merge_index import (ADDED, DUP_ID, DUP_NAME, REPLACED, SINGLE, OppIndex,
+                             normalize_player_name)
 from src.scraper_global import GlobalScraper
 from src.scoring import OB1Scorer
 from src.models import MarketOpportunity
@@ -46,6 +49,11 @@ OPPS_FILE = Path("data/opportunities.json")
 # the dashboard noisy; it's a dial, not an irreversible commitment.
 SCORE_FLOOR = 55  # WARM floor
 
+# Leagues scouted concurrently. Discovery is network-bound (feeds, search,
+# freshness checks, LLM), so threads are enough; shared rate limits (DDG
+# spacing, Gemini budget, LLM ledger) live in the shared scraper/gateway.
+DEFAULT_LEAGUE_WORKERS = 4
+
 def load_existing_opps():
     if OPPS_FILE.exists():
         try:
@@ -60,56 +68,12 @@ def save_opps(opps):
 def is_valid_player_name(name: str) -> bool:
     """
     Valida che il nome sia una persona, non il titolo di una pagina.
-    Regole strutturali condivise in src/entity_gate.py; la lista storica di
-    termini resta sotto come rete supplementare per i casi già visti.
+    Regole strutturali condivise in src/entity_gate.py; il vocabolario delle
+    frasi già viste (config/junk_terms.txt) resta come rete supplementare.
     """
     if not classify_name(name).spend_allowed:
         return False
-    if not name or len(name) < 3:
-        return False
-    if '|' in name:
-        return False
-    # Normalize all unicode whitespace (handles \xa0, zero-width, etc.)
-    name = ' '.join(name.split())
-    junk_terms = [
-        # Italian media / organizations (observed in CI logs)
-        'sky sport', 'transfermarkt', 'calciomercato', 'svincolati',
-        'web radio', 'il portale', 'il piccolo', 'management magazine',
-        'next pro wiki', 'chiamarsi bomber', 'spareggi nazionali', 'spareggi',
-        'stagione sportiva', 'sport news', 'giornale', 'magazine',
-        'notiziario', 'dipartimento', 'interregionale', 'associazione',
-        'rappresentativa', 'juniores cup', 'parametro zero',
-        'football italy', 'football club', 'migliori giovani',
-        'giovani talenti', 'occasione serie', 'notizie calcio',
-        'scuola superiore', 'fischio finale', 'ultime notizie',
-        'la casa di c', 'tutto mercato', 'calciomercato live',
-        'accordo collettivo', 'accordo', 'collettivo',
-        # Media / news outlets
-        'guardian', 'ultimo uomo', 'mediaset', 'calcio professionistiche',
-        'talenti serie', 'salerno in web', 'cosenza quotidiano', 'tutto calcio',
-        # Spanish / Portuguese junk
-        'jugadores libres', 'ranking', 'classifica', 'tabella',
-        'sul mercato', 'quanti svincolati',
-        'rádio', 'el gráfico', 'sitio oficial', 'diario democracia', 'portal brazuca',
-        'libre comercio', 'mercado libre', 'economic freedom', 'sou tricolor',
-        'craques do futebol',
-        # League / competition names
-        'reserve league', 'liga profesional', 'selección', 'seleccion',
-        'mundial sub', 'sub-20', 'sub-23',
-    ]
-    name_lower = name.lower()
-    if any(term in name_lower for term in junk_terms):
-        return False
-    # Reject org-like names starting with non-name words.
-    # NOTE: do NOT include 'la','lo','da','dal','della','degli' — real players like
-    # La Gumina, Da Silva, Della Morte would be incorrectly blocked.
-    words = name.split()
-    if not words:
-        return False
-    first_word = words[0].lower()
-    if first_word in ('the', 'tutto', 'nuova', 'nuovo', 'cinque', 'tanti', 'un', 'una'):
-        return False
-    return True
+    return junk_match(name) is None
 
 
 def purge_junk_entries(opps: list) -> list:
@@ -127,22 +91,16 @@ def purge_junk_entries(opps: list) -> list:
     return clean
 
 
-# Clubs that play in Serie A or Serie B — not relevant for a Lega Pro radar.
-# U23/NextGen teams are intentionally excluded (they play physically in Serie C).
-_WRONG_LEAGUE_CLUBS = {
-    'cesena fc', 'salernitana', 'reggiana', 'cremonese', 'juve stabia',
-    'cittadella', 'catanzaro', 'lazio', 'roma', 'bologna', 'empoli',
-    'lecce', 'spezia', 'modena', 'sudtirol', 'bari', 'palermo',
-    'sampdoria', 'parma', 'pisa', 'brescia', 'cosenza',
-}
-
 def purge_wrong_league(opps: list) -> list:
-    """Remove players contracted to Serie A/B clubs (not acquirable by Lega Pro teams)."""
+    """Remove players contracted to Serie A/B clubs (not acquirable by Lega Pro teams).
+
+    Leagues come from config/clubs.yaml; U23/NextGen teams are listed under
+    serie_c there because they play physically in Serie C.
+    """
     clean = []
     removed = 0
     for opp in opps:
-        club = (opp.get('current_club') or '').lower().strip()
-        if any(bad in club for bad in _WRONG_LEAGUE_CLUBS) and not _is_recent(opp):
+        if lexicon().has_league([opp.get('current_club')], *UPPER_LEAGUES) and not _is_recent(opp):
             removed += 1
             continue
         clean.append(opp)
@@ -152,40 +110,110 @@ def purge_wrong_league(opps: list) -> list:
 
 
 def _normalize_name(name: str) -> str:
-    n = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower().strip()
-    return re.sub(r'\s+', ' ', n)
+    return normalize_player_name(name)
+
+
+def _player_key(registry):
+    """Identity of a record: canonical registry id (TM id wins), else the plain name."""
+    if registry is None:
+        return None
 
+    def key(rec: dict) -> str:
+        return registry.resolve(rec.get('player_name') or '', tm_player_id=record_tm_id(rec)) \
+            or normalize_player_name(rec.get('player_name') or '')
+    return key
 
-def deduplicate(opps: list) -> list:
+
+def deduplicate(opps: list, registry=None) -> list:
     """Merge duplicate entries for the same player (different source articles).
     Keeps the entry with the most data; discards single-word names (surname-only).
+    One pass through OppIndex: each name is normalized and scored once. With a
+    PlayerRegistry, "Rossi Mattia", "ROSSI MATTIA" and "Matia Rossi" are one player.
     """
-    # Drop single-word names first — unenrichable noise
-    valid = [o for o in opps if len((o.get('player_name') or '').strip().split()) >= 2]
-    dropped_singles = len(opps) - len(valid)
-
-    def _score(o):
-        return (
-            bool(o.get('market_value')) * 100 +
-            bool(o.get('appearances')) * 50 +
-            bool(o.get('contract_expires')) * 30 +
-            bool(o.get('goals')) * 20 +
-            bool(o.get('agent')) * 10 +
-            bool(o.get('nationality')) * 5 +
-            len(o.get('description', '') or o.get('summary', '') or '') // 10
-        )
-
-    groups: dict = {}
-    for o in valid:
-        key = _normalize_name(o.get('player_name', ''))
-        if key not in groups or _score(o) > _score(groups[key]):
-            groups[key] = o
-
-    result = list(groups.values())
-    merged = len(valid) - len(result)
-    if dropped_singles or merged:
-        print(f"  [DEDUP] Removed {dropped_singles} single-word names, merged {merged} duplicates → {len(result)} unique")
-    return result
+    return _dedup_index(opps, registry).records
+
+
+def _dedup_index(opps: list, registry=None) -> OppIndex:
+    index = OppIndex(opps, key=_player_key(registry))
+    s = index.stats
+    merged = s[DUP_ID] + s[DUP_NAME] + s[REPLACED]
+    if s[SINGLE] or merged:
+        print(f"  [DEDUP] Removed {s[SINGLE]} single-word names, merged {merged} duplicates → {len(index)} unique")
+    index.reset_stats()
+    return index
+
+
+def league_workers() -> int:
+    """OB1_LEAGUE_WORKERS: leagues scouted at once (1 = one after another)."""
+    try:
+        return max(1, int(os.getenv("OB1_LEAGUE_WORKERS", str(DEFAULT_LEAGUE_WORKERS))))
+    except (TypeError, ValueError):
+        return DEFAULT_LEAGUE_WORKERS
+
+
+def scout_league(scraper, league_id: str, league_conf) -> dict:
+    """
+    Discovery + gate for ONE league. Never raises: a broken league comes back
+    as {'error': ...} and the caller alerts, exactly like the serial loop did.
+    Returns the accepted entries in discovery order, not yet merged.
+    """
+    out = {'opps': [], 'skipped': 0, 'error': None}
+    name = league_conf.get('name', league_id) if isinstance(league_conf, dict) else league_id
+    print(f"\n🌍 Scouting: {name} ({league_id})")
+
+    try:
+        # Discovery
+        raw_opps = scraper.scrape_league(league_id)
+        if not raw_opps:
+            return out
+
+        # Scoring
+        # Ensure league_conf is a dict
+        if not isinstance(league_conf, dict):
+            print(f"  [ERROR] Invalid config for {league_id}")
+            return out
+
+        scorer = OB1Scorer()
+        league_prefix = league_id.split('_')[0].upper() # IT, BR, AR
+
+        for opp in raw_opps:
+            try:
+                # Validate player name before scoring
+                if not is_valid_player_name(opp.player_name):
+                    out['skipped'] += 1
+                    continue
+
+                # Gate with the same SCORE-002 used by the dashboard (pre-enrichment)
+                raw_dict = {
+                    'player_name': opp.player_name,
+                    'opportunity_type': opp.opportunity_type.value,
+                    'discovered_at': opp.reported_date,
+                    'source_name': opp.source_name,
+                    'source_url': opp.source_url,
+                    'summary': opp.description,
+                }
+                gate_score = scorer.score(raw_dict)['ob1_score']
+                opp.relevance_score = max(1, min(5, gate_score // 20))
+
+                if gate_score >= SCORE_FLOOR:  # worth enriching
+                    out['opps'].append({
+                        "id": hashlib.md5(f"{opp.player_name}_{opp.source_url}".encode()).hexdigest(),
+                        "player_name": opp.player_name,
+                        "region": league_prefix,
+                        "opportunity_type": opp.opportunity_type.value,
+                        "description": opp.description,
+                        "ob1_score": gate_score,
+                        "source_name": opp.source_name,
+                        "source_url": opp.source_url,
+                        "discovered_at": datetime.now().isoformat(),
+                        "league_id": league_id,
+                    })
+            except Exception as e:
+                print(f"  [SKIP] Player error: {e}")
+
+    except Exception as e:
+        out['error'] = str(e)
+    return out
 
 
 def run_ouroboros():
@@ -201,76 +229,42 @@ def run_ouroboros():
     # Cleanup: purge junk names, wrong-league clubs, single-word names, duplicates
     existing_opps = purge_junk_entries(existing_opps)
     existing_opps = purge_wrong_league(existing_opps)
-    existing_opps = deduplicate(existing_opps)
-
-    new_opps_count = 0
+    # Dedup doubles as the merge index: existing records are indexed once by
+    # id and normalized name, and every candidate below is an O(1) lookup
+    # instead of a scan of the whole history.
+    registry = PlayerRegistry() if resolution_enabled() else None
+    index = _dedup_index(existing_opps, registry)
     skipped_count = 0
 
-    leagues = scraper.leagues
-    for league_id, league_conf in leagues.items():
-        print(f"\n🌍 Scouting: {league_conf['name']} ({league_id})")
-
-        try:
-            # Discovery
-            raw_opps = scraper.scrape_league(league_id)
-            if not raw_opps: continue
-
-            # Scoring
-            # Ensure league_conf is a dict
-            if not isinstance(league_conf, dict):
-                print(f"  [ERROR] Invalid config for {league_id}")
-                continue
-
-            scorer = OB1Scorer()
-            league_prefix = league_id.split('_')[0].upper() # IT, BR, AR
-
-            for opp in raw_opps:
-                try:
-                    # Validate player name before scoring
-                    if not is_valid_player_name(opp.player_name):
-                        skipped_count += 1
-                        continue
-
-                    # Gate with the same SCORE-002 used by the dashboard (pre-enrichment)
-                    raw_dict = {
-                        'player_name': opp.player_name,
-                        'opportunity_type': opp.opportunity_type.value,
-                        'discovered_at': opp.reported_date,
-                        'source_name': opp.source_name,
-                        'source_url': opp.source_url,
-                        'summary': opp.description,
-                    }
-                    gate_score = scorer.score(raw_dict)['ob1_score']
-                    opp.relevance_score = max(1, min(5, gate_score // 20))
-
-                    if gate_score >= SCORE_FLOOR:  # worth enriching
-                        opp_dict = {
-                            "id": hashlib.md5(f"{opp.player_name}_{opp.source_url}".encode()).hexdigest(),
-                            "player_name": opp.player_name,
-                            "region": league_prefix,
-                            "opportunity_type": opp.opportunity_type.value,
-                            "description": opp.description,
-                            "ob1_score": gate_score,
-                            "source_name": opp.source_name,
-                            "source_url": opp.source_url,
-                            "discovered_at": datetime.now().isoformat(),
-                            "league_id": league_id,
-                        }
-
-                        # Dedup and Add
-                        if not any(o['id'] == opp_dict['id'] for o in existing_opps):
-                            existing_opps.append(opp_dict)
-                            new_opps_count += 1
-                except Exception as e:
-                    print(f"  [SKIP] Player error: {e}")
-
-        except Exception as e:
-            print(f"❌ Error in {league_id}: {e}")
-            notifier.admin_alert("ERROR", f"ouroboros/{league_id}", str(e))
+    # Leagues run side by side on ONE scraper: same HTTP session, same LLM
+    # gateway and ledger, same Gemini budget. Results are merged below in
+    # config order, so the output does not depend on which league finished first.
+    # The seen-store is the scraper's too: one SeenStore (one connection,
+    # one Bloom filter) for every league, closed once the leagues are done.
+    leagues = list(scraper.leagues.items())
+    workers = max(1, min(league_workers(), len(leagues) or 1))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="league") as pool:
+            futures = [pool.submit(scout_league, scraper, league_id, league_conf)
+                       for league_id, league_conf in leagues]
+            for (league_id, _conf), future in zip(leagues, futures):
+                result = future.result()
+                skipped_count += result['skipped']
+                if result['error']:
+                    print(f"❌ Error in {league_id}: {result['error']}")
+                    notifier.admin_alert("ERROR", f"ouroboros/{league_id}", result['error'])
+                for opp_dict in result['opps']:
+                    index.add(opp_dict)
+    finally:
+        scraper.close()
+
+    if registry is not None:
+        registry.close()
 
     # Final Save
-    save_opps(existing_opps)
-    print(f"\n✅ OUROBOROS COMPLETED. Added {new_opps_count} new, skipped {skipped_count} invalid.")
+    save_opps(index.records)
+    print(f"  [MERGE] {index.summary()}")
+    print(f"\n✅ OUROBOROS COMPLETED. Added {index.stats[ADDED]} new, skipped {skipped_count} invalid.")
     print("=" * 60)
 
 if __name__ == "__main__":
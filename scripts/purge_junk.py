@@ -23,7 +23,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.entity_gate import JUNK, OUT_OF_SCOPE, classify, find_particle_duplicates
+from src.entity_gate import JUNK, OUT_OF_SCOPE, classify
+from src.entity_resolution import find_duplicates
 
 DATA_FILE = Path("data/opportunities.json")
 SNAPSHOT_DIR = Path("data/snapshots")
@@ -58,7 +59,7 @@ def main() -> int:
         else:
             keep.append(opp)
 
-    dupes = find_particle_duplicates([o.get("player_name") for o in opportunities])
+    dupes = find_duplicates([o.get("player_name") for o in opportunities])
 
     print(f"Analizzate {len(opportunities)} entry\n")
     if junk:
@@ -72,9 +73,9 @@ def main() -> int:
         for opp, reason in out_of_scope:
             print(f"  - {str(opp.get('player_name'))[:38]:40s} {reason}")
     if dupes:
-        print(f"\nDUPLICATI da preposizione ({len(dupes)}):")
-        for artifact, canonical in dupes.items():
-            print(f"  - '{artifact}' → probabile duplicato di '{canonical}'")
+        print(f"\nDUPLICATI probabili ({len(dupes)}):")
+        for variant, (canonical, rule) in dupes.items():
+            print(f"  - '{variant}' → probabile duplicato di '{canonical}' ({rule})")
 
     removed = [o for o, _ in junk]
     if args.drop_out_of_scope:
@@ -15,7 +15,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent))
 from src.enricher_tm import TransfermarktEnricher, BATCH_SIZE
-from src.entity_gate import classify
+from src.entity_gate import classify, junk_match
+from src.entity_resolution import PlayerRegistry, resolution_enabled
 from src.metrics import METRICS_FILE, get_metrics
 
 DATA_FILE = Path("data/opportunities.json")
@@ -27,21 +28,6 @@ DELAY_BETWEEN_BATCHES = 5  # seconds
 # Free tier ≈20 RPD shared with discovery — keep enrichment lean.
 MAX_BATCHES_PER_RUN = int(os.getenv("MAX_ENRICH_BATCHES", "4"))
 
-_JUNK_TERMS = [
-    'transfermarkt', 'calciomercato', 'svincolati', 'la casa di c',
-    'rádio', 'fischio finale', 'ultime notizie', 'football club',
-    'web radio', 'il portale', 'il piccolo', 'management magazine',
-    'next pro wiki', 'chiamarsi bomber', 'spareggi nazionali', 'spareggi',
-    'stagione sportiva', 'sport news', 'giornale', 'magazine',
-    'notiziario', 'dipartimento', 'interregionale', 'associazione',
-    'sky sport', 'rappresentativa', 'juniores cup', 'parametro zero',
-    'football italy', 'migliori giovani', 'giovani talenti', 'occasione serie',
-    'notizie calcio', 'scuola superiore', 'tutto mercato', 'calciomercato live',
-    'accordo collettivo', 'guardian', 'ultimo uomo', 'mediaset',
-    'jugadores libres', 'ranking', 'classifica', 'tabella',
-    'reserve league', 'liga profesional', 'selección', 'seleccion',
-]
-
 _TM_KEYS = ['nationality', 'second_nationality', 'foot', 'market_value',
             'enrichment_source',
             'market_value_formatted', 'height_cm', 'birth_date', 'contract_expires',
@@ -53,21 +39,28 @@ def _is_enrichable(opp) -> bool:
     """
     Si spende su questo record? Il gate è condiviso con la discovery
     (src/entity_gate.py): una sola fonte di verità invece di tre liste
-    divergenti. Accetta un dict o, per compatibilità, un nome.
+    divergenti. Accetta un dict o, per compatibilità, un nome. Il vocabolario
+    spazzatura è lo stesso della discovery (config/junk_terms.txt).
     """
     if isinstance(opp, str):
         opp = {"player_name": opp}
-    return classify(opp).spend_allowed
+    if not classify(opp).spend_allowed:
+        return False
+    return junk_match(opp.get("player_name") or opp.get("name")) is None
 
 
-def apply_tm_data(opp: dict, tm: dict) -> bool:
+def apply_tm_data(opp: dict, tm: dict, registry: PlayerRegistry = None,
+                  reused: bool = False) -> bool:
     """
     Merge TM data into an opportunity. Returns True if locked as enriched.
+    With a registry, a locked result is also written to the player registry,
+    under the TM id when the profile matches the name.
 
     Conta anche i FATTI NUOVI (ARCH-002 Fase 1): un campo che prima era vuoto e
     ora ha un valore. Non si contano le riscritture dello stesso dato — quelle
     sono lavoro rifatto, non informazione nuova, ed è proprio la differenza che
-    il costo per fatto deve rendere visibile.
+    il costo per fatto deve rendere visibile. `reused`: il dato viene dal
+    registro (known_enrichment), non da una chiamata — nessun fatto nuovo.
     """
     metrics = get_metrics()
     if tm.get('market_value_eur') and not tm.get('market_value'):
@@ -77,7 +70,7 @@ def apply_tm_data(opp: dict, tm: dict) -> bool:
 
     for key in _TM_KEYS:
         if tm.get(key) is not None:
-            if not opp.get(key):
+            if not opp.get(key) and not reused:
                 metrics.fact(key)
             opp[key] = tm[key]
     # setdefault would return an existing null value; guard for that.
@@ -94,7 +87,8 @@ def apply_tm_data(opp: dict, tm: dict) -> bool:
             age = datetime.now().year - int(str(tm['birth_date'])[:4])
             if 10 <= age <= 60:
                 opp['age'] = age
-                metrics.fact('age')
+                if not reused:
+                    metrics.fact('age')
         except (ValueError, TypeError):
             pass
 
@@ -102,13 +96,16 @@ def apply_tm_data(opp: dict, tm: dict) -> bool:
     if tm.get('main_position') and not (opp.get('role_name') or opp.get('role')):
         opp['role_name'] = tm['main_position']
         opp['role'] = tm['main_position']
-        metrics.fact('role_name')
+        if not reused:
+            metrics.fact('role_name')
 
     # Lock only when substantive data arrived; otherwise retry next run.
     has_substance = any(tm.get(k) for k in [
         'market_value', 'appearances', 'contract_expires', 'goals', 'birth_date', 'current_club',
     ])
     opp['tm_enriched'] = has_substance
+    if has_substance and registry is not None:
+        registry.record_enrichment(opp.get('player_name') or '', tm)
     return has_substance
 
 
@@ -151,14 +148,36 @@ def main():
         0 if not (o.get('current_club') or '').strip() else 1,
         o.get('player_name') or '',
     ))
+    # Same data/ directory as the opportunities: data/ob1.db in production.
+    registry = PlayerRegistry(DATA_FILE.parent / "ob1.db") if resolution_enabled() else None
+    if registry is not None:
+        # Same player already enriched under another spelling (or another
+        # record): reuse what the registry knows instead of paying again.
+        # Not written back: record_enrichment would reset last_enriched, and
+        # data that keeps being reused would never age out of the
+        # ENRICHED_FRESH_DAYS window.
+        known = 0
+        for opp in pending:
+            tm = registry.known_enrichment(opp.get('player_name') or '')
+            if tm and apply_tm_data(opp, tm, reused=True):
+                known += 1
+                get_metrics().item_skipped("registry")
+        if known:
+            print(f"Già noti al registro (nessuna spesa): {known}")
+            pending = [o for o in pending if o.get('tm_enriched') is not True]
+            DATA_FILE.write_text(json.dumps(opportunities, ensure_ascii=False, indent=2),
+                                 encoding='utf-8')
     no_age = sum(1 for o in pending if o.get('age') in (None, ''))
     print(f"Da arricchire: {len(pending)} (senza età: {no_age})")
     if not pending:
         print("Niente da fare.")
+        if registry is not None:
+            registry.close()
         _report_metrics()
         return
 
     enricher = TransfermarktEnricher()
+    enricher.registry = registry
     enriched = 0
     batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
     if len(batches) > MAX_BATCHES_PER_RUN:
@@ -176,7 +195,7 @@ def main():
         results = enricher.enrich_players_batch(names)
         for opp in batch:
             tm = results.get(opp['player_name']) or {}
-            if tm and apply_tm_data(opp, tm):
+            if tm and apply_tm_data(opp, tm, registry):
                 enriched += 1
                 print(f"  ✅ {opp['player_name']}: "
                       f"{tm.get('market_value_text') or '?'} | age={opp.get('age')} "
@@ -185,6 +204,9 @@ def main():
         if bi < len(batches) and not enricher.stalled:
             time.sleep(DELAY_BETWEEN_BATCHES)
 
+    if registry is not None:
+        registry.close()
+
     # NB: docs/data.json ha il formato dashboard (dict con opportunities/stats),
     # non la lista grezza. Scriverci la lista lo corrompe finché
     # generate_dashboard.py non gira. Lo rigenera lui, subito dopo in ingest.yml.
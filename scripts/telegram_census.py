@@ -26,21 +26,48 @@ Il parsing è codice puro (testabile offline su fixture); la rete sta solo in
 fetch_preview(). Nessuna API key: si legge solo l'anteprima pubblica che
 Telegram serve a chiunque.
 
+Un censimento nazionale sono decine di handle, e i canali morti o con
+redirect erano quasi tutto il tempo: un timeout da 20 s alla volta, in fila.
+Ora le anteprime si chiedono in parallelo (al più `--workers` insieme), le
+prove di un'anteprima restano in data/telegram_previews.json per PREVIEW_TTL_H
+ore, e un canale già trovato morto o inesistente si ricontrolla solo dopo
+RECHECK_DAYS — un canale morto da mesi non risorge da un giorno all'altro.
+Un timeout o un errore di rete (status 0) invece non è una prova: non entra
+in cache e non rimanda il ricontrollo, il canale si richiede al giro dopo.
+Il registro si scrive una volta, alla fine. Così il censimento può girare
+ogni giorno.
+
 Uso:
     python scripts/telegram_census.py                # censisce i candidati noti
     python scripts/telegram_census.py handle1 h2 ... # censisce handle specifici
+    python scripts/telegram_census.py --tutti        # ignora cache e ricontrolli lenti
 """
 
 from __future__ import annotations
 
 import html as html_mod
 import json
+import os
 import re
-import sys
-from datetime import datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable, Dict, Optional
 
 REGISTRY = Path("config/telegram_channels.json")
+PREVIEW_CACHE = Path("data/telegram_previews.json")
+
+# Anteprime in volo insieme: abbastanza da coprire i timeout dei canali
+# morti, abbastanza poche da non sembrare uno scraper a t.me.
+WORKERS = 8
+TIMEOUT_S = 10
+# Le prove di un'anteprima valgono qualche ora: due lanci ravvicinati (un
+# handle aggiunto, un errore da correggere) non rifanno tutta la rete.
+PREVIEW_TTL_H = 6
+# Verdetti che cambiano di rado: si ricontrollano con calma. "inesistente"
+# prima di "morto", e solo se Telegram ha risposto davvero (vedi _recheck_later).
+RECHECK_DAYS = {"morto": 7, "inesistente": 3}
 
 # Oltre questa età dell'ultimo messaggio un canale non è "attivo". 45 giorni:
 # copre la pausa estiva tra due comunicati senza assolvere un canale morto.
@@ -141,7 +168,7 @@ def classify(evidence: dict) -> str:
     return "news_generiche"
 
 
-def fetch_preview(handle: str, timeout: int = 20) -> tuple[int, str]:
+def fetch_preview(handle: str, timeout: int = TIMEOUT_S) -> tuple[int, str]:
     import urllib.request
     req = urllib.request.Request(
         f"https://t.me/s/{handle}", headers={"User-Agent": "Mozilla/5.0"})
@@ -154,41 +181,139 @@ def fetch_preview(handle: str, timeout: int = 20) -> tuple[int, str]:
         return 0, ""
 
 
-def census(handles: list[str]) -> dict:
-    now = datetime.now(timezone.utc)
-    rows = {}
+def default_workers() -> int:
+    """OB1_CENSUS_WORKERS=1: censimento in fila, come prima."""
+    try:
+        return max(1, int(os.getenv("OB1_CENSUS_WORKERS", "")))
+    except ValueError:
+        return WORKERS
+
+
+class PreviewCache:
+    """
+    handle -> (status, prove, quando). Si tengono le prove, non l'HTML: il
+    verdetto si ricalcola comunque all'ora del censimento, ed è quello che
+    conta per la staleness.
+    """
+
+    def __init__(self, path: Path | str = PREVIEW_CACHE, ttl_hours: float = PREVIEW_TTL_H):
+        self.path = Path(path)
+        self.ttl = timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        try:
+            self._rows = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._rows = {}
+
+    def get(self, handle: str, now: datetime) -> Optional[dict]:
+        with self._lock:
+            row = self._rows.get(handle)
+        if not row:
+            return None
+        try:
+            fresh = now - datetime.fromisoformat(row["fetched_at"]) <= self.ttl
+        except (KeyError, ValueError):
+            return None
+        return row if fresh else None
+
+    def put(self, handle: str, status: int, evidence: dict, now: datetime) -> dict:
+        row = {"status": status, "evidence": evidence,
+               "fetched_at": now.isoformat(timespec="seconds")}
+        with self._lock:
+            self._rows[handle] = row
+        return row
+
+    def save(self) -> None:
+        with self._lock:
+            rows = dict(sorted(self._rows.items()))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(rows, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _recheck_later(row: Optional[dict], now: datetime) -> bool:
+    """
+    Il verdetto precedente è di quelli lenti, e non è ancora ora. Un
+    "inesistente" nato da una richiesta fallita (status 0, o una riga di
+    prima che lo status si registrasse) non aspetta: non ha provato niente.
+    """
+    days = RECHECK_DAYS.get((row or {}).get("verdict"))
+    if days is None:
+        return False
+    if row["verdict"] == "inesistente" and not row.get("http_status"):
+        return False
+    try:
+        return now - datetime.fromisoformat(row["verified_at"]) < timedelta(days=days)
+    except (KeyError, ValueError):
+        return False
+
+
+def census(handles: list[str], previous: Dict[str, dict] = None,
+           fetch: Callable[[str], tuple] = fetch_preview, workers: int = None,
+           cache: PreviewCache = None, now: datetime = None) -> dict:
+    """
+    Le righe del registro per `handles`. `previous` (il registro attuale)
+    decide chi si ricontrolla dopo; `cache` evita di rifare un'anteprima
+    appena vista. Nessuna scrittura su disco: le fa chi chiama, una volta.
+    """
+    now = now or datetime.now(timezone.utc)
+    previous = previous or {}
+    handles = list(dict.fromkeys(handles))
+    rows, todo = {}, []
     for h in handles:
-        status, page = fetch_preview(h)
-        # t.me/s/ di canali senza anteprima fa redirect a t.me/<handle>:
-        # la pagina risultante non contiene widget di messaggi.
-        ev = parse_preview(page)
-        v = verdict(status, ev, now)
-        rows[h] = {
+        if _recheck_later(previous.get(h), now):
+            rows[h] = previous[h]
+        else:
+            todo.append(h)
+
+    def probe(h: str) -> dict:
+        cached = cache.get(h, now) if cache is not None else None
+        if cached is None:
+            status, page = fetch(h)
+            # t.me/s/ di canali senza anteprima fa redirect a t.me/<handle>:
+            # la pagina risultante non contiene widget di messaggi.
+            cached = {"status": status, "evidence": parse_preview(page),
+                      "fetched_at": now.isoformat(timespec="seconds")}
+            # Timeout o rete giù: non è una prova, non si tiene per ore.
+            if cache is not None and status:
+                cache.put(h, status, cached["evidence"], now)
+        ev = cached["evidence"]
+        v = verdict(cached["status"], ev, now)
+        return {
             "handle": h,
             "verdict": v,
             "content_type": classify(ev) if v in ("attivo", "morto") else None,
-            "verified_at": now.isoformat(timespec="seconds"),
+            "verified_at": cached["fetched_at"],
+            "http_status": cached["status"],
             **ev,
         }
-        print(f"@{h:20} {v:12} ultimo_msg={ev['last_message_at'] or '-':26}"
-              f" tipo={rows[h]['content_type'] or '-'}")
-    return rows
 
+    workers = workers or default_workers()
+    if workers > 1 and len(todo) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            rows.update(zip(todo, pool.map(probe, todo)))
+    else:
+        rows.update((h, probe(h)) for h in todo)
 
-def main():
-    handles = sys.argv[1:] or KNOWN_CANDIDATES
-    rows = census(handles)
+    for h in handles:
+        r = rows[h]
+        note = "" if h in todo else "  (ricontrollo più avanti)"
+        print(f"@{h:20} {r['verdict']:12} ultimo_msg={r['last_message_at'] or '-':26}"
+              f" tipo={r['content_type'] or '-'}{note}")
+    return {h: rows[h] for h in handles}
 
-    existing = {}
-    if REGISTRY.exists():
-        try:
-            existing = json.loads(REGISTRY.read_text(encoding="utf-8")).get("channels", {})
-        except (ValueError, OSError):
-            pass
-    existing.update(rows)
 
+def load_registry(path: Path = REGISTRY) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("channels", {})
+    except (ValueError, OSError):
+        return {}
+
+
+def write_registry(channels: dict, path: Path = REGISTRY) -> dict:
     counts = {}
-    for r in existing.values():
+    for r in channels.values():
         counts[r["verdict"]] = counts.get(r["verdict"], 0) + 1
     out = {
         "_meta": {
@@ -199,11 +324,36 @@ def main():
             "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             "coverage": counts,
         },
-        "channels": dict(sorted(existing.items())),
+        "channels": dict(sorted(channels.items())),
     }
-    REGISTRY.parent.mkdir(parents=True, exist_ok=True)
-    REGISTRY.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n",
-                        encoding="utf-8")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    return counts
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Censimento dei canali Telegram")
+    ap.add_argument("handles", nargs="*", help="handle da censire (default: i candidati noti)")
+    ap.add_argument("--workers", type=int, default=default_workers(),
+                    help="anteprime in parallelo")
+    ap.add_argument("--tutti", action="store_true",
+                    help="ricontrolla tutto adesso: niente cache, niente ricontrolli lenti")
+    args = ap.parse_args()
+
+    existing = load_registry()
+    cache = None if args.tutti else PreviewCache()
+    rows = census(args.handles or KNOWN_CANDIDATES,
+                  previous=None if args.tutti else existing,
+                  workers=args.workers, cache=cache)
+    if cache is not None:
+        cache.save()
+    existing.update(rows)
+    counts = write_registry(existing)
     print(f"\nregistro: {REGISTRY} · verdetti: {counts}")
 
 
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Backtest dei pesi dello score: quale configurazione avrebbe messo in cima i
+giocatori che poi sono esplosi?
+
+OB1Scorer.WEIGHTS e le soglie HOT/WARM sono tarati a mano. I dati per
+verificarli ci sono (data/backtest/: la rosa Serie C 2022-23 congelata al
+30/06/2023 e l'esito verificato di chi era stato flaggato), ma nessun codice
+rifaceva il conto.
+
+Qui i record si caricano UNA volta e diventano la matrice dei sette fattori
+(OB1Scorer.columns, la stessa funzione dello score in produzione). Una
+configurazione — sette pesi più la coppia di soglie — è poi solo un prodotto
+matrice-vettore e qualche confronto: con NumPy migliaia di vettori si valutano
+in un'unica moltiplicazione, a blocchi distribuiti sui core. Senza NumPy
+funziona uguale, solo più lento.
+
+Metriche per configurazione:
+  precision@K    quota di "hit" tra i primi K del ranking
+  hot_hit_rate   quota di "hit" tra i record sopra la soglia HOT
+  hot_count      quanti record finiscono HOT (una soglia che non flagga
+                 nessuno ha hit rate indefinito, non perfetto)
+
+Il report classificato va in data/backtest/weight_sweep.json.
+
+    python -m src.backtest --samples 20000 --k 10
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_backtest -v
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from src.scoring import FACTORS, OB1Scorer
+except ImportError:  # layout PYTHONPATH=src
+    from scoring import FACTORS, OB1Scorer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy facoltativo, come in scoring
+    np = None
+
+BACKTEST_DIR = Path("data/backtest")
+RAW_FILE = BACKTEST_DIR / "serie_c_2022_2023_raw.json"
+RESULTS_FILE = BACKTEST_DIR / "backtest_results.json"
+REPORT_FILE = BACKTEST_DIR / "weight_sweep.json"
+
+# Esiti verificati che contano come "l'avevamo visto giusto".
+POSITIVE_STATUSES = ("hit",)
+
+DEFAULT_K = 10
+DEFAULT_SAMPLES = 5000
+DEFAULT_TOP = 25
+HOT_RANGE = range(60, 81, 2)
+WARM_GAP = (6, 10, 13, 16)       # warm = hot - gap: 13 è la coppia attuale 70/57
+CHUNK = 2000                     # vettori di pesi per blocco di lavoro
+
+
+@dataclass
+class BacktestSet:
+    """Record storici come colonne: fattori (n × 7) ed esiti (n)."""
+    names: List[str]
+    factors: List[List[int]]          # riga per record, colonne in ordine FACTORS
+    labels: List[int]                 # 1 = hit
+    meta: Dict[str, object] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def hits(self) -> int:
+        return sum(self.labels)
+
+
+@dataclass(frozen=True)
+class Config:
+    weights: Tuple[float, ...]        # in ordine FACTORS
+    hot: int
+    warm: int
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"weights": {k: round(w, 4) for k, w in zip(FACTORS, self.weights)},
+                "hot": self.hot, "warm": self.warm}
+
+
+# ------------------------------------------------------------------ caricamento
+def _as_opportunity(player: dict, result: dict, freeze: str) -> dict:
+    """Un giocatore della rosa congelata nel formato che OB1Scorer si aspetta."""
+    stats = player.get("stats") or {}
+    metrics = result.get("key_metrics_2023") or {}
+    return {
+        "player_name": player.get("name") or result.get("name"),
+        "age": player.get("age_2023"),
+        "appearances": stats.get("games") or metrics.get("appearances"),
+        "goals": stats.get("goals") or metrics.get("goals"),
+        "current_club": player.get("team_2023") or result.get("club_2023") or "",
+        "market_value": result.get("market_value_2023"),
+        "opportunity_type": "mercato",
+        # Come nel backtest originale: lo score è quello del giorno del freeze.
+        "reported_date": freeze,
+        "summary": result.get("league_2023") or "",
+    }
+
+
+def load_backtest(raw_path: Path | str = RAW_FILE,
+                  results_path: Path | str = RESULTS_FILE,
+                  positive: Sequence[str] = POSITIVE_STATUSES) -> BacktestSet:
+    """
+    Solo i giocatori con un esito verificato: un esito ignoto non è un "miss".
+    I fattori si calcolano alla data del freeze, con lo scorer di oggi.
+    """
+    raw = json.loads(Path(raw_path).read_text(encoding="utf-8"))
+    results = json.loads(Path(results_path).read_text(encoding="utf-8"))
+    freeze = (raw.get("metadata") or {}).get("freeze_date") or \
+        (results.get("metadata") or {}).get("freeze_date") or ""
+    players = {p.get("name"): p for p in raw.get("players", [])}
+
+    opps, names, labels = [], [], []
+    for r in results.get("results", []):
+        if not r.get("status"):
+            continue
+        opps.append(_as_opportunity(players.get(r.get("name")) or {}, r, freeze))
+        names.append(r.get("name") or "")
+        labels.append(1 if r["status"] in positive else 0)
+
+    today = date.fromisoformat(freeze) if freeze else None
+    table = OB1Scorer().columns(opps, today=today)
+    factors = [[table.columns[k][i] for k in FACTORS] for i in range(len(opps))]
+    return BacktestSet(names, factors, labels,
+                       meta={"freeze_date": freeze, "positive": list(positive),
+                             "season": (raw.get("metadata") or {}).get("season")})
+
+
+# ------------------------------------------------------------------ spazio
+def sample_weights(n: int, seed: int = 20230630,
+                   include: Sequence[Dict[str, float]] = ()) -> List[Tuple[float, ...]]:
+    """
+    `n` vettori di pesi uniformi sul simplesso (somma 1), riproducibili, più
+    quelli in `include` (di solito WEIGHTS, per avere sempre il riferimento).
+    """
+    rng = random.Random(seed)
+    out = [tuple(float(w.get(k, 0.0)) for k in FACTORS) for w in include]
+    for _ in range(n):
+        cuts = sorted(rng.random() for _ in range(len(FACTORS) - 1))
+        edges = [0.0, *cuts, 1.0]
+        out.append(tuple(b - a for a, b in zip(edges, edges[1:])))
+    return out
+
+
+def threshold_pairs(hot_range: Sequence[int] = HOT_RANGE,
+                    gaps: Sequence[int] = WARM_GAP) -> List[Tuple[int, int]]:
+    return [(h, h - g) for h in hot_range for g in gaps]
+
+
+# ------------------------------------------------------------------ valutazione
+_STATE: Dict[str, object] = {}
+
+
+def _init_worker(factors, labels, pairs, k) -> None:
+    """Stato condiviso del processo: i dati si spediscono una volta, non per blocco."""
+    _STATE["pairs"] = pairs
+    _STATE["k"] = k
+    if np is not None:
+        _STATE["F"] = np.asarray(factors, dtype=np.float64).reshape(-1, len(FACTORS))
+        _STATE["y"] = np.asarray(labels, dtype=np.int64)
+    else:
+        _STATE["F"], _STATE["y"] = factors, labels
+
+
+def _eval_chunk(args) -> List[tuple]:
+    """Valuta un blocco di vettori di pesi su tutte le coppie di soglie."""
+    offset, weights, top = args
+    pairs, k = _STATE["pairs"], _STATE["k"]
+    if np is not None:
+        return _eval_numpy(offset, weights, pairs, k, top)
+    # Solo i migliori del blocco tornano indietro: il resto è rumore da serializzare.
+    return heapq.nsmallest(top, ((_rank_key(m), offset + wi, pi, m)
+                                 for wi, pi, m in _eval_python(weights, pairs, k)))
+
+
+def _rank_key(m: Dict[str, float]) -> tuple:
+    return (-m["precision_at_k"], -(m["hot_hit_rate"] or 0.0), -m["hot_hits"],
+            m["hot_count"])
+
+
+def _eval_numpy(offset, weights, pairs, k, top) -> List[tuple]:
+    """
+    Tutto il blocco in array m × P (pesi × soglie); i dict si costruiscono
+    solo per le `top` righe che sopravvivono al ranking.
+    """
+    F, y = _STATE["F"], _STATE["y"]
+    n = F.shape[0]
+    W = np.asarray(weights, dtype=np.float64)            # m × 7
+    m = W.shape[0]
+    S = np.rint(F @ W.T)                                 # n × m, come int(round())
+    kk = min(k, n)
+    if kk:
+        # top-K per colonna, a parità vince l'ordine dei record (stabile)
+        order = np.argsort(-S, axis=0, kind="stable")[:kk]
+        p_at_k = y[order].sum(axis=0) / kk
+    else:
+        p_at_k = np.zeros(m)
+    hot = np.asarray([h for h, _w in pairs], dtype=np.float64)
+    warm = np.asarray([w for _h, w in pairs], dtype=np.float64)
+    is_hot = S[:, :, None] >= hot                        # n × m × P
+    hot_count = is_hot.sum(axis=0)                       # m × P
+    hot_hits = (is_hot & (y[:, None, None] == 1)).sum(axis=0)
+    warm_count = ((S[:, :, None] >= warm) & ~is_hot).sum(axis=0)
+    rate = np.divide(hot_hits, hot_count, out=np.zeros(hot_count.shape), where=hot_count > 0)
+    p_full = np.broadcast_to(p_at_k[:, None], hot_count.shape)
+
+    # lexsort: l'ultima chiave è la principale; l'indice piatto rompe le parità
+    flat = np.arange(m * len(pairs))
+    keys = (flat, hot_count.ravel(), -hot_hits.ravel(), -rate.ravel(), -p_full.ravel())
+    best = np.lexsort(keys)[:top]
+    out = []
+    for idx in best.tolist():
+        wi, pi = divmod(idx, len(pairs))
+        hc = int(hot_count[wi, pi])
+        metrics = {
+            "precision_at_k": float(p_at_k[wi]),
+            "hot_count": hc,
+            "hot_hits": int(hot_hits[wi, pi]),
+            "hot_hit_rate": float(rate[wi, pi]) if hc else None,
+            "warm_count": int(warm_count[wi, pi]),
+        }
+        out.append((_rank_key(metrics), offset + wi, pi, metrics))
+    return out
+
+
+def _eval_python(weights, pairs, k) -> List[tuple]:
+    F, y = _STATE["F"], _STATE["y"]
+    rows = []
+    for wi, w in enumerate(weights):
+        scores = []
+        for f in F:
+            total = 0
+            for value, wk in zip(f, w):
+                total = total + value * wk
+            scores.append(int(round(total)))
+        order = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+        p_at_k = (sum(y[i] for i in order) / len(order)) if order else 0.0
+        for pi, (hot, warm) in enumerate(pairs):
+            hot_idx = [i for i, s in enumerate(scores) if s >= hot]
+            hot_hits = sum(y[i] for i in hot_idx)
+            rows.append((wi, pi, {
+                "precision_at_k": p_at_k,
+                "hot_count": len(hot_idx),
+                "hot_hits": hot_hits,
+                "hot_hit_rate": (hot_hits / len(hot_idx)) if hot_idx else None,
+                "warm_count": sum(1 for s in scores if warm <= s < hot),
+            }))
+    return rows
+
+
+def sweep(data: BacktestSet, weights: Sequence[Tuple[float, ...]],
+          pairs: Sequence[Tuple[int, int]], k: int = DEFAULT_K,
+          top: int = DEFAULT_TOP, workers: Optional[int] = None) -> Dict[str, object]:
+    """
+    Valuta ogni (pesi × soglie) e restituisce le `top` configurazioni migliori,
+    classificate per precision@K, poi hot hit rate, poi hit assoluti.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [(i, list(weights[i:i + CHUNK]), top) for i in range(0, len(weights), CHUNK)]
+    init = (data.factors, data.labels, list(pairs), k)
+    t0 = time.perf_counter()
+    if workers <= 1 or len(jobs) <= 1:
+        _init_worker(*init)
+        partial = [_eval_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_init_worker, initargs=init) as pool:
+            partial = list(pool.map(_eval_chunk, jobs))
+    elapsed = time.perf_counter() - t0
+
+    best = heapq.nsmallest(top, (row for chunk in partial for row in chunk))
+    evaluated = len(weights) * len(pairs)
+    return {
+        "configs_evaluated": evaluated,
+        "elapsed_s": round(elapsed, 3),
+        "us_per_config": round(elapsed * 1e6 / evaluated, 3) if evaluated else None,
+        "ranked": [{**Config(tuple(weights[wi]), *pairs[pi]).as_dict(), **m}
+                   for _key, wi, pi, m in best],
+    }
+
+
+def evaluate(data: BacktestSet, weights: Dict[str, float], hot: int = 70,
+             warm: int = 57, k: int = DEFAULT_K) -> Dict[str, object]:
+    """Le metriche di UNA configurazione (tipicamente quella in produzione)."""
+    w = tuple(float(weights.get(f, 0.0)) for f in FACTORS)
+    result = sweep(data, [w], [(hot, warm)], k=k, top=1, workers=1)
+    return result["ranked"][0]
+
+
+# ------------------------------------------------------------------ cli
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Sweep dei pesi di OB1Scorer sullo storico")
+    ap.add_argument("--raw", default=str(RAW_FILE))
+    ap.add_argument("--results", default=str(RESULTS_FILE))
+    ap.add_argument("--out", default=str(REPORT_FILE))
+    ap.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                    help="vettori di pesi casuali sul simplesso")
+    ap.add_argument("--k", type=int, default=DEFAULT_K, help="K di precision@K")
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help="righe del report")
+    ap.add_argument("--workers", type=int, default=None, help="processi (default: i core)")
+    ap.add_argument("--positive", default=",".join(POSITIVE_STATUSES),
+                    help="esiti che contano come hit (es. hit,lateral)")
+    ap.add_argument("--seed", type=int, default=20230630)
+    args = ap.parse_args()
+
+    data = load_backtest(args.raw, args.results,
+                         positive=[s.strip() for s in args.positive.split(",") if s.strip()])
+    print(f"Backtest {data.meta.get('season')}: {len(data)} giocatori con esito, "
+          f"{data.hits} hit (freeze {data.meta.get('freeze_date')})")
+    if not data.hits:
+        print("  Nessun hit tra gli esiti: ogni configurazione ha precision@K = 0, "
+              "il ranking distingue solo per quanti record finiscono HOT.")
+
+    weights = sample_weights(args.samples, seed=args.seed, include=[OB1Scorer.WEIGHTS])
+    pairs = threshold_pairs()
+    result = sweep(data, weights, pairs, k=args.k, top=args.top, workers=args.workers)
+    baseline = evaluate(data, OB1Scorer.WEIGHTS, k=args.k)
+    print(f"  {result['configs_evaluated']} configurazioni in {result['elapsed_s']} s "
+          f"({result['us_per_config']} µs l'una)")
+    print(f"  attuale: precision@{args.k}={baseline['precision_at_k']:.2f} "
+          f"HOT {baseline['hot_hits']}/{baseline['hot_count']}")
+    if result["ranked"]:
+        b = result["ranked"][0]
+        print(f"  migliore: precision@{args.k}={b['precision_at_k']:.2f} "
+              f"HOT {b['hot_hits']}/{b['hot_count']} soglie {b['hot']}/{b['warm']}")
+
+    report = {
+        "_meta": {
+            **data.meta,
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "players": len(data), "hits": data.hits, "k": args.k,
+            "samples": args.samples, "seed": args.seed,
+            "threshold_pairs": len(pairs),
+            "configs_evaluated": result["configs_evaluated"],
+            "elapsed_s": result["elapsed_s"], "us_per_config": result["us_per_config"],
+            "numpy": np is not None,
+        },
+        "baseline": baseline,
+        "ranked": result["ranked"],
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    print(f"  report: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -76,10 +76,40 @@ def _sanction_label(row: dict) -> str:
 
 def squad_status(store, club: str, on_date: str) -> dict:
     """Stato disciplinare di una rosa alla data del brief."""
+    return squad_statuses(store, [club], on_date)[club]
+
+
+def squad_statuses(store, clubs, on_date: str) -> dict:
+    """
+    Lo stato di più rose con due query in tutto, non due per società: il
+    brief di un comitato sono decine di DS, e le domande sono le stesse.
+    """
+    clubs = list(dict.fromkeys(c for c in clubs if c))
+    statuses = {c: {"club": c, "out": [], "at_risk": []} for c in clubs}
+    if not clubs:
+        return statuses
+    for row in store.squalificati(on_date, clubs=clubs):
+        statuses[row["club"]]["out"].append(row)
+    for row in store.diffidati(clubs=clubs):
+        statuses[row["club"]]["at_risk"].append(row)
+    return statuses
+
+
+def _latest_source(store):
+    row = store.conn.execute(
+        "SELECT cu_number, cu_date FROM cu_sanctions "
+        "WHERE cu_number IS NOT NULL ORDER BY cu_date DESC, cu_number DESC LIMIT 1"
+    ).fetchone()
+    return {"cu_number": row[0], "cu_date": row[1]} if row else None
+
+
+def _assemble(on_date: str, squad: dict, opponent: dict, source) -> dict:
     return {
-        "club": club,
-        "out": store.squalificati(on_date, club=club),
-        "at_risk": store.diffidati(club=club),
+        "on_date": on_date,
+        "squad": squad,
+        "opponent": opponent,
+        "source": source,
+        "has_content": bool(squad["out"] or squad["at_risk"]),
     }
 
 
@@ -88,21 +118,44 @@ def build_brief(store, on_date: str, club: str, opponent: str = None) -> dict:
     Dati del brief. Separato dal formato di proposito: lo stesso brief deve
     poter uscire su Telegram oggi e in PDF domani senza riscrivere le regole.
     """
-    brief = {
-        "on_date": on_date,
-        "squad": squad_status(store, club, on_date),
-        "opponent": squad_status(store, opponent, on_date) if opponent else None,
-        "source": None,
-    }
-    rows = store.conn.execute(
-        "SELECT cu_number, cu_date FROM cu_sanctions "
-        "WHERE cu_number IS NOT NULL ORDER BY cu_date DESC, cu_number DESC LIMIT 1"
-    ).fetchone()
-    if rows:
-        brief["source"] = {"cu_number": rows[0], "cu_date": rows[1]}
-    s = brief["squad"]
-    brief["has_content"] = bool(s["out"] or s["at_risk"])
-    return brief
+    statuses = squad_statuses(store, [club, opponent], on_date)
+    return _assemble(on_date, statuses[club],
+                     statuses[opponent] if opponent else None, _latest_source(store))
+
+
+def build_briefs(store, on_date: str, subscribers) -> list:
+    """
+    Il brief di tutti gli abbonati di un comitato in un passaggio solo.
+
+    `subscribers` sono dict {club, opponent, chat_ids} con i nomi già
+    risolti (CUStore.resolve_club). Le rose di tutti — società e avversari —
+    si leggono con le stesse due query di una sola, e ogni coppia (società,
+    avversario) si impagina una volta: due DS della stessa società ricevono
+    lo stesso messaggio, non due calcoli uguali. Cinquanta società costano
+    come una.
+
+    Ritorna una consegna per coppia, nell'ordine del primo abbonato:
+    {club, opponent, brief, message, chat_ids}. `message` è None se il brief
+    non ha nulla da dire — la stessa regola del brief singolo.
+    """
+    subscribers = list(subscribers)
+    statuses = squad_statuses(
+        store, [c for s in subscribers for c in (s["club"], s.get("opponent"))], on_date)
+    source = _latest_source(store)
+    deliveries: dict = {}
+    for sub in subscribers:
+        key = (sub["club"], sub.get("opponent") or None)
+        if key not in deliveries:
+            brief = _assemble(on_date, statuses[key[0]],
+                              statuses[key[1]] if key[1] else None, source)
+            deliveries[key] = {
+                "club": key[0], "opponent": key[1], "brief": brief,
+                "message": format_telegram(brief) if brief["has_content"] else None,
+                "chat_ids": [],
+            }
+        ids = deliveries[key]["chat_ids"]
+        ids.extend(c for c in map(str, sub.get("chat_ids") or []) if c not in ids)
+    return list(deliveries.values())
 
 
 def _section(title: str, status: dict, is_opponent: bool = False) -> list:
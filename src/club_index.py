@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+ARCH-003 — Indice dei nomi di società dei Comunicati Ufficiali.
+
+CUStore.resolve_club confrontava un nome digitato a mano con TUTTE le società
+del db, a colpi di maiuscole e sottostringhe. Con un comitato bastava; con
+decine di comitati sono migliaia di nomi, e il confronto per sottostringa
+sbagliava comunque da solo: una sigla mancante ("SSDARL", "1907") lasciava
+due candidati dove la società era una, e un refuso ("CASTENSO") non ne
+trovava nessuno.
+
+Qui ogni società ha una chiave normalizzata — senza accenti né punteggiatura,
+senza forma giuridica (SSD, ARL, ASD...) e senza anno di fondazione — e i
+trigrammi di quella chiave stanno in una tabella SQLite accanto a
+cu_sanctions. Una domanda legge solo le società che condividono almeno un
+trigramma col nome cercato, e le ordina per somiglianza (Jaccard sui
+trigrammi, come pg_trgm): il costo segue i candidati, non il numero di
+società. L'indice cresce a ogni ingest con i soli nomi nuovi.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_club_index -v
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+# Forme giuridiche e sigle sportive che un comitato aggiunge o omette a
+# seconda del comunicato. Tolte dalla chiave, non dal nome: il nome esatto
+# resta quello del CU, perché è quello che le query SQL confrontano.
+LEGAL_FORMS = frozenset({
+    "ssd", "asd", "ssdarl", "ssdrl", "ssdsrl", "asdarl", "arl", "srl", "spa", "scarl",
+    "sd", "ss", "us", "usd", "as", "ac", "acd", "fc", "fbc", "sc", "asc", "sco",
+    "gs", "gsd", "pol", "ssdacrl",
+})
+
+# Un refuso non si risolve mai da solo: "MONTICELLO" è a un passo da
+# "MONTICELLI", che è un'altra società. La somiglianza ordina i candidati,
+# decide chi ha scritto il nome.
+# Sotto questa non è un candidato: condivide una sillaba, non un nome.
+MIN_SCORE = 0.1
+
+_YEAR = re.compile(r"(18|19|20)\d\d")
+_DOTS = re.compile(r"[.’'`´]")
+_ARL = re.compile(r"\ba\s*r\s*l\b")        # "a r.l." -> "arl"
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_IN_CHUNK = 500
+
+
+def club_tokens(name: str) -> List[str]:
+    """
+    'U.S.D. Castenaso Calcio 1907 S.S.D.A.R.L.' -> ['castenaso', 'calcio'].
+    I punti si fondono ("S.S.D." è una sigla, non tre lettere); se dopo la
+    pulizia non resta niente ("A.C. 1907"), vale il nome senza accenti.
+    """
+    flat = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    tokens = [t for t in _NON_ALNUM.split(_ARL.sub("arl", _DOTS.sub("", flat))) if t]
+    kept = [t for t in tokens if t not in LEGAL_FORMS and not _YEAR.fullmatch(t)]
+    return kept or tokens
+
+
+def club_key(name: str) -> str:
+    return " ".join(club_tokens(name))
+
+
+def trigrams(key: str) -> set:
+    """Trigrammi per parola, con i bordi come pg_trgm: '  c', ' ca', ..., 'io '."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _flat(name: str) -> str:
+    """Il confronto esatto di prima: maiuscole e spazi non contano."""
+    return " ".join((name or "").split()).upper()
+
+
+class ClubIndex:
+    """
+    Società → chiave e trigrammi, sulla connessione di CUStore. `add` è
+    idempotente: un nome già indicizzato non si ricalcola.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS club_names (
+                    club    TEXT PRIMARY KEY,
+                    flat    TEXT NOT NULL,
+                    key     TEXT NOT NULL,
+                    n_grams INTEGER NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_club_names_flat "
+                              "ON club_names(flat)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_club_names_key "
+                              "ON club_names(key)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS club_trigrams (
+                    gram TEXT NOT NULL,
+                    club TEXT NOT NULL,
+                    PRIMARY KEY (gram, club)
+                ) WITHOUT ROWID""")
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM club_names").fetchone()[0]
+
+    def add(self, clubs: Iterable[str]) -> int:
+        """Indicizza i nomi nuovi. Va chiamato dentro la transazione dell'ingest."""
+        clubs = [c for c in dict.fromkeys(clubs) if c]
+        known = set()
+        for i in range(0, len(clubs), _IN_CHUNK):
+            chunk = clubs[i:i + _IN_CHUNK]
+            known.update(r[0] for r in self.conn.execute(
+                f"SELECT club FROM club_names WHERE club IN ({','.join('?' * len(chunk))})",
+                chunk))
+        names, grams = [], []
+        for club in clubs:
+            if club in known:
+                continue
+            key = club_key(club)
+            tg = trigrams(key)
+            names.append((club, _flat(club), key, len(tg)))
+            grams.extend((g, club) for g in tg)
+        self.conn.executemany("INSERT OR IGNORE INTO club_names VALUES (?, ?, ?, ?)", names)
+        self.conn.executemany("INSERT OR IGNORE INTO club_trigrams VALUES (?, ?)", grams)
+        return len(names)
+
+    # ------------------------------------------------------------- letture
+    def exact(self, name: str) -> List[str]:
+        return [r[0] for r in self.conn.execute(
+            "SELECT club FROM club_names WHERE flat = ? ORDER BY club", (_flat(name),))]
+
+    def same_key(self, name: str) -> List[str]:
+        return [r[0] for r in self.conn.execute(
+            "SELECT club FROM club_names WHERE key = ? ORDER BY club", (club_key(name),))]
+
+    def _hits(self, grams: List[str], limit: Optional[int] = None) -> list:
+        """
+        (società, somiglianza, trigrammi in comune, trigrammi della società),
+        dalla più simile. Conto e ordinamento li fa SQLite: in Python arrivano
+        solo i candidati sopra MIN_SCORE, più quelli che contengono il nome o
+        vi sono contenuti (tutti i trigrammi di uno nell'altro), che contano
+        per resolve a qualunque somiglianza.
+        """
+        if not grams:
+            return []
+        q = (f"SELECT t.club, ROUND(COUNT(*) * 1.0 / (? + n.n_grams - COUNT(*)), 3) AS score, "
+             f"COUNT(*) AS shared, n.n_grams FROM club_trigrams t "
+             f"JOIN club_names n ON n.club = t.club "
+             f"WHERE t.gram IN ({','.join('?' * len(grams))}) GROUP BY t.club "
+             f"HAVING score >= ? OR shared = ? OR shared = n.n_grams "
+             f"ORDER BY score DESC, t.club")
+        if limit:
+            q += f" LIMIT {int(limit)}"
+        return self.conn.execute(q, [len(grams), *grams, MIN_SCORE, len(grams)]).fetchall()
+
+    def ranked(self, name: str, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """Società simili a `name`, [(nome, somiglianza 0..1)] dalla più simile."""
+        return [(club, score) for club, score, _s, _n
+                in self._hits(sorted(trigrams(club_key(name))), limit)]
+
+    def all(self, limit: Optional[int] = None) -> List[str]:
+        q = "SELECT club FROM club_names ORDER BY club"
+        if limit:
+            q += f" LIMIT {int(limit)}"
+        return [r[0] for r in self.conn.execute(q)]
+
+    def resolve(self, name: str, limit: int = 10) -> Tuple[Optional[str], List[str]]:
+        """
+        Nome digitato -> (nome_esatto, []) o (None, candidati). In ordine:
+        uguale a meno di maiuscole/spazi; stessa chiave (sigle, anno, accenti);
+        contenimento a parole in una direzione o nell'altra. Un refuso o
+        un'ambiguità non si sciolgono a caso: si ritornano i candidati, dal
+        più simile, e li conferma una persona.
+        """
+        if not _flat(name):
+            return None, []
+        for found in (self.exact(name), self.same_key(name)):
+            if len(found) == 1:
+                return found[0], []
+            if found:
+                return None, found
+
+        grams = sorted(trigrams(club_key(name)))
+        hits = self._hits(grams)
+        ranked = [(club, score) for club, score, _s, _n in hits if score >= MIN_SCORE]
+        # Contenimento a parole: o la società ha tutti i trigrammi del nome,
+        # o il nome ha tutti i suoi. Il conto filtra, i token confermano —
+        # solo sui pochi che passano.
+        target = set(club_tokens(name))
+        contains = [c for c, _score, shared, n in hits
+                    if (shared == len(grams) and target <= set(club_tokens(c)))
+                    or (shared == n and set(club_tokens(c)) <= target)]
+        if len(contains) == 1:
+            return contains[0], []
+        if contains:
+            return None, contains[:limit]
+
+        # Niente di sicuro: i più simili, e se sono pochi il resto
+        # dell'elenco — meglio una lista da scorrere che un "non trovato" muto.
+        out = [c for c, _s in ranked[:limit]]
+        if len(out) < limit:
+            out += [c for c in self.all(limit=limit + len(out)) if c not in out][:limit - len(out)]
+        return None, out
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Lessico di club e fonti: da un testo libero all'entità, con la sua lega.
+
+Scoring, purge e report confrontavano `current_club` e il nome della fonte con
+tre liste scritte a mano (SERIE_C_CLUBS, SOURCE_SCORES, _WRONG_LEAGUE_CLUBS,
+più quella dei report), a colpi di `in` per ogni candidato. Le liste erano
+divergenti — Reggiana e Cesena stavano insieme tra i club di Serie C dello
+score e tra quelli di A/B da purgare — e il confronto per sottostringa
+sbagliava da solo: "roma" dentro "Romagna", "bari" dentro "Barisardo",
+"tuttoc" dentro "tuttocalciatori".
+
+Qui tutto viene da config/clubs.yaml e diventa UN automa: una regex a trie
+(entity_gate.trie_pattern) su testo senza accenti e punteggiatura, a parole
+intere. A ogni posizione il motore segue un solo ramo per carattere, quindi il
+costo non cresce con il numero di club. Un match restituisce l'entità (nome
+canonico, lega, girone), non solo un sì/no.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_club_lexicon -v
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+try:
+    from src.entity_gate import trie_pattern
+except ImportError:  # layout PYTHONPATH=src
+    from entity_gate import trie_pattern
+
+# Accanto al codice come il vocabolario spazzatura: lo score non deve
+# cambiare a seconda della cartella da cui si lancia uno script.
+CLUBS_CONFIG = Path(__file__).resolve().parent.parent / "config" / "clubs.yaml"
+
+SERIE_A = "serie_a"
+SERIE_B = "serie_b"
+SERIE_C = "serie_c"
+UPPER_LEAGUES = (SERIE_A, SERIE_B)
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Minuscolo, senza accenti, punteggiatura come spazio: "FeralpiSalò" → "feralpisalo"."""
+    flat = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return " ".join(_NON_ALNUM.split(flat)).strip()
+
+
+@dataclass(frozen=True)
+class Club:
+    name: str
+    league: str
+    group: str = ""
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    score: int
+
+
+@dataclass(frozen=True)
+class Hit:
+    entity: object        # Club o Source
+    alias: str            # la forma normalizzata che ha fatto match
+
+
+class _Automaton:
+    """Alias normalizzati → entità, compilati in una regex a parole intere."""
+
+    def __init__(self, entries: Dict[str, object]):
+        self.entries = {normalize(a): e for a, e in entries.items() if normalize(a)}
+        self._re = (re.compile(r"(?<![a-z0-9])(?:" + trie_pattern(self.entries) + r")(?![a-z0-9])")
+                    if self.entries else None)
+
+    def find_all(self, text: str) -> List[Hit]:
+        if self._re is None or not isinstance(text, str):
+            return []
+        return [Hit(self.entries[m.group(0)], m.group(0))
+                for m in self._re.finditer(normalize(text))]
+
+    def find(self, text: str) -> Optional[Hit]:
+        if self._re is None or not isinstance(text, str):
+            return None
+        m = self._re.search(normalize(text))
+        return Hit(self.entries[m.group(0)], m.group(0)) if m else None
+
+
+class Lexicon:
+    """Club e fonti di config/clubs.yaml, pronti da interrogare."""
+
+    def __init__(self, clubs: Dict[str, Club], sources: Dict[str, Source]):
+        self.clubs = _Automaton(clubs)
+        self.sources = _Automaton(sources)
+        self._exact_sources = {normalize(a): s for a, s in sources.items()}
+
+    def club(self, text: str) -> Optional[Club]:
+        """Il primo club riconosciuto nel testo, o None."""
+        hit = self.clubs.find(text)
+        return hit.entity if hit else None
+
+    def clubs_in(self, text: str) -> List[Club]:
+        return [h.entity for h in self.clubs.find_all(text)]
+
+    def league_of(self, text: str) -> Optional[str]:
+        club = self.club(text)
+        return club.league if club else None
+
+    def has_league(self, texts, *leagues: str) -> Optional[Club]:
+        """Il primo club di una di `leagues` in uno qualunque dei testi."""
+        for text in texts:
+            for club in self.clubs_in(text):
+                if club.league in leagues:
+                    return club
+        return None
+
+    def source(self, name: str) -> Optional[Source]:
+        """La fonte: prima il nome intero, poi una fonte nota dentro il nome."""
+        exact = self._exact_sources.get(normalize(name)) if isinstance(name, str) else None
+        if exact is not None:
+            return exact
+        hit = self.sources.find(name)
+        return hit.entity if hit else None
+
+
+def load_lexicon(path: Path | str = CLUBS_CONFIG) -> Lexicon:
+    """Legge config/clubs.yaml. File assente => lessico vuoto, mai un errore."""
+    try:
+        data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    except (OSError, yaml.YAMLError):
+        data = {}
+
+    clubs: Dict[str, Club] = {}
+    by_name: Dict[str, Club] = {}
+
+    def add(name: str, league: str, group: str = "") -> None:
+        club = Club(name, league, group)
+        clubs[name] = club
+        by_name[normalize(name)] = club
+
+    for group, entries in (data.get(SERIE_C) or {}).items():
+        for entry in entries or []:
+            name = entry.get("name") if isinstance(entry, dict) else entry
+            if name:
+                add(str(name), SERIE_C, str(group))
+    for league in UPPER_LEAGUES:
+        for name in data.get(league) or []:
+            add(str(name), league)
+    for alias, canonical in (data.get("aliases") or {}).items():
+        club = by_name.get(normalize(str(canonical)))
+        if club is not None:
+            clubs[str(alias)] = club
+
+    sources: Dict[str, Source] = {}
+    for entry in data.get("sources") or []:
+        source = Source(str(entry["name"]), int(entry["score"]))
+        for alias in [source.name, *(entry.get("aliases") or [])]:
+            sources[str(alias)] = source
+    return Lexicon(clubs, sources)
+
+
+@lru_cache(maxsize=None)
+def lexicon() -> Lexicon:
+    """Il lessico di processo, compilato alla prima richiesta."""
+    return load_lexicon()
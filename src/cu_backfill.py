@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+ARCH-003 — Backfill di stagione dei Comunicati Ufficiali.
+
+Il brief del giovedì ingerisce gli ultimi CU nuovi dell'anteprima del canale,
+uno alla volta. Basta per la settimana, non per la memoria: i diffidati sono
+giusti solo se il db ha TUTTI i provvedimenti della stagione, e ricostruirli a
+mano erano ore di giri manuali. Qui si fa in un colpo, e si può interrompere:
+
+  - i CU vengono dallo storico del canale (cu_feed.channel_history, pagine
+    ?before=) o da una lista di URL;
+  - i PDF si scaricano in parallelo, ma al più `per_host` alla volta e a
+    `interval` secondi di distanza per sito: il server di un comitato non è
+    una CDN, e farsi bloccare a metà stagione costa più del tempo risparmiato;
+  - i PDF restano in data/cu_pdf/ per contenuto (sha256), con un indice
+    url -> hash: un secondo giro non riscarica, e lo stesso file pubblicato
+    sotto due URL occupa un posto solo;
+  - il parsing va a un pool di processi (un PDF per processo, cu_pdf seriale
+    dentro), l'ingest in CUStore è una transazione per lotto;
+  - il SeenStore segna un URL come visto solo DOPO che il suo lotto è nel db,
+    con le stesse chiavi di cu_feed.new_cu_links: un giro interrotto riparte
+    dal primo lotto non ingerito, e il brief non riscarica ciò che il
+    backfill ha già letto.
+
+Uso:
+    python -m src.cu_backfill --canale figccrer --dal 2025-07-01
+    python -m src.cu_backfill --urls lista_cu.txt
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_backfill -v
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    from src.cu_feed import channel_history
+    from src.cu_parser import DEFAULT_DB, CUStore, parse_cu_pages
+    from src.cu_pdf import fetch_pdf, pdf_pages
+    from src.watch.seen import SeenStore, content_key, watch_enabled
+except ImportError:  # layout PYTHONPATH=src
+    from cu_feed import channel_history
+    from cu_parser import DEFAULT_DB, CUStore, parse_cu_pages
+    from cu_pdf import fetch_pdf, pdf_pages
+    from watch.seen import SeenStore, content_key, watch_enabled
+
+PDF_CACHE = Path("data/cu_pdf")
+
+# CU per lotto: un lotto è un commit e un giro di SeenStore. Abbastanza grande
+# da ammortizzare la transazione, abbastanza piccolo da perdere poco se la
+# run muore.
+BATCH = 20
+DOWNLOAD_WORKERS = 8
+PER_HOST = 2
+HOST_INTERVAL_S = 1.0
+
+
+def season_start(today: date = None) -> str:
+    """1° luglio della stagione in corso: il primo CU che conta per le diffide."""
+    today = today or date.today()
+    year = today.year if today.month >= 7 else today.year - 1
+    return f"{year}-07-01"
+
+
+class HostLimiter:
+    """
+    Cortesia per sito: al più `per_host` richieste in corso verso lo stesso
+    host, e almeno `interval` secondi fra due partenze. Siti diversi non si
+    aspettano fra loro — il parallelismo vero è fra comitati.
+    """
+
+    def __init__(self, per_host: int = PER_HOST, interval: float = HOST_INTERVAL_S,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.per_host, self.interval = per_host, interval
+        self._clock, self._sleep = clock, sleep
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._next: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        with sem:
+            with self._lock:
+                now = self._clock()
+                start = max(now, self._next.get(host, now))
+                self._next[host] = start + self.interval
+            if start > now:
+                self._sleep(start - now)
+            yield
+
+
+class PdfCache:
+    """
+    PDF per contenuto: <sha256>.pdf, più index.json url -> sha256. L'indice
+    è ciò che evita il download; l'hash è ciò che evita i doppioni.
+    """
+
+    def __init__(self, root: Path | str = PDF_CACHE):
+        self.root = Path(root)
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        try:
+            self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._index = {}
+
+    def get(self, url: str) -> Optional[Path]:
+        with self._lock:
+            digest = self._index.get(url)
+        path = self.root / f"{digest}.pdf" if digest else None
+        return path if path is not None and path.exists() else None
+
+    def put(self, url: str, data: bytes) -> Path:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.root / f"{digest}.pdf"
+        if not path.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        with self._lock:
+            self._index[url] = digest
+        return path
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._index:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self._index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._index, sort_keys=True, indent=0) + "\n",
+                           encoding="utf-8")
+            os.replace(tmp, self._index_path)
+
+
+def _parse_pdf(path: str) -> tuple:
+    """Nel worker: (parsed, None) o (None, errore). Un PDF rotto non ferma il lotto."""
+    try:
+        return parse_cu_pages(pdf_pages(path, workers=1)), None
+    except Exception as exc:                      # PDF corrotto, pypdf che cede
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def _process_context():
+    """
+    I processi di parsing partono da un forkserver, non con fork: quando il
+    pool crea un worker i thread dei download sono già in volo, e un fork in
+    quel momento copia nel figlio i lock che tengono (SQLite, HostLimiter,
+    urllib) — presi, per sempre. Dove forkserver non c'è (Windows, e macOS
+    parte già con spawn) vale il default della piattaforma.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def backfill(items: Iterable[dict], store: CUStore, seen: SeenStore = None,
+             cache: PdfCache = None, limiter: HostLimiter = None,
+             batch: int = BATCH, download_workers: int = DOWNLOAD_WORKERS,
+             parse_workers: int = None, fetch: Callable[[str], bytes] = fetch_pdf,
+             log: Callable[[str], None] = print) -> dict:
+    """
+    Scarica, legge e ingerisce `items` (voci di cu_feed, basta la chiave url).
+    Ritorna i totali: cu ingeriti, già visti, falliti, nuove sanzioni/risultati.
+    I falliti non vengono segnati: il prossimo giro li riprova.
+    """
+    cache = cache or PdfCache()
+    limiter = limiter or HostLimiter()
+    urls = list(dict.fromkeys(it["url"] for it in items))
+    check = seen is not None and watch_enabled()
+    todo = [u for u in urls if not check or seen.is_new(content_key(u))]
+    totals = {"cu": 0, "skipped": len(urls) - len(todo), "failed": 0,
+              "new_sanctions": 0, "new_results": 0}
+    if not todo:
+        return totals
+
+    def download(url: str) -> tuple:
+        path = cache.get(url)
+        if path is not None:
+            return url, str(path), None
+        try:
+            with limiter.slot(url):
+                data = fetch(url)
+            return url, str(cache.put(url, data)), None
+        except Exception as exc:                  # rete giù, 404, timeout
+            return url, None, f"{type(exc).__name__}: {exc}"
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    batches = [todo[i:i + batch] for i in range(0, len(todo), batch)]
+    process_pool = (ProcessPoolExecutor(max_workers=min(parse_workers, batch),
+                                        mp_context=_process_context())
+                    if parse_workers > 1 else nullcontext())
+    with ThreadPoolExecutor(max_workers=download_workers) as threads, process_pool as procs:
+        parse_map = procs.map if procs is not None else map
+        pending = [threads.submit(download, u) for u in batches[0]]
+        for n in range(len(batches)):
+            fetched = [f.result() for f in pending]
+            # Il lotto dopo si scarica mentre questo si legge.
+            pending = ([threads.submit(download, u) for u in batches[n + 1]]
+                       if n + 1 < len(batches) else [])
+            ok = [(u, p) for u, p, _e in fetched if p is not None]
+            done, parsed = [], []
+            for (url, _path), (result, error) in zip(ok, parse_map(_parse_pdf, [p for _u, p in ok])):
+                if result is None:
+                    log(f"  [SALTATO] {url}: {error}")
+                    continue
+                done.append(url)
+                parsed.append(result)
+            for url, _p, error in fetched:
+                if error:
+                    log(f"  [SALTATO] {url}: {error}")
+            added = store.ingest_many(parsed)
+            if check:
+                seen.see_batch([(u, "") for u in done], kind="cu_pdf")
+            cache.save()
+            totals["cu"] += len(done)
+            totals["failed"] += len(batches[n]) - len(done)
+            totals["new_sanctions"] += added["new_sanctions"]
+            totals["new_results"] += added["new_results"]
+            log(f"  lotto {n + 1}/{len(batches)}: {len(done)} CU, "
+                f"+{added['new_sanctions']} sanzioni, +{added['new_results']} risultati")
+    return totals
+
+
+def read_url_list(path: Path | str) -> List[dict]:
+    """Un URL per riga; righe vuote e commenti (#) ignorati."""
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [{"url": ln.strip()} for ln in lines if ln.strip() and not ln.lstrip().startswith("#")]
+
+
+def main() -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Backfill di stagione dei Comunicati Ufficiali")
+    origin = ap.add_mutually_exclusive_group(required=True)
+    origin.add_argument("--canale", help="handle del canale Telegram del comitato")
+    origin.add_argument("--urls", help="file con un URL di CU per riga")
+    ap.add_argument("--dal", default=season_start(), help="data ISO del primo CU (default: 1/7)")
+    ap.add_argument("--pagine", type=int, default=60, help="pagine di storico al massimo")
+    ap.add_argument("--db", default=str(DEFAULT_DB))
+    ap.add_argument("--facts", default="data/cu_facts.json",
+                    help="manifest della memoria versionata (segmenti in data/cu_facts/)")
+    ap.add_argument("--lotto", type=int, default=BATCH)
+    ap.add_argument("--workers", type=int, default=None, help="processi di parsing")
+    args = ap.parse_args()
+
+    limiter = HostLimiter()
+    if args.canale:
+        items = channel_history(args.canale, since=args.dal, max_pages=args.pagine,
+                                limiter=limiter)
+        print(f"@{args.canale}: {len(items)} CU dal {args.dal}")
+    else:
+        items = read_url_list(args.urls)
+
+    store = CUStore(args.db)
+    seen = SeenStore(args.db)
+    try:
+        store.import_facts(args.facts)
+        totals = backfill(items, store, seen=seen, limiter=limiter, batch=args.lotto,
+                          parse_workers=args.workers)
+        store.export_facts(args.facts)
+    finally:
+        seen.close()
+        store.close()
+    print(f"backfill: {totals}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,14 +13,36 @@ listing HTML va confrontato per differenza a ogni giro; qui il messaggio
 nuovo è il segnale, ed è quello che ARCH-002 chiede — lavorare sul cambiamento,
 non sull'orologio.
 
-Il parsing è codice puro e testabile offline; la rete sta solo in fetch_channel().
-Nessuna API key: si legge l'anteprima che Telegram serve a chiunque.
+Il parsing è codice puro e testabile offline; la rete sta in fetch_channel()
+e in ChannelCrawler. Nessuna API key: si legge l'anteprima che Telegram serve
+a chiunque.
+
+Il giro di ogni giovedì (e il polling di più comitati) passa da
+ChannelCrawler: per ogni canale un cursore — l'id dell'ultimo messaggio visto
+— e i validatori HTTP stanno in data/ob1.db. Si chiede l'anteprima con una
+GET condizionale su una connessione keep-alive; se l'ultimo messaggio è
+quello del cursore il giro di quel canale finisce lì, con una richiesta sola.
+Solo se i messaggi nuovi sono più di una pagina si torna indietro con
+?before=, e ci si ferma al primo messaggio già noto.
 """
 
 from __future__ import annotations
 
 import html as html_mod
 import re
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from src.watch.seen import DEFAULT_DB
+except ImportError:  # layout PYTHONPATH=src
+    from watch.seen import DEFAULT_DB
+
+# Pagine di messaggi nuovi al massimo per canale e per giro: oltre, è un
+# canale mai visto o fermo da mesi, e lo storico è lavoro di cu_backfill.
+MAX_NEW_PAGES = 5
 
 # Un messaggio dell'anteprima. Stesso confine usato dal censimento: il wrapper
 # si ripete, e l'ultimo si chiude sulla fine della sezione.
@@ -30,6 +52,8 @@ _MSG_RE = re.compile(
 
 _HREF_PDF = re.compile(r'href="(https?://[^"]+?\.pdf)"', re.I)
 _TIME_RE = re.compile(r'datetime="([^"]+)"')
+# "handle/123": l'id del messaggio, il cursore di ?before= per lo storico.
+_POST_RE = re.compile(r'data-post="[^"/]*/(\d+)"')
 
 # "Cu 11 del 05.08.26", "COMUNICATO UFFICIALE N. 146", "C.U. n.3"
 _CU_NUM_RE = re.compile(
@@ -48,7 +72,8 @@ def _strip_tags(fragment: str) -> str:
 def parse_cu_feed(page_html: str) -> list:
     """
     Anteprima di t.me/s/<handle> -> lista di CU trovati, dal più vecchio al
-    più recente. Ogni voce: url, cu_number (se dichiarato), posted_at, text.
+    più recente. Ogni voce: url, cu_number (se dichiarato), posted_at,
+    post_id (l'id del messaggio, se c'è), text.
 
     Un messaggio può portare più PDF (comunicato + allegati): li teniamo
     tutti, perché scartare a priori significherebbe decidere qui quale sia il
@@ -65,22 +90,29 @@ def parse_cu_feed(page_html: str) -> list:
             continue
         num = _CU_NUM_RE.search(text)
         when = _TIME_RE.search(msg)
+        post = _POST_RE.search(msg)
         for url in dict.fromkeys(pdfs):        # dedup preservando l'ordine
             found.append({
                 "url": html_mod.unescape(url),
                 "cu_number": int(num.group(1)) if num else None,
                 "posted_at": when.group(1) if when else None,
+                "post_id": int(post.group(1)) if post else None,
                 "text": text[:200],
             })
     return found
 
 
-def fetch_channel(handle: str, timeout: int = 20) -> tuple:
-    """(status, html) dell'anteprima pubblica. Unica funzione che tocca la rete."""
+def channel_url(handle: str, before: int = None) -> str:
+    return f"https://t.me/s/{handle}" + (f"?before={before}" if before else "")
+
+
+def fetch_channel(handle: str, timeout: int = 20, before: int = None) -> tuple:
+    """(status, html) dell'anteprima pubblica, o della pagina di storico prima
+    del messaggio `before`. Unica funzione che tocca la rete."""
     import urllib.request
 
     req = urllib.request.Request(
-        f"https://t.me/s/{handle}", headers={"User-Agent": "Mozilla/5.0"})
+        channel_url(handle, before), headers={"User-Agent": "Mozilla/5.0"})
     try:
         with urllib.request.urlopen(req, timeout=timeout) as r:
             return r.status, r.read().decode("utf-8", "ignore")
@@ -88,17 +120,217 @@ def fetch_channel(handle: str, timeout: int = 20) -> tuple:
         return 0, ""
 
 
-def new_cu_links(handle: str, seen=None) -> list:
+class ChannelCrawler:
     """
-    I CU del canale non ancora ingeriti. Con seen=None ritorna tutto quello
-    che vede: comodo per il primo giro e per l'ispezione manuale.
+    Messaggi nuovi dei canali, dal cursore in avanti. Una sessione HTTP per
+    tutti i canali (keep-alive), richieste condizionali sull'anteprima, e il
+    cursore che avanza solo quando il giro del canale è completo: una pagina
+    di storico fallita a metà lascia il cursore dov'era, e il giro dopo
+    riattraversa il buco invece di saltarlo.
+
+    `fetch(handle, before, headers) -> (status, html, headers)` sostituisce la
+    rete nei test.
     """
-    status, page = fetch_channel(handle)
-    if status != 200:
-        return []
-    items = parse_cu_feed(page)
-    if seen is None:
-        return items
+
+    def __init__(self, path: Path | str = DEFAULT_DB, session=None,
+                 fetch: Callable = None, max_pages: int = MAX_NEW_PAGES):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cu_channels (
+                    handle        TEXT PRIMARY KEY,
+                    last_post_id  INTEGER,
+                    etag          TEXT,
+                    last_modified TEXT,
+                    checked_at    TEXT
+                )""")
+        self.max_pages = max_pages
+        self._session = session
+        self._fetch = fetch or self._http
+
+    def _http(self, handle: str, before: int = None, headers: dict = None) -> tuple:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        try:
+            r = self._session.get(channel_url(handle, before), timeout=20,
+                                  headers={"User-Agent": "Mozilla/5.0", **(headers or {})})
+        except Exception:
+            return 0, "", {}
+        return r.status_code, r.text if r.status_code == 200 else "", dict(r.headers)
+
+    def cursor(self, handle: str) -> Optional[int]:
+        row = self.conn.execute("SELECT last_post_id FROM cu_channels WHERE handle = ?",
+                                (handle,)).fetchone()
+        return row[0] if row else None
+
+    def _save(self, handle: str, **fields) -> None:
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        cols = ["handle", "checked_at", *fields]
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO cu_channels ({', '.join(cols)}) "
+                f"VALUES ({', '.join('?' * len(cols))}) ON CONFLICT(handle) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in cols[1:]),
+                (handle, now, *fields.values()))
+
+    def crawl(self, handle: str) -> list:
+        """
+        I CU pubblicati dopo il cursore, dal più vecchio al più recente, nel
+        formato di parse_cu_feed. Al primo giro (nessun cursore) c'è solo
+        l'anteprima: lo storico intero è compito di cu_backfill.
+        """
+        row = self.conn.execute("SELECT * FROM cu_channels WHERE handle = ?",
+                                (handle,)).fetchone()
+        last = row["last_post_id"] if row else None
+        headers = {}
+        if row and row["etag"]:
+            headers["If-None-Match"] = row["etag"]
+        if row and row["last_modified"]:
+            headers["If-Modified-Since"] = row["last_modified"]
+
+        status, page, resp_headers = self._fetch(handle, None, headers)
+        if status == 304:
+            self._save(handle)
+            return []
+        if status != 200:
+            return []
+        ids = [int(i) for i in _POST_RE.findall(page)]
+        if not ids:
+            return []
+        top = max(ids)
+        validators = {"etag": resp_headers.get("ETag"),
+                      "last_modified": resp_headers.get("Last-Modified")}
+        if last is not None and top <= last:
+            self._save(handle, **validators)
+            return []
+
+        pages, low = [parse_cu_feed(page)], min(ids)
+        # Più messaggi nuovi di quanti ne stiano in una pagina: indietro
+        # finché non compare un id già visto.
+        for _ in range(self.max_pages - 1):
+            if last is None or low <= last + 1:
+                break
+            status, page, _h = self._fetch(handle, low, {})
+            older = [int(i) for i in _POST_RE.findall(page)] if status == 200 else []
+            if not older or min(older) >= low:
+                break
+            pages.append(parse_cu_feed(page))
+            low = min(older)
+
+        items = [it for items in reversed(pages) for it in items
+                 if last is None or it["post_id"] is None or it["post_id"] > last]
+        if last is None or low <= last + 1:
+            self._save(handle, last_post_id=top, **validators)
+        # Altrimenti c'è un buco non colmato (pagina fallita o più di
+        # max_pages di novità): il cursore resta, il prossimo giro riprova.
+        urls, out = set(), []
+        for it in items:                   # un PDF ripostato conta una volta
+            if it["url"] not in urls:
+                urls.add(it["url"])
+                out.append(it)
+        return out
+
+    def close(self) -> None:
+        if self._session is not None and self._fetch == self._http:
+            self._session.close()
+        self.conn.close()
+
+    def __enter__(self) -> "ChannelCrawler":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def _unseen(items: List[dict], seen) -> List[dict]:
     # La chiave è l'URL: un CU è immutabile una volta pubblicato, e usare il
     # contenuto costringerebbe a scaricare il PDF prima di sapere se serve.
-    return [it for it in items if seen.see(it["url"], kind="cu_pdf")]
+    # Una query e una transazione per tutto il lotto (SeenStore.see_batch),
+    # con le stesse risposte di un see() per voce.
+    flags = seen.see_batch([(it["url"], "") for it in items], kind="cu_pdf")
+    return [it for it, new in zip(items, flags) if new]
+
+
+def new_cu_links(handle: str, seen=None, crawler: ChannelCrawler = None) -> list:
+    """
+    I CU del canale non ancora ingeriti. Con seen=None ritorna tutto quello
+    che vede: comodo per il primo giro e per l'ispezione manuale. Con un
+    `crawler` si guarda solo oltre il cursore del canale.
+    """
+    if crawler is not None:
+        items = crawler.crawl(handle)
+    else:
+        status, page = fetch_channel(handle)
+        if status != 200:
+            return []
+        items = parse_cu_feed(page)
+    if seen is None or not items:
+        return items
+    return _unseen(items, seen)
+
+
+def new_cu_links_many(handles: Iterable[str], seen=None,
+                      crawler: ChannelCrawler = None) -> Dict[str, list]:
+    """
+    new_cu_links su più comitati: un crawler (una sessione) per tutti, e un
+    solo see_batch per le voci di tutti i canali.
+    """
+    own = crawler is None
+    crawler = crawler or ChannelCrawler()
+    try:
+        found = {h: crawler.crawl(h) for h in dict.fromkeys(handles) if h}
+    finally:
+        if own:
+            crawler.close()
+    if seen is None:
+        return found
+    flat = _unseen([{**it, "_channel": h} for h, items in found.items() for it in items], seen)
+    out = {h: [] for h in found}
+    for it in flat:
+        out[it.pop("_channel")].append(it)
+    return out
+
+
+def channel_history(handle: str, since: str = None, max_pages: int = 60,
+                    fetch=fetch_channel, limiter=None) -> list:
+    """
+    Lo storico dei CU del canale, all'indietro con ?before=<id> fino a
+    `since` (data ISO, tipicamente l'inizio della stagione) o a `max_pages`
+    pagine. Stesso formato di parse_cu_feed, dal più vecchio al più recente.
+
+    Il cursore è l'id più basso della pagina fra TUTTI i messaggi, non solo
+    quelli con un PDF: una pagina di sole circolari va attraversata, non è
+    la fine del canale. `limiter` (cu_backfill.HostLimiter) distanzia le
+    richieste a t.me come quelle ai siti dei comitati.
+    """
+    pages, before = [], None
+    for _ in range(max_pages):
+        if limiter is not None:
+            with limiter.slot(channel_url(handle, before)):
+                status, page = fetch(handle, before=before)
+        else:
+            status, page = fetch(handle, before=before)
+        if status != 200:
+            break
+        pages.append(parse_cu_feed(page))
+        ids = [int(i) for i in _POST_RE.findall(page)]
+        if not ids or (before is not None and min(ids) >= before):
+            break
+        before = min(ids)
+        times = _TIME_RE.findall(page)
+        if since and times and min(times)[:10] < since:
+            break
+
+    found = [it for items in reversed(pages) for it in items
+             if not since or not it["posted_at"] or it["posted_at"][:10] >= since]
+    urls, out = set(), []
+    for it in found:                       # un PDF ripostato conta una volta
+        if it["url"] not in urls:
+            urls.add(it["url"])
+            out.append(it)
+    return out
@@ -5,7 +5,9 @@ ARCH-003 — Parser dei Comunicati Ufficiali LND (giustizia sportiva + risultati
 Da UNA fonte (il PDF del CU, grado A) escono TRE prodotti:
   - squalificati/diffidati per il brief del giovedì (DS);
   - memoria disciplinare della rosa (settore giovanile);
-  - indice di presenza: un ammonito era in campo, per forza (scouting).
+  - indice di presenza: un ammonito era in campo, per forza (scouting);
+    incrociato con i risultati diventa la stagione per tesserato —
+    presenze, giornate saltate, calendario della società (cu_timeline).
 
 Il formato è quello VERIFICATO su CU 146 del CRER (13/04/2026), non uno ideale.
 Particolarità reali di cui il parser tiene conto:
@@ -26,8 +28,21 @@ from __future__ import annotations
 
 import re
 import sqlite3
+import string
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    from src.club_index import ClubIndex
+    from src.cu_pdf import pdf_pages
+    from src.cu_timeline import SeasonTimeline
+    from src.entity_resolution import PlayerRegistry, resolution_enabled
+except ImportError:  # layout PYTHONPATH=src
+    from club_index import ClubIndex
+    from cu_pdf import pdf_pages
+    from cu_timeline import SeasonTimeline
+    from entity_resolution import PlayerRegistry, resolution_enabled
 
 DEFAULT_DB = Path("data/ob1.db")
 
@@ -80,11 +95,61 @@ def _clean_date(raw: str) -> str:
     return (raw or "").strip()
 
 
+_ASCII_UPPER = string.ascii_uppercase.encode()
+_ASCII_LOWER = string.ascii_lowercase.encode()
+
+
 def _mostly_upper(line: str) -> bool:
-    letters = [c for c in line if c.isalpha()]
-    if not letters:
+    if line.isascii():
+        # Caso comune: si contano le lettere cancellandole, in C, senza
+        # passare carattere per carattere da Python.
+        raw = line.encode()
+        upper = len(raw) - len(raw.translate(None, _ASCII_UPPER))
+        n = upper + len(raw) - len(raw.translate(None, _ASCII_LOWER))
+    else:
+        letters = "".join(filter(str.isalpha, line))
+        upper, n = sum(map(str.isupper, letters)), len(letters)
+    if not n:
         return False
-    return sum(1 for c in letters if c.isupper()) / len(letters) > 0.8
+    return upper / n > 0.8
+
+
+# --- classificatore di riga -------------------------------------------------
+# Un CU di stagione sono centinaia di pagine e un backfill ne legge migliaia:
+# provare le dodici regex in fila su ogni riga costa più dell'estrazione. Per
+# riga si calcolano una volta sola tre indizi economici — la parola iniziale,
+# la riga in maiuscolo, la forma "punteggio in coda" — e si prova solo la
+# regex che quegli indizi rendono possibile. Ogni indizio è una condizione
+# NECESSARIA della regex che protegge, mai sufficiente: la regex resta il
+# giudice, quindi l'esito è lo stesso della scansione completa (lo verifica
+# tests/test_cu_parser.py, il confronto di velocità è scripts/bench_cu_parser.py).
+
+RE_LEAD = re.compile(r"\w+")
+
+# Le regex ancorate a inizio riga, per parola iniziale in maiuscolo. Le parole
+# sono tutte diverse: una riga ne può tentare al più una.
+_LEAD_RULES = {"GIRONE": RE_GIRONE, "AMMENDA": RE_AMMENDA}
+_LEAD_RULES.update(dict.fromkeys(
+    ("CALCIATORI", "DIRIGENTI", "ALLENATORI", "MASSAGGIATORI", "ASSISTENTI"), RE_ROLE))
+_LEAD_RULES.update(dict.fromkeys(("I", "II", "III", "IIII", "IV", "V"), RE_AMMON))
+
+
+
+def _maybe_result(line: str) -> bool:
+    """' - ' fra le squadre e un punteggio (o dcr/dts) in coda: senza, RE_RESULT
+    non può combaciare."""
+    return " - " in line and (line[-1].isdecimal() or line.endswith(("dcr", "dts")))
+
+
+def _lines(pages: Iterable[str], meta: dict) -> Iterator[str]:
+    """Le righe delle pagine in fila; intanto cerca la testata del CU."""
+    for page in pages:
+        if meta["cu_number"] is None:
+            m = RE_META.search(page)
+            if m:
+                meta["cu_number"] = int(m.group(1))
+                meta["cu_date"] = _clean_date(m.group(2))
+        yield from page.splitlines()
 
 
 def parse_cu_text(text: str) -> dict:
@@ -93,37 +158,63 @@ def parse_cu_text(text: str) -> dict:
       {"meta": {...}, "results": [...], "sanctions": [...]}
     Ogni sanzione: category, match_date, role, kind, detail, person, club, reason.
     """
-    meta = {"cu_number": None, "cu_date": None}
-    m = RE_META.search(text or "")
-    if m:
-        meta["cu_number"] = int(m.group(1))
-        meta["cu_date"] = _clean_date(m.group(2))
+    return parse_cu_pages([text or ""])
+
+
+def parse_cu_pages(pages: Iterable[str]) -> dict:
+    """
+    parse_cu_text su un CU che arriva a pagine (cu_pdf.pdf_pages): lo stato
+    passa da una pagina all'altra, quindi una sanzione a cavallo di pagina
+    resta una; la testata è la prima che compare.
 
+    L'ordine delle prove è quello storico e conta (GARE DEL prima di tutto,
+    il risultato prima del ruolo, le squalifiche prima delle ammonizioni):
+    il classificatore salta solo le prove che non possono riuscire.
+    """
+    meta = {"cu_number": None, "cu_date": None}
     results, sanctions = [], []
     category = match_date = girone = giornata = None
     role = kind = detail = None
 
-    for raw in (text or "").splitlines():
-        line = re.sub(r"\s+", " ", raw).strip()
+    for raw in _lines(pages, meta):
+        line = " ".join(raw.split())
         if not line or RE_PAGE_ARTIFACT.match(line):
             continue
 
-        g = RE_GARE_DEL.search(line)
-        if g:
-            match_date = _clean_date(g.group(1))
-            continue
-
-        c = RE_CATEGORY.search(line)
-        if c and _mostly_upper(line) and not RE_RESULT.match(line):
-            category = c.group(1).upper().replace("  ", " ")
+        # Maiuscolo per i pre-filtri delle regex re.I. 'İ' è l'unica lettera
+        # che re.I accosta a una delle nostre ('I') senza che upper() ce la porti.
+        up = line.upper()
+        if "İ" in up:
+            up = up.replace("İ", "I")
+        if "GARE DEL" in up:
+            g = RE_GARE_DEL.search(line)
+            if g:
+                match_date = _clean_date(g.group(1))
+                continue
 
-        gi = RE_GIRONE.match(line)
-        if gi:
-            girone, giornata = gi.group(1), int(gi.group(2))
-            continue
+        lead = RE_LEAD.match(line)
+        # Le lettere delle parole chiave hanno un maiuscolo di un carattere
+        # solo: se la riga ne comincia con una, in `up` sta nella stessa posizione.
+        rule = _LEAD_RULES.get(up[:lead.end()]) if lead else None
+        upper = _mostly_upper(line)
+        r = RE_RESULT.match(line) if _maybe_result(line) else None
+        has_paren = "(" in line
+
+        # RE_CATEGORY è case-sensitive: prima una delle sue parole, letterale.
+        if upper and not r and ("ECCELLENZA" in line or "PROMOZIONE" in line
+                                or "CATEGORIA" in line or "UNDER" in line
+                                or "JUNIORES" in line or "COPPA" in line):
+            c = RE_CATEGORY.search(line)
+            if c:
+                category = c.group(1).upper().replace("  ", " ")
+
+        if rule is RE_GIRONE:
+            gi = RE_GIRONE.match(line)
+            if gi:
+                girone, giornata = gi.group(1), int(gi.group(2))
+                continue
 
-        r = RE_RESULT.match(line)
-        if r and not RE_PERSON.search(line):
+        if r and not (has_paren and RE_PERSON.search(line)):
             results.append({
                 "category": category, "match_date": match_date,
                 "girone": girone, "giornata": giornata,
@@ -133,32 +224,35 @@ def parse_cu_text(text: str) -> dict:
             })
             continue
 
-        ro = RE_ROLE.match(line)
-        if ro:
-            role, kind, detail = ro.group(1).upper(), None, None
-            continue
+        if rule is RE_ROLE:
+            ro = RE_ROLE.match(line)
+            if ro:
+                role, kind, detail = ro.group(1).upper(), None, None
+                continue
 
-        sd = RE_SQUAL_DATE.search(line)
-        if sd:
-            kind, detail = "SQUALIFICA_FINO_AL", _clean_date(sd.group(1))
-            continue
-        sg = RE_SQUAL_GARE.search(line)
-        if sg:
-            kind, detail = "SQUALIFICA_GARE", sg.group(1).upper()
-            continue
-        am = RE_AMMON.match(line)
-        if am:
-            kind = "AMMONIZIONE"
-            detail = am.group(1).upper() + ("_DIFFIDA" if am.group(2) else "")
-            continue
-        if RE_AMMENDA.match(line):
+        if "SQUALIFICA" in up:
+            sd = RE_SQUAL_DATE.search(line)
+            if sd:
+                kind, detail = "SQUALIFICA_FINO_AL", _clean_date(sd.group(1))
+                continue
+            sg = RE_SQUAL_GARE.search(line)
+            if sg:
+                kind, detail = "SQUALIFICA_GARE", sg.group(1).upper()
+                continue
+        if rule is RE_AMMON:
+            am = RE_AMMON.match(line)
+            if am:
+                kind = "AMMONIZIONE"
+                detail = am.group(1).upper() + ("_DIFFIDA" if am.group(2) else "")
+                continue
+        if rule is RE_AMMENDA and RE_AMMENDA.match(line):
             kind, detail = "AMMENDA", None
             continue
 
         # Tesserati: solo dentro una sanzione attiva e su righe in maiuscolo —
         # così "Per gravi proteste nei confronti dell'Arbitro (art. 36)" non
         # diventa un giocatore di nome "Arbitro".
-        if kind and _mostly_upper(line):
+        if kind and upper and has_paren:
             people = RE_PERSON.findall(line)
             if people:
                 for person, club in people:
@@ -173,7 +267,7 @@ def parse_cu_text(text: str) -> dict:
         # Riga di motivazione (prosa mista) dopo una squalifica: si attacca
         # all'ultima sanzione, non se ne crea una nuova.
         if (sanctions and kind and kind.startswith("SQUALIFICA")
-                and not _mostly_upper(line) and len(line) > 20):
+                and not upper and len(line) > 20):
             prev = sanctions[-1]
             prev["reason"] = ((prev["reason"] + " ") if prev["reason"] else "") + line
 
@@ -182,6 +276,88 @@ def parse_cu_text(text: str) -> dict:
 
 # --------------------------------------------------------------------- store
 
+# Memoria versionata (CUStore.export_facts/import_facts).
+FACTS_FORMAT = 2
+_SANCTION_COLS = ("cu_number", "cu_date", "category", "match_date", "role",
+                  "kind", "detail", "person", "club", "reason")
+_RESULT_COLS = ("cu_number", "cu_date", "category", "match_date", "girone",
+                "giornata", "home", "away", "home_goals", "away_goals", "note")
+_SANCTION_ORDER = "cu_number, club, person, kind, detail, match_date"
+_RESULT_ORDER = "cu_number, match_date, home, away, girone"
+
+
+def _sha256(raw: bytes) -> str:
+    import hashlib
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _week_of(cu_date) -> str:
+    """'2026-04-13' -> '2026-W16': la settimana del comunicato nomina il segmento."""
+    try:
+        year, week, _ = datetime.strptime(cu_date or "", "%Y-%m-%d").isocalendar()
+    except ValueError:
+        return "senza-data"
+    return f"{year}-W{week:02d}"
+
+
+def _read_manifest(path: Path) -> dict:
+    import json
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _club_filter(op: str, club, clubs, args: list) -> str:
+    """Filtro SQL per una società o per un gruppo; aggiunge i parametri ad `args`."""
+    if club:
+        args.append(club)
+        return f"{op} club = ? "
+    if clubs is not None:
+        clubs = list(dict.fromkeys(clubs))
+        args.extend(clubs)
+        return f"{op} club IN ({','.join('?' * len(clubs))}) " if clubs else f"{op} 0 "
+    return ""
+
+
+# Stato disciplinare materializzato, una riga per calciatore e società: ultimo
+# provvedimento, diffida in corso, fine della squalifica a termine più
+# lontana, presenze. diffidati() e presence_index() erano finestre e GROUP BY
+# sull'intera cu_sanctions a ogni chiamata; con più comitati e più stagioni
+# nel db il brief deve restare istantaneo, quindi lo stato si aggiorna
+# all'ingest, solo per chi il CU tocca, e la lettura è un lookup sulla chiave.
+# Solo calciatori (come le due query che sostituisce): un dirigente ammonito
+# non era in campo e la sua diffida non toglie nessuno dalla formazione.
+_PLAYER_ROWS = "(role = 'CALCIATORI' OR role IS NULL)"
+
+_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS player_discipline_state (
+        club TEXT NOT NULL, person TEXT NOT NULL,
+        last_kind TEXT, last_detail TEXT, last_match_date TEXT,
+        last_cu_number INTEGER,
+        diffida INTEGER NOT NULL DEFAULT 0,
+        suspended_until TEXT,
+        presences INTEGER NOT NULL DEFAULT 0,
+        match_days INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (club, person)
+    )"""
+
+# "Ultimo" = data gara più recente, poi numero di CU; a pari merito vince
+# l'ultimo letto (rowid), così l'esito non dipende dall'ordine del planner.
+_STATE_REFRESH = f"""
+    INSERT OR REPLACE INTO player_discipline_state
+    SELECT :club, :person, last.kind, last.detail, last.match_date, last.cu_number,
+           last.kind = 'AMMONIZIONE' AND last.detail LIKE '%DIFFIDA',
+           agg.until, agg.n, agg.days
+    FROM (SELECT kind, detail, match_date, cu_number FROM cu_sanctions
+          WHERE club = :club AND person = :person AND {_PLAYER_ROWS}
+          ORDER BY match_date DESC, cu_number DESC, rowid DESC LIMIT 1) AS last,
+         (SELECT MAX(CASE WHEN kind = 'SQUALIFICA_FINO_AL' THEN detail END) AS until,
+                 COUNT(*) AS n, COUNT(DISTINCT match_date) AS days
+          FROM cu_sanctions
+          WHERE club = :club AND person = :person AND {_PLAYER_ROWS}) AS agg"""
+
+
 class CUStore:
     """
     Accumulo dei fatti estratti dai CU in data/ob1.db (stesso file del
@@ -189,6 +365,10 @@ class CUStore:
 
     Il dedup è nel vincolo UNIQUE, non nella logica: ri-ingerire lo stesso CU
     non duplica niente — requisito per poter rilanciare l'ingestion senza paura.
+
+    I calciatori sanzionati entrano anche nell'anagrafe (`players`, vedi
+    entity_resolution): stessa connessione, così la presenza nei CU di un
+    record di mercato è una join e non un confronto di stringhe.
     """
 
     def __init__(self, path: Path | str = DEFAULT_DB):
@@ -220,29 +400,116 @@ class CUStore:
                     home_goals INTEGER, away_goals INTEGER, note TEXT,
                     UNIQUE(home, away, match_date, girone)
                 )""")
+            # Gli UNIQUE servono al dedup, non alle domande del brief: quelle
+            # sono per società, per tipo di sanzione, per data.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cu_s_club_person "
+                              "ON cu_sanctions(club, person)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cu_s_kind_detail "
+                              "ON cu_sanctions(kind, detail)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cu_s_kind_match "
+                              "ON cu_sanctions(kind, match_date)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cu_s_cu "
+                              "ON cu_sanctions(cu_date, cu_number)")
+            self.conn.execute(_STATE_TABLE)
+            # Memoria versionata (export_facts/import_facts): quali segmenti il
+            # db contiene già, e quali righe sono già in un segmento.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cu_facts_segments (
+                    file TEXT PRIMARY KEY, sha256 TEXT NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS cu_facts_marks (
+                    tbl TEXT NOT NULL, lo INTEGER NOT NULL, hi INTEGER NOT NULL
+                )""")
+            empty = self.conn.execute(
+                "SELECT NOT EXISTS (SELECT 1 FROM player_discipline_state)").fetchone()[0]
+            if empty:
+                # Db di prima della tabella di stato (o appena importato a
+                # mano): si ricostruisce una volta, poi va avanti per ingest.
+                self._refresh_state(self.conn.execute(
+                    f"SELECT DISTINCT club, person FROM cu_sanctions WHERE {_PLAYER_ROWS}"))
+        self.club_index = ClubIndex(self.conn)
+        if not len(self.club_index):
+            # Come lo stato: un db di prima dell'indice si indicizza una volta.
+            with self.conn:
+                self.club_index.add(r[0] for r in self.conn.execute(
+                    "SELECT DISTINCT club FROM cu_sanctions"))
+        # Stagione per tesserato (cu_timeline): dopo l'indice, che le serve
+        # per legare i nomi dei risultati a quelli della giustizia sportiva.
+        self.timeline = SeasonTimeline(self.conn)
+        if self.timeline.empty():
+            with self.conn:
+                self.timeline.rebuild()
+        self.players = PlayerRegistry(conn=self.conn) if resolution_enabled() else None
+
+    def _refresh_state(self, keys) -> None:
+        """Ricalcola lo stato dei (club, person) toccati. Va chiamato dentro
+        la transazione che ha scritto le loro sanzioni."""
+        self.conn.executemany(_STATE_REFRESH, [{"club": c, "person": p}
+                                               for c, p in dict.fromkeys(map(tuple, keys))])
+
+    def _update_timeline(self, sanctions, results) -> None:
+        """Righe appena scritte -> stagioni delle società toccate. Come
+        _refresh_state, dentro la transazione che le ha scritte."""
+        self.timeline.update(sanctions=[dict(zip(_SANCTION_COLS, row)) for row in sanctions],
+                             results=[dict(zip(_RESULT_COLS, row)) for row in results])
+
+    def _link_players(self, sanctions) -> int:
+        """Tesserati → anagrafe. Solo calciatori: dirigenti e tecnici no."""
+        if self.players is None:
+            return 0
+        n = 0
+        for s in sanctions:
+            if s.get("role") not in (None, "CALCIATORI"):
+                continue
+            if self.players.link_cu(s["person"], s["club"],
+                                    s.get("match_date") or s.get("cu_date") or ""):
+                n += 1
+        return n
 
     def ingest(self, parsed: dict) -> dict:
-        meta = parsed["meta"]
+        return self.ingest_many([parsed])
+
+    def ingest_many(self, parsed_list) -> dict:
+        """
+        Più CU in UNA transazione, a executemany: un backfill di stagione
+        sono centinaia di comunicati, e un commit per riga (o per CU) è il
+        grosso del tempo. Il dedup resta quello del vincolo UNIQUE.
+        """
+        sanctions, results = [], []
+        for parsed in parsed_list:
+            meta = parsed["meta"]
+            sanctions.extend(
+                (meta["cu_number"], meta["cu_date"], s["category"],
+                 s["match_date"] or "", s["role"], s["kind"],
+                 s["detail"] or "", s["person"], s["club"], s["reason"])
+                for s in parsed["sanctions"])
+            results.extend(
+                (meta["cu_number"], meta["cu_date"], r["category"],
+                 r["match_date"] or "", r["girone"] or "", r["giornata"],
+                 r["home"], r["away"], r["home_goals"], r["away_goals"], r["note"])
+                for r in parsed["results"])
         new_s = new_r = 0
         with self.conn:
-            for s in parsed["sanctions"]:
-                cur = self.conn.execute(
+            if sanctions:
+                new_s = self.conn.executemany(
                     "INSERT OR IGNORE INTO cu_sanctions VALUES (?,?,?,?,?,?,?,?,?,?)",
-                    (meta["cu_number"], meta["cu_date"], s["category"],
-                     s["match_date"] or "", s["role"], s["kind"],
-                     s["detail"] or "", s["person"], s["club"], s["reason"]))
-                new_s += cur.rowcount
-            for r in parsed["results"]:
-                cur = self.conn.execute(
+                    sanctions).rowcount
+            if results:
+                new_r = self.conn.executemany(
                     "INSERT OR IGNORE INTO cu_results VALUES (?,?,?,?,?,?,?,?,?,?,?)",
-                    (meta["cu_number"], meta["cu_date"], r["category"],
-                     r["match_date"] or "", r["girone"] or "", r["giornata"],
-                     r["home"], r["away"], r["home_goals"], r["away_goals"],
-                     r["note"]))
-                new_r += cur.rowcount
+                    results).rowcount
+            if new_s:
+                self._refresh_state((row[8], row[7]) for row in sanctions
+                                    if row[4] in (None, "CALCIATORI"))
+                self.club_index.add(row[8] for row in sanctions)
+            if new_s or new_r:
+                self._update_timeline(sanctions if new_s else [], results if new_r else [])
+        self._link_players({**s, "cu_date": p["meta"]["cu_date"]}
+                           for p in parsed_list for s in p["sanctions"])
         return {"new_sanctions": new_s, "new_results": new_r}
 
-    def squalificati(self, on_date: str, club: str = None) -> list:
+    def squalificati(self, on_date: str, club: str = None, clubs=None) -> list:
         """
         Chi non può giocare alla data data: per il brief del giovedì.
 
@@ -258,21 +525,24 @@ class CUStore:
           sempre già scontata, e mostrarla renderebbe il brief rumoroso.
           Il campo 'certezza' porta la distinzione fino al messaggio.
         """
-        args = [on_date, on_date, str(GARE_WINDOW_DAYS)]
+        # Il confronto di stringhe sulla data gara non cambia l'esito (è
+        # implicato da quello con julianday) ma lascia usare l'indice
+        # (kind, match_date) invece di calcolare julianday su ogni riga.
+        window = f"-{GARE_WINDOW_DAYS} days"
+        args = [on_date, on_date, window, on_date, str(GARE_WINDOW_DAYS)]
         q = ("SELECT person, club, kind, detail, reason, match_date, cu_number, role, "
              "  CASE WHEN kind='SQUALIFICA_FINO_AL' THEN 'certa' ELSE 'stimata' END "
              "  AS certezza "
              "FROM cu_sanctions WHERE ("
              "  (kind='SQUALIFICA_FINO_AL' AND detail >= ?) OR "
              "  (kind='SQUALIFICA_GARE' AND match_date != '' "
+             "     AND match_date >= date(?, ?) "
              "     AND julianday(?) - julianday(match_date) <= CAST(? AS INTEGER))) ")
-        if club:
-            q += "AND club = ? "
-            args.append(club)
+        q += _club_filter("AND", club, clubs, args)
         q += "ORDER BY club, person"
         return [dict(r) for r in self.conn.execute(q, args)]
 
-    def diffidati(self, club: str = None) -> list:
+    def diffidati(self, club: str = None, clubs=None) -> list:
         """
         Chi salta la prossima al primo cartellino. È l'informazione che il DS
         non ha da nessun'altra parte e che cambia una scelta di formazione.
@@ -280,18 +550,16 @@ class CUStore:
         Vale solo l'ULTIMO provvedimento di un tesserato: chi è stato diffidato
         e poi squalificato ha già scontato la diffida, e continuare a
         elencarlo sarebbe un falso positivo — quello che distrugge la fiducia
-        in un alert automatico.
+        in un alert automatico. L'ultimo provvedimento è già nello stato
+        materializzato (player_discipline_state): per società è un lookup.
+
+        `clubs` (come in squalificati) chiede più società in una query sola:
+        è ciò che usa il brief di un comitato intero (brief.build_briefs).
         """
-        q = ("SELECT person, club, detail, match_date, cu_number FROM ("
-             "  SELECT *, ROW_NUMBER() OVER ("
-             "    PARTITION BY person, club ORDER BY match_date DESC, cu_number DESC"
-             "  ) AS rn FROM cu_sanctions"
-             "  WHERE role='CALCIATORI' OR role IS NULL"
-             ") WHERE rn = 1 AND kind='AMMONIZIONE' AND detail LIKE '%DIFFIDA' ")
+        q = ("SELECT person, club, last_detail AS detail, last_match_date AS match_date, "
+             "last_cu_number AS cu_number FROM player_discipline_state WHERE diffida = 1 ")
         args = []
-        if club:
-            q += "AND club = ? "
-            args.append(club)
+        q += _club_filter("AND", club, clubs, args)
         q += "ORDER BY club, person"
         return [dict(r) for r in self.conn.execute(q, args)]
 
@@ -313,25 +581,24 @@ class CUStore:
         punto solo, prima della query esatta — non dentro ogni query.
 
         Ritorna (nome_esatto, candidati):
-          - match univoco (esatto a meno di maiuscole/spazi, o per
-            contenimento in una direzione o nell'altra) -> (nome, [])
-          - nessun match o match ambiguo -> (None, candidati) — candidati è
-            ciò che si avvicina, o l'intera lista se non si avvicina niente.
-            Serve a dire "non trovato" invece di restituire in silenzio
-            uno squalificati() vuoto che sembra un "tutto ok".
+          - match univoco (esatto a meno di maiuscole/spazi, stessa chiave a
+            meno di sigle societarie, anno e accenti, contenimento a parole)
+            -> (nome, [])
+          - refuso, nessun match o match ambiguo -> (None, candidati) —
+            candidati è ciò che si avvicina, dal più simile, o l'inizio
+            dell'elenco se non si avvicina niente. Un refuso si conferma a
+            mano ("MONTICELLO" è a un passo da "MONTICELLI", un'altra
+            società). Serve a dire "non trovato" invece di restituire in
+            silenzio uno squalificati() vuoto che sembra un "tutto ok".
+
+        Il confronto non scorre più tutte le società: passa dall'indice a
+        trigrammi (src/club_index.py), aggiornato a ogni ingest.
         """
-        if not name:
-            return None, []
-        target = " ".join(name.split()).upper()
-        clubs = self.clubs()
-        exact = [c for c in clubs if " ".join(c.split()).upper() == target]
-        if len(exact) == 1:
-            return exact[0], []
-        contains = [c for c in clubs
-                    if target in c.upper() or c.upper() in target]
-        if len(contains) == 1:
-            return contains[0], []
-        return None, sorted(set(contains) or clubs)
+        return self.club_index.resolve(name)
+
+    def club_candidates(self, name: str, limit: int = 10) -> list:
+        """[(società, somiglianza 0..1)] dal più simile: per chi deve scegliere."""
+        return self.club_index.ranked(name, limit=limit)
 
     def presence_index(self, club: str = None) -> list:
         """
@@ -339,16 +606,34 @@ class CUStore:
         Non è il tabellino — è il segnale sistematico che il tabellino
         pubblico, a questo livello, non esiste (ARCH-003 §3).
         """
-        q = ("SELECT person, club, COUNT(*) AS provvedimenti, "
-             "COUNT(DISTINCT match_date) AS giornate_distinte "
-             "FROM cu_sanctions WHERE role IS NULL OR role='CALCIATORI' ")
+        q = ("SELECT person, club, presences AS provvedimenti, "
+             "match_days AS giornate_distinte FROM player_discipline_state ")
         args = []
         if club:
-            q += "AND club = ? "
+            q += "WHERE club = ? "
             args.append(club)
-        q += "GROUP BY person, club ORDER BY giornate_distinte DESC, provvedimenti DESC"
+        q += "ORDER BY giornate_distinte DESC, provvedimenti DESC, person, club"
         return [dict(r) for r in self.conn.execute(q, args)]
 
+    def season_timeline(self, club: str = None, person: str = None, season: str = None,
+                        min_appearances: int = 0, limit: int = None) -> list:
+        """
+        Per (società, tesserato, stagione): presenze (limite inferiore: gare
+        con un provvedimento), di cui ritrovate fra i risultati, giornate
+        saltate per squalifica, gare della squadra. Materializzato
+        all'ingest (cu_timeline): lo scouting legge un indice.
+        """
+        return self.timeline.season(club=club, person=person, season=season,
+                                    min_appearances=min_appearances, limit=limit)
+
+    def timeline_events(self, person: str, club: str = None) -> list:
+        """Gara per gara: 'presenza' e 'squalificato', con girone, giornata, avversario."""
+        return self.timeline.events(person, club=club)
+
+    def fixture_density(self, club: str = None, season: str = None) -> list:
+        """Gare giocate per stagione e categoria, e gare a settimana."""
+        return self.timeline.density(club=club, season=season)
+
     # --------------------------------------------------------- persistenza
     # Il database sta nel .gitignore, e giustamente: è un contenitore, si
     # rigenera. I FATTI estratti no — sono la memoria disciplinare di una
@@ -356,50 +641,151 @@ class CUStore:
     # l'ultimo comunicato letto, cioè diventa sbagliata senza sembrarlo.
     # Quindi si versiona il JSON, non il .db: si legge in un diff, comprime
     # bene in git, e non dipende dalla versione di SQLite che lo ha scritto.
+    #
+    # Il JSON è a segmenti: data/cu_facts.json è il manifest (file e sha256
+    # di ogni segmento), i fatti stanno in data/cu_facts/<settimana>.<hash>.json
+    # e un segmento scritto non si tocca più. Prima ogni giro reinseriva
+    # tutta la stagione riga per riga e la riserializzava per intero: il
+    # costo d'avvio del brief cresceva con il campionato. Ora l'import legge
+    # solo i segmenti che il db non ha ancora, l'export scrive solo le righe
+    # che non stanno ancora in un segmento. Il confine è una filigrana sui
+    # rowid (cu_facts_marks): le tabelle non cancellano mai, quindi i rowid
+    # crescono e basta.
+
+    def _uncovered(self, table: str, order: str) -> list:
+        return [dict(r) for r in self.conn.execute(
+            f"SELECT * FROM {table} WHERE NOT EXISTS (SELECT 1 FROM cu_facts_marks m "
+            f"WHERE m.tbl = ? AND {table}.rowid BETWEEN m.lo AND m.hi) ORDER BY {order}",
+            (table,))]
+
+    def _max_rowid(self, table: str) -> int:
+        return self.conn.execute(f"SELECT IFNULL(MAX(rowid), 0) FROM {table}").fetchone()[0]
+
+    def _totals(self) -> dict:
+        return {"sanctions": self.conn.execute("SELECT COUNT(*) FROM cu_sanctions").fetchone()[0],
+                "results": self.conn.execute("SELECT COUNT(*) FROM cu_results").fetchone()[0]}
 
     def export_facts(self, path: Path | str) -> dict:
+        """
+        Scrive un segmento per settimana (del CU) con le sole righe nuove e
+        aggiorna il manifest. Nessuna riga nuova, nessun file toccato: il
+        commit del workflow resta vuoto. Ritorna i totali del db.
+        """
         import json
 
-        data = {
+        manifest_path = Path(path)
+        manifest = _read_manifest(manifest_path)
+        sanctions = self._uncovered("cu_sanctions", _SANCTION_ORDER)
+        results = self._uncovered("cu_results", _RESULT_ORDER)
+        if not sanctions and not results and manifest.get("format") == FACTS_FORMAT:
+            return self._totals()
+
+        weeks: dict = {}
+        for key, rows in (("sanctions", sanctions), ("results", results)):
+            for row in rows:
+                weeks.setdefault(_week_of(row.get("cu_date")), {"sanctions": [], "results": []})[
+                    key].append(row)
+        seg_dir = manifest_path.with_suffix("")
+        seg_dir.mkdir(parents=True, exist_ok=True)
+        segments = list(manifest.get("segments", []))
+        known = {seg["file"] for seg in segments}
+        added = []
+        for week, rows in sorted(weeks.items()):
+            raw = (json.dumps(rows, ensure_ascii=False, indent=1) + "\n").encode("utf-8")
+            digest = _sha256(raw)
+            name = f"{seg_dir.name}/{week}.{digest[:12]}.json"
+            (manifest_path.parent / name).write_bytes(raw)
+            if name not in known:
+                seg = {"file": name, "sha256": digest, "sanctions": len(rows["sanctions"]),
+                       "results": len(rows["results"])}
+                segments.append(seg)
+                added.append(seg)
+
+        manifest = {
             "_meta": {
-                "purpose": ("Fatti estratti dai Comunicati Ufficiali LND. "
-                            "Rigenerabile con scripts/brief_giovedi.py; "
+                "purpose": ("Fatti estratti dai Comunicati Ufficiali LND, a segmenti "
+                            "(data/cu_facts/). Rigenerabile con scripts/brief_giovedi.py; "
                             "versionato perché e' memoria, non cache."),
                 "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             },
-            "sanctions": [dict(r) for r in self.conn.execute(
-                "SELECT * FROM cu_sanctions ORDER BY cu_number, club, person")],
-            "results": [dict(r) for r in self.conn.execute(
-                "SELECT * FROM cu_results ORDER BY cu_number, match_date, home")],
+            "format": FACTS_FORMAT,
+            "segments": segments,
         }
-        p = Path(path)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(data, ensure_ascii=False, indent=1) + "\n",
-                     encoding="utf-8")
-        return {"sanctions": len(data["sanctions"]), "results": len(data["results"])}
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1) + "\n",
+                       encoding="utf-8")
+        tmp.replace(manifest_path)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cu_facts_segments VALUES (?, ?)",
+                [(seg["file"], seg["sha256"]) for seg in added])
+            for table in ("cu_sanctions", "cu_results"):
+                self.conn.execute("DELETE FROM cu_facts_marks WHERE tbl = ?", (table,))
+                self.conn.execute("INSERT INTO cu_facts_marks VALUES (?, 0, ?)",
+                                  (table, self._max_rowid(table)))
+        return self._totals()
 
     def import_facts(self, path: Path | str) -> dict:
-        """Ricostruisce il db dai fatti versionati. Idempotente come l'ingest."""
+        """
+        Carica i segmenti del manifest che il db non ha ancora, a executemany
+        e in una transazione sola. Idempotente come l'ingest. Un segmento che
+        non corrisponde al suo sha256 è un errore, non un file da saltare:
+        una memoria corrotta in silenzio è peggio di un brief che non parte.
+        """
         import json
 
-        p = Path(path)
-        if not p.exists():
-            return {"sanctions": 0, "results": 0}
-        data = json.loads(p.read_text(encoding="utf-8"))
-        cols_s = ("cu_number", "cu_date", "category", "match_date", "role",
-                  "kind", "detail", "person", "club", "reason")
-        cols_r = ("cu_number", "cu_date", "category", "match_date", "girone",
-                  "giornata", "home", "away", "home_goals", "away_goals", "note")
+        manifest_path = Path(path)
+        manifest = _read_manifest(manifest_path)
+        if manifest.get("format") != FACTS_FORMAT:
+            # Formato di prima: tutto inline. Si carica intero; il primo
+            # export lo riscrive a segmenti.
+            batches = [manifest] if manifest else []
+            loaded = []
+        else:
+            have = dict(self.conn.execute("SELECT file, sha256 FROM cu_facts_segments"))
+            batches, loaded = [], []
+            for seg in manifest.get("segments", []):
+                if have.get(seg["file"]) == seg["sha256"]:
+                    continue
+                raw = (manifest_path.parent / seg["file"]).read_bytes()
+                if _sha256(raw) != seg["sha256"]:
+                    raise ValueError(f"{seg['file']}: sha256 diverso dal manifest")
+                batches.append(json.loads(raw))
+                loaded.append(seg)
+
+        sanctions = [tuple(row.get(c) for c in _SANCTION_COLS)
+                     for b in batches for row in b.get("sanctions", [])]
+        results = [tuple(row.get(c) for c in _RESULT_COLS)
+                   for b in batches for row in b.get("results", [])]
         n_s = n_r = 0
         with self.conn:
-            for row in data.get("sanctions", []):
-                n_s += self.conn.execute(
-                    f"INSERT OR IGNORE INTO cu_sanctions VALUES ({','.join('?' * 10)})",
-                    tuple(row.get(c) for c in cols_s)).rowcount
-            for row in data.get("results", []):
-                n_r += self.conn.execute(
-                    f"INSERT OR IGNORE INTO cu_results VALUES ({','.join('?' * 11)})",
-                    tuple(row.get(c) for c in cols_r)).rowcount
+            for table, rows, key in (("cu_sanctions", sanctions, "s"),
+                                     ("cu_results", results, "r")):
+                if not rows:
+                    continue
+                before = self._max_rowid(table)
+                n = self.conn.executemany(
+                    f"INSERT OR IGNORE INTO {table} VALUES ({','.join('?' * len(rows[0]))})",
+                    rows).rowcount
+                if n and loaded:
+                    # Le righe appena entrate stanno già in un segmento: non
+                    # vanno riesportate.
+                    self.conn.execute("INSERT INTO cu_facts_marks VALUES (?, ?, ?)",
+                                      (table, before + 1, self._max_rowid(table)))
+                if key == "s":
+                    n_s = n
+                else:
+                    n_r = n
+            self.conn.executemany("INSERT OR REPLACE INTO cu_facts_segments VALUES (?, ?)",
+                                  [(seg["file"], seg["sha256"]) for seg in loaded])
+            if n_s:
+                self._refresh_state((row[8], row[7]) for row in sanctions
+                                    if row[4] in (None, "CALCIATORI"))
+                self.club_index.add(row[8] for row in sanctions)
+            if n_s or n_r:
+                self._update_timeline(sanctions if n_s else [], results if n_r else [])
+        if n_s:
+            self._link_players(dict(zip(_SANCTION_COLS, row)) for row in sanctions)
         return {"sanctions": n_s, "results": n_r}
 
     def close(self):
@@ -410,18 +796,9 @@ class CUStore:
 
 def read_pdf(source: str) -> str:
     """Testo di un CU da percorso locale o URL. I CU LND sono PDF con testo
-    nativo: niente OCR, niente dipendenze pesanti."""
-    import pypdf
-
-    if source.startswith(("http://", "https://")):
-        import io
-        import urllib.request
-        req = urllib.request.Request(source, headers={"User-Agent": "Mozilla/5.0"})
-        with urllib.request.urlopen(req, timeout=30) as r:
-            handle = io.BytesIO(r.read())
-    else:
-        handle = source
-    return "\n".join(p.extract_text() or "" for p in pypdf.PdfReader(handle).pages)
+    nativo: niente OCR, niente dipendenze pesanti. Solo le pagine utili al
+    parser (vedi cu_pdf): per lo stream pagina per pagina c'è pdf_pages."""
+    return "\n".join(pdf_pages(source))
 
 
 def main():
@@ -433,7 +810,7 @@ def main():
     ap.add_argument("--dry-run", action="store_true", help="stampa e basta")
     args = ap.parse_args()
 
-    parsed = parse_cu_text(read_pdf(args.source))
+    parsed = parse_cu_pages(pdf_pages(args.source))
     meta = parsed["meta"]
     print(f"CU {meta['cu_number']} del {meta['cu_date']}: "
           f"{len(parsed['results'])} risultati, {len(parsed['sanctions'])} sanzioni")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+ARCH-003 — Testo dei Comunicati Ufficiali dal PDF, pagina per pagina.
+
+Un CU regionale supera spesso le cento pagine e quasi tutto il tempo di un
+ingest è pypdf che estrae testo. Prima si estraeva tutto in fila, si univa
+in una stringa sola e solo dopo partiva il parser. Ora:
+
+  - le pagine vanno a blocchi a un pool di processi, e il testo torna
+    nell'ordine delle pagine mentre gli altri blocchi sono ancora in corso:
+    la macchina a stati (cu_parser.parse_cu_pages) consuma pagina per
+    pagina, con al più `WINDOW` blocchi per worker in memoria;
+  - una pagina senza nessun marcatore che il parser sappia usare (date di
+    gara, gironi, punteggi, ruoli, sanzioni, tesserati in maiuscolo) non
+    torna affatto: sono circolari, calendari, prose regolamentari;
+  - il testo delle pagine utili resta in data/cu_text/<sha256>…jsonl.gz:
+    lo stesso PDF, riletto per un backfill o un re-ingest, non si estrae
+    di nuovo. La chiave è il contenuto, non l'URL — un comitato che
+    ripubblica lo stesso file sotto un altro nome colpisce la cache.
+
+Il pre-scan guarda il testo della pagina dentro il worker, non lo stream
+grezzo del PDF: nei CU il testo è codificato nei font, e i marcatori nello
+stream non si leggono. Il risparmio è a valle (niente trasporto, cache,
+parsing delle pagine vuote), l'estrazione la fa comunque il pool.
+
+Configurazione (environment):
+    OB1_PDF_WORKERS=1     estrazione seriale, nel processo (default: i core)
+    OB1_CU_TEXT_CACHE=0   niente cache del testo
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_pdf -v
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+TEXT_CACHE = Path("data/cu_text")
+
+# Va alzato quando cambia RE_PAGE_MARKERS: la cache conserva solo le pagine
+# che il pre-scan di allora ha tenuto.
+CACHE_VERSION = 1
+
+# Pagine per blocco spedito a un worker, e blocchi in volo per worker: il
+# primo ammortizza l'apertura del PDF, il secondo tiene limitata la memoria
+# quando il consumatore è più lento dell'estrazione.
+PAGE_CHUNK = 4
+WINDOW = 2
+
+# Tutto ciò che può cambiare lo stato di cu_parser: testata, date di gara,
+# categorie, gironi, ruoli, sanzioni, tesserati "COGNOME (SOCIETA')" e
+# punteggi "N - N". Una pagina senza niente di questo può solo allungare la
+# motivazione dell'ultima squalifica con prosa che non le appartiene più.
+RE_PAGE_MARKERS = re.compile(
+    r"(?i:COMUNICATO\s+UFFICIALE|GARE\s+DEL|GIRONE|SQUALIFICA|AMMONIZIONE|AMMENDA)"
+    r"|CALCIATORI|DIRIGENTI|ALLENATORI|MASSAGGIATORI|ASSISTENTI"
+    r"|ECCELLENZA|PROMOZIONE|CATEGORIA|UNDER|JUNIORES|COPPA"
+    r"|[A-ZÀ-ÖØ-Þ]{2}\s*\(|\d\s*-\s*\d")
+
+
+def text_cache_enabled() -> bool:
+    return os.getenv("OB1_CU_TEXT_CACHE", "1") != "0"
+
+
+def default_workers() -> int:
+    try:
+        return max(1, int(os.getenv("OB1_PDF_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def has_markers(text: str) -> bool:
+    return bool(text) and RE_PAGE_MARKERS.search(text) is not None
+
+
+def fetch_pdf(source: str) -> bytes:
+    """Byte del PDF da percorso locale o URL."""
+    if source.startswith(("http://", "https://")):
+        import urllib.request
+        req = urllib.request.Request(source, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(req, timeout=30) as r:
+            return r.read()
+    return Path(source).read_bytes()
+
+
+# ------------------------------------------------------------------ worker
+_STATE: Dict[str, object] = {}
+
+
+def _reader(path: str, digest: str):
+    """Un PdfReader per processo, riaperto solo quando cambia il PDF."""
+    if _STATE.get("digest") != digest:
+        import pypdf
+        _STATE["digest"], _STATE["reader"] = digest, pypdf.PdfReader(path)
+    return _STATE["reader"]
+
+
+def _extract(job) -> List[Optional[str]]:
+    """Testo delle pagine [start, stop); None per quelle scartate dal pre-scan."""
+    path, digest, start, stop, prescan = job
+    pages = _reader(path, digest).pages
+    out = []
+    for i in range(start, stop):
+        text = pages[i].extract_text() or ""
+        out.append(text if not prescan or has_markers(text) else None)
+    return out
+
+
+def _in_order(pool: Executor, jobs: list, window: int) -> Iterator[List[Optional[str]]]:
+    """Come pool.map, ma con al più `window` blocchi in volo: chi consuma
+    piano non si ritrova tutto il PDF in memoria."""
+    todo = iter(jobs)
+    pending = deque(pool.submit(_extract, job) for job in islice(todo, window))
+    while pending:
+        done = pending.popleft().result()
+        for job in islice(todo, 1):
+            pending.append(pool.submit(_extract, job))
+        yield done
+
+
+# ------------------------------------------------------------------- cache
+def _cache_path(cache_dir: Path, digest: str, prescan: bool) -> Path:
+    return Path(cache_dir) / f"{digest}.{'m' if prescan else 'a'}{CACHE_VERSION}.jsonl.gz"
+
+
+def _cached_pages(path: Path) -> Iterator[str]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            yield json.loads(line)
+
+
+# --------------------------------------------------------------- pipeline
+def pdf_pages(source: str, workers: int = None, prescan: bool = True,
+              cache_dir: Path | str = TEXT_CACHE, pool: Executor = None) -> Iterator[str]:
+    """
+    Il testo delle pagine di un CU, nell'ordine, una alla volta.
+
+    `pool` permette a chi ingerisce più PDF di fila di riusare gli stessi
+    processi; senza, se ne apre uno per PDF (o nessuno, con un worker solo
+    o un PDF di un blocco). La cache si scrive solo se il PDF è stato letto
+    fino in fondo: un generatore abbandonato a metà non lascia file tronchi.
+    """
+    data = fetch_pdf(source)
+    digest = hashlib.sha256(data).hexdigest()
+    cached = _cache_path(cache_dir, digest, prescan) if text_cache_enabled() else None
+    if cached is not None and cached.exists():
+        yield from _cached_pages(cached)
+        return
+
+    import pypdf
+
+    n_pages = len(pypdf.PdfReader(io.BytesIO(data)).pages)
+    # I worker aprono il PDF da disco: si spedisce un percorso, non i byte.
+    remote = source.startswith(("http://", "https://"))
+    path = source
+    if remote:
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+    jobs = [(path, digest, i, min(i + PAGE_CHUNK, n_pages), prescan)
+            for i in range(0, n_pages, PAGE_CHUNK)]
+    workers = workers or default_workers()
+
+    tmp = sink = None
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(cached.name + ".tmp")
+        sink = gzip.open(tmp, "wt", encoding="utf-8")
+    own_pool = None
+    try:
+        if pool is None and workers > 1 and len(jobs) > 1:
+            pool = own_pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        if pool is None:
+            chunks = map(_extract, jobs)
+        else:
+            chunks = _in_order(pool, jobs, WINDOW * workers)
+        for chunk in chunks:
+            for text in chunk:
+                if text is None:
+                    continue
+                if sink is not None:
+                    sink.write(json.dumps(text, ensure_ascii=False) + "\n")
+                yield text
+        if sink is not None:
+            sink.close()
+            sink = None
+            os.replace(tmp, cached)
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown(cancel_futures=True)
+        if sink is not None:
+            sink.close()
+            tmp.unlink(missing_ok=True)
+        if remote:
+            Path(path).unlink(missing_ok=True)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+ARCH-003 — Stagione per tesserato dai Comunicati Ufficiali: presenze,
+giornate saltate, calendario della società.
+
+presence_index conta i provvedimenti di un tesserato: un ammonito era in
+campo. È un segnale, ma non dice QUANDO né rispetto a COSA — quante gare ha
+giocato la sua squadra, quante ne ha saltate per squalifica. cu_results ha
+già ogni gara con data, girone e giornata; qui le due tabelle si incrociano
+una volta, all'ingest, e la risposta resta scritta:
+
+  - club_fixtures: il calendario giocato di ogni squadra, per nome ESATTO
+    della squadra nei risultati e categoria. "POL. SAN MAURO" e "US SAN
+    MAURO", "VIRTUS 1907" e "VIRTUS 2015" sono società diverse con la stessa
+    chiave (club_index.club_key): un calendario a testa. La chiave fa solo
+    da ponte fra il tabellone dei risultati e la giustizia sportiva, che
+    non scrivono la società allo stesso modo ("VIANESE CALCIO" / "VIANESE
+    CALCIO SSDARL") — e solo quando da una parte e dall'altra c'è un solo
+    nome con quella chiave. Altrimenti niente calendario, non quello di
+    un'altra società;
+  - club_season: gare, prima e ultima data, gare a settimana — la densità
+    del calendario di una squadra in una stagione e categoria;
+  - player_timeline: gli eventi di un tesserato, uno per gara: 'presenza'
+    (provvedimento in quella gara: era in distinta, quindi c'era) e
+    'squalificato' (gara della sua squadra che cade dentro una squalifica);
+  - player_season: i conti per (società, tesserato, stagione), con gli
+    indici che servono allo scouting ("chi ha giocato almeno N gare").
+
+Le presenze sono un LIMITE INFERIORE: chi gioca pulito non compare mai nei
+CU. I minuti non esistono a questo livello — il CU non li scrive e un
+tabellino pubblico non c'è. Le giornate saltate si contano sulle gare che
+il db conosce: una squalifica a giornate si sconta sulle successive gare
+della sua categoria, una a termine su quelle fino alla data. Se i risultati
+non sono ancora stati letti, il conto è più basso, mai inventato.
+
+Si ricalcola solo la società che il lotto tocca (per sanzioni o risultati),
+dentro la transazione dell'ingest: il costo segue la società, non il db.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_timeline -v
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from src.club_index import club_key
+except ImportError:  # layout PYTHONPATH=src
+    from club_index import club_key
+
+# Provvedimenti che mettono un tesserato in campo (o in distinta) in quella
+# gara. L'ammenda no: a un calciatore la dà il giudice per fatti anche fuori
+# dal campo, e nei CU è quasi sempre della società.
+PRESENCE_KINDS = ("AMMONIZIONE", "SQUALIFICA_GARE", "SQUALIFICA_FINO_AL")
+
+# "SQUALIFICA PER DUE GARE EFFETTIVE" -> detail 'DUE'.
+_GARE = {"UNA": 1, "UN": 1, "DUE": 2, "TRE": 3, "QUATTRO": 4, "CINQUE": 5, "SEI": 6,
+         "SETTE": 7, "OTTO": 8, "NOVE": 9, "DIECI": 10}
+
+_IN_CHUNK = 500
+
+
+def is_iso_date(value) -> bool:
+    """
+    Il parser lascia passare com'è una data che non sa leggere ("GARE DEL
+    11/4" -> '11/4'): il CU si ingerisce lo stesso, ma nella stagione quella
+    riga non ha un posto. Si salta, come fa _week_of con "senza-data".
+    """
+    try:
+        date.fromisoformat(value or "")
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def season_of(match_date: str) -> str:
+    """'2026-04-11' -> '2025-26': la stagione parte il 1° luglio."""
+    year, month = int(match_date[:4]), int(match_date[5:7])
+    start = year if month >= 7 else year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def gare_count(detail: str) -> int:
+    """Giornate di una SQUALIFICA_GARE; 0 se il CU le scrive in un modo che non conosciamo."""
+    word = (detail or "").strip().upper()
+    if word.isdigit():
+        return int(word)
+    return _GARE.get(word, 0)
+
+
+def _per_week(first: str, last: str, n: int) -> float:
+    weeks = (date.fromisoformat(last) - date.fromisoformat(first)).days / 7 + 1
+    return round(n / weeks, 2)
+
+
+class SeasonTimeline:
+    """
+    Le quattro tabelle, sulla connessione di CUStore. `update` va chiamato
+    dentro la transazione dell'ingest, dopo ClubIndex.add: per sapere quali
+    società ricalcolare quando arrivano solo risultati serve la chiave dei
+    nomi già indicizzati.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        with self.conn:
+            # Tabelle di un db in cui il calendario era per chiave: sono tutte
+            # derivate, si buttano e CUStore le ricostruisce (empty()).
+            cols = {r[1] for r in self.conn.execute("PRAGMA table_info(club_fixtures)")}
+            if cols and "team" not in cols:
+                for table in ("club_fixtures", "club_season", "player_timeline",
+                              "player_season"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS club_fixtures (
+                    team TEXT NOT NULL, category TEXT NOT NULL DEFAULT '',
+                    match_date TEXT NOT NULL, opponent TEXT NOT NULL,
+                    team_key TEXT NOT NULL,
+                    girone TEXT, giornata INTEGER, venue TEXT NOT NULL,
+                    PRIMARY KEY (team, category, match_date, opponent)
+                ) WITHOUT ROWID""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_club_fixtures_key "
+                              "ON club_fixtures(team_key)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS club_season (
+                    team TEXT NOT NULL, season TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '', team_key TEXT NOT NULL,
+                    fixtures INTEGER NOT NULL, first_match TEXT, last_match TEXT,
+                    per_week REAL,
+                    PRIMARY KEY (team, season, category)
+                ) WITHOUT ROWID""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_timeline (
+                    club TEXT NOT NULL, person TEXT NOT NULL, season TEXT NOT NULL,
+                    match_date TEXT NOT NULL, event TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '',
+                    girone TEXT, giornata INTEGER, opponent TEXT,
+                    kind TEXT, detail TEXT,
+                    PRIMARY KEY (club, person, match_date, event, category)
+                ) WITHOUT ROWID""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_player_timeline_person "
+                              "ON player_timeline(person, match_date)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_season (
+                    club TEXT NOT NULL, person TEXT NOT NULL, season TEXT NOT NULL,
+                    appearances INTEGER NOT NULL,
+                    matched INTEGER NOT NULL,
+                    missed INTEGER NOT NULL,
+                    club_fixtures INTEGER NOT NULL,
+                    first_match TEXT, last_match TEXT,
+                    PRIMARY KEY (club, person, season)
+                ) WITHOUT ROWID""")
+            # Le domande dello scouting: per stagione dai più presenti, e per
+            # nome del tesserato su tutte le società in cui è passato.
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_player_season_rank "
+                              "ON player_season(season, appearances DESC)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_player_season_person "
+                              "ON player_season(person)")
+
+    def empty(self) -> bool:
+        return self.conn.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM club_fixtures) "
+            "AND NOT EXISTS (SELECT 1 FROM player_season)").fetchone()[0]
+
+    # ------------------------------------------------------------ scritture
+    def _add_fixtures(self, results: Iterable[dict]) -> set:
+        """Due righe di calendario per risultato, una per squadra. Ritorna le squadre toccate."""
+        rows, teams = [], set()
+        for r in results:
+            if not is_iso_date(r.get("match_date")):
+                continue
+            home, away = r["home"], r["away"]
+            cat, day = r.get("category") or "", r["match_date"]
+            rows.append((home, cat, day, away, club_key(home), r.get("girone"),
+                         r.get("giornata"), "casa"))
+            rows.append((away, cat, day, home, club_key(away), r.get("girone"),
+                         r.get("giornata"), "trasferta"))
+            teams.update((home, away))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO club_fixtures VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return teams
+
+    def _refresh_club_season(self, teams: Iterable[str]) -> None:
+        rows = []
+        for team in teams:
+            by: Dict[tuple, List[str]] = {}
+            for cat, day in self.conn.execute(
+                    "SELECT category, match_date FROM club_fixtures WHERE team = ?", (team,)):
+                by.setdefault((season_of(day), cat), []).append(day)
+            for (season, cat), days in by.items():
+                days = sorted(set(days))
+                rows.append((team, season, cat, club_key(team), len(days),
+                             days[0], days[-1], _per_week(days[0], days[-1], len(days))))
+            self.conn.execute("DELETE FROM club_season WHERE team = ?", (team,))
+        self.conn.executemany(
+            "INSERT INTO club_season VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def team_for(self, club: str) -> Optional[str]:
+        """
+        La squadra dei risultati di una società: lo stesso nome, se gioca
+        con quello; altrimenti l'unica squadra con la sua chiave, purché
+        anche fra le società della giustizia sportiva quella chiave sia di
+        una sola. Due candidati da una parte o dall'altra: None.
+        """
+        if self.conn.execute("SELECT 1 FROM club_fixtures WHERE team = ? LIMIT 1",
+                             (club,)).fetchone():
+            return club
+        key = club_key(club)
+        teams = [r[0] for r in self.conn.execute(
+            "SELECT DISTINCT team FROM club_fixtures WHERE team_key = ? LIMIT 2", (key,))]
+        if len(teams) != 1:
+            return None
+        others = self.conn.execute(
+            "SELECT COUNT(*) FROM club_names WHERE key = ? AND flat != ?",
+            (key, " ".join(club.split()).upper())).fetchone()[0]
+        return teams[0] if not others else None
+
+    def _clubs_for(self, keys: set) -> set:
+        """Le società della giustizia sportiva che hanno una di queste chiavi."""
+        keys, clubs = sorted(keys), set()
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            clubs.update(r[0] for r in self.conn.execute(
+                f"SELECT club FROM club_names WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk))
+        return clubs
+
+    def _refresh_club(self, club: str) -> None:
+        """Eventi e conti di stagione di tutti i calciatori di una società."""
+        calendar: Dict[tuple, list] = {}         # (stagione, categoria) -> gare in ordine
+        team = self.team_for(club)
+        for cat, day, opp, girone, giornata in self.conn.execute(
+                "SELECT category, match_date, opponent, girone, giornata FROM club_fixtures "
+                "WHERE team = ? ORDER BY match_date, category, opponent", (team,)):
+            calendar.setdefault((season_of(day), cat), []).append((day, cat, opp, girone, giornata))
+
+        def fixtures(season: str, category: Optional[str]) -> list:
+            # La categoria del provvedimento, se il calendario la conosce;
+            # altrimenti tutte le gare della stagione, una per data.
+            own = calendar.get((season, category or ""))
+            if own:
+                return own
+            merged = {}
+            for (s, _c), games in sorted(calendar.items()):
+                if s == season:
+                    for g in games:
+                        merged.setdefault(g[0], g)
+            return [merged[d] for d in sorted(merged)]
+
+        events: Dict[tuple, tuple] = {}
+        pools: Dict[tuple, set] = {}
+        for person, cat, day, kind, detail in self.conn.execute(
+                f"SELECT person, category, match_date, kind, detail FROM cu_sanctions "
+                f"WHERE club = ? AND (role = 'CALCIATORI' OR role IS NULL) "
+                f"AND match_date != '' AND kind IN ({','.join('?' * len(PRESENCE_KINDS))}) "
+                f"ORDER BY person, match_date", (club, *PRESENCE_KINDS)):
+            if not is_iso_date(day):
+                continue
+            season = season_of(day)
+            games = fixtures(season, cat)
+            pools.setdefault((person, season), set()).update(g[0] for g in games)
+            game = next((g for g in games if g[0] == day), None)
+            events.setdefault((person, day, "presenza", cat or ""), (
+                season, *(game[3:5] + (game[2],) if game else (None, None, None)), kind, detail))
+            if kind == "SQUALIFICA_GARE":
+                missed = [g for g in games if g[0] > day][:gare_count(detail)]
+            elif kind == "SQUALIFICA_FINO_AL" and is_iso_date(detail):
+                missed = [g for g in games if day < g[0] <= detail]
+            else:
+                missed = []
+            for g in missed:
+                events.setdefault((person, g[0], "squalificato", g[1]),
+                                  (season, g[3], g[4], g[2], kind, detail))
+
+        self.conn.execute("DELETE FROM player_timeline WHERE club = ?", (club,))
+        self.conn.execute("DELETE FROM player_season WHERE club = ?", (club,))
+        self.conn.executemany(
+            "INSERT INTO player_timeline VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(club, person, ev[0], day, event, cat, *ev[1:])
+             for (person, day, event, cat), ev in events.items()])
+
+        totals: Dict[tuple, dict] = {}
+        for (person, day, event, _cat), ev in events.items():
+            t = totals.setdefault((person, ev[0]), {"presenza": set(), "matched": set(),
+                                                    "squalificato": set()})
+            t[event].add(day)
+            if event == "presenza" and ev[3] is not None:
+                t["matched"].add(day)
+        self.conn.executemany(
+            "INSERT INTO player_season VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(club, person, season, len(t["presenza"]), len(t["matched"]),
+              len(t["squalificato"]), len(pools.get((person, season), ())),
+              min(t["presenza"]) if t["presenza"] else None,
+              max(t["presenza"]) if t["presenza"] else None)
+             for (person, season), t in totals.items()])
+
+    def update(self, sanctions: Iterable[dict] = (), results: Iterable[dict] = ()) -> None:
+        """
+        Dopo un lotto: il calendario delle squadre dei risultati, e la
+        stagione di ogni società che il lotto tocca — per una sanzione sua
+        o per una gara nuova della sua squadra. Anche le società con la
+        stessa chiave di un nome nuovo: il ponte per chiave può essersi
+        aperto o, con un secondo omonimo, chiuso.
+        """
+        teams = self._add_fixtures(results)
+        self._refresh_club_season(teams)
+        clubs = {s["club"] for s in sanctions if s.get("role") in (None, "CALCIATORI")}
+        keys = {club_key(name) for name in teams | clubs}
+        for club in sorted(clubs | self._clubs_for(keys)):
+            self._refresh_club(club)
+
+    def rebuild(self) -> None:
+        """Tutto da capo, da cu_results e cu_sanctions: un db di prima delle tabelle."""
+        for table in ("club_fixtures", "club_season", "player_timeline", "player_season"):
+            self.conn.execute(f"DELETE FROM {table}")
+        self.update(
+            sanctions=[{"club": r[0], "role": None} for r in self.conn.execute(
+                "SELECT DISTINCT club FROM cu_sanctions "
+                "WHERE role = 'CALCIATORI' OR role IS NULL")],
+            results=[dict(r) for r in self.conn.execute(
+                "SELECT category, match_date, girone, giornata, home, away FROM cu_results")])
+
+    # ------------------------------------------------------------- letture
+    def season(self, club: str = None, person: str = None, season: str = None,
+               min_appearances: int = 0, limit: int = None) -> List[dict]:
+        q = ("SELECT club, person, season, appearances, matched, missed, club_fixtures, "
+             "first_match, last_match FROM player_season WHERE appearances >= ? ")
+        args: list = [min_appearances]
+        for col, val in (("season", season), ("club", club), ("person", person)):
+            if val:
+                q += f"AND {col} = ? "
+                args.append(val)
+        q += "ORDER BY appearances DESC, missed, club, person"
+        if limit:
+            q += f" LIMIT {int(limit)}"
+        return [dict(zip(("club", "person", "season", "appearances", "matched", "missed",
+                          "club_fixtures", "first_match", "last_match"), r))
+                for r in self.conn.execute(q, args)]
+
+    def events(self, person: str, club: str = None) -> List[dict]:
+        q = ("SELECT club, person, season, match_date, event, category, girone, giornata, "
+             "opponent, kind, detail FROM player_timeline WHERE person = ? ")
+        args = [person]
+        if club:
+            q += "AND club = ? "
+            args.append(club)
+        q += "ORDER BY match_date, event, club"
+        return [dict(zip(("club", "person", "season", "match_date", "event", "category",
+                          "girone", "giornata", "opponent", "kind", "detail"), r))
+                for r in self.conn.execute(q, args)]
+
+    def density(self, club: str = None, season: str = None) -> List[dict]:
+        q = ("SELECT team, season, category, fixtures, first_match, last_match, per_week "
+             "FROM club_season WHERE 1 = 1 ")
+        args = []
+        if club:
+            q += "AND team = ? "
+            args.append(self.team_for(club))
+        if season:
+            q += "AND season = ? "
+            args.append(season)
+        q += "ORDER BY team, season, category"
+        return [dict(zip(("club", "season", "category", "fixtures", "first_match",
+                          "last_match", "per_week"), r))
+                for r in self.conn.execute(q, args)]
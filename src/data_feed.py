@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Pubblicazione di docs/data.json per la PWA: compatto, precompresso, a delta.
+
+data.json usciva con indent=2 (~260 KB) e la PWA lo riscaricava intero dopo
+ogni giro della pipeline, anche quando erano cambiati tre record. Chi apre la
+dashboard da bordo campo, con una rete da stadio, pagava il feed intero per
+ogni aggiornamento.
+
+Qui il documento della dashboard esce:
+  - compatto (nessuno spazio), con i fratelli .gz e .br già compressi per gli
+    host che servono il precompresso (gzip_static/brotli_static). Brotli è
+    facoltativo: senza il modulo si scrive solo il .gz;
+  - versionato per contenuto in docs/feed/data.<versione>.json, immutabile e
+    quindi cacheabile per sempre;
+  - con un delta JSON Patch (RFC 6902) dalla versione precedente,
+    docs/feed/delta.<da>.<a>.json. Le ultime DELTA_KEEP transizioni restano
+    disponibili: un client indietro di qualche giro applica la catena;
+  - descritto da docs/feed/manifest.json, l'unico file da rivalidare.
+
+docs/data.json resta, compatto, per chi lo legge già (script, sanity check).
+
+La PWA però non parte dal documento intero: publish_shards scrive in
+docs/shards/ un indice leggero (INDEX_FIELDS e i campi datati per record), un
+dettaglio per giocatore senza i campi datati e un segmento per
+classificazione. La prima schermata costa
+l'indice; il service worker precarica i segmenti HOT e poi WARM, i dettagli
+dei COLD arrivano all'apertura della scheda. L'indice ha lo stesso manifest e
+gli stessi delta del feed intero.
+
+Il delta sulla lista `opportunities` lavora per `id`: record spariti →
+remove, nuovi → add, cambiati → replace dei soli campi cambiati, riordinati
+dallo score → move, e solo per i record fuori dalla sottosequenza crescente
+più lunga (quelli rimasti nello stesso ordine relativo non si toccano).
+Ogni delta si apre con un "test" sul last_update di partenza e viene
+verificato applicandolo prima di scriverlo.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_data_feed -v
+"""
+
+from __future__ import annotations
+
+import copy
+import gzip
+import hashlib
+import json
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli facoltativo: solo il .gz
+    brotli = None
+
+FEED_DIR = "feed"
+SHARDS_DIR = "shards"
+MANIFEST = "manifest.json"
+DELTA_KEEP = 8            # due giorni di giri a 6 ore
+# Un delta più grande di questa frazione del feed compresso non conviene:
+# tanto vale scaricare il file intero.
+DELTA_MAX_RATIO = 0.5
+
+# L'indice delle shard porta solo quello che serve a card, filtri, contatori
+# e ordinamento della PWA; breakdown, intel, assessment e testi stanno nel
+# dettaglio del giocatore.
+INDEX_FIELDS = (
+    "id", "player_name", "age", "role", "role_name", "ob1_score", "classification",
+    "opportunity_type", "current_club", "nationality", "discovered_at",
+    "contract_expires", "days_without_contract", "data_verified",
+    "market_publishable", "tm_url",
+)
+SEGMENTS = ("hot", "warm", "cold")       # ordine di prefetch del service worker
+# Campi che generate_dashboard ricalcola ogni giorno (_dated_row) anche se il
+# giocatore non cambia: fuori dal dettaglio, così l'hash di un dettaglio cambia
+# solo con i suoi fatti. Quelli che servono alla card (score, classificazione,
+# giorni senza contratto) stanno già in INDEX_FIELDS; gli altri, i pesanti,
+# vanno in un segmento datato per giro (dated.<versione>.json) che la PWA
+# scarica una volta, alla prima scheda aperta. Di `intel` solo i segnali di
+# scadenza sono datati; il resto del badge resta nel dettaglio.
+DATED_FIELDS = (
+    "ob1_score", "classification", "score_breakdown", "days_without_contract",
+    "stale_free_agent", "assessment", "reported_date",
+)
+DATED_INTEL = ("signals",)
+
+
+def compact(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def content_version(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def write_precompressed(path: Path, payload: bytes) -> Dict[str, int]:
+    """Scrive `path` e i fratelli .gz (e .br se c'è brotli). Ritorna le dimensioni."""
+    path.write_bytes(payload)
+    sizes = {"bytes": len(payload)}
+    # mtime=0: stesso contenuto → stesso .gz, niente diff spuri nel repo.
+    gz = gzip.compress(payload, compresslevel=9, mtime=0)
+    path.with_name(path.name + ".gz").write_bytes(gz)
+    sizes["gzip_bytes"] = len(gz)
+    br_path = path.with_name(path.name + ".br")
+    if brotli is not None:
+        br = brotli.compress(payload, quality=11)
+        br_path.write_bytes(br)
+        sizes["brotli_bytes"] = len(br)
+    elif br_path.exists():
+        br_path.unlink()        # un .br di un giro precedente sarebbe stantio
+    return sizes
+
+
+# ---------------------------------------------------------------- JSON Patch
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _keys(items: list) -> Optional[List[Any]]:
+    """Gli `id` di una lista di dict, se ci sono tutti e sono distinti."""
+    keys = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        key = item.get("id")
+        if key is None or isinstance(key, (dict, list)):
+            return None
+        keys.append(key)
+    return keys if len(set(keys)) == len(keys) else None
+
+
+def _stable(seq: List[int]) -> set:
+    """Posizioni della sottosequenza crescente più lunga di `seq`."""
+    tails: List[int] = []
+    tail_pos: List[int] = []
+    prev = [-1] * len(seq)
+    for i, v in enumerate(seq):
+        j = bisect_left(tails, v)
+        if j == len(tails):
+            tails.append(v)
+            tail_pos.append(i)
+        else:
+            tails[j] = v
+            tail_pos[j] = i
+        prev[i] = tail_pos[j - 1] if j else -1
+    out = set()
+    i = tail_pos[-1] if tail_pos else -1
+    while i >= 0:
+        out.add(i)
+        i = prev[i]
+    return out
+
+
+def _diff_keyed(old: list, new: list, path: str, old_keys: list, new_keys: list) -> List[dict]:
+    ops: List[dict] = []
+    wanted = set(new_keys)
+    cur = list(zip(old_keys, old))
+    for i in range(len(cur) - 1, -1, -1):
+        if cur[i][0] not in wanted:
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+            del cur[i]
+
+    target = {k: i for i, k in enumerate(new_keys)}
+    stable_at = _stable([target[k] for k, _ in cur])
+    stable = {cur[i][0] for i in stable_at}
+
+    for i, key in enumerate(new_keys):
+        # Un record fuori posto che deve scendere va in coda: lo riprende
+        # una move quando arriva il suo turno.
+        while i < len(cur) and cur[i][0] != key and cur[i][0] not in stable and key in stable:
+            ops.append({"op": "move", "from": f"{path}/{i}", "path": f"{path}/-"})
+            cur.append(cur.pop(i))
+        if i < len(cur) and cur[i][0] == key:
+            pass
+        else:
+            j = next((j for j in range(i + 1, len(cur)) if cur[j][0] == key), None)
+            if j is None:
+                ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+                cur.insert(i, (key, new[i]))
+                continue
+            ops.append({"op": "move", "from": f"{path}/{j}", "path": f"{path}/{i}"})
+            cur.insert(i, cur.pop(j))
+        ops.extend(diff(cur[i][1], new[i], f"{path}/{i}"))
+    return ops
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[dict]:
+    """Le operazioni JSON Patch che portano `old` a `new`."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        ops = [{"op": "remove", "path": _pointer(path, k)} for k in old if k not in new]
+        for k, v in new.items():
+            if k in old:
+                ops.extend(diff(old[k], v, _pointer(path, k)))
+            else:
+                ops.append({"op": "add", "path": _pointer(path, k), "value": v})
+        return ops
+    if isinstance(old, list):
+        old_keys, new_keys = _keys(old), _keys(new)
+        if old_keys is not None and new_keys is not None:
+            return _diff_keyed(old, new, path, old_keys, new_keys)
+        if len(old) == len(new):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                ops.extend(diff(a, b, f"{path}/{i}"))
+            return ops
+        return [{"op": "replace", "path": path, "value": new}]
+    return [] if old == new else [{"op": "replace", "path": path, "value": new}]
+
+
+def _walk(doc: Any, pointer: str):
+    parts = [p.replace("~1", "/").replace("~0", "~") for p in pointer.split("/")[1:]]
+    parent = doc
+    for part in parts[:-1]:
+        parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+    return parent, parts[-1] if parts else None
+
+
+def apply_patch(doc: Any, ops: List[dict]) -> Any:
+    """Applica `ops` a una copia di `doc`. Un "test" fallito solleva ValueError."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind = op["op"]
+        if op["path"] == "":
+            if kind == "test":
+                if doc != op["value"]:
+                    raise ValueError("test fallito sulla radice")
+                continue
+            doc = copy.deepcopy(op["value"])
+            continue
+        if kind == "move":
+            src, key = _walk(doc, op["from"])
+            value = src.pop(int(key)) if isinstance(src, list) else src.pop(key)
+        else:
+            value = copy.deepcopy(op.get("value"))
+        parent, key = _walk(doc, op["path"])
+        if kind == "test":
+            current = parent[int(key)] if isinstance(parent, list) else parent[key]
+            if current != value:
+                raise ValueError(f"test fallito su {op['path']}")
+        elif kind == "remove":
+            parent.pop(int(key) if isinstance(parent, list) else key)
+        elif isinstance(parent, list):
+            if kind == "replace":
+                parent[int(key)] = value
+            elif key == "-":
+                parent.append(value)
+            else:
+                parent.insert(int(key), value)
+        else:
+            parent[key] = value
+    return doc
+
+
+# ---------------------------------------------------------------- publish
+
+def _read_json(path: Path) -> Any:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def publish_versioned(feed: Path, doc: dict, name: str = "data",
+                      extra: Iterable[str] = ()) -> dict:
+    """
+    In `feed`: la versione per contenuto di `doc`, il delta dalla precedente
+    e il manifest. Tutto il resto della cartella, tranne i file di `extra`,
+    viene rimosso. Ritorna il manifest.
+    """
+    feed.mkdir(parents=True, exist_ok=True)
+    payload = compact(doc)
+    version = content_version(payload)
+    prev_manifest = _read_json(feed / MANIFEST) or {}
+    prev_version = prev_manifest.get("version")
+
+    full_name = f"{name}.{version}.json"
+    sizes = write_precompressed(feed / full_name, payload)
+
+    deltas = list(prev_manifest.get("deltas") or [])
+    if prev_version and prev_version != version:
+        prev_doc = _read_json(feed / f"{name}.{prev_version}.json")
+        if isinstance(prev_doc, dict):
+            ops = [{"op": "test", "path": "/last_update", "value": prev_doc.get("last_update")}]
+            ops += diff(prev_doc, json.loads(payload))
+            delta = compact(ops)
+            if (apply_patch(prev_doc, ops) == json.loads(payload)
+                    and len(gzip.compress(delta)) <= DELTA_MAX_RATIO * sizes["gzip_bytes"]):
+                delta_name = f"delta.{prev_version}.{version}.json"
+                delta_sizes = write_precompressed(feed / delta_name, delta)
+                deltas.insert(0, {"from": prev_version, "to": version, "file": delta_name,
+                                  "bytes": delta_sizes["bytes"], "ops": len(ops)})
+    deltas = deltas[:DELTA_KEEP]
+
+    manifest = {"version": version, "file": full_name, **sizes,
+                "last_update": doc.get("last_update"), "deltas": deltas}
+    (feed / MANIFEST).write_bytes(compact(manifest))
+
+    keep = {full_name} | {d["file"] for d in deltas} | set(extra)
+    for path in feed.iterdir():
+        base = path.name
+        for ext in (".gz", ".br"):
+            if base.endswith(ext):
+                base = base[: -len(ext)]
+        if base != MANIFEST and base not in keep:
+            path.unlink()
+    return manifest
+
+
+def publish(docs_dir: Path, data: dict) -> dict:
+    """data.json compatto e precompresso, più il feed versionato in docs/feed/."""
+    write_precompressed(docs_dir / "data.json", compact(data))
+    return publish_versioned(docs_dir / FEED_DIR, data)
+
+
+def _write_shard(folder: Path, prefix: str, obj: Any) -> str:
+    """Un file per contenuto: se il nome esiste già, il contenuto è lo stesso."""
+    payload = compact(obj)
+    name = f"{prefix}.{content_version(payload)}.json"
+    if not (folder / name).exists():
+        write_precompressed(folder / name, payload)
+    return name
+
+
+def _split_dated(opp: dict) -> tuple:
+    """
+    (fatti, datati): il dettaglio senza DATED_FIELDS né intel.signals, e quei
+    campi a parte. Il client li rimette insieme: dettaglio, poi la voce del
+    segmento datato, poi la riga dell'indice, con `intel` fuso chiave per
+    chiave.
+    """
+    facts = {k: v for k, v in opp.items() if k not in DATED_FIELDS}
+    dated = {k: opp[k] for k in DATED_FIELDS if k in opp}
+    intel = opp.get("intel")
+    if isinstance(intel, dict) and any(k in intel for k in DATED_INTEL):
+        facts["intel"] = {k: v for k, v in intel.items() if k not in DATED_INTEL}
+        dated["intel"] = {k: intel[k] for k in DATED_INTEL if k in intel}
+    return facts, dated
+
+
+def publish_shards(docs_dir: Path, data: dict) -> dict:
+    """
+    La dashboard a pezzi in docs/shards/: un indice leggero (i soli
+    INDEX_FIELDS per record più il nome del suo dettaglio), un file di
+    dettaglio per giocatore, un segmento per classificazione e il segmento
+    datato del giro ({dettaglio: campi datati}). L'indice passa per
+    publish_versioned, quindi anche lui si aggiorna a delta; dettagli e
+    segmenti hanno il contenuto nel nome e non cambiano mai — e, senza i
+    campi datati, un giocatore fermo tiene lo stesso dettaglio da un giorno
+    all'altro.
+    """
+    folder = docs_dir / SHARDS_DIR
+    folder.mkdir(parents=True, exist_ok=True)
+    files = set()
+    rows = []
+    # Segmento = {nome del dettaglio: record}: il service worker lo scarica
+    # in una richiesta e lo spacchetta nei singoli dettagli in cache.
+    by_class: Dict[str, dict] = {c: {} for c in SEGMENTS}
+    by_detail: Dict[str, dict] = {}
+    for opp in data.get("opportunities") or []:
+        facts, dated = _split_dated(opp)
+        detail = _write_shard(folder, "p", facts)
+        files.add(detail)
+        row = {k: opp[k] for k in INDEX_FIELDS if k in opp}
+        row["detail"] = detail
+        rows.append(row)
+        by_class.setdefault(opp.get("classification") or "cold", {})[detail] = facts
+        heavy = {k: v for k, v in dated.items() if k not in INDEX_FIELDS}
+        if heavy:
+            by_detail[detail] = heavy
+
+    segments = {}
+    for cls, records in by_class.items():
+        if records:
+            segments[cls] = _write_shard(folder, f"segment.{cls}", records)
+            files.add(segments[cls])
+
+    index = {k: v for k, v in data.items() if k != "opportunities"}
+    index["opportunities"] = rows
+    index["segments"] = segments
+    if by_detail:
+        index["dated"] = _write_shard(folder, "dated", by_detail)
+        files.add(index["dated"])
+    return publish_versioned(folder, index, name="index", extra=files)
@@ -348,6 +348,9 @@ class TransfermarktEnricher:
         self.gemini_disabled = self.gemini_client is None
         self.fallback_cfg = resolve_fallback()
         self._tm_urls = self._load_tm_urls()
+        # Anagrafe giocatori (entity_resolution.PlayerRegistry), la imposta
+        # chi orchestra la run: qui si scrive solo quando un id TM è certo.
+        self.registry = None
         # Fase 2 disattivabile senza rollback di codice (vincolo ARCH-002 §7)
         self._etag_enabled = os.getenv("OB1_ETAG", "1") != "0"
         self._etags = self._load_etags() if self._etag_enabled else {}
@@ -633,6 +636,9 @@ class TransfermarktEnricher:
                               f"{self._slugify(matched_name)}/profil/spieler/{tm_id}")
             out["tm_player_id"] = tm_id
             out["enrichment_source"] = "Enrichment:sports-skills"
+            registry = getattr(self, "registry", None)
+            if registry is not None:
+                registry.record_enrichment(player_name, out)
             print(f"  [SPORTS-SKILLS] {player_name}: "
                   f"mv={out.get('market_value_eur')} club={out.get('current_club')}")
         return out
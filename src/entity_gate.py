@@ -18,6 +18,12 @@ Perché non una blacklist di stringhe: una lista di frasi già viste cattura sol
 ciò che è già passato. Qui si ragiona su **token**, così "La Serie" e "Summer
 Transfer Big Board" cadono, mentre "La Gumina", "Da Riva" e "Della Morte"
 restano — sono cognomi veri che una blacklist per sottostringa distruggerebbe.
+
+Le frasi già viste restano comunque utili come rete supplementare (testate,
+siti esteri, pagine elenco): stanno in UN file, config/junk_terms.txt, e
+`junk_match` le confronta tutte con una sola regex compilata a trie. Il costo
+non cresce con il vocabolario, e ouroboros, enrichment e scraper smettono di
+tenere tre copie che divergono.
 """
 
 from __future__ import annotations
@@ -25,7 +31,9 @@ from __future__ import annotations
 import re
 import unicodedata
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
 
 PLAYER = "player"
 JUNK = "junk"
@@ -74,6 +82,12 @@ _NAME_PARTICLES = {
     "van", "von", "der", "den", "dos", "das", "do", "el", "al", "ben", "mac", "mc",
 }
 
+# Accanto al codice, non relativo alla cwd: un gate senza vocabolario non
+# fallisce, lascia passare — e non se ne accorge nessuno.
+JUNK_VOCABULARY = Path(__file__).resolve().parent.parent / "config" / "junk_terms.txt"
+SCOPE_NAMES = "nomi"
+SCOPE_TITLES = "titoli"
+
 _MONTHS = {
     "gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno", "luglio",
     "agosto", "settembre", "ottobre", "novembre", "dicembre",
@@ -143,6 +157,94 @@ def classify_name(name: Any) -> Verdict:
     return Verdict(PLAYER)
 
 
+@dataclass(frozen=True)
+class JunkHit:
+    term: str
+    rule: str
+
+    def __str__(self) -> str:
+        return f"{self.rule}: '{self.term}'"
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Alternanza fattorizzata per prefisso: "spareggi(?: nazionali)?" invece di
+    "spareggi nazionali|spareggi". A ogni posizione del testo la regex segue un
+    solo ramo per carattere, qualunque sia il numero di termini; il `?` greedy
+    fa vincere il termine più lungo.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _junk_text(text: str) -> str:
+    return " ".join((text or "").split()).lower()
+
+
+class JunkMatcher:
+    """Vocabolario {termine: regola} compilato in una regex sola."""
+
+    def __init__(self, vocabulary: Dict[str, str]):
+        self.rules = {_junk_text(t): r for t, r in vocabulary.items() if _junk_text(t)}
+        self._re = re.compile(trie_pattern(self.rules)) if self.rules else None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, text: str) -> Optional[JunkHit]:
+        """Il primo termine del vocabolario che compare nel testo, con la regola."""
+        if self._re is None or not isinstance(text, str):
+            return None
+        m = self._re.search(_junk_text(text))
+        return JunkHit(m.group(0), self.rules[m.group(0)]) if m else None
+
+
+def load_junk_vocabulary(path: Path | str = JUNK_VOCABULARY) -> Dict[str, Dict[str, str]]:
+    """{ambito: {termine: regola}} dal file di vocabolario. Assente => vuoto."""
+    out: Dict[str, Dict[str, str]] = {}
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return out
+    rule, scopes = "", []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            rule, _, scope_list = line[1:-1].partition(":")
+            rule = rule.strip()
+            scopes = [s.strip() for s in scope_list.split(",") if s.strip()]
+            continue
+        for scope in scopes:
+            out.setdefault(scope, {})[line] = rule
+    return out
+
+
+@lru_cache(maxsize=None)
+def junk_matcher(scope: str = SCOPE_NAMES) -> JunkMatcher:
+    """Il matcher di un ambito, compilato alla prima richiesta e poi riusato."""
+    return JunkMatcher(load_junk_vocabulary().get(scope, {}))
+
+
+def junk_match(text: str, scope: str = SCOPE_NAMES) -> Optional[JunkHit]:
+    """Quale frase del vocabolario spazzatura compare in `text`, o None."""
+    return junk_matcher(scope).match(text)
+
+
 def classify(opp: Dict[str, Any], max_market_value: Optional[int] = None) -> Verdict:
     """
     Verdetto sul record completo: nome + plausibilità dei valori.
@@ -178,16 +280,14 @@ def find_particle_duplicates(names) -> Dict[str, str]:
     "Da Bernardo Silva" quando esiste già "Bernardo Silva": è un artefatto di
     parsing (preposizione incollata dal testo), non un secondo giocatore.
     Ritorna {nome_artefatto: nome_canonico}.
+
+    È un caso particolare della risoluzione delle identità
+    (entity_resolution.find_duplicates), che copre anche ordine, accenti,
+    refusi e iniziali.
     """
-    canonical = {_norm(n).lower(): n for n in names if isinstance(n, str)}
-    out = {}
-    for n in names:
-        if not isinstance(n, str):
-            continue
-        tokens = _norm(n).lower().split()
-        if len(tokens) < 3 or tokens[0] not in _NAME_PARTICLES:
-            continue
-        tail = " ".join(tokens[1:])
-        if tail in canonical and canonical[tail] != n:
-            out[n] = canonical[tail]
-    return out
+    try:
+        from src.entity_resolution import find_duplicates
+    except ImportError:  # layout PYTHONPATH=src
+        from entity_resolution import find_duplicates
+    return {n: canonical for n, (canonical, rule) in find_duplicates(names).items()
+            if rule == "preposizione"}
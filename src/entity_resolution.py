@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Risoluzione delle identità: un giocatore, un id, qualunque sia la grafia.
+
+Lo stesso calciatore arriva scritto in modi diversi a seconda della fonte:
+
+    "Mattia Rossi"      articolo
+    "Rossi Mattia"      elenco squadra, ordine cognome-nome
+    "ROSSI MATTIA"      Comunicato Ufficiale
+    "Matia Rossi"       refuso
+    "M. Rossi"          tabellino
+    "Da Mattia Rossi"   preposizione incollata dal parsing
+
+Ogni grafia che sfugge alla dedup è un giocatore in più da arricchire: ricerche
+e chiamate LLM pagate due volte per la stessa persona.
+
+Confrontare ogni nome con tutti gli altri non scala. Si usano chiavi di
+blocco — token ordinati, chiave fonetica, cognome + iniziale — e solo i nomi che
+condividono almeno una chiave si confrontano davvero, con regole esplicite e
+un punteggio per regola. Due omonimi con id Transfermarkt diversi NON si fondono
+mai: l'id TM batte qualunque somiglianza.
+
+L'id TM però vale quanto il dato da cui viene: in opportunities.json lo stesso
+tm_url compare su giocatori diversi (arricchimenti sbagliati). Un id TM conta
+solo se lo slug del profilo è compatibile col nome (`record_tm_id`) e se il
+nome è compatibile col giocatore che quell'id ha già nel registro.
+
+Il registro è persistente (data/ob1.db, accanto a seen e cu_*): ogni variante
+già vista si risolve con una lookup, e l'id canonico resta stabile tra le run.
+OB1_ENTITY_RESOLUTION=0 riporta i chiamanti al confronto esatto sul nome.
+
+È anche l'anagrafe condivisa. L'enrichment (`record_enrichment`) scrive data
+di nascita, club e quando il giocatore è stato arricchito l'ultima volta; i CU
+(`link_cu`) legano ogni "COGNOME NOME (SOCIETA')" a un id. Così l'enrichment
+salta chi è già noto sotto un'altra grafia (`known_enrichment`) e un report
+trova la presenza nei CU di un record di mercato con una lookup
+(`cu_presence`), senza rifare il matching di stringhe in ogni sottosistema.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_entity_resolution -v
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from src.club_index import club_tokens
+    from src.entity_gate import _NAME_PARTICLES
+    from src import tm_url
+except ImportError:  # layout PYTHONPATH=src
+    from club_index import club_tokens
+    from entity_gate import _NAME_PARTICLES
+    import tm_url
+
+DEFAULT_DB = Path("data/ob1.db")
+
+# Regole in ordine di fiducia. Sotto MATCH_THRESHOLD non si fonde.
+SCORE_EXACT = 1.0        # stessi token: ordine, maiuscole, accenti
+SCORE_PHONETIC = 0.92    # stessi token a meno di doppie, h, c/k, j/i...
+SCORE_PARTICLE = 0.9     # "Da Bernardo Silva" = "Bernardo Silva"
+SCORE_INITIAL = 0.85     # "M. Rossi" = "Mattia Rossi", solo se non ambiguo
+MATCH_THRESHOLD = 0.85
+
+# Un arricchimento più vecchio di così non basta a saltarne uno nuovo: club e
+# valore cambiano a ogni finestra di mercato.
+ENRICHED_FRESH_DAYS = 60
+
+_IN_CHUNK = 500
+_APOSTROPHES = re.compile(r"[’'`´]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def resolution_enabled() -> bool:
+    """OB1_ENTITY_RESOLUTION=0: dedup sul nome normalizzato esatto, come prima."""
+    return os.getenv("OB1_ENTITY_RESOLUTION", "1") != "0"
+
+
+# ------------------------------------------------------------------ chiavi
+def name_tokens(name: str) -> List[str]:
+    """
+    Token confrontabili: senza accenti, minuscoli, apostrofi fusi ("D'Angelo"
+    → "dangelo", non un'iniziale "d"), punti e trattini come spazi.
+    """
+    s = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    s = _APOSTROPHES.sub("", s)
+    return [t for t in _NON_ALNUM.split(s) if t]
+
+
+def variant_key(name: str) -> str:
+    """La grafia normalizzata così com'è: la chiave della lookup diretta."""
+    return " ".join(name_tokens(name))
+
+
+def phonetic(token: str) -> str:
+    """
+    Chiave fonetica minima per nomi italiani: toglie solo le differenze che
+    non cambiano il suono (doppie, h muta, c/k/q, j/y/i, w/v, ph/f). Le vocali
+    restano: "Marco" e "Mario" sono due persone.
+    """
+    t = token.replace("ph", "f").replace("x", "ks")
+    t = t.translate(str.maketrans({"c": "k", "q": "k", "j": "i", "y": "i", "w": "v"}))
+    t = t.replace("h", "")
+    return re.sub(r"(.)\1+", r"\1", t)
+
+
+def record_tm_id(rec: dict) -> Optional[str]:
+    """L'id TM di un record, solo se il profilo parla davvero di quel nome."""
+    if rec.get("tm_player_id"):
+        return str(rec["tm_player_id"])
+    url = rec.get("tm_url")
+    if url and tm_url.matches_player(url, rec.get("player_name")):
+        return tm_url.profile_id(url)
+    return None
+
+
+def _is_particle_artifact(tokens: List[str]) -> bool:
+    return len(tokens) >= 3 and tokens[0] in _NAME_PARTICLES
+
+
+def blocking_keys(tokens: List[str]) -> List[str]:
+    """Le chiavi sotto cui un nome va cercato e indicizzato."""
+    if not tokens:
+        return []
+    keys = ["s:" + " ".join(sorted(tokens)),
+            "p:" + " ".join(sorted(phonetic(t) for t in tokens))]
+    if _is_particle_artifact(tokens):
+        keys.append("s:" + " ".join(sorted(tokens[1:])))
+    if len(tokens) >= 2:
+        first, last = tokens[0], tokens[-1]
+        keys.append(f"i:{last}|{first[0]}")
+        keys.append(f"i:{first}|{last[0]}")
+    return list(dict.fromkeys(keys))
+
+
+def score_pair(a: List[str], b: List[str]) -> Tuple[float, str]:
+    """Quanto è probabile che due grafie siano la stessa persona, e perché."""
+    if not a or not b:
+        return 0.0, ""
+    if sorted(a) == sorted(b):
+        return SCORE_EXACT, "ordine/accenti"
+    if sorted(map(phonetic, a)) == sorted(map(phonetic, b)):
+        return SCORE_PHONETIC, "fonetica"
+    for x, y in ((a, b), (b, a)):
+        if _is_particle_artifact(x) and sorted(x[1:]) == sorted(y):
+            return SCORE_PARTICLE, "preposizione"
+    if len(a) == 2 and len(b) == 2:
+        for x, y in ((a, b), (b, a)):
+            # "m rossi" / "rossi m" contro "mattia rossi" / "rossi mattia"
+            for initial, surname in ((x[0], x[1]), (x[1], x[0])):
+                if len(initial) != 1:
+                    continue
+                for full, other in ((y[0], y[1]), (y[1], y[0])):
+                    if other == surname and len(full) > 1 and full[0] == initial:
+                        return SCORE_INITIAL, "iniziale"
+    return 0.0, ""
+
+
+@dataclass
+class Match:
+    player_id: str
+    score: float
+    rule: str
+
+
+# ------------------------------------------------------------------ registro
+class PlayerRegistry:
+    """
+    Varianti di nome → id canonico, con l'id Transfermarkt quando si conosce.
+    SQLite di standard library; `PlayerRegistry(":memory:")` per i test e per
+    chi vuole solo raggruppare una lista senza ricordarla. `conn` riusa una
+    connessione già aperta sullo stesso file (CUStore): le tabelle stanno
+    accanto a cu_sanctions e si possono unire in SQL.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_DB,
+                 threshold: float = MATCH_THRESHOLD,
+                 conn: Optional[sqlite3.Connection] = None):
+        self._owns_conn = conn is None
+        if conn is None:
+            self.path = str(path)
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+        else:
+            self.path = ""
+        self.conn = conn
+        self.threshold = threshold
+        self._variants: Dict[str, str] = {}   # cache di processo della lookup diretta
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS players (
+                    player_id    TEXT PRIMARY KEY,
+                    name         TEXT NOT NULL,
+                    tm_player_id TEXT,
+                    first_seen   TEXT NOT NULL
+                )""")
+            # Anagrafe: colonne aggiunte dopo, ALTER per i db già esistenti.
+            have = {r[1] for r in self.conn.execute("PRAGMA table_info(players)")}
+            for col in ("birth_date", "club", "club_date", "last_enriched", "tm_payload"):
+                if col not in have:
+                    self.conn.execute(f"ALTER TABLE players ADD COLUMN {col} TEXT")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_players_tm ON players(tm_player_id)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_variants (
+                    variant   TEXT PRIMARY KEY,
+                    player_id TEXT NOT NULL,
+                    name      TEXT NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_blocks (
+                    block     TEXT NOT NULL,
+                    player_id TEXT NOT NULL,
+                    PRIMARY KEY (block, player_id)
+                )""")
+            # (person, club) come li scrive il CU → id: la chiave di join con
+            # cu_sanctions, che ha le stesse due colonne.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_cu (
+                    person    TEXT NOT NULL,
+                    club      TEXT NOT NULL,
+                    player_id TEXT NOT NULL,
+                    PRIMARY KEY (person, club)
+                )""")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_player_cu_id ON player_cu(player_id)")
+
+    # ------------------------------------------------------------- letture
+    def lookup(self, name: str) -> Optional[str]:
+        """Solo varianti già registrate: O(1), nessun confronto."""
+        key = variant_key(name)
+        if not key:
+            return None
+        if key in self._variants:
+            return self._variants[key]
+        row = self.conn.execute(
+            "SELECT player_id FROM player_variants WHERE variant = ?", (key,)).fetchone()
+        if row:
+            self._variants[key] = row[0]
+            return row[0]
+        return None
+
+    def by_tm_id(self, tm_player_id) -> Optional[str]:
+        if not tm_player_id:
+            return None
+        row = self.conn.execute("SELECT player_id FROM players WHERE tm_player_id = ?",
+                                (str(tm_player_id),)).fetchone()
+        return row[0] if row else None
+
+    def player(self, player_id: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM players WHERE player_id = ?",
+                                (player_id,)).fetchone()
+        return dict(row) if row else None
+
+    def variants(self, player_id: str) -> List[str]:
+        return [r[0] for r in self.conn.execute(
+            "SELECT name FROM player_variants WHERE player_id = ? ORDER BY name",
+            (player_id,))]
+
+    def _find(self, name: str) -> Optional[str]:
+        """Lookup, poi i blocchi. Non scrive niente."""
+        pid = self.lookup(name)
+        if pid is None:
+            m = self.match(name)
+            pid = m.player_id if m else None
+        return pid
+
+    def known(self, name: str) -> Optional[dict]:
+        """Scheda anagrafica del giocatore, con gli alias. Non scrive niente."""
+        pid = self._find(name)
+        if pid is None:
+            return None
+        rec = self.player(pid) or {}
+        rec["aliases"] = self.variants(pid)
+        return rec
+
+    def known_enrichment(self, name: str, fresh_days: int = ENRICHED_FRESH_DAYS
+                         ) -> Optional[dict]:
+        """
+        Quello che l'enrichment ha già trovato per questo giocatore, sotto
+        qualunque grafia, se recente e ancorato a un id TM. È il dizionario
+        TM intero dell'ultimo arricchimento (valore, presenze, contratto...),
+        nel formato di `apply_tm_data`: si applica al record senza spendere
+        una chiamata, e lo blocca solo se lo avrebbe bloccato l'originale. Un
+        giocatore registrato prima che il dizionario si salvasse non si riusa:
+        data di nascita e club da soli chiuderebbero un record a metà.
+        """
+        rec = self.known(name)
+        if not rec or not rec.get("tm_player_id") or not rec.get("last_enriched"):
+            return None
+        try:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(rec["last_enriched"])
+            payload = json.loads(rec.get("tm_payload") or "null")
+        except ValueError:
+            return None
+        if age.days > fresh_days or not isinstance(payload, dict):
+            return None
+        return {**payload, "tm_player_id": rec["tm_player_id"], "enrichment_source": "Registry"}
+
+    def cu_presence(self, name_or_id: str) -> List[dict]:
+        """
+        Provvedimenti CU del giocatore, su tutte le società in cui compare.
+        Vuoto se il db non ha cu_sanctions (registro aperto da solo).
+        """
+        pid = name_or_id if self.player(name_or_id) else self._find(name_or_id)
+        if pid is None:
+            return []
+        try:
+            return [dict(r) for r in self.conn.execute(
+                "SELECT s.* FROM player_cu l JOIN cu_sanctions s "
+                "ON s.person = l.person AND s.club = l.club "
+                "WHERE l.player_id = ? ORDER BY s.match_date, s.cu_number", (pid,))]
+        except sqlite3.OperationalError:
+            return []
+
+    def match(self, name: str, tm_player_id=None) -> Optional[Match]:
+        """Il miglior candidato sopra soglia, o None. Non scrive niente."""
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        blocks = blocking_keys(tokens)
+        marks = ",".join("?" * len(blocks))
+        candidates = [r[0] for r in self.conn.execute(
+            f"SELECT DISTINCT player_id FROM player_blocks WHERE block IN ({marks})",
+            blocks)]
+        if not candidates:
+            return None
+
+        tm = str(tm_player_id) if tm_player_id else None
+        best: Dict[str, Tuple[float, str]] = {}
+        for i in range(0, len(candidates), _IN_CHUNK):
+            chunk = candidates[i:i + _IN_CHUNK]
+            qmarks = ",".join("?" * len(chunk))
+            for row in self.conn.execute(
+                    f"SELECT v.player_id, v.variant, p.tm_player_id FROM player_variants v "
+                    f"JOIN players p ON p.player_id = v.player_id "
+                    f"WHERE v.player_id IN ({qmarks})", chunk):
+                if tm and row["tm_player_id"] and row["tm_player_id"] != tm:
+                    continue  # omonimi: l'id TM decide
+                score, rule = score_pair(tokens, row["variant"].split())
+                if score > best.get(row["player_id"], (0.0, ""))[0]:
+                    best[row["player_id"]] = (score, rule)
+
+        ranked = sorted(((s, r, pid) for pid, (s, r) in best.items()
+                         if s >= self.threshold), key=lambda x: (-x[0], x[2]))
+        if not ranked:
+            return None
+        top_score, top_rule, top_id = ranked[0]
+        # Un'iniziale che calza su due persone diverse non identifica nessuno.
+        if top_rule == "iniziale" and len(ranked) > 1 and ranked[1][0] == top_score:
+            return None
+        return Match(top_id, top_score, top_rule)
+
+    # ------------------------------------------------------------ scritture
+    def resolve(self, name: str, tm_player_id=None, create: bool = True) -> Optional[str]:
+        """
+        L'id canonico di `name`. Ordine: id TM già noto, variante già vista,
+        miglior candidato dai blocchi; altrimenti un giocatore nuovo (se
+        `create`). La grafia usata si registra come variante.
+        """
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        tm = str(tm_player_id) if tm_player_id else None
+
+        pid = self.by_tm_id(tm)
+        if pid is not None and not self._compatible(pid, tokens):
+            # Id TM già di qualcun altro con un nome che non c'entra: il dato
+            # è sporco, si risolve per nome e l'id non si attacca a nessuno.
+            pid, tm = None, None
+        if pid is None:
+            pid = self.lookup(name)
+            if pid is not None and tm:
+                known = self.player(pid) or {}
+                if known.get("tm_player_id") and known["tm_player_id"] != tm:
+                    pid = None  # stessa grafia, altra persona
+        if pid is None:
+            m = self.match(name, tm)
+            pid = m.player_id if m else None
+        if pid is None:
+            if not create:
+                return None
+            pid = self._create(tokens, name, tm)
+        self._register(pid, name, tokens, tm)
+        return pid
+
+    def record_enrichment(self, name: str, tm: dict) -> Optional[str]:
+        """Scrive sull'anagrafe l'esito di un arricchimento (formato TM dict)."""
+        tm_id = record_tm_id({"player_name": name, "tm_url": tm.get("tm_url"),
+                              "tm_player_id": tm.get("tm_player_id")})
+        pid = self.resolve(name, tm_player_id=tm_id)
+        if pid is None:
+            return None
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        payload = json.dumps({k: v for k, v in tm.items()
+                              if v is not None and k != "enrichment_source"},
+                             ensure_ascii=False, sort_keys=True, default=str)
+        with self.conn:
+            self.conn.execute(
+                "UPDATE players SET birth_date = COALESCE(?, birth_date), "
+                "club = COALESCE(?, club), club_date = CASE WHEN ? IS NULL "
+                "THEN club_date ELSE ? END, last_enriched = ?, tm_payload = ? "
+                "WHERE player_id = ?",
+                (tm.get("birth_date") or None, tm.get("current_club") or None,
+                 tm.get("current_club") or None, now[:10], now, payload, pid))
+        return pid
+
+    def link_cu(self, person: str, club: str, on_date: str = "") -> Optional[str]:
+        """
+        Lega un tesserato del CU al suo id. Il club del CU diventa l'ultimo
+        club noto solo se la data è più recente di quella che c'è già.
+
+        Il CU ha solo nome e società. Un giocatore già ancorato a un id TM si
+        lega solo se la società del CU è la sua: altrimenti l'omonimo
+        dilettante diventerebbe il professionista, e "ASD VIRTUS
+        CASTELFRANCO" finirebbe come club attuale di chi gioca a Pescara.
+        In quel caso il tesserato resta su un'identità sua, senza id TM e
+        fuori dai blocchi del matching; e il club di un giocatore ancorato
+        lo scrive solo l'enrichment.
+        """
+        known = self.conn.execute(
+            "SELECT player_id FROM player_cu WHERE person = ? AND club = ?",
+            (person, club)).fetchone()
+        pid = known[0] if known else None
+        if pid is not None and not self._cu_compatible(pid, club):
+            pid = None        # legato per nome prima che l'enrichment lo ancorasse
+        if pid is None:
+            found = self._find(person)
+            if found is None:
+                pid = self.resolve(person)
+            elif self._cu_compatible(found, club):
+                pid = found
+                self._register(pid, person, name_tokens(person), None)
+            else:
+                pid = self._cu_identity(person)
+        if pid is None:
+            return None
+        with self.conn:
+            if not known or known[0] != pid:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO player_cu (person, club, player_id) "
+                    "VALUES (?, ?, ?)", (person, club, pid))
+            if on_date:
+                self.conn.execute(
+                    "UPDATE players SET club = ?, club_date = ? WHERE player_id = ? "
+                    "AND tm_player_id IS NULL AND (club_date IS NULL OR club_date < ?)",
+                    (club, on_date, pid, on_date))
+        return pid
+
+    def _cu_compatible(self, pid: str, club: str) -> bool:
+        """Senza id TM basta il nome; con l'id TM serve la stessa società."""
+        rec = self.player(pid) or {}
+        if not rec.get("tm_player_id"):
+            return True
+        ours, theirs = set(club_tokens(club)), set(club_tokens(rec.get("club") or ""))
+        return bool(ours and theirs) and (ours <= theirs or theirs <= ours)
+
+    def _cu_identity(self, person: str) -> Optional[str]:
+        """L'identità senza id TM di questo tesserato: quella già usata, o una nuova."""
+        row = self.conn.execute(
+            "SELECT l.player_id FROM player_cu l JOIN players p ON p.player_id = l.player_id "
+            "WHERE l.person = ? AND p.tm_player_id IS NULL ORDER BY l.player_id LIMIT 1",
+            (person,)).fetchone()
+        if row:
+            return row[0]
+        tokens = name_tokens(person)
+        return self._create(tokens, person, None) if tokens else None
+
+    def _compatible(self, pid: str, tokens: List[str]) -> bool:
+        # Il nome canonico conta anche quando la sua variante è di un omonimo.
+        names = [r[0] for r in self.conn.execute(
+            "SELECT name FROM players WHERE player_id = ? UNION "
+            "SELECT name FROM player_variants WHERE player_id = ?", (pid, pid))]
+        return any(score_pair(tokens, name_tokens(n))[0] >= self.threshold for n in names)
+
+    def _create(self, tokens: List[str], name: str, tm: Optional[str]) -> str:
+        seed = " ".join(sorted(tokens)) + "|" + (tm or "")
+        pid = "p" + hashlib.sha1(seed.encode("utf-8")).hexdigest()[:12]
+        n = 1
+        while self.player(pid) is not None:
+            n += 1
+            pid = "p" + hashlib.sha1(f"{seed}|{n}".encode("utf-8")).hexdigest()[:12]
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO players (player_id, name, tm_player_id, first_seen) "
+                "VALUES (?, ?, ?, ?)", (pid, " ".join(name.split()), tm, now))
+        return pid
+
+    def _register(self, pid: str, name: str, tokens: List[str],
+                  tm: Optional[str]) -> None:
+        key = " ".join(tokens)
+        with self.conn:
+            if tm:
+                self.conn.execute(
+                    "UPDATE players SET tm_player_id = ? WHERE player_id = ? "
+                    "AND tm_player_id IS NULL", (tm, pid))
+            # Una grafia già legata a un altro id non si sposta: l'omonimo con
+            # id TM diverso resta raggiungibile solo dal suo id TM.
+            self.conn.execute(
+                "INSERT OR IGNORE INTO player_variants (variant, player_id, name) "
+                "VALUES (?, ?, ?)", (key, pid, " ".join(name.split())))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO player_blocks (block, player_id) VALUES (?, ?)",
+                [(b, pid) for b in blocking_keys(tokens)])
+        if key not in self._variants:
+            row = self.conn.execute(
+                "SELECT player_id FROM player_variants WHERE variant = ?", (key,)).fetchone()
+            self._variants[key] = row[0] if row else pid
+
+    def close(self) -> None:
+        if not self._owns_conn:
+            return
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def __enter__(self) -> "PlayerRegistry":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+# ------------------------------------------------------------------ helper
+def find_duplicates(names: Iterable, registry: Optional[PlayerRegistry] = None
+                    ) -> Dict[str, Tuple[str, str]]:
+    """
+    {grafia: (grafia_canonica, regola)} per ogni nome che è un doppione di un
+    altro della lista. Canonica è la prima grafia vista, salvo gli artefatti
+    da preposizione, che puntano sempre al nome senza preposizione.
+    """
+    own = registry is None
+    reg = registry or PlayerRegistry(":memory:")
+    try:
+        names = [n for n in dict.fromkeys(names) if isinstance(n, str) and n.strip()]
+        # Gli artefatti per ultimi: il canonico deve essere il nome pulito.
+        ordered = sorted(names, key=lambda n: _is_particle_artifact(name_tokens(n)))
+        first_name: Dict[str, str] = {}
+        out: Dict[str, Tuple[str, str]] = {}
+        for n in ordered:
+            m = reg.match(n)
+            pid = reg.resolve(n)
+            if pid in first_name and first_name[pid] != n:
+                out[n] = (first_name[pid], m.rule if m else "ordine/accenti")
+            else:
+                first_name.setdefault(pid, n)
+        return out
+    finally:
+        if own:
+            reg.close()
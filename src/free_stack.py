@@ -26,6 +26,7 @@ import html
 import json
 import os
 import re
+import threading
 import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -55,6 +56,9 @@ def _metric(name: str, *args) -> None:
 SEARCH_CACHE_DIR = Path("data/search_cache")
 SEARCH_CACHE_TTL_S = 7 * 24 * 3600
 
+# Prompt utente senza gateway: il max_input_chars più stretto del registry.
+FALLBACK_INPUT_BUDGET = 6000
+
 _UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
 
@@ -203,6 +207,10 @@ def _with_domains(query: str, domains: Optional[List[str]]) -> str:
 _DDG_MIN_INTERVAL_S = 2.5
 _DDG_BLOCK_COOLDOWN_S = 900
 _ddg_state = {"last_call": 0.0, "blocked_until": 0.0}
+# Il distanziamento vale per il processo, non per il thread: con le leghe in
+# parallelo una richiesta DDG alla volta, sempre a _DDG_MIN_INTERVAL_S dalla
+# precedente.
+_ddg_lock = threading.Lock()
 
 
 def ddg_blocked() -> bool:
@@ -224,19 +232,22 @@ def search_duckduckgo(query: str, max_results: int = 8,
     q = _with_domains(query, domains)
     for endpoint in ("https://html.duckduckgo.com/html/", "https://lite.duckduckgo.com/lite/"):
         # Throttle lato nostro: le richieste fitte sono ciò che fa scattare il blocco
-        gap = time.time() - _ddg_state["last_call"]
-        if gap < _DDG_MIN_INTERVAL_S:
-            time.sleep(_DDG_MIN_INTERVAL_S - gap)
-        try:
-            resp = requests.post(
-                endpoint, data={"q": q, "kl": "it-it"},
-                headers={"User-Agent": _UA, "Accept-Language": "it-IT,it;q=0.9"},
-                timeout=20,
-            )
-        except requests.RequestException:
-            continue
-        finally:
-            _ddg_state["last_call"] = time.time()
+        with _ddg_lock:
+            if ddg_blocked():
+                return []
+            gap = time.time() - _ddg_state["last_call"]
+            if gap < _DDG_MIN_INTERVAL_S:
+                time.sleep(_DDG_MIN_INTERVAL_S - gap)
+            try:
+                resp = requests.post(
+                    endpoint, data={"q": q, "kl": "it-it"},
+                    headers={"User-Agent": _UA, "Accept-Language": "it-IT,it;q=0.9"},
+                    timeout=20,
+                )
+            except requests.RequestException:
+                continue
+            finally:
+                _ddg_state["last_call"] = time.time()
 
         if _is_ddg_block(resp.status_code, resp.text):
             _ddg_state["blocked_until"] = time.time() + _DDG_BLOCK_COOLDOWN_S
@@ -499,6 +510,22 @@ def llm_complete_json(
     return None
 
 
+def llm_input_budget(task: str = "extract") -> int:
+    """
+    Quanto può essere lungo il prompt utente di `task` senza essere troncato.
+    Senza gateway vale il tetto più stretto del registry (triage): Gemini ha
+    una finestra molto più ampia, quindi chi sta sotto le rotte free sta
+    sotto anche lui.
+    """
+    gw = _gateway()
+    if gw:
+        try:
+            return gw.input_budget(task, exclude_providers={"gemini"})
+        except Exception:
+            pass
+    return FALLBACK_INPUT_BUDGET
+
+
 def llm_source_label() -> str:
     """Etichetta della rotta usata più di recente, per il campo sources."""
     gw = _gateway()
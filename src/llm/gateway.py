@@ -23,6 +23,7 @@ from __future__ import annotations
 import json
 import os
 import re
+import threading
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -120,6 +121,7 @@ class LLMGateway:
             "calls": 0, "cache_hits": 0, "failures": 0,
             "by_route": {}, "tokens": 0,
         }
+        self._stats_lock = threading.Lock()
 
     # ------------------------------------------------------------------ API
     def complete_json(
@@ -218,6 +220,23 @@ class LLMGateway:
         )
 
     # -------------------------------------------------------------- interni
+    def input_budget(
+        self, task: str,
+        exclude_providers: Optional[Iterable[str]] = None,
+        only_providers: Optional[Iterable[str]] = None,
+    ) -> int:
+        """
+        Caratteri di prompt che arrivano interi a QUALUNQUE rotta di `task`:
+        il tetto della classe, ristretto dalla rotta più stretta. Chi mette più
+        articoli in un prompt deve restare qui sotto — oltre, ci pensa _clamp
+        e la coda del prompt sparisce senza che nessuno lo sappia.
+        """
+        tc = self.registry.task_class(task)
+        limits = [tc.max_input_chars]
+        limits += [r.max_input_chars for r in self._pick_routes(
+            task, exclude_providers, only_providers) if r.max_input_chars]
+        return min(limit for limit in limits if limit)
+
     def _pick_routes(
         self, task: str,
         exclude_providers: Optional[Iterable[str]] = None,
@@ -295,9 +314,10 @@ class LLMGateway:
 
     def _bump(self, route: Route, tokens: int) -> None:
         _metric("llm_call", route.label, tokens)
-        self.stats["calls"] += 1
-        self.stats["tokens"] += tokens
-        self.stats["by_route"][route.label] = self.stats["by_route"].get(route.label, 0) + 1
+        with self._stats_lock:
+            self.stats["calls"] += 1
+            self.stats["tokens"] += tokens
+            self.stats["by_route"][route.label] = self.stats["by_route"].get(route.label, 0) + 1
 
     def _log(self, msg: str) -> None:
         if self.verbose:
@@ -365,14 +385,18 @@ def _parse_json(text: str) -> Any:
 
 
 _GATEWAY: Optional[LLMGateway] = None
+_GATEWAY_LOCK = threading.Lock()
 
 
 def get_gateway(config_path: Optional[Path] = None) -> LLMGateway:
     """Singleton di processo: una sola istanza condivide ledger e cache."""
     global _GATEWAY
-    if _GATEWAY is None:
-        _GATEWAY = LLMGateway(registry=Registry.load(config_path))
-    return _GATEWAY
+    # Le leghe di ouroboros girano in thread: due istanze vorrebbero dire due
+    # ledger in memoria che si contendono lo stesso file e le stesse quote.
+    with _GATEWAY_LOCK:
+        if _GATEWAY is None:
+            _GATEWAY = LLMGateway(registry=Registry.load(config_path))
+        return _GATEWAY
 
 
 def reset_gateway() -> None:
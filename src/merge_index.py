@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Indice delle opportunità: merge e dedup in O(1) per record.
+
+ouroboros_run confrontava ogni candidato con tutto lo storico (`any(o['id'] ==
+...)`) e la dedup ricalcolava nome normalizzato e "ricchezza" del record a ogni
+confronto. Con un migliaio di record storici e centinaia di candidati per run
+era il passo Python puro più lento della discovery.
+
+Qui ogni record entra una volta: nome normalizzato e punteggio si calcolano
+all'ingresso e restano negli indici accanto al record (non DENTRO il dict, che
+finisce così com'è in data/opportunities.json). Due indici, id e nome
+normalizzato, rispondono in O(1).
+
+Regole, le stesse di prima:
+  - nome di una parola sola      → scartato (cognome senza nome: non arricchibile)
+  - stesso id (nome + articolo)  → resta il record esistente
+  - stesso nome normalizzato     → resta il più ricco (`richness`); a parità il
+    primo arrivato, nella posizione del primo arrivato
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_merge_index -v
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+_WS = re.compile(r"\s+")
+
+ADDED = "added"
+DUP_ID = "dup_id"
+DUP_NAME = "dup_name"
+REPLACED = "replaced"
+SINGLE = "single"
+
+
+@lru_cache(maxsize=8192)
+def normalize_player_name(name: str) -> str:
+    """Senza accenti, minuscolo, spazi collassati: "Nicolò  Bertolà" = "nicolo bertola"."""
+    n = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower().strip()
+    return _WS.sub(" ", n)
+
+
+def richness(o: dict) -> int:
+    """Quanto dato porta un record: a parità di giocatore vince il più ricco."""
+    return (
+        bool(o.get("market_value")) * 100 +
+        bool(o.get("appearances")) * 50 +
+        bool(o.get("contract_expires")) * 30 +
+        bool(o.get("goals")) * 20 +
+        bool(o.get("agent")) * 10 +
+        bool(o.get("nationality")) * 5 +
+        len(o.get("description", "") or o.get("summary", "") or "") // 10
+    )
+
+
+class OppIndex:
+    """
+    Lista ordinata di record + indici per id e per nome normalizzato.
+
+    `key` sostituisce il nome normalizzato come identità del giocatore: con
+    entity_resolution è l'id canonico del registro, così "Rossi Mattia" e
+    "Mattia Rossi" finiscono sullo stesso record.
+    """
+
+    def __init__(self, records: Iterable[dict] = (),
+                 key: Optional[Callable[[dict], str]] = None):
+        self._key = key or (lambda rec: normalize_player_name(rec.get("player_name") or ""))
+        self.records: List[dict] = []
+        self._richness: List[int] = []   # calcolato una volta, all'ingresso
+        self._by_id: Dict[str, int] = {}
+        self._by_name: Dict[str, int] = {}
+        self.stats: Dict[str, int] = {ADDED: 0, DUP_ID: 0, DUP_NAME: 0,
+                                      REPLACED: 0, SINGLE: 0}
+        for rec in records:
+            self.add(rec)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.records)
+
+    def __contains__(self, opp_id: str) -> bool:
+        return opp_id in self._by_id
+
+    def get_by_name(self, name: str) -> Optional[dict]:
+        i = self._by_name.get(self._key({"player_name": name}))
+        return None if i is None else self.records[i]
+
+    def add(self, rec: dict) -> str:
+        """Inserisce o fonde un record. Ritorna l'esito (ADDED, DUP_ID, ...)."""
+        name = (rec.get("player_name") or "").strip()
+        if len(name.split()) < 2:
+            return self._count(SINGLE)
+        key = self._key(rec)
+        opp_id = rec.get("id")
+
+        if opp_id and opp_id in self._by_id:
+            return self._count(DUP_ID)
+
+        i = self._by_name.get(key)
+        if i is None:
+            self._by_name[key] = len(self.records)
+            if opp_id:
+                self._by_id[opp_id] = len(self.records)
+            self.records.append(rec)
+            self._richness.append(richness(rec))
+            return self._count(ADDED)
+
+        score = richness(rec)
+        if score <= self._richness[i]:
+            return self._count(DUP_NAME)
+        old_id = self.records[i].get("id")
+        if old_id and self._by_id.get(old_id) == i:
+            del self._by_id[old_id]
+        if opp_id:
+            self._by_id[opp_id] = i
+        self.records[i] = rec
+        self._richness[i] = score
+        return self._count(REPLACED)
+
+    def _count(self, outcome: str) -> str:
+        self.stats[outcome] += 1
+        return outcome
+
+    def reset_stats(self) -> None:
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s[ADDED]} nuovi, {s[REPLACED]} sostituiti da un record più ricco, "
+                f"{s[DUP_ID]} id già presenti, {s[DUP_NAME]} doppioni per nome, "
+                f"{s[SINGLE]} nomi di una parola → {len(self.records)} record")
@@ -77,6 +77,8 @@ class RunMetrics:
     facts: int = 0
     facts_by_field: Dict[str, int] = field(default_factory=dict)
     players_touched: int = 0
+    items_skipped: int = 0
+    items_skipped_by_reason: Dict[str, int] = field(default_factory=dict)
     cost_usd: float = 0.0
 
     # ------------------------------------------------------------ registrazioni
@@ -126,6 +128,14 @@ class RunMetrics:
     def player_touched(self, n: int = 1) -> None:
         self.players_touched += max(0, int(n))
 
+    def item_skipped(self, reason: str = "", n: int = 1) -> None:
+        """Articoli che non sono arrivati al triage LLM: inferenza risparmiata."""
+        n = max(0, int(n))
+        self.items_skipped += n
+        if reason and n:
+            self.items_skipped_by_reason[reason] = (
+                self.items_skipped_by_reason.get(reason, 0) + n)
+
     # ----------------------------------------------------------------- letture
     @property
     def operations(self) -> int:
@@ -183,6 +193,8 @@ class RunMetrics:
             "facts": self.facts,
             "facts_by_field": dict(sorted(self.facts_by_field.items())),
             "players_touched": self.players_touched,
+            "items_skipped": self.items_skipped,
+            "items_skipped_by_reason": dict(sorted(self.items_skipped_by_reason.items())),
             "operations": self.operations,
             "cost_per_fact": self.cost_per_fact,
             "cost_usd": round(self.cost_usd, 6),
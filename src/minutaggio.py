@@ -401,12 +401,15 @@ SOGLIA_APPRENDISTATO = {
 }
 
 
-def check_contract_signals(player: Dict[str, Any], league: str = 'serie_c') -> Dict[str, Any]:
+def check_contract_signals(player: Dict[str, Any], league: str = 'serie_c',
+                           now: Optional[datetime] = None) -> Dict[str, Any]:
     """Genera segnali contestuali su contratto e normativa.
 
     - Scadenza contratto (da TM data)
     - Soglia apprendistato (12 presenze Serie B, 15 Serie C)
     - Safe margin minutaggio
+
+    `now` fissa l'istante per i giorni alla scadenza (default: adesso).
     """
     signals = []
 
@@ -415,7 +418,7 @@ def check_contract_signals(player: Dict[str, Any], league: str = 'serie_c') -> D
     if contract_expires:
         try:
             exp_date = datetime.strptime(contract_expires[:10], '%Y-%m-%d')
-            days_left = (exp_date - datetime.now()).days
+            days_left = (exp_date - (now or datetime.now())).days
             if days_left < 0:
                 signals.append({
                     'type': 'contract_expired',
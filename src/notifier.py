@@ -40,6 +40,7 @@ class TelegramNotifier:
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_ids = self._parse_chat_ids()
         self.enabled = bool(self.bot_token)
+        self._session = None
 
         if not self.enabled:
             print("⚠️ Telegram notifier disabilitato (token mancante)")
@@ -54,8 +55,9 @@ class TelegramNotifier:
         fallback = os.getenv('TELEGRAM_CHAT_ID', '')
         return [fallback] if fallback else []
 
-    def send_message(self, text: str, parse_mode: str = 'HTML', reply_markup: dict = None) -> bool:
-        """Invia messaggio con footer OB1 a tutti i chat configurati.
+    def send_message(self, text: str, parse_mode: str = 'HTML', reply_markup: dict = None,
+                     chat_ids: List[str] = None) -> bool:
+        """Invia messaggio con footer OB1 a tutti i chat configurati (o a `chat_ids`).
         Se testo + footer supera 4096 char, splitta e mette footer solo sull'ultimo chunk."""
 
         if not self.enabled:
@@ -65,7 +67,7 @@ class TelegramNotifier:
 
         # Se entra in un messaggio, invio diretto
         if len(text_with_footer) <= TELEGRAM_MAX_LENGTH:
-            return self._send_raw(text_with_footer, parse_mode, reply_markup)
+            return self._send_raw(text_with_footer, parse_mode, reply_markup, chat_ids)
 
         # Split per paragrafi, footer solo sull'ultimo chunk
         max_chunk = TELEGRAM_MAX_LENGTH - 20  # margine contatore
@@ -90,18 +92,20 @@ class TelegramNotifier:
             chunk = f"{part}{suffix}\n\n({i + 1}/{len(parts)})"
 
             if len(chunk) > TELEGRAM_MAX_LENGTH and is_last:
-                if not self._send_raw(f"{part}\n\n({i + 1}/{len(parts)})", parse_mode):
+                if not self._send_raw(f"{part}\n\n({i + 1}/{len(parts)})", parse_mode,
+                                      chat_ids=chat_ids):
                     success = False
-                if not self._send_raw(OB1_FOOTER, parse_mode):
+                if not self._send_raw(OB1_FOOTER, parse_mode, chat_ids=chat_ids):
                     success = False
             else:
                 rm = reply_markup if is_last else None  # keyboard solo sull'ultimo
-                if not self._send_raw(chunk, parse_mode, rm):
+                if not self._send_raw(chunk, parse_mode, rm, chat_ids):
                     success = False
 
         return success
 
-    def _send_raw(self, text: str, parse_mode: str = 'HTML', reply_markup: dict = None) -> bool:
+    def _send_raw(self, text: str, parse_mode: str = 'HTML', reply_markup: dict = None,
+                  chat_ids: List[str] = None) -> bool:
         """Invio diretto senza footer (uso interno)."""
 
         if not self.enabled:
@@ -110,7 +114,7 @@ class TelegramNotifier:
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         success = True
 
-        for chat_id in self.chat_ids:
+        for chat_id in (self.chat_ids if chat_ids is None else chat_ids):
             try:
                 payload = {
                     'chat_id': chat_id,
@@ -122,7 +126,7 @@ class TelegramNotifier:
                 if reply_markup:
                     payload['reply_markup'] = json.dumps(reply_markup)
 
-                resp = requests.post(url, json=payload, timeout=10)
+                resp = (self._session or requests).post(url, json=payload, timeout=10)
 
                 if resp.status_code != 200:
                     print(f"❌ Telegram error ({chat_id}): {resp.text}")
@@ -134,6 +138,25 @@ class TelegramNotifier:
 
         return success
 
+    def send_batch(self, batch: List[Dict[str, Any]], parse_mode: str = 'HTML') -> Dict[str, int]:
+        """Più messaggi, ognuno ai suoi destinatari: [{'message', 'chat_ids'}].
+        Una connessione sola per tutto il lotto; un invio fallito non ferma gli altri.
+        Ritorna {'sent': n, 'failed': n}, contati per messaggio."""
+        totals = {'sent': 0, 'failed': 0}
+        if not self.enabled:
+            totals['failed'] = len(batch)
+            return totals
+        self._session = requests.Session()
+        try:
+            for item in batch:
+                ok = self.send_message(item['message'], parse_mode=parse_mode,
+                                       chat_ids=list(item['chat_ids']))
+                totals['sent' if ok else 'failed'] += 1
+        finally:
+            self._session.close()
+            self._session = None
+        return totals
+
     def send_document(self, file_path: str, caption: str = None) -> bool:
         """Invia un file (PDF, report)"""
         if not self.enabled: return False
@@ -183,7 +183,7 @@ def assess_identity(opp: dict) -> dict:
     }
 
 
-def reconcile_opportunity_type(opp: dict) -> dict:
+def reconcile_opportunity_type(opp: dict, now: Optional[datetime] = None) -> dict:
     """
     Un contratto futuro confermato da Transfermarkt vince su una
     classificazione 'svincolato'/'rescissione' presa a monte da una fonte
@@ -216,7 +216,7 @@ def reconcile_opportunity_type(opp: dict) -> dict:
         expires = datetime.fromisoformat(str(ce)[:10])
     except ValueError:
         return opp
-    if expires <= datetime.now():
+    if expires <= (now or datetime.now()):
         return opp
     out = dict(opp)
     out["opportunity_type"] = "mercato"
@@ -224,9 +224,9 @@ def reconcile_opportunity_type(opp: dict) -> dict:
     return out
 
 
-def apply_gate(opp: dict) -> dict:
+def apply_gate(opp: dict, now: Optional[datetime] = None) -> dict:
     """Ritorna copia opportunity con età normalizzata + flag gate."""
-    out = reconcile_opportunity_type(opp)
+    out = reconcile_opportunity_type(opp, now=now)
     gate = assess_identity(out)
     if gate["age_normalized"] is not None:
         out["age"] = gate["age_normalized"]
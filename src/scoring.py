@@ -2,10 +2,89 @@
 """
 OB1 Serie C - SCORE-001: Advanced Scoring Algorithm
 Prioritizza le opportunita di mercato con scoring intelligente
+
+`score` valuta un record; `score_batch` valuta una lista intera con lo stesso
+risultato, bit per bit. Il batch costruisce prima le colonne dei sette
+fattori (`columns`): i fattori che dipendono da un solo valore (data, tipo,
+eta, valore, fonte) si calcolano una volta per valore distinto, non per
+record, e i confronti di sottostringa sono regex compilate una volta. Il
+totale pesato è un'operazione per colonna — con NumPy se installato — quindi
+ricalcolarlo con altri pesi non rilegge i record.
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy facoltativo: stesso risultato in Python puro
+    np = None
+
+try:
+    from src.club_lexicon import SERIE_C, lexicon
+except ImportError:  # layout PYTHONPATH=src
+    from club_lexicon import SERIE_C, lexicon
+
+
+# Ordine delle chiavi di score_breakdown.
+FACTORS = ('freshness', 'opportunity_type', 'experience', 'age',
+           'market_value', 'league_fit', 'source')
+
+
+def _any_of(terms: Iterable[str]):
+    """Una regex che trova una qualunque delle sottostringhe: `any(t in s ...)`."""
+    return re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)))
+
+
+def classify_score(ob1_score: int) -> str:
+    """HOT ≥70 / WARM ≥57 / COLD — same dials as SCORE-002"""
+    if ob1_score >= 70:
+        return 'hot'
+    if ob1_score >= 57:
+        return 'warm'
+    return 'cold'
+
+
+class ScoreColumns:
+    """
+    I sette fattori di una lista di record, una colonna per fattore.
+    `totals` ricalcola i punteggi con qualunque set di pesi senza toccare i
+    record; `breakdown(i)` restituisce il dict che `score` darebbe al record i.
+    """
+
+    def __init__(self, keys: Sequence[str], columns: Dict[str, List[int]]):
+        self.keys = tuple(keys)
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns[self.keys[0]]) if self.keys else 0
+
+    def breakdown(self, i: int) -> Dict[str, int]:
+        return {key: self.columns[key][i] for key in self.keys}
+
+    def totals(self, weights: Dict[str, float]) -> List[int]:
+        """
+        ob1_score per record. Somma nello stesso ordine di `score` (l'ordine
+        di WEIGHTS), quindi stessi float e stesso arrotondamento a pari.
+        """
+        keys = [k for k in weights if k in self.columns]
+        if not keys or not len(self):
+            return [0] * len(self)
+        if np is not None:
+            total = np.asarray(self.columns[keys[0]], dtype=np.float64) * weights[keys[0]]
+            for key in keys[1:]:
+                total = total + np.asarray(self.columns[key], dtype=np.float64) * weights[key]
+            return np.rint(total).astype(np.int64).tolist()
+        cols = [self.columns[k] for k in keys]
+        ws = [weights[k] for k in keys]
+        out = []
+        for row in zip(*cols):
+            total = 0
+            for value, w in zip(row, ws):
+                total = total + value * w
+            out.append(int(round(total)))
+        return out
 
 
 class OB1Scorer:
@@ -23,22 +102,6 @@ class OB1Scorer:
         'source': 0.05,
     }
 
-    # Club noti Serie C 2025/26 (subset per matching)
-    SERIE_C_CLUBS = {
-        'pescara', 'reggiana', 'spal', 'cesena', 'rimini', 'perugia',
-        'ternana', 'arezzo', 'gubbio', 'torres', 'vis pesaro', 'pineto',
-        'carpi', 'pontedera', 'lucchese', 'pianese', 'entella', 'virtus entella',
-        'milan futuro', 'ascoli', 'campobasso', 'sestri levante', 'legnago',
-        'avellino', 'benevento', 'catania', 'cerignola', 'audace cerignola',
-        'crotone', 'foggia', 'giugliano', 'latina', 'messina', 'monopoli',
-        'potenza', 'sorrento', 'taranto', 'team altamura', 'turris',
-        'trapani', 'casertana', 'cavese', 'juventus next gen',
-        'alcione', 'arzignano', 'caldiero', 'feralpisalò', 'giana erminio',
-        'lecco', 'lumezzane', 'novara', 'padova', 'pro patria', 'pro vercelli',
-        'renate', 'trento', 'triestina', 'union clodiense', 'vicenza',
-        'atalanta u23', 'albinoleffe', 'l.r. vicenza',
-    }
-
     # Score per tipo opportunita
     TYPE_SCORES = {
         'svincolato': 100,
@@ -49,19 +112,16 @@ class OB1Scorer:
         'altro': 40,
     }
 
-    # Score per fonte
-    SOURCE_SCORES = {
-        'tuttoc': 95,
-        'tuttolegapro': 95,
-        'gazzetta': 95,
-        'corriere dello sport': 90,
-        'tuttosport': 90,
-        'calciomercato': 85,
-        'tmw': 80,
-        'transfermarkt': 85,
-        'football italia': 75,
-        'tuttocampo': 70,
-    }
+    _SERIE_B_RE = _any_of(['serie b', 'serieb', 'cadetti'])
+    _AMATEUR_RE = _any_of(['maia alta', 'obermais', 'eccellenza', 'promozione', 'juniores'])
+    _UPPER_LEAGUE_RE = _any_of(['serie b', 'cadetti', 'serie a'])
+    _SERIE_C_RE = _any_of(['serie c', 'lega pro'])
+    _FREE_TYPES = ('svincolato', 'rescissione', 'scadenza')
+
+    def __init__(self):
+        # Club e fonti da config/clubs.yaml: un solo automa a parole intere,
+        # così "Romagna" non è la Roma e "tuttocalciatori" non è TuttoC.
+        self.lexicon = lexicon()
 
     def score(self, opportunity: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -86,21 +146,81 @@ class OB1Scorer:
         total = sum(breakdown[key] * self.WEIGHTS[key] for key in self.WEIGHTS)
         ob1_score = int(round(total))
 
-        # HOT ≥70 / WARM ≥57 / COLD — same dials as SCORE-002
-        if ob1_score >= 70:
-            classification = 'hot'
-        elif ob1_score >= 57:
-            classification = 'warm'
-        else:
-            classification = 'cold'
-
         return {
             'ob1_score': ob1_score,
-            'classification': classification,
+            'classification': classify_score(ob1_score),
             'score_breakdown': breakdown,
         }
 
-    def _calc_freshness(self, date_str: str, opp_type: str = '') -> int:
+    def columns(self, opportunities: Sequence[Dict[str, Any]],
+                today: Optional[date] = None) -> ScoreColumns:
+        """
+        Le colonne dei fattori per una lista di record. Data, tipo, eta,
+        valore e fonte passano per una cache per valore: la stessa funzione
+        di `score`, chiamata una volta per valore distinto.
+        """
+        today = today or datetime.now().date()
+        free_types = self._FREE_TYPES
+        fresh_c: Dict[tuple, int] = {}
+        type_c: Dict[str, int] = {}
+        age_c: Dict[Any, int] = {}
+        mv_c: Dict[Any, int] = {}
+        source_c: Dict[Any, int] = {}
+
+        def cached(cache: dict, value, fn, *args) -> int:
+            try:
+                return cache[value]
+            except KeyError:
+                cache[value] = out = fn(value, *args)
+                return out
+            except TypeError:          # valore non hashable: niente cache
+                return fn(value, *args)
+
+        fresh, types, exp, ages, mvs, fit, sources = ([] for _ in range(7))
+        for opp in opportunities:
+            get = opp.get
+            opp_type = (get('opportunity_type') or 'altro').lower()
+            date_str = get('reported_date') or get('discovered_at', '')
+            if isinstance(date_str, str) and 'T' in date_str:
+                date_str = date_str.split('T')[0]   # come _calc_freshness: conta il giorno
+            key = (date_str, opp_type in free_types)
+            f = fresh_c.get(key) if isinstance(date_str, str) else None
+            if f is None:
+                f = self._calc_freshness(date_str, opp_type, today)
+                if isinstance(date_str, str):
+                    fresh_c[key] = f
+            fresh.append(f)
+            types.append(cached(type_c, opp_type, self._calc_type_score))
+            exp.append(self._calc_experience(opp))
+            ages.append(cached(age_c, get('age'), self._calc_age))
+            mvs.append(cached(mv_c, get('market_value'), self._calc_market_value))
+            fit.append(self._calc_league_fit(opp))
+            sources.append(cached(source_c, get('source_name', ''), self._calc_source))
+        cols = {'freshness': fresh, 'opportunity_type': types, 'experience': exp,
+                'age': ages, 'market_value': mvs, 'league_fit': fit, 'source': sources}
+        return ScoreColumns(FACTORS, cols)
+
+    def score_batch(self, opportunities: Sequence[Dict[str, Any]],
+                    breakdown: bool = True,
+                    weights: Optional[Dict[str, float]] = None,
+                    today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        `score` su una lista intera, stesso output record per record.
+        breakdown=False omette score_breakdown (resta in `columns`);
+        `weights` sostituisce WEIGHTS per un'analisi what-if.
+        """
+        table = self.columns(opportunities, today=today)
+        totals = table.totals(weights or self.WEIGHTS)
+        out = []
+        for i, ob1_score in enumerate(totals):
+            result = {'ob1_score': ob1_score, 'classification': classify_score(ob1_score)}
+            if breakdown:
+                result['score_breakdown'] = table.breakdown(i)
+            out.append(result)
+        return out
+
+    def _calc_freshness(self, date_str: str, opp_type: str = '',
+                        today: Optional[date] = None) -> int:
         """Quanto e' recente la notizia. Svincolati/rescissioni restano utili piu' a lungo."""
         if not date_str:
             return 50
@@ -110,8 +230,8 @@ class OB1Scorer:
                 date_str = date_str.split('T')[0]
 
             reported = datetime.strptime(date_str, '%Y-%m-%d').date()
-            days_ago = (datetime.now().date() - reported).days
-            free = opp_type in ('svincolato', 'rescissione', 'scadenza')
+            days_ago = ((today or datetime.now().date()) - reported).days
+            free = opp_type in self._FREE_TYPES
 
             if days_ago <= 0:
                 return 100
@@ -163,9 +283,8 @@ class OB1Scorer:
             score += 10
 
         # Bonus se ha giocato in Serie B (check nel summary o club)
-        serie_b_keywords = ['serie b', 'serieb', 'cadetti']
         text_to_check = (summary + ' ' + current_club + ' ' + ' '.join(previous_clubs)).lower()
-        if any(kw in text_to_check for kw in serie_b_keywords):
+        if self._SERIE_B_RE.search(text_to_check):
             score += 15
 
         return min(100, score)
@@ -194,18 +313,8 @@ class OB1Scorer:
         if not source_name:
             return 50
 
-        source_lower = source_name.lower()
-
-        # Check exact match first
-        if source_lower in self.SOURCE_SCORES:
-            return self.SOURCE_SCORES[source_lower]
-
-        # Check partial match
-        for key, score in self.SOURCE_SCORES.items():
-            if key in source_lower or source_lower in key:
-                return score
-
-        return 50  # Fonte sconosciuta
+        source = self.lexicon.source(source_name)
+        return source.score if source else 50  # Fonte sconosciuta
 
     def _calc_market_value(self, market_value: Optional[int]) -> int:
         """Score basato sul valore di mercato (indicatore qualita giocatore)"""
@@ -240,20 +349,17 @@ class OB1Scorer:
             score -= 25
 
         # Penalita: club chiaramente dilettanti/amatoriali
-        amateur_keywords = ['maia alta', 'obermais', 'eccellenza', 'promozione', 'juniores']
-        if any(kw in all_text for kw in amateur_keywords):
+        if self._AMATEUR_RE.search(all_text):
             score -= 15
 
         # Bonus: club Serie C noto
-        for club in self.SERIE_C_CLUBS:
-            if club in current_club or any(club in pc for pc in previous_clubs):
-                score += 30
-                break
+        if self.lexicon.has_league([current_club, *previous_clubs], SERIE_C):
+            score += 30
 
         # Bonus: menzioni Serie B/C nel testo
-        if any(kw in all_text for kw in ['serie b', 'cadetti', 'serie a']):
+        if self._UPPER_LEAGUE_RE.search(all_text):
             score += 25
-        elif any(kw in all_text for kw in ['serie c', 'lega pro']):
+        elif self._SERIE_C_RE.search(all_text):
             score += 15
 
         return max(0, min(100, score))
@@ -391,13 +497,8 @@ def score_opportunities(opportunities: list) -> list:
     Returns:
         Lista con ob1_score e classification aggiunti
     """
-    scorer = OB1Scorer()
-    scored = []
-
-    for opp in opportunities:
-        score_data = scorer.score(opp)
-        scored_opp = {**opp, **score_data}
-        scored.append(scored_opp)
+    scored = [{**opp, **score_data} for opp, score_data in
+              zip(opportunities, OB1Scorer().score_batch(opportunities))]
 
     # Sort by score descending
     scored.sort(key=lambda x: x['ob1_score'], reverse=True)
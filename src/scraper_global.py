@@ -6,6 +6,7 @@ High-performance scouting engine using Scrapling (Anti-Bot) and Tavily (Discover
 
 import os
 import re
+import threading
 import time
 import yaml
 import json
@@ -24,20 +25,30 @@ except ImportError:  # google-genai non installato: discovery gira free
     genai = None
 
 try:
-    from src.free_stack import free_web_search, llm_complete_json, llm_mode, has_any_llm
+    from src.free_stack import (free_web_search, has_any_llm, llm_complete_json,
+                                llm_input_budget, llm_mode)
 except ImportError:  # layout PYTHONPATH=src
-    from free_stack import free_web_search, llm_complete_json, llm_mode, has_any_llm
+    from free_stack import (free_web_search, has_any_llm, llm_complete_json,
+                            llm_input_budget, llm_mode)
 
 try:
-    from src.watch.poller import feeds_enabled, load_sources, poll_new_items
+    from src.watch.poller import FeedPoller, feeds_enabled, load_sources, poll_new_items
+    from src.watch.seen import SeenStore
 except ImportError:  # layout PYTHONPATH=src
     try:
-        from watch.poller import feeds_enabled, load_sources, poll_new_items
+        from watch.poller import FeedPoller, feeds_enabled, load_sources, poll_new_items
+        from watch.seen import SeenStore
     except ImportError:  # watch assente: la discovery resta a ricerca
+        FeedPoller = SeenStore = None
         def feeds_enabled(): return False
         def load_sources(**_kw): return []
         def poll_new_items(*_a, **_kw): return []
 
+try:
+    from src.entity_gate import SCOPE_TITLES, junk_match
+except ImportError:  # layout PYTHONPATH=src
+    from entity_gate import SCOPE_TITLES, junk_match
+
 try:
     from src.metrics import get_metrics
 except ImportError:  # layout PYTHONPATH=src
@@ -68,8 +79,35 @@ MAX_PLAYERS_PER_SOURCE = 5
 # Free tier gemini-2.5-flash ≈ 20 RPD. Discovery must leave budget for enrichment.
 # Override with env GEMINI_DISCOVERY_BUDGET.
 DEFAULT_DISCOVERY_BUDGET = 4
-# Articoli per prompt di triage: cento in un colpo non li regge nessun free tier.
-FEED_TRIAGE_CHUNK = 8
+# Il triage si impacchetta fino al max_input_chars della rotta più stretta
+# (llm_input_budget): un articolo che non ci sta passa al prompt dopo invece di
+# finire sotto _clamp. Questo è solo il tetto di articoli per prompt, perché
+# anche l'output (un oggetto per giocatore) ha un limite.
+TRIAGE_MAX_ITEMS = 30
+# Caratteri di estratto per articolo nel prompt di triage. I nomi stanno nel
+# titolo e nell'attacco del pezzo: il resto costa token su ogni articolo e
+# non aggiunge giocatori. Si impacchettano estratti, non articoli interi.
+TRIAGE_EXCERPT_CHARS = 400
+# Pre-triage deterministico: punteggio minimo perché un articolo dei feed valga
+# una riga nel prompt LLM. Una parola di mercato forte basta da sola; un nome
+# proprio da solo no (è il marcatore di una cronaca). OB1_PRETRIAGE=0 lo spegne.
+PRETRIAGE_MIN_SCORE = 2
+
+
+def pretriage_enabled() -> bool:
+    return os.getenv("OB1_PRETRIAGE", "1") != "0"
+
+
+def _terms_regex(terms: List[str]) -> "re.Pattern":
+    """
+    Una regex sola per una lista di termini, a parola intera: 'piace' non
+    prende "Piacenza", 'diretta' non prende "indiretta". Un '*' finale fa del
+    termine una radice ('acquist*' → acquisto, acquisti). Un gruppo per
+    termine, così m.lastindex dice quale termine ha colpito.
+    """
+    alts = [f"({re.escape(t[:-1])}\\w*)" if t.endswith('*') else f"({re.escape(t)})"
+            for t in terms]
+    return re.compile(r"\b(?:" + "|".join(alts) + r")\b")
 
 
 def _is_daily_quota_error(msg: str) -> bool:
@@ -112,14 +150,32 @@ class GlobalScraper:
         '/transferencias/',
     ]
 
-    # Title fragments that indicate a listing page, not a player article
-    JUNK_TITLE_TERMS = [
-        'jugadores libres', 'ranking', 'classifica', 'tabella',
-        'gli svincolati', 'sul mercato', 'quanti svincolati',
-        'transferencias', 'calendario', 'risultati',
-        'ultime notizie', 'tutto mercato', 'calciomercato live',
-        'notiziario', 'fischio finale',
+    # Parole che decidono il tipo di opportunità: le stesse servono al
+    # pre-triage per dire "qui c'è un movimento di mercato".
+    TYPE_KEYWORDS = [
+        (OpportunityType.SVINCOLATO, ['svincolato', 'parametro zero', 'free agent']),
+        (OpportunityType.RESCISSIONE, ['rescinde', 'risoluzione', 'rescissione']),
+        (OpportunityType.PRESTITO, ['prestito', 'loan']),
+    ]
+
+    # Segnali di mercato più deboli: uno solo non basta, due o uno con un nome sì.
+    # A parola intera (vedi _terms_regex); '*' finale = radice.
+    MARKET_TERMS = [
+        'firma*', 'ufficiale', 'ingaggi*', 'acquist*', 'cession*', 'trasferiment*',
+        'contratt*', 'rinnov*', 'tessera*', 'arriva*', 'colpo', 'trattativa',
+        'obiettivo', 'interessa*', 'piace', 'si muove', 'sondaggio', 'classe 20*', 'classe 19*',
+        'talento', 'giovane', 'under', 'esordio', 'primavera', 'fichaje',
+    ]
+    _MARKET_RE = _terms_regex(MARKET_TERMS)
+
+    # Cronaca partita, classifiche, comunicati: materiale senza mercato.
+    NOISE_TERMS = [
+        'pagelle', 'highlights', 'tabellino', 'conferenza stampa', 'biglietti',
+        'prevendita', 'abbonament*', 'arbitro', 'designazioni', 'probabili formazioni',
+        'giudice sportivo', 'diretta', 'sintesi', 'post partita',
     ]
+    _NOISE_RE = _terms_regex(NOISE_TERMS)
+    _SCORELINE = re.compile(r'\b\d{1,2}\s*-\s*\d{1,2}\b')
 
     def __init__(self, config_path: str = "config/leagues.yaml"):
         self.serper_key = os.getenv('SERPER_API_KEY')
@@ -134,6 +190,13 @@ class GlobalScraper:
                 print(f"    [GEMINI] client non inizializzato ({str(e)[:80]})")
         self.gemini_disabled = False  # circuit breaker: daily quota dead
         self.gemini_calls = 0
+        # Le leghe possono girare in parallelo (ouroboros_run): il budget
+        # Gemini, il poller dei feed e la memoria del "già visto" sono dello
+        # scraper, non della lega.
+        self._gemini_lock = threading.Lock()
+        self._poller_lock = threading.Lock()
+        self._feed_poller = None
+        self._seen = None
         try:
             self.discovery_budget = max(0, int(os.getenv(
                 "GEMINI_DISCOVERY_BUDGET", str(DEFAULT_DISCOVERY_BUDGET))))
@@ -153,6 +216,14 @@ class GlobalScraper:
         """Gemini Search Grounding — one call: searches Google + extracts player names."""
         if not self.gemini_client or self.gemini_disabled:
             return []
+        # Una chiamata grounded alla volta: budget e circuit breaker restano
+        # esatti anche con più leghe in volo, e il free tier non regge raffiche.
+        with self._gemini_lock:
+            return self._search_grounded_locked(query)
+
+    def _search_grounded_locked(self, query: str) -> List[Dict]:
+        if self.gemini_disabled:
+            return []
         if self.gemini_calls >= self.discovery_budget:
             print(f"    [GEMINI BUDGET] discovery cap {self.discovery_budget} raggiunto → Tavily")
             return []
@@ -237,25 +308,144 @@ class GlobalScraper:
         "Se non trovi calciatori individuali reali, rispondi esattamente: []"
     )
 
+    @staticmethod
+    def _triage_block(r: Dict, max_excerpt: int = TRIAGE_EXCERPT_CHARS) -> str:
+        excerpt = " ".join((r.get('content') or '').split())
+        if len(excerpt) > max_excerpt:
+            excerpt = excerpt[:max(0, max_excerpt)]
+        return (f"TITOLO: {r.get('title', '')}\nURL: {r.get('url', '')}\n"
+                f"ESTRATTO: {excerpt}")
+
+    def _pack_triage(self, results: List[Dict], budget: int) -> List[str]:
+        """
+        Corpus di articoli, ciascuno lungo al massimo `budget` caratteri, con
+        estratti di TRIAGE_EXCERPT_CHARS. Si riempie un prompt finché il
+        prossimo articolo ci sta, poi se ne apre un altro. Solo un articolo che
+        da solo supera il budget si accorcia ancora, e lo si dice.
+        """
+        sep = "\n\n"
+        corpora: List[str] = []
+        current: List[str] = []
+        size = 0
+        for r in results:
+            block = self._triage_block(r)
+            if len(block) > budget:
+                overflow = len(block) - budget
+                excerpt = min(TRIAGE_EXCERPT_CHARS, len(" ".join(
+                    (r.get('content') or '').split())))
+                block = self._triage_block(r, excerpt - overflow)
+                print(f"    [TRIAGE] estratto accorciato di {overflow} caratteri: "
+                      f"{r.get('url', '')[:80]}")
+            extra = len(block) + (len(sep) if current else 0)
+            if current and (size + extra > budget or len(current) >= TRIAGE_MAX_ITEMS):
+                corpora.append(sep.join(current))
+                current, size = [], 0
+                extra = len(block)
+            current.append(block)
+            size += extra
+        if current:
+            corpora.append(sep.join(current))
+        return corpora
+
     def _extract_players(self, results: List[Dict], context: str) -> List[Dict]:
         """
         Da risultati (ricerca o feed) ai nomi dei giocatori, via LLM free.
         Unico punto di estrazione: ricerca e feed non devono divergere.
+
+        Tanti prompt quanti ne servono perché ogni estratto arrivi intero alla
+        rotta: il budget è quello del task triage, meno le istruzioni.
         """
         if not results or not has_any_llm():
             return []
-        corpus = "\n\n".join(
-            f"TITOLO: {r.get('title', '')}\nURL: {r.get('url', '')}\n"
-            f"ESTRATTO: {(r.get('content') or '')[:400]}"
-            for r in results
-        )
-        items = llm_complete_json(
-            "Sei un analista di calciomercato. Rispondi SOLO con JSON valido.",
-            f"Da questi articoli su: {context}\n\n{self._EXTRACT_RULES}\n\n{corpus}",
-            gemini_client=self.gemini_client,
-            task="triage",
-        )
-        return items if isinstance(items, list) else []
+        header = f"Da questi articoli su: {context}\n\n{self._EXTRACT_RULES}\n\n"
+        budget = max(1, llm_input_budget("triage") - len(header))
+        out: List[Dict] = []
+        for corpus in self._pack_triage(results, budget):
+            items = llm_complete_json(
+                "Sei un analista di calciomercato. Rispondi SOLO con JSON valido.",
+                header + corpus,
+                gemini_client=self.gemini_client,
+                task="triage",
+            )
+            if isinstance(items, list):
+                out.extend(items)
+        return out
+
+    def _pretriage(self, item: Dict) -> Tuple[int, str]:
+        """
+        Punteggio senza LLM di un articolo (forma risultato di ricerca) e il
+        motivo se va scartato, "" se va al triage. Le liste sono quelle che
+        scrape_league usa già per scartare pagine e tipizzare: il pre-triage
+        non introduce una seconda politica editoriale.
+        """
+        url = item.get('url', '')
+        title = item.get('title', '')
+        if self._is_junk_url(url):
+            return 0, "url_listing"
+        if self._is_junk_title(title):
+            return 0, "titolo_listing"
+
+        text = f"{title} {item.get('content') or ''}".lower()
+        score = 0
+        if any(k in text for _t, kws in self.TYPE_KEYWORDS for k in kws):
+            score += 2
+        score += min(2, len({m.lastindex for m in self._MARKET_RE.finditer(text)}))
+        if self._extract_name(title):
+            score += 1
+        if self._NOISE_RE.search(text) or self._SCORELINE.search(title):
+            score -= 2
+        if score < PRETRIAGE_MIN_SCORE:
+            return score, "nessun_segnale"
+        return score, ""
+
+    def _prefilter_feed_items(self, results: List[Dict]) -> List[Dict]:
+        """Solo gli articoli plausibili; gli scarti si contano per motivo."""
+        if not pretriage_enabled():
+            return results
+        kept: List[Dict] = []
+        dropped: Dict[str, int] = {}
+        for r in results:
+            _score, reason = self._pretriage(r)
+            if reason:
+                dropped[reason] = dropped.get(reason, 0) + 1
+            else:
+                kept.append(r)
+        for reason, n in dropped.items():
+            _metric("item_skipped", f"pretriage_{reason}", n)
+        if dropped:
+            detail = ", ".join(f"{k}={v}" for k, v in sorted(dropped.items()))
+            print(f"    [PRE-TRIAGE] {len(kept)}/{len(results)} al triage LLM ({detail})")
+        return kept
+
+    def feed_poller(self):
+        """Un FeedPoller per scraper: una sessione HTTP e un file di ETag per tutte le leghe."""
+        if FeedPoller is None:
+            return None
+        with self._poller_lock:
+            if self._feed_poller is None:
+                self._feed_poller = FeedPoller()
+            return self._feed_poller
+
+    def seen_store(self):
+        """
+        Un SeenStore per scraper, condiviso dalle leghe: uno per lega erano
+        più connessioni e più filtri di Bloom sullo stesso data/ob1.db, e
+        due leghe con un feed in comune potevano registrare lo stesso
+        articolo insieme. Il SeenStore serializza le sue operazioni.
+        """
+        if SeenStore is None:
+            return None
+        with self._poller_lock:
+            if self._seen is None:
+                self._seen = SeenStore()
+            return self._seen
+
+    def close(self) -> None:
+        """Fine run: chiude la memoria condivisa (e salva il suo filtro)."""
+        with self._poller_lock:
+            seen, self._seen = self._seen, None
+        if seen is not None:
+            seen.close()
 
     def discover_from_feeds(self, league_id: str,
                             trusted: Optional[List[str]] = None) -> List[Dict]:
@@ -268,18 +458,14 @@ class GlobalScraper:
         sources = load_sources(league_id=league_id)
         if not sources:
             return []
-        items = poll_new_items(sources)
+        items = poll_new_items(sources, seen=self.seen_store(), poller=self.feed_poller())
         if not items:
             return []
+        results = self._prefilter_feed_items([it.as_search_result() for it in items])
 
-        # A blocchi: un prompt con cento articoli non lo regge nessun tier free.
-        out: List[Dict] = []
-        for i in range(0, len(items), FEED_TRIAGE_CHUNK):
-            chunk = items[i:i + FEED_TRIAGE_CHUNK]
-            out.extend(self._extract_players(
-                [it.as_search_result() for it in chunk],
-                f"mercato {league_id} (articoli nuovi dai feed)",
-            ))
+        # I prompt li dimensiona _extract_players sul budget della rotta.
+        out = self._extract_players(
+            results, f"mercato {league_id} (articoli nuovi dai feed)")
         print(f"    [FEED DISCOVERY] {len(out)} giocatori da {len(items)} articoli nuovi")
         return out
 
@@ -360,9 +546,11 @@ class GlobalScraper:
         return any(p in url_lower for p in self.BLACKLIST_URL_PATTERNS)
 
     def _is_junk_title(self, title: str) -> bool:
-        """Detect generic listing titles that aren't about a specific player."""
-        title_lower = title.lower()
-        return any(term in title_lower for term in self.JUNK_TITLE_TERMS)
+        """
+        Detect generic listing titles that aren't about a specific player.
+        Vocabulary shared with the name gates: config/junk_terms.txt, "titoli".
+        """
+        return junk_match(title, SCOPE_TITLES) is not None
 
     def scrape_league(self, league_id: str) -> List[MarketOpportunity]:
         """Scrape all opportunities for a league with fresh filtering."""
@@ -496,9 +684,9 @@ class GlobalScraper:
 
     def _detect_type(self, text: str) -> OpportunityType:
         text = text.lower()
-        if any(k in text for k in ['svincolato', 'parametro zero', 'free agent']): return OpportunityType.SVINCOLATO
-        if any(k in text for k in ['rescinde', 'risoluzione', 'rescissione']): return OpportunityType.RESCISSIONE
-        if any(k in text for k in ['prestito', 'loan']): return OpportunityType.PRESTITO
+        for opp_type, keywords in self.TYPE_KEYWORDS:
+            if any(k in text for k in keywords):
+                return opp_type
         return OpportunityType.TALENT
 
     def _extract_name(self, title: str) -> str:
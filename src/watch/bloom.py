@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Filtro di Bloom davanti al SeenStore.
+
+Risponde a una sola domanda, ma la risponde senza toccare SQLite: "questa
+chiave è sicuramente nuova?". Un "no" del filtro è certo (mai visto), un "sì"
+vuol dire solo "forse" e la conferma la dà il database. In un giro di feed
+quasi tutto quello che non è già passato finisce nel primo caso.
+
+Le chiavi del SeenStore sono già sha256 in esadecimale: le posizioni dei bit
+si ricavano da due fette del digest (double hashing), nessun hash in più.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_watch -v
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from typing import Iterable
+
+DEFAULT_CAPACITY = 50_000
+DEFAULT_ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Bit array + k posizioni per chiave. Serializzabile come bytes."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        n_bits = -self.capacity * math.log(error_rate) / (math.log(2) ** 2)
+        self.n_bits = max(8, int(math.ceil(n_bits)))
+        self.n_hashes = max(1, int(round(self.n_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Chiave sha256 esadecimale: bastano due fette da 64 bit del digest.
+        # Una chiave scritta a mano (test, kind diversi) si ri-hasha prima.
+        try:
+            h1 = int(key[:16], 16)
+            h2 = int(key[16:32], 16) | 1
+        except ValueError:
+            digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+            h1 = int(digest[:16], 16)
+            h2 = int(digest[16:32], 16) | 1
+        for i in range(self.n_hashes):
+            yield (h1 + i * h2) % self.n_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def saturated(self) -> bool:
+        """Oltre la capacità il tasso di falsi positivi sale: va ricostruito."""
+        return self.count > self.capacity
+
+    # ------------------------------------------------------------ persistenza
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, capacity: int, error_rate: float,
+                   count: int) -> "BloomFilter":
+        bf = cls(capacity, error_rate)
+        if len(blob) != len(bf.bits):
+            raise ValueError("dimensione del filtro incoerente con la capacità")
+        bf.bits = bytearray(blob)
+        bf.count = int(count)
+        return bf
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Quasi-doppioni: la stessa notizia riscritta da tre siti diversi.
+
+`content_only_key` riconosce solo il testo IDENTICO. Ma tuttoc, tuttolegapro e
+tuttomercatoweb riprendono lo stesso trasferimento cambiando un verbo e
+l'ordine delle frasi: per l'hash esatto sono tre notizie, e il triage LLM le
+paga tre volte per scoprire lo stesso giocatore.
+
+MinHash sulle parole di contenuto, con LSH a bande: due testi finiscono nello
+stesso secchio se coincidono in almeno una banda, e solo quei candidati si
+confrontano davvero (Jaccard stimato sulle firme). Il costo di una domanda non
+cresce con lo storico.
+
+Le parole si troncano alle prime cinque lettere: "firma"/"firmato",
+"arriva"/"arrivo" diventano la stessa. È lo stemmer più rozzo che esista, ed è
+quello giusto per titoli di mercato in italiano — non serve un dizionario.
+
+La somiglianza da sola non basta. Due comunicati fatti con lo stesso modello
+("UFFICIALE: il Pineto ingaggia il difensore Mario Rossi" / "... Luca
+Bianchi") condividono quasi tutte le parole e differiscono proprio in quella
+che conta. Quindi servono anche i nomi (`names`): si fonde solo se le
+parole maiuscole dentro la frase di uno dei due testi compaiono tutte,
+maiuscole, anche nell'altro — dove possono stare a inizio frase ("Avellino,
+preso Patierno" / "Ufficiale: Patierno all'Avellino"). Una riscrittura cita
+le stesse persone e gli stessi club; un altro acquisto dallo stesso modello no.
+
+Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_watch -v
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import re
+import struct
+import unicodedata
+from typing import List, Optional, Sequence, Tuple
+
+NUM_PERM = 60
+BANDS = 20
+ROWS = NUM_PERM // BANDS           # 3: soglia LSH ≈ (1/20)^(1/3) ≈ 0.37
+
+# Sotto questa soglia di Jaccard due articoli sono storie diverse. Sopra, sono
+# la stessa notizia scritta da un'altra redazione — se citano gli stessi nomi.
+DEFAULT_THRESHOLD = 0.6
+
+# Un titolo da sitemap ("Mercato avellino colpo") non ha abbastanza parole per
+# dire che due pezzi sono la stessa storia: meglio pagare un triage in più che
+# fondere due notizie diverse.
+MIN_TOKENS = 6
+
+STEM_LEN = 5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20260803)     # firme stabili tra processi e tra run
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_WORD_RE = re.compile(r"[^\W\d_]+")
+# Dopo questi (o a inizio testo) la maiuscola è della frase, non del nome.
+_SENTENCE_END = ".!?:;\"«»\n"
+
+_STOPWORDS = {
+    "il", "lo", "la", "le", "gli", "un", "una", "uno", "di", "da", "in", "con",
+    "su", "per", "tra", "fra", "del", "della", "dello", "dei", "degli", "delle",
+    "al", "alla", "allo", "ai", "agli", "alle", "dal", "dalla", "dai", "dalle",
+    "nel", "nella", "nei", "nelle", "sul", "sulla", "sui", "sulle", "che", "non",
+    "per", "piu", "come", "anche", "dopo", "ecco", "sono", "stato", "stata",
+    "suo", "sua", "suoi", "sue", "the", "and", "for", "questo", "questa",
+    "ha", "hanno", "essere", "era", "verso", "ancora", "gia", "poi", "cosi",
+}
+
+
+def neardup_enabled() -> bool:
+    """OB1_NEARDUP=0: si torna al solo hash esatto."""
+    return os.getenv("OB1_NEARDUP", "1") != "0"
+
+
+def neardup_threshold() -> float:
+    """OB1_NEARDUP_THRESHOLD: Jaccard minimo per dire "stessa notizia"."""
+    try:
+        value = float(os.getenv("OB1_NEARDUP_THRESHOLD", DEFAULT_THRESHOLD))
+    except (TypeError, ValueError):
+        return DEFAULT_THRESHOLD
+    return min(1.0, max(0.0, value))
+
+
+def shingles(text: str) -> set:
+    """Parole di contenuto, senza accenti né stopword, troncate a STEM_LEN."""
+    flat = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return {t[:STEM_LEN] for t in _TOKEN_RE.findall(flat.lower())
+            if len(t) >= 3 and t not in _STOPWORDS}
+
+
+def names(text: str) -> Tuple[frozenset, frozenset]:
+    """
+    (nomi certi, tutte le parole maiuscole), in minuscolo e senza accenti.
+
+    Certi sono quelli dentro la frase: persone, club, città. A inizio frase la
+    maiuscola può essere un nome ("Avellino, preso...") o solo la frase
+    ("Ufficiale", "Dopo"): quelle parole contano solo dall'altra parte.
+    """
+    text = text or ""
+    sure, every = set(), set()
+    for m in _WORD_RE.finditer(text):
+        word = m.group()
+        if len(word) < 3 or not word[0].isupper():
+            continue
+        flat = unicodedata.normalize("NFKD", word).encode("ascii", "ignore").decode().lower()
+        every.add(flat)
+        gap = text[:m.start()]
+        before = gap.rstrip()
+        if before and before[-1] not in _SENTENCE_END and "\n" not in gap[len(before):]:
+            sure.add(flat)
+    return frozenset(sure), frozenset(every)
+
+
+def same_names(a: Tuple[frozenset, frozenset], b: Tuple[frozenset, frozenset]) -> bool:
+    """I nomi certi di uno dei due testi compaiono tutti fra le maiuscole dell'altro."""
+    return a[0] <= b[1] or b[0] <= a[1]
+
+
+def pack_names(nm: Tuple[frozenset, frozenset]) -> str:
+    """Per la colonna seen_near.names: "certi|altri"."""
+    sure, every = nm
+    return " ".join(sorted(sure)) + "|" + " ".join(sorted(every - sure))
+
+
+def unpack_names(raw: str) -> Tuple[frozenset, frozenset]:
+    sure, _, rest = raw.partition("|")
+    sure = frozenset(sure.split())
+    return sure, sure | frozenset(rest.split())
+
+
+def _h64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(),
+                          "little")
+
+
+def signature(text: str) -> Optional[Tuple[int, ...]]:
+    """Firma MinHash, o None se il testo è troppo povero per giudicare."""
+    tokens = shingles(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    hashes = [_h64(t) for t in tokens]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Jaccard stimato: quota di permutazioni con lo stesso minimo."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def bands(sig: Sequence[int]) -> List[int]:
+    """Un intero per banda, firmato a 64 bit: entra in una colonna INTEGER."""
+    out = []
+    for i in range(BANDS):
+        chunk = struct.pack(f"<B{ROWS}Q", i, *sig[i * ROWS:(i + 1) * ROWS])
+        v = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little")
+        out.append(v - (1 << 64) if v > (1 << 63) - 1 else v)
+    return out
+
+
+def pack(sig: Sequence[int]) -> bytes:
+    return struct.pack(f"<{NUM_PERM}Q", *sig)
+
+
+def unpack(blob: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f"<{NUM_PERM}Q", blob)
@@ -19,6 +19,7 @@ from __future__ import annotations
 import json
 import os
 import re
+import threading
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
@@ -203,6 +204,9 @@ class FeedPoller:
         self.etag_path = Path(etag_path) if etag_path else FEED_ETAG_CACHE
         self.session = session or requests.Session()
         self._validators: Dict[str, Dict[str, str]] = self._load()
+        # Un poller solo per tutte le leghe di una run (ouroboros le scorre in
+        # parallelo): una sessione, un file di validator, scritto da uno alla volta.
+        self._lock = threading.Lock()
 
     def _load(self) -> Dict[str, Dict[str, str]]:
         try:
@@ -212,13 +216,17 @@ class FeedPoller:
             return {}
 
     def save(self) -> None:
-        try:
-            self.etag_path.parent.mkdir(parents=True, exist_ok=True)
-            self.etag_path.write_text(
-                json.dumps(self._validators, ensure_ascii=False, indent=2, sort_keys=True),
-                encoding="utf-8")
-        except OSError:
-            pass
+        with self._lock:
+            snapshot = dict(self._validators)
+            try:
+                self.etag_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.etag_path.with_suffix(self.etag_path.suffix + ".tmp")
+                tmp.write_text(
+                    json.dumps(snapshot, ensure_ascii=False, indent=2, sort_keys=True),
+                    encoding="utf-8")
+                os.replace(tmp, self.etag_path)
+            except OSError:
+                pass
 
     def poll(self, source: Source, now: Optional[datetime] = None) -> PollResult:
         now = now or datetime.now(timezone.utc)
@@ -248,7 +256,8 @@ class FeedPoller:
         if resp.headers.get("Last-Modified"):
             validators["last_modified"] = resp.headers["Last-Modified"]
         if validators:
-            self._validators[source.url] = validators
+            with self._lock:
+                self._validators[source.url] = validators
 
         items = parse_feed(resp.text, source.id)
         cutoff = now - timedelta(days=source.max_age_days)
@@ -306,8 +315,9 @@ def poll_new_items(
     owns_seen = seen is None
     seen = seen or SeenStore()
 
-    new_items: List[Item] = []
-    stats = {"304": 0, "ok": 0, "errore": 0, "nuovi": 0, "già visti": 0}
+    fetched: List[Item] = []
+    stats = {"304": 0, "ok": 0, "errore": 0, "nuovi": 0, "già visti": 0,
+             "quasi-doppi": 0}
     try:
         for source in sources:
             result = poller.poll(source)
@@ -320,12 +330,19 @@ def poll_new_items(
                     print(f"    [FEED {source.id}] {result.error}")
                 continue
             stats["ok"] += 1
-            for item in result.items:
-                if seen.see(item.url, item.content, kind="article"):
-                    new_items.append(item)
-                    stats["nuovi"] += 1
-                else:
-                    stats["già visti"] += 1
+            fetched.extend(result.items)
+        # Un lotto solo per tutto il giro: una sitemap da centinaia di URL
+        # costa una query e un commit, non un fsync per articolo.
+        flags = seen.see_batch(((i.url, i.content) for i in fetched), kind="article")
+        new_items = [item for item, new in zip(fetched, flags) if new]
+        stats["già visti"] = len(fetched) - len(new_items)
+        # La stessa storia ripresa da tre siti: al triage ne basta una.
+        dupes = seen.near_duplicates((i.url, i.content) for i in new_items)
+        new_items = [item for item, dup in zip(new_items, dupes) if dup is None]
+        stats["quasi-doppi"] = len(dupes) - len(new_items)
+        stats["nuovi"] = len(new_items)
+        if stats["quasi-doppi"]:
+            _metric("item_skipped", "quasi_doppio", stats["quasi-doppi"])
         poller.save()
     finally:
         if owns_seen:
@@ -334,7 +351,8 @@ def poll_new_items(
     if verbose:
         print(f"    [FEEDS] {len(sources)} fonti: {stats['ok']} aggiornate, "
               f"{stats['304']} invariate, {stats['errore']} in errore | "
-              f"{stats['nuovi']} articoli nuovi, {stats['già visti']} già visti")
+              f"{stats['nuovi']} articoli nuovi, {stats['già visti']} già visti, "
+              f"{stats['quasi-doppi']} quasi-doppi")
     return new_items
 
 
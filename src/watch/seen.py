@@ -16,19 +16,35 @@ La chiave è `sha256(url + contenuto_normalizzato)`, non l'URL da solo:
 
 Storage: SQLite in `data/ob1.db` (ARCH-002 §5.5), gitignorato e trasportato
 tra le run dall'artifact di Actions. `SeenStore(":memory:")` per i test.
+Un'istanza si può dividere fra thread (le leghe in parallelo di
+ouroboros_run): una connessione, e un lock attorno a ogni operazione.
+
+Un giro di sitemap porta centinaia di URL: `see_batch()` li risolve con una
+query `IN` e un'unica transazione, e un filtro di Bloom persistito nello stesso
+file (bloom.py) dice "sicuramente nuovo" senza interrogare SQLite.
+OB1_SEEN_BLOOM=0 lo spegne: le risposte restano identiche, solo più lente.
+
+`near_duplicates()` va oltre l'hash esatto: la stessa notizia riscritta da un
+altro sito (neardup.py, MinHash + LSH). Le firme vivono in due tabelle accanto
+a `seen` e invecchiano con lei.
 
 Test: PYTHONIOENCODING=utf-8 python -m unittest tests.test_watch -v
 """
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import os
 import re
 import sqlite3
+import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
+
+from . import neardup
+from .bloom import DEFAULT_CAPACITY, DEFAULT_ERROR_RATE, BloomFilter
 
 DEFAULT_DB = Path("data/ob1.db")
 
@@ -36,6 +52,9 @@ DEFAULT_DB = Path("data/ob1.db")
 # è di fatto un evento nuovo — e le righe non devono crescere all'infinito.
 DEFAULT_RETENTION_DAYS = 60
 
+# Variabili per statement: le build storiche di SQLite si fermano a 999.
+_IN_CHUNK = 500
+
 _WS = re.compile(r"\s+")
 _VOLATILE = re.compile(
     r"(?:\?|&)(?:utm_[a-z]+|fbclid|gclid|ref|ref_src|_ga)=[^&\s]*", re.IGNORECASE)
@@ -46,6 +65,11 @@ def watch_enabled() -> bool:
     return os.getenv("OB1_WATCH", "1") != "0"
 
 
+def bloom_enabled() -> bool:
+    """OB1_SEEN_BLOOM=0: ogni domanda va al database, come prima."""
+    return os.getenv("OB1_SEEN_BLOOM", "1") != "0"
+
+
 def normalize_content(text: str) -> str:
     """
     Testo confrontabile: spazi collassati, minuscolo, niente code di tracking.
@@ -74,6 +98,19 @@ def content_only_key(content: str) -> str:
     return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
 
 
+def _locked(method):
+    """Un'operazione alla volta sulla connessione condivisa."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _StaleFilter(Exception):
+    """Un insert del lotto è stato ignorato: la chiave c'era già."""
+
+
 class SeenStore:
     """
     Memoria di cosa è già passato. Nessuna dipendenza esterna: sqlite3 è nella
@@ -84,11 +121,29 @@ class SeenStore:
         self.path = str(path)
         if self.path != ":memory:":
             Path(self.path).parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(self.path)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
         self._init_db()
+        self._bloom: Optional[BloomFilter] = None
+        self._bloom_dirty = False
+        # Il filtro in memoria copre ogni insert fino a _synced_at (valore del
+        # contatore condiviso) più i nostri, i cui intervalli stanno in _own.
+        # Quelli di un altro SeenStore sullo stesso file no: è il conto che
+        # _save_bloom fa prima di timbrare il filtro.
+        self._synced_at = 0
+        self._own: List[Tuple[int, int]] = []
+        if bloom_enabled():
+            self._bloom = self._load_bloom()
 
     def _init_db(self) -> None:
+        # WAL + synchronous=NORMAL: un commit non aspetta più l'fsync del file
+        # principale, e in caso di crash del sistema si perde al massimo
+        # l'ultima transazione — per una memoria di "già visto" basta.
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         with self.conn:
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS seen (
@@ -105,12 +160,164 @@ class SeenStore:
                 "CREATE INDEX IF NOT EXISTS idx_seen_content ON seen(content_hash)")
             self.conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_seen_last ON seen(last_seen)")
+            # Il filtro vale solo se ha visto OGNI insert. Un contatore tenuto
+            # da un trigger lo garantisce anche per chi scrive senza passare da
+            # qui (codice vecchio, una run interrotta): se il contatore salvato
+            # col filtro non coincide, il filtro si ricostruisce dalla tabella.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_meta (
+                    name  TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO seen_meta (name, value) VALUES ('inserts', 0)")
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS seen_count_inserts AFTER INSERT ON seen
+                BEGIN
+                    UPDATE seen_meta SET value = value + 1 WHERE name = 'inserts';
+                END
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_bloom (
+                    id         INTEGER PRIMARY KEY CHECK (id = 1),
+                    capacity   INTEGER NOT NULL,
+                    error_rate REAL NOT NULL,
+                    n_items    INTEGER NOT NULL,
+                    inserts_at INTEGER NOT NULL,
+                    bits       BLOB NOT NULL
+                )
+            """)
+            # Una riga per articolo "rappresentante" (il primo di una storia),
+            # una per ciascuna delle sue bande LSH: la domanda "somiglia a
+            # qualcosa di già visto?" è una query IN sulle bande.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_near (
+                    id         INTEGER PRIMARY KEY,
+                    url        TEXT,
+                    signature  BLOB NOT NULL,
+                    first_seen TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_near_bands (
+                    band    INTEGER NOT NULL,
+                    near_id INTEGER NOT NULL
+                )
+            """)
+            # I nomi del rappresentante (neardup.names), aggiunti dopo: ALTER
+            # per i db già esistenti. Una riga senza nomi non fonde niente.
+            if "names" not in {r[1] for r in self.conn.execute("PRAGMA table_info(seen_near)")}:
+                self.conn.execute("ALTER TABLE seen_near ADD COLUMN names TEXT")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_near_band ON seen_near_bands(band)")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_near_first ON seen_near(first_seen)")
+
+    # ------------------------------------------------------------------ bloom
+    def _inserts_counter(self) -> int:
+        row = self.conn.execute(
+            "SELECT value FROM seen_meta WHERE name = 'inserts'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _load_bloom(self) -> BloomFilter:
+        row = self.conn.execute("SELECT * FROM seen_bloom WHERE id = 1").fetchone()
+        counter = self._inserts_counter()
+        if row and row["inserts_at"] == counter:
+            try:
+                bloom = BloomFilter.from_bytes(row["bits"], row["capacity"],
+                                               row["error_rate"], row["n_items"])
+                if not bloom.saturated:
+                    self._synced_at, self._own = counter, []
+                    return bloom
+            except ValueError:
+                pass
+        return self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> BloomFilter:
+        """Dalla tabella, con capacità doppia delle righe: non si satura subito."""
+        # Prima il contatore, poi le chiavi: un insert che arriva in mezzo
+        # finisce nel filtro senza essere contato, mai il contrario.
+        counter = self._inserts_counter()
+        n = self.count()
+        bloom = BloomFilter(max(DEFAULT_CAPACITY, 2 * n), DEFAULT_ERROR_RATE)
+        bloom.update(r[0] for r in self.conn.execute("SELECT key FROM seen"))
+        self._synced_at, self._own = counter, []
+        self._bloom_dirty = True
+        return bloom
+
+    def _record_inserts(self, n: int) -> None:
+        """Dentro la transazione dei nostri `n` insert: sono gli ultimi `n` del contatore."""
+        if n:
+            hi = self._inserts_counter()
+            self._own.append((hi - n, hi))
+
+    def _save_bloom(self) -> None:
+        """
+        Da chiamare DENTRO la transazione degli insert che il filtro copre.
+
+        Più SeenStore sullo stesso file (una run con più leghe, il brief e il
+        backfill) salvano ciascuno il proprio filtro: l'ultimo non ha le
+        chiavi degli altri, e timbrarlo col contatore condiviso lo farebbe
+        passare per completo. Quindi, a lock di scrittura preso: si unisce al
+        filtro salvato, si rilegge il contatore, e si timbra solo se ogni
+        insert contato è coperto — dal filtro salvato, dal nostro o dai
+        nostri insert. Se non torna, il filtro si rifà dalla tabella.
+        """
+        b = self._bloom
+        if b is None:
+            return
+        # Un UPDATE che non cambia niente prende il lock di scrittura: da qui
+        # a COMMIT nessun altro inserisce, e contatore e filtro salvato sono
+        # quelli veri.
+        self.conn.execute("UPDATE seen_meta SET value = value WHERE name = 'inserts'")
+        counter = self._inserts_counter()
+        covered = self._synced_at
+        row = self.conn.execute("SELECT * FROM seen_bloom WHERE id = 1").fetchone()
+        if row and (row["capacity"], row["error_rate"]) == (b.capacity, b.error_rate):
+            try:
+                stored = BloomFilter.from_bytes(row["bits"], row["capacity"],
+                                                row["error_rate"], row["n_items"])
+            except ValueError:
+                stored = None
+            if stored is not None and row["inserts_at"] <= counter:
+                b.bits = bytearray(x | y for x, y in zip(b.bits, stored.bits))
+                b.count = max(b.count, stored.count)
+                covered = max(covered, row["inserts_at"])
+        mine = sum(max(0, min(hi, counter) - max(lo, covered)) for lo, hi in self._own)
+        if mine != counter - covered or b.saturated:
+            b = self._bloom = self._rebuild_bloom()
+            counter = self._synced_at
+        self.conn.execute(
+            "INSERT OR REPLACE INTO seen_bloom (id, capacity, error_rate, n_items, "
+            "inserts_at, bits) VALUES (1, ?, ?, ?, ?, ?)",
+            (b.capacity, b.error_rate, b.count, counter, b.to_bytes()))
+        self._synced_at, self._own = counter, []
+        self._bloom_dirty = False
+
+    def _maybe_seen(self, key: str) -> bool:
+        """False = sicuramente mai visto. True = lo deve dire il database."""
+        return self._bloom is None or key in self._bloom
+
+    def _existing(self, keys: List[str]) -> set:
+        """Quali di queste chiavi sono già nel database: una query ogni _IN_CHUNK."""
+        found = set()
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(r[0] for r in self.conn.execute(
+                f"SELECT key FROM seen WHERE key IN ({marks})", chunk))
+        return found
 
     # ------------------------------------------------------------------ letture
+    @_locked
     def is_new(self, key: str) -> bool:
+        if not self._maybe_seen(key):
+            return True
         row = self.conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone()
         return row is None
 
+    @_locked
     def seen_content(self, content: str) -> bool:
         """Questo testo è già passato, anche se da un altro URL?"""
         h = content_only_key(content)
@@ -118,14 +325,17 @@ class SeenStore:
             "SELECT 1 FROM seen WHERE content_hash = ? LIMIT 1", (h,)).fetchone()
         return row is not None
 
+    @_locked
     def info(self, key: str) -> Optional[dict]:
         row = self.conn.execute("SELECT * FROM seen WHERE key = ?", (key,)).fetchone()
         return dict(row) if row else None
 
+    @_locked
     def count(self) -> int:
         return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
 
     # ---------------------------------------------------------------- scritture
+    @_locked
     def mark(self, key: str, url: str = "", content: str = "",
              kind: str = "item") -> bool:
         """
@@ -133,18 +343,29 @@ class SeenStore:
         fare), False se era già visto (e allora il lavoro si salta).
         """
         now = datetime.now(timezone.utc).isoformat(timespec="seconds")
-        existing = self.conn.execute(
-            "SELECT times_seen FROM seen WHERE key = ?", (key,)).fetchone()
+        existing = None
+        if self._maybe_seen(key):
+            existing = self.conn.execute(
+                "SELECT times_seen FROM seen WHERE key = ?", (key,)).fetchone()
         with self.conn:
-            if existing:
+            # OR IGNORE: un filtro rimasto indietro (un altro SeenStore ha
+            # scritto nel frattempo) dice "nuovo" a una chiave che c'è già.
+            # Decide l'insert, non il filtro.
+            inserted = not existing and self.conn.execute(
+                "INSERT OR IGNORE INTO seen (key, kind, url, content_hash, first_seen, "
+                "last_seen, times_seen) VALUES (?, ?, ?, ?, ?, ?, 1)",
+                (key, kind, normalize_url(url), content_only_key(content), now, now)).rowcount
+            if not inserted:
                 self.conn.execute(
                     "UPDATE seen SET last_seen = ?, times_seen = times_seen + 1 "
                     "WHERE key = ?", (now, key))
                 return False
-            self.conn.execute(
-                "INSERT INTO seen (key, kind, url, content_hash, first_seen, "
-                "last_seen, times_seen) VALUES (?, ?, ?, ?, ?, ?, 1)",
-                (key, kind, normalize_url(url), content_only_key(content), now, now))
+            self._record_inserts(1)
+        if self._bloom is not None:
+            # Il filtro non si riscrive a ogni singolo mark: lo fa close(). Se
+            # la run muore prima, se ne accorge il contatore degli insert.
+            self._bloom.add(key)
+            self._bloom_dirty = True
         return True
 
     def see(self, url: str, content: str = "", kind: str = "item") -> bool:
@@ -158,24 +379,192 @@ class SeenStore:
             return True
         return self.mark(content_key(url, content), url=url, content=content, kind=kind)
 
+    @_locked
+    def see_batch(self, items: Iterable[tuple], kind: str = "item") -> List[bool]:
+        """
+        see() su ogni (url, content), stesso ordine e stesse risposte, ma in
+        blocco: una query `IN` per le sole chiavi che il filtro non esclude,
+        poi insert e update con executemany in UNA transazione — un fsync per
+        lotto invece di uno per articolo. Lo stesso articolo due volte nel
+        lotto conta come due passaggi, come due see() consecutivi.
+        """
+        items = list(items)
+        if not watch_enabled():
+            return [True] * len(items)
+        if not items:
+            return []
+
+        keyed = [(content_key(url, content), url, content) for url, content in items]
+        candidates = list(dict.fromkeys(k for k, _u, _c in keyed if self._maybe_seen(k)))
+        existing = self._existing(candidates)
+
+        while True:
+            now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            flags: List[bool] = []
+            inserts, bumps = {}, {}
+            for key, url, content in keyed:
+                if key in existing or key in inserts:
+                    bumps[key] = bumps.get(key, 0) + 1
+                    flags.append(False)
+                    continue
+                inserts[key] = (key, kind, normalize_url(url), content_only_key(content),
+                                now, now)
+                flags.append(True)
+            try:
+                with self.conn:
+                    if inserts:
+                        n = self.conn.executemany(
+                            "INSERT OR IGNORE INTO seen (key, kind, url, content_hash, "
+                            "first_seen, last_seen, times_seen) VALUES (?, ?, ?, ?, ?, ?, 1)",
+                            list(inserts.values())).rowcount
+                        if n != len(inserts):
+                            raise _StaleFilter
+                        self._record_inserts(n)
+                    if bumps:
+                        self.conn.executemany(
+                            "UPDATE seen SET last_seen = ?, times_seen = times_seen + ? "
+                            "WHERE key = ?", [(now, n, k) for k, n in bumps.items()])
+                    if self._bloom is not None and (inserts or self._bloom_dirty):
+                        self._bloom.update(inserts)
+                        self._save_bloom()
+                return flags
+            except _StaleFilter:
+                # Il filtro ha detto "nuovo" a chiavi che un altro SeenStore
+                # ha già scritto: il lotto si annulla e si rifà chiedendo al
+                # database per tutte le chiavi. Raro, e mai un'eccezione.
+                existing = self._existing(list(dict.fromkeys(k for k, _u, _c in keyed)))
+
     def see_many(self, items: Iterable[tuple], kind: str = "item") -> list:
         """(url, content) → solo quelli nuovi, nell'ordine di arrivo."""
-        out = []
-        for url, content in items:
-            if self.see(url, content, kind=kind):
-                out.append(url)
+        items = list(items)
+        flags = self.see_batch(items, kind=kind)
+        return [url for (url, _content), new in zip(items, flags) if new]
+
+    # ------------------------------------------------------------ quasi-doppi
+    def _near_candidates(self, band_keys: List[int]) -> Tuple[dict, dict]:
+        """
+        Dai rappresentanti già salvati, solo quelli che condividono almeno una
+        di queste bande: (banda → [riferimenti], riferimento → (url, firma, nomi)).
+        """
+        bucket, ids = {}, set()
+        for i in range(0, len(band_keys), _IN_CHUNK):
+            chunk = band_keys[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for band, near_id in self.conn.execute(
+                    f"SELECT band, near_id FROM seen_near_bands WHERE band IN ({marks})",
+                    chunk):
+                bucket.setdefault(band, []).append(("db", near_id))
+                ids.add(near_id)
+        stored = {}
+        ids = sorted(ids)
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            for r in self.conn.execute(
+                    f"SELECT id, url, signature, names FROM seen_near WHERE id IN ({marks})",
+                    chunk):
+                names = None if r["names"] is None else neardup.unpack_names(r["names"])
+                stored[("db", r["id"])] = (r["url"], neardup.unpack(r["signature"]), names)
+        return bucket, stored
+
+    @_locked
+    def near_duplicates(self, items: Iterable[tuple],
+                        threshold: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Per ogni (url, content): None se è una storia nuova, altrimenti l'URL
+        dell'articolo già visto (in questa run o in una passata) di cui è una
+        riscrittura. Nello stesso lotto vince il primo arrivato; i nuovi
+        rappresentanti si registrano in una transazione.
+
+        Con OB1_NEARDUP=0 (o OB1_WATCH=0) ogni articolo è una storia nuova.
+        """
+        items = list(items)
+        if not (watch_enabled() and neardup.neardup_enabled()):
+            return [None] * len(items)
+        if threshold is None:
+            threshold = neardup.neardup_threshold()
+
+        sigs = [neardup.signature(content) for _url, content in items]
+        names = [neardup.names(content) for _url, content in items]
+        banded = [neardup.bands(sig) if sig else [] for sig in sigs]
+        # L'indice LSH del lotto parte da quello salvato e cresce man mano che
+        # arrivano nuovi rappresentanti.
+        bucket, known = self._near_candidates(sorted({b for bs in banded for b in bs}))
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        out: List[Optional[str]] = []
+        fresh: List[Tuple[str, tuple, tuple, List[int]]] = []
+        for (url, _content), sig, nm, bs in zip(items, sigs, names, banded):
+            if sig is None:
+                out.append(None)
+                continue
+            match = None
+            checked = set()
+            for b in bs:
+                for ref in bucket.get(b, ()):
+                    if ref in checked:
+                        continue
+                    checked.add(ref)
+                    other_url, other_sig, other_names = known[ref]
+                    if (other_names is not None and neardup.same_names(nm, other_names)
+                            and neardup.similarity(sig, other_sig) >= threshold):
+                        match = other_url
+                        break
+                if match is not None:
+                    break
+            out.append(match)
+            if match is None:
+                ref = ("new", len(fresh))
+                known[ref] = (url, sig, nm)
+                fresh.append((url, sig, nm, bs))
+                for b in bs:
+                    bucket.setdefault(b, []).append(ref)
+
+        if fresh:
+            with self.conn:
+                for url, sig, nm, bs in fresh:
+                    cur = self.conn.execute(
+                        "INSERT INTO seen_near (url, signature, first_seen, names) "
+                        "VALUES (?, ?, ?, ?)",
+                        (normalize_url(url), neardup.pack(sig), now, neardup.pack_names(nm)))
+                    self.conn.executemany(
+                        "INSERT INTO seen_near_bands (band, near_id) VALUES (?, ?)",
+                        [(b, cur.lastrowid) for b in bs])
         return out
 
     # ---------------------------------------------------------------- manutenzione
+    @_locked
     def prune(self, days: int = DEFAULT_RETENTION_DAYS) -> int:
         """Righe più vecchie di `days` (per ultima visione). Ritorna quante."""
         cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat(
             timespec="seconds")
         with self.conn:
             cur = self.conn.execute("DELETE FROM seen WHERE last_seen < ?", (cutoff,))
-        return cur.rowcount or 0
-
+            removed = cur.rowcount or 0
+            # Una storia di due mesi fa riscritta oggi è di nuovo una notizia.
+            old = self.conn.execute(
+                "DELETE FROM seen_near WHERE first_seen < ?", (cutoff,)).rowcount
+            if old:
+                self.conn.execute(
+                    "DELETE FROM seen_near_bands WHERE near_id NOT IN "
+                    "(SELECT id FROM seen_near)")
+            if removed and self._bloom is not None:
+                # Le chiavi cancellate resterebbero "forse viste" per sempre:
+                # risposta corretta, ma ogni falso positivo costa una query.
+                self._bloom = self._rebuild_bloom()
+                # Niente unione col filtro salvato: avrebbe ancora le chiavi tolte.
+                self.conn.execute("DELETE FROM seen_bloom")
+                self._save_bloom()
+        return removed
+
+    @_locked
     def close(self) -> None:
+        try:
+            if self._bloom is not None and self._bloom_dirty:
+                with self.conn:
+                    self._save_bloom()
+        except sqlite3.Error:
+            pass
         try:
             self.conn.close()
         except sqlite3.Error:
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test offline del backtest dei pesi (src/backtest.py).
+
+Metriche verificate a mano su un set minuscolo; stesso ranking con e senza
+NumPy, in un processo o in più.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_backtest -v
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.backtest as backtest
+from src.backtest import (BacktestSet, evaluate, load_backtest, sample_weights,
+                          sweep, threshold_pairs)
+from src.scoring import FACTORS, OB1Scorer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Quattro giocatori: solo il fattore "age" distingue gli hit, "market_value"
+# li nasconde. Pesi tutti sull'età => i due hit in cima.
+TINY = BacktestSet(
+    names=["a", "b", "c", "d"],
+    factors=[[50, 50, 50, 100, 40, 50, 50],
+             [50, 50, 50, 25, 100, 50, 50],
+             [50, 50, 50, 90, 40, 50, 50],
+             [50, 50, 50, 45, 100, 50, 50]],
+    labels=[1, 0, 1, 0],
+)
+AGE_ONLY = {k: (1.0 if k == "age" else 0.0) for k in FACTORS}
+MV_ONLY = {k: (1.0 if k == "market_value" else 0.0) for k in FACTORS}
+
+
+class MetricsTestCase(unittest.TestCase):
+    def test_precision_and_hot_rate(self):
+        m = evaluate(TINY, AGE_ONLY, hot=80, warm=40, k=2)
+        self.assertEqual((m["precision_at_k"], m["hot_count"], m["hot_hits"]), (1.0, 2, 2))
+        self.assertEqual(m["hot_hit_rate"], 1.0)
+        self.assertEqual(m["warm_count"], 1)
+        m = evaluate(TINY, MV_ONLY, hot=80, warm=40, k=2)
+        self.assertEqual((m["precision_at_k"], m["hot_hits"], m["hot_count"]), (0.0, 0, 2))
+
+    def test_threshold_that_flags_nobody_has_no_rate(self):
+        self.assertIsNone(evaluate(TINY, AGE_ONLY, hot=101, warm=90)["hot_hit_rate"])
+
+    def test_sweep_ranks_the_right_weights_first(self):
+        weights = [tuple(MV_ONLY[k] for k in FACTORS), tuple(AGE_ONLY[k] for k in FACTORS)]
+        best = sweep(TINY, weights, [(80, 40)], k=2, top=1, workers=1)["ranked"][0]
+        self.assertEqual(best["weights"]["age"], 1.0)
+
+    def test_same_ranking_with_and_without_numpy(self):
+        weights = sample_weights(300, include=[OB1Scorer.WEIGHTS])
+        pairs = threshold_pairs()
+        fast = sweep(TINY, weights, pairs, k=2, top=10, workers=1)["ranked"]
+        with mock.patch.object(backtest, "np", None):
+            slow = sweep(TINY, weights, pairs, k=2, top=10, workers=1)["ranked"]
+        self.assertEqual(fast, slow)
+
+    def test_parallel_equals_serial(self):
+        weights = sample_weights(300)
+        pairs = threshold_pairs()
+        with mock.patch.object(backtest, "CHUNK", 64):
+            serial = sweep(TINY, weights, pairs, k=2, top=5, workers=1)
+            parallel = sweep(TINY, weights, pairs, k=2, top=5, workers=2)
+        self.assertEqual(serial["ranked"], parallel["ranked"])
+        self.assertEqual(serial["configs_evaluated"], 300 * len(pairs))
+
+    def test_sampled_weights_sum_to_one(self):
+        for w in sample_weights(50):
+            self.assertAlmostEqual(sum(w), 1.0)
+        self.assertEqual(sample_weights(3, seed=1), sample_weights(3, seed=1))
+
+
+class LoadTestCase(unittest.TestCase):
+    RAW = ROOT / "data" / "backtest" / "serie_c_2022_2023_raw.json"
+    RESULTS = ROOT / "data" / "backtest" / "backtest_results.json"
+
+    @unittest.skipUnless(RAW.exists() and RESULTS.exists(), "dati di backtest assenti")
+    def test_only_players_with_an_outcome_are_loaded(self):
+        data = load_backtest(self.RAW, self.RESULTS)
+        self.assertEqual(len(data), 20)
+        self.assertEqual(data.meta["freeze_date"], "2023-06-30")
+        # Al giorno del freeze la notizia è fresca per definizione.
+        self.assertTrue(all(row[FACTORS.index("freshness")] == 100 for row in data.factors))
+        misses_as_hits = load_backtest(self.RAW, self.RESULTS, positive=("miss",))
+        self.assertEqual(misses_as_hits.hits, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,7 +16,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.brief import build_brief, format_telegram
+from src.brief import build_brief, build_briefs, format_telegram
 from src.cu_parser import CUStore
 
 
@@ -168,5 +168,58 @@ class FormatTestCase(unittest.TestCase):
         self.assertLess(len(self._msg()), 4096)
 
 
+
+class BatchBriefTestCase(unittest.TestCase):
+    """Il brief di un comitato: stesso contenuto del brief singolo, una frazione delle query."""
+
+    CLUBS = [f"SOCIETA {i:02d}" for i in range(50)]
+
+    def setUp(self):
+        self.store = CUStore(":memory:")
+        self.store.ingest(_cu(146, "2026-04-13", "2026-04-11", [
+            {**(AMM if i % 2 else SQ2), "person": f"GIOCATORE {i:02d}", "club": c}
+            for i, c in enumerate(self.CLUBS[:40])]))
+        self.subs = [{"club": c, "opponent": self.CLUBS[(i + 1) % 50], "chat_ids": [str(i)]}
+                     for i, c in enumerate(self.CLUBS)]
+
+    def tearDown(self):
+        self.store.close()
+
+    def _queries(self, fn):
+        seen = []
+        self.store.conn.set_trace_callback(seen.append)
+        try:
+            result = fn()
+        finally:
+            self.store.conn.set_trace_callback(None)
+        return result, len(seen)
+
+    def test_lo_stesso_messaggio_del_brief_singolo(self):
+        for d in build_briefs(self.store, "2026-04-16", self.subs):
+            brief = build_brief(self.store, "2026-04-16", d["club"], opponent=d["opponent"])
+            self.assertEqual(d["brief"], brief)
+            self.assertEqual(d["message"], format_telegram(brief) if brief["has_content"] else None)
+
+    def test_cinquanta_societa_costano_come_una(self):
+        _, una = self._queries(lambda: build_briefs(self.store, "2026-04-16", self.subs[:1]))
+        out, tutte = self._queries(lambda: build_briefs(self.store, "2026-04-16", self.subs))
+        self.assertEqual(len(out), 50)
+        self.assertEqual(tutte, una)
+
+    def test_stessa_coppia_un_messaggio_per_piu_chat(self):
+        subs = [{"club": "SOCIETA 01", "opponent": None, "chat_ids": ["10"]},
+                {"club": "SOCIETA 01", "opponent": None, "chat_ids": ["11", "10"]},
+                {"club": "SOCIETA 01", "opponent": "SOCIETA 02", "chat_ids": ["12"]}]
+        out = build_briefs(self.store, "2026-04-16", subs)
+        self.assertEqual([(d["opponent"], d["chat_ids"]) for d in out],
+                         [(None, ["10", "11"]), ("SOCIETA 02", ["12"])])
+
+    def test_senza_provvedimenti_nessun_messaggio(self):
+        out = build_briefs(self.store, "2026-04-16",
+                           [{"club": "SOCIETA 45", "opponent": None, "chat_ids": ["1"]}])
+        self.assertIsNone(out[0]["message"])
+        self.assertFalse(out[0]["brief"]["has_content"])
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -72,16 +72,73 @@ class IngestNewEmptyChannelTestCase(unittest.TestCase):
     """
 
     def test_canale_vuoto_non_tenta_il_fetch_e_lo_dice(self):
-        with mock.patch.object(bg, "new_cu_links") as fetch:
+        with mock.patch.object(bg, "new_cu_links_many") as fetch:
             result = bg.ingest_new(store=mock.Mock(), seen=mock.Mock(), channel="")
         fetch.assert_not_called()
         self.assertEqual(result, {"cu": 0, "new_sanctions": 0, "new_results": 0})
 
     def test_canale_valorizzato_tenta_il_fetch(self):
-        with mock.patch.object(bg, "new_cu_links", return_value=[]) as fetch:
+        with mock.patch.object(bg, "new_cu_links_many", return_value={}) as fetch:
             bg.ingest_new(store=mock.Mock(), seen=mock.Mock(), channel="lndemiliaromagna")
         fetch.assert_called_once()
 
+    def test_piu_comitati_in_un_giro_solo(self):
+        """--canale "a, b": un solo new_cu_links_many, il limite vale per canale."""
+        found = {"crer": [{"url": f"https://x/crer{i}.pdf"} for i in range(3)],
+                 "marche": [{"url": "https://x/marche0.pdf"}]}
+        store = mock.Mock()
+        store.ingest.return_value = {"new_sanctions": 1, "new_results": 0}
+        parsed = {"meta": {"cu_number": 1}}
+        with mock.patch.object(bg, "new_cu_links_many", return_value=found) as fetch, \
+                mock.patch.object(bg, "pdf_pages", side_effect=lambda url: url), \
+                mock.patch.object(bg, "parse_cu_pages", return_value=parsed) as parse:
+            totals = bg.ingest_new(store, seen=mock.Mock(), channel="crer, @marche", limit=2)
+        fetch.assert_called_once()
+        self.assertEqual(fetch.call_args[0][0], ["crer", "marche"])
+        self.assertEqual([c[0][0] for c in parse.call_args_list],
+                         ["https://x/crer1.pdf", "https://x/crer2.pdf", "https://x/marche0.pdf"])
+        self.assertEqual(totals, {"cu": 3, "new_sanctions": 3, "new_results": 0})
+
+
+
+class BriefBatchTestCase(unittest.TestCase):
+    """Gli abbonati di un comitato: uno configurato male non costa il brief agli altri."""
+
+    def setUp(self):
+        from src.cu_parser import CUStore
+        self.store = CUStore(":memory:")
+        self.store.ingest({"meta": {"cu_number": 146, "cu_date": "2026-04-13"}, "results": [],
+                           "sanctions": [{"category": "ECCELLENZA", "match_date": "2026-04-11",
+                                          "role": "CALCIATORI", "reason": None,
+                                          "kind": "AMMONIZIONE", "detail": "I_DIFFIDA",
+                                          "person": "ROSSI MARIO", "club": c}
+                                         for c in ("NOCETO", "CASTENASO CALCIO")]})
+        self.notifier = mock.Mock(enabled=True)
+        self.notifier.send_batch.return_value = {"sent": 1, "failed": 0}
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_un_lotto_solo_e_gli_scartati_segnalati(self):
+        subs = [{"club": "noceto", "opponent": "CASTENASO", "chat_ids": ["1"]},
+                {"club": "Noceto", "opponent": "castenaso calcio", "chat_ids": ["2"]},
+                {"club": "SOCIETA CHE NON ESISTE", "opponent": None, "chat_ids": ["3"]}]
+        with mock.patch("builtins.print"):
+            code = bg.brief_batch(self.store, subs, "2026-04-16", notifier=self.notifier)
+        self.assertEqual(code, 2)
+        (batch,), _ = self.notifier.send_batch.call_args
+        self.assertEqual([(d["club"], d["opponent"], d["chat_ids"]) for d in batch],
+                         [("NOCETO", "CASTENASO CALCIO", ["1", "2"])])
+
+    def test_file_abbonati(self):
+        import json
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "abbonati.json"
+            path.write_text(json.dumps([{"club": "NOCETO", "chat_ids": 42}]), encoding="utf-8")
+            self.assertEqual(bg.load_subscribers(path),
+                             [{"club": "NOCETO", "opponent": None, "chat_ids": ["42"]}])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test offline dell'indice dei nomi di società (src/club_index.py).
+
+Il caso guida è quello dei comunicati veri: la stessa società scritta con e
+senza sigla o anno, e il nome digitato a mano da chi configura il brief, che
+può avere un refuso. Nessuno dei due deve finire in un "non trovato" — e due
+società diverse non devono mai fondersi in silenzio.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_club_index -v
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.club_index import ClubIndex, club_key, trigrams
+from src.cu_parser import CUStore
+
+CLUBS = ["CASTENASO CALCIO", "VIANESE CALCIO SSDARL", "NOCETO", "TERRE DI CASTELLI 1907",
+         "U.S. SAN FELICE", "FIORENZUOLA 1922 SSD ARL", "REAL FORMIGINE", "SAVIGNANESE",
+         "MEDICINA FOSSATONE S.S.D."]
+
+
+class ClubKeyTestCase(unittest.TestCase):
+    def test_sigle_anno_accenti_e_punteggiatura_non_contano(self):
+        self.assertEqual(club_key("U.S.D. Castenaso Calcio 1907 S.S.D.A.R.L."),
+                         "castenaso calcio")
+        self.assertEqual(club_key("Fiorenzuola 1922 S.S.D. a r.l."), "fiorenzuola")
+        self.assertEqual(club_key("Società Sportiva Forlì"), "societa sportiva forli")
+
+    def test_un_nome_fatto_solo_di_sigle_resta_se_stesso(self):
+        self.assertEqual(club_key("A.C. 1907"), "ac 1907")
+
+    def test_trigrammi_per_parola(self):
+        self.assertEqual(trigrams("ab"), {"  a", " ab", "ab "})
+        self.assertEqual(trigrams(""), set())
+
+
+class ResolveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.index = ClubIndex(self.conn)
+        self.index.add(CLUBS)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_sigla_e_anno_mancanti(self):
+        self.assertEqual(self.index.resolve("Terre di Castelli"), ("TERRE DI CASTELLI 1907", []))
+        self.assertEqual(self.index.resolve("FIORENZUOLA SSDARL"),
+                         ("FIORENZUOLA 1922 SSD ARL", []))
+
+    def test_un_refuso_si_propone_non_si_risolve(self):
+        club, candidati = self.index.resolve("CASTENSO CALCIO")
+        self.assertIsNone(club)
+        self.assertEqual(candidati[0], "CASTENASO CALCIO")
+        club, candidati = self.index.resolve("Medicina Fosatone")
+        self.assertIsNone(club)
+        self.assertEqual(candidati[0], "MEDICINA FOSSATONE S.S.D.")
+
+    def test_un_nome_vicino_e_un_altra_societa(self):
+        self.index.add(["MONTICELLI"])
+        club, candidati = self.index.resolve("MONTICELLO")
+        self.assertIsNone(club)
+        self.assertEqual(candidati[0], "MONTICELLI")
+
+    def test_stessa_chiave_su_due_societa_e_ambigua(self):
+        self.index.add(["CASTENASO CALCIO SSD"])
+        club, candidati = self.index.resolve("castenaso calcio srl")
+        self.assertIsNone(club)
+        self.assertEqual(candidati, ["CASTENASO CALCIO", "CASTENASO CALCIO SSD"])
+
+    def test_candidati_ordinati_con_il_punteggio(self):
+        ranked = self.index.ranked("CASTENSO CALCIO", limit=3)
+        self.assertEqual(ranked[0][0], "CASTENASO CALCIO")
+        self.assertEqual([s for _c, s in ranked], sorted((s for _c, s in ranked), reverse=True))
+        self.assertTrue(all(0 < s <= 1 for _c, s in ranked))
+
+    def test_add_indicizza_solo_i_nomi_nuovi(self):
+        self.assertEqual(self.index.add(CLUBS + ["RIMINI FC"]), 1)
+        self.assertEqual(len(self.index), len(CLUBS) + 1)
+
+    def test_migliaia_di_societa_il_refuso_resta_primo_candidato(self):
+        rnd = random.Random(47)
+        letters = "abcdefghilmnoprstuvz"
+        noise = {" ".join("".join(rnd.choice(letters) for _ in range(rnd.randint(5, 10)))
+                          for _ in range(rnd.randint(1, 3))).upper() for _ in range(3000)}
+        self.index.add(noise)
+        self.assertEqual(self.index.resolve("CASTENSO CALCIO")[1][0], "CASTENASO CALCIO")
+        self.assertEqual(self.index.resolve("Savignanes")[1][0], "SAVIGNANESE")
+        self.assertEqual(self.index.resolve("Terre di Castelli"), ("TERRE DI CASTELLI 1907", []))
+
+
+class CUStoreIndexTestCase(unittest.TestCase):
+    def _cu(self, clubs):
+        return {"meta": {"cu_number": 1, "cu_date": "2026-04-13"}, "results": [],
+                "sanctions": [{"category": "ECCELLENZA", "match_date": "2026-04-11",
+                               "role": "CALCIATORI", "reason": None, "kind": "AMMENDA",
+                               "detail": None, "person": "ROSSI MARIO", "club": c}
+                              for c in clubs]}
+
+    def test_l_ingest_aggiorna_l_indice(self):
+        store = CUStore(":memory:")
+        store.ingest(self._cu(["CASTENASO CALCIO"]))
+        self.assertEqual(store.resolve_club("castenaso"), ("CASTENASO CALCIO", []))
+        self.assertEqual(store.resolve_club("castenso calcio"), (None, ["CASTENASO CALCIO"]))
+        self.assertEqual(store.club_candidates("CASTENASO")[0], ("CASTENASO CALCIO", 0.667))
+        store.close()
+
+    def test_un_db_senza_indice_si_indicizza_all_apertura(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "ob1.db"
+            store = CUStore(db)
+            store.ingest(self._cu(["NOCETO", "REAL FORMIGINE"]))
+            with store.conn:                        # un db di prima dell'indice
+                store.conn.execute("DROP TABLE club_names")
+                store.conn.execute("DROP TABLE club_trigrams")
+            store.close()
+            reopened = CUStore(db)
+            self.assertEqual(len(reopened.club_index), 2)
+            self.assertEqual(reopened.resolve_club("Formigine"), ("REAL FORMIGINE", []))
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test offline del lessico club/fonti (src/club_lexicon.py).
+
+Parole intere, non sottostringhe; ogni club con la sua lega, da un solo
+config/clubs.yaml per scoring, purge e report.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_club_lexicon -v
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "scripts"))
+
+from ouroboros_run import purge_wrong_league  # noqa: E402
+from src.club_lexicon import SERIE_A, SERIE_B, SERIE_C, lexicon, load_lexicon  # noqa: E402
+from src.scoring import OB1Scorer  # noqa: E402
+
+
+class LexiconTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lex = lexicon()
+
+    def test_whole_words_only(self):
+        self.assertIsNone(self.lex.club("Romagna Centro"))
+        self.assertIsNone(self.lex.club("romagnasport.com"))
+        self.assertIsNone(self.lex.club("Barisardo"))
+        self.assertEqual(self.lex.club("AS Roma Primavera").league, SERIE_A)
+
+    def test_club_with_its_league(self):
+        club = self.lex.club("Cavese 1919")
+        self.assertEqual((club.name, club.league, club.group), ("Cavese", SERIE_C, "girone_c"))
+        self.assertEqual(self.lex.league_of("AC Reggiana 1919"), SERIE_B)
+        # Accenti e punteggiatura non contano, gli alias portano al canonico.
+        self.assertEqual(self.lex.club("Feralpisalo").name, "FeralpiSalò")
+        self.assertEqual(self.lex.club("L.R. Vicenza").name, "Vicenza")
+        self.assertEqual(self.lex.league_of("Sudtirol"), SERIE_B)
+
+    def test_sources(self):
+        self.assertEqual(self.lex.source("www.tuttoc.com").score, 95)
+        self.assertEqual(self.lex.source("tuttomercatoweb.com").name, "TMW")
+        self.assertIsNone(self.lex.source("tuttocalciatori.net"))
+        self.assertIsNone(self.lex.source(None))
+
+    def test_missing_config_is_an_empty_lexicon(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            empty = load_lexicon(Path(tmp) / "clubs.yaml")
+        self.assertIsNone(empty.club("Cavese"))
+        self.assertIsNone(empty.source("TuttoC"))
+
+
+class CallersTestCase(unittest.TestCase):
+    def test_scoring_uses_the_lexicon(self):
+        scorer = OB1Scorer()
+        self.assertEqual(scorer._calc_source("tuttocalciatori"), 50)
+        self.assertEqual(scorer._calc_source("TuttoC"), 95)
+        serie_c = scorer._calc_league_fit({"current_club": "Cavese 1919"})
+        romagna = scorer._calc_league_fit({"current_club": "Romagna Centro"})
+        self.assertEqual(serie_c - romagna, 30)
+
+    def test_purge_drops_serie_b_but_keeps_serie_c(self):
+        opps = [{"player_name": "A", "current_club": "Reggiana",
+                 "discovered_at": "2020-01-01T00:00:00"},
+                {"player_name": "B", "current_club": "Cavese",
+                 "discovered_at": "2020-01-01T00:00:00"},
+                {"player_name": "C", "current_club": "Romagna Centro",
+                 "discovered_at": "2020-01-01T00:00:00"}]
+        self.assertEqual([o["player_name"] for o in purge_wrong_league(opps)], ["B", "C"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test offline del backfill di stagione dei CU (src/cu_backfill.py).
+
+Rete finta, PDF veri (costruiti come in test_cu_pdf): lo storico del canale
+si attraversa all'indietro, i siti si aspettano solo con se stessi, un giro
+interrotto riparte da dove si era fermato senza riscaricare niente.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_backfill -v
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "tests"))
+
+from src.cu_backfill import (HostLimiter, PdfCache, _process_context, backfill,  # noqa: E402
+                             season_start)
+from src.cu_feed import channel_history  # noqa: E402
+from src.cu_parser import CUStore  # noqa: E402
+from src.watch.seen import SeenStore  # noqa: E402
+from test_cu_pdf import _pdf  # noqa: E402
+
+
+def _post(post_id, day, body):
+    return (f'<div class="tgme_widget_message_wrap js-widget">'
+            f'<div class="tgme_widget_message " data-post="figccrer/{post_id}">'
+            f'<div class="tgme_widget_message_text js-message_text">{body}</div>'
+            f'<time datetime="2025-{day}T10:00:00+00:00"></time></div>')
+
+
+def _cu_post(post_id, day, n):
+    return _post(post_id, day, f'CU {n} <a href="https://crer.it/cu{n}.pdf">pdf</a>')
+
+
+def _cu_pdf(n, club):
+    return _pdf([[f"COMUNICATO UFFICIALE N. {n} DEL 1/10/2025", "GARE DEL 28/ 9/2025",
+                  "CALCIATORI NON ESPULSI", "I AMMONIZIONE DIFFIDA",
+                  f"ROSSI MARIO ({club})", f"{club} - NOCETO 2 - 1"]])
+
+
+class HostLimiterTestCase(unittest.TestCase):
+    def test_stesso_host_distanziato_host_diversi_no(self):
+        t, waits = [0.0], []
+        limiter = HostLimiter(per_host=2, interval=1.0, clock=lambda: t[0],
+                              sleep=waits.append)
+        for url in ("https://a.it/1.pdf", "https://a.it/2.pdf", "https://b.it/1.pdf",
+                    "https://A.it/3.pdf"):
+            with limiter.slot(url):
+                pass
+        self.assertEqual(waits, [1.0, 2.0])
+
+    def test_stagione(self):
+        from datetime import date
+        self.assertEqual(season_start(date(2026, 3, 1)), "2025-07-01")
+        self.assertEqual(season_start(date(2026, 7, 1)), "2026-07-01")
+
+
+class ChannelHistoryTestCase(unittest.TestCase):
+    PAGES = {
+        None: [_cu_post(40, "10-20", 9), _post(41, "10-21", "circolare"), _cu_post(42, "10-22", 10)],
+        40: [_post(30, "09-30", "solo testo"), _post(31, "10-01", "auguri")],
+        30: [_cu_post(20, "09-10", 7), _cu_post(21, "09-12", 8), _cu_post(22, "09-13", 7)],
+        20: [_cu_post(10, "06-20", 1), _cu_post(11, "07-02", 2)],
+        10: [_cu_post(1, "05-01", 0)],
+    }
+
+    def fetch(self, handle, before=None):
+        self.calls.append(before)
+        return 200, f"<section>{''.join(self.PAGES[before])}</section>"
+
+    def setUp(self):
+        self.calls = []
+
+    def test_all_indietro_fino_all_inizio_stagione(self):
+        items = channel_history("figccrer", since="2025-07-01", fetch=self.fetch)
+        self.assertEqual([it["url"].rsplit("/", 1)[-1] for it in items],
+                         ["cu2.pdf", "cu7.pdf", "cu8.pdf", "cu9.pdf", "cu10.pdf"])
+        # La pagina di sole chiacchiere si attraversa; quella di giugno chiude.
+        self.assertEqual(self.calls, [None, 40, 30, 20])
+        self.assertEqual(items[0]["post_id"], 11)
+
+    def test_limite_di_pagine(self):
+        channel_history("figccrer", fetch=self.fetch, max_pages=2)
+        self.assertEqual(self.calls, [None, 40])
+
+
+class BackfillTestCase(unittest.TestCase):
+    CLUBS = ["CASTENASO", "FIDENZA", "VIANESE", "MEDICINA", "SORAGNA"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {"OB1_CU_TEXT_CACHE": "0"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.store = CUStore(":memory:")
+        self.seen = SeenStore(":memory:")
+        self.items = [{"url": f"https://crer.it/cu{i}.pdf"} for i in range(len(self.CLUBS))]
+        self.pdfs = {it["url"]: _cu_pdf(i + 1, club)
+                     for i, (it, club) in enumerate(zip(self.items, self.CLUBS))}
+        self.fetched = []
+
+    def tearDown(self):
+        self.store.close()
+        self.seen.close()
+        self.tmp.cleanup()
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        if url in getattr(self, "broken", ()):
+            raise OSError("connessione rifiutata")
+        return self.pdfs[url]
+
+    def _run(self, **kw):
+        kw.setdefault("parse_workers", 1)
+        return backfill(self.items, self.store, seen=self.seen,
+                        cache=PdfCache(Path(self.tmp.name) / "pdf"),
+                        limiter=HostLimiter(interval=0), batch=2, fetch=self.fetch,
+                        log=lambda _m: None, **kw)
+
+    def test_ingerisce_tutto_a_lotti(self):
+        totals = self._run(parse_workers=2)
+        self.assertEqual((totals["cu"], totals["new_sanctions"], totals["new_results"]),
+                         (5, 5, 5))
+        self.assertEqual(len(self.store.diffidati()), 5)
+
+    def test_i_processi_di_parsing_non_nascono_con_fork(self):
+        # I thread dei download sono già in volo quando il pool crea i worker.
+        self.assertNotEqual(_process_context().get_start_method(), "fork")
+
+    def test_interrotto_riparte_dai_mancanti_senza_riscaricare(self):
+        self.broken = {self.items[3]["url"]}
+        first = self._run()
+        self.assertEqual((first["cu"], first["failed"]), (4, 1))
+        self.broken = set()
+        self.fetched.clear()
+        second = self._run()
+        self.assertEqual((second["cu"], second["skipped"], second["failed"]), (1, 4, 0))
+        self.assertEqual(self.fetched, [self.items[3]["url"]])
+        # Stesse chiavi del brief: new_cu_links non li riproporrà.
+        self.assertFalse(self.seen.see(self.items[0]["url"], kind="cu_pdf"))
+
+    def test_cache_per_contenuto(self):
+        self.pdfs[self.items[1]["url"]] = self.pdfs[self.items[0]["url"]]
+        self._run()
+        cached = sorted(p.name for p in (Path(self.tmp.name) / "pdf").glob("*.pdf"))
+        self.assertEqual(len(cached), 4)
+        # Db nuovo, stessa cache: si rilegge tutto senza un solo download.
+        self.store.close()
+        self.seen.close()
+        self.store, self.seen = CUStore(":memory:"), SeenStore(":memory:")
+        self.fetched.clear()
+        self.assertEqual(self._run()["cu"], 5)
+        self.assertEqual(self.fetched, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,10 +12,11 @@ stesso canale finiscono anche moduli e circolari, che PDF sono ma comunicati no.
 import sys
 import unittest
 from pathlib import Path
+from unittest import mock
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.cu_feed import parse_cu_feed
+from src.cu_feed import ChannelCrawler, new_cu_links, new_cu_links_many, parse_cu_feed
 from src.watch.seen import SeenStore
 
 
@@ -96,5 +97,98 @@ class SeenIntegrationTestCase(unittest.TestCase):
             self.assertFalse(seen.see(items[0]["url"], kind="cu_pdf"))
 
 
+
+class FakeChannel:
+    """Un canale con messaggi 1..n, 20 per pagina come t.me/s, ETag = ultimo id."""
+
+    PER_PAGE = 20
+
+    def __init__(self, n, pdf_every=3):
+        self.n, self.pdf_every, self.calls = n, pdf_every, []
+
+    def post(self, n_new):
+        self.n += n_new
+
+    def _msg(self, i):
+        body = (f'Cu {i} <a href="https://x.it/cu{i}.pdf">pdf</a>' if i % self.pdf_every == 0
+                else "Circolare senza allegato")
+        return (f'<div class="tgme_widget_message_wrap js-widget">'
+                f'<div class="tgme_widget_message " data-post="crer/{i}">'
+                f'<div class="tgme_widget_message_text">{body}</div>'
+                f'<time datetime="2026-04-13T09:00:00+00:00"></time></div>')
+
+    def __call__(self, handle, before=None, headers=None):
+        self.calls.append((handle, before, dict(headers or {})))
+        etag = f'"{self.n}"'
+        if before is None and (headers or {}).get("If-None-Match") == etag:
+            return 304, "", {}
+        top = self.n if before is None else min(before - 1, self.n)
+        ids = range(max(1, top - self.PER_PAGE + 1), top + 1)
+        return 200, _page(*(self._msg(i) for i in ids)), {"ETag": etag}
+
+
+class ChannelCrawlerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.channel = FakeChannel(100)
+        self.crawler = ChannelCrawler(":memory:", fetch=self.channel)
+
+    def tearDown(self):
+        self.crawler.close()
+
+    def _numbers(self, items):
+        return [it["cu_number"] for it in items]
+
+    def test_primo_giro_solo_l_anteprima_poi_il_cursore(self):
+        items = self.crawler.crawl("crer")
+        self.assertEqual(self._numbers(items), [i for i in range(81, 101) if i % 3 == 0])
+        self.assertEqual(self.crawler.cursor("crer"), 100)
+        self.assertEqual(len(self.channel.calls), 1)
+
+    def test_niente_di_nuovo_costa_una_richiesta_condizionale(self):
+        self.crawler.crawl("crer")
+        self.channel.calls.clear()
+        self.assertEqual(self.crawler.crawl("crer"), [])
+        self.assertEqual(self.channel.calls, [("crer", None, {"If-None-Match": '"100"'})])
+
+    def test_tante_novita_si_torna_indietro_fino_al_cursore(self):
+        self.crawler.crawl("crer")
+        self.channel.post(45)
+        self.channel.calls.clear()
+        items = self.crawler.crawl("crer")
+        self.assertEqual(self._numbers(items), [i for i in range(101, 146) if i % 3 == 0])
+        self.assertEqual([before for _h, before, _hd in self.channel.calls], [None, 126, 106])
+        self.assertEqual(self.crawler.cursor("crer"), 145)
+
+    def test_buco_non_colmato_il_cursore_resta(self):
+        self.crawler.crawl("crer")
+        self.channel.post(200)
+        self.crawler.max_pages = 2
+        self.crawler.crawl("crer")
+        self.assertEqual(self.crawler.cursor("crer"), 100)
+
+    def test_il_seen_store_si_interroga_in_blocco(self):
+        with SeenStore(":memory:") as seen:
+            first = new_cu_links("crer", seen=seen, crawler=self.crawler)
+            with mock.patch.object(seen, "see", side_effect=AssertionError), \
+                    mock.patch.object(seen, "see_batch", wraps=seen.see_batch) as batch:
+                # Cursore azzerato: le stesse voci tornano, il seen le scarta.
+                self.crawler.conn.execute("DELETE FROM cu_channels")
+                self.assertEqual(new_cu_links("crer", seen=seen, crawler=self.crawler), [])
+            batch.assert_called_once()
+        self.assertEqual(len(first), 7)
+
+    def test_piu_comitati_un_see_batch_solo(self):
+        other = FakeChannel(10, pdf_every=5)
+        crawler = ChannelCrawler(":memory:", fetch=lambda h, b=None, hd=None:
+                                 (other if h == "marche" else self.channel)(h, b, hd))
+        with SeenStore(":memory:") as seen, \
+                mock.patch.object(seen, "see_batch", wraps=seen.see_batch) as batch:
+            found = new_cu_links_many(["crer", "marche", "crer"], seen=seen, crawler=crawler)
+        crawler.close()
+        batch.assert_called_once()
+        self.assertEqual({h: len(v) for h, v in found.items()}, {"crer": 7, "marche": 2})
+        self.assertNotIn("_channel", found["marche"][0])
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -9,15 +9,20 @@ Un parser che passa su un formato pulito e cade su quello vero non serve.
     PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_parser -v
 """
 
+import json
+import random
 import shutil
 import sys
 import tempfile
 import unittest
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "scripts"))
 
-from src.cu_parser import CUStore, parse_cu_text
+from bench_cu_parser import legacy_parse_cu_text, synthetic_cu  # noqa: E402
+from src.cu_parser import CUStore, parse_cu_text  # noqa: E402
 
 # Blocco reale (CU 146 CRER, Fasi Finali Under 19 Élite), verbatim.
 CU_REALE = """COMUNICATO UFFICIALE N. 146 DEL 13/4/2026
@@ -146,6 +151,38 @@ class ParseSanctionsTestCase(unittest.TestCase):
                              for s in self.parsed["sanctions"]))
 
 
+class ClassifierTestCase(unittest.TestCase):
+    """Il classificatore salta regex, non righe: esito identico alla scansione completa."""
+
+    def assertSameAsLegacy(self, text, msg=None):
+        self.assertEqual(parse_cu_text(text), legacy_parse_cu_text(text), msg)
+
+    def test_fixture_reale(self):
+        self.assertSameAsLegacy(CU_REALE)
+
+    def test_righe_del_fixture_rimescolate(self):
+        rnd = random.Random(13)
+        lines = CU_REALE.splitlines()
+        for trial in range(200):
+            self.assertSameAsLegacy("\n".join(rnd.choices(lines, k=60)), trial)
+
+    def test_corpus_sintetico_con_i_casi_di_confine(self):
+        for seed in range(20):
+            self.assertSameAsLegacy(synthetic_cu(2000, seed=seed), seed)
+
+    def test_unicode_che_inganna_i_prefiltri(self):
+        """'İ' combacia con 'I' sotto re.I; 'Ⅳ' è maiuscola ma non lettera."""
+        text = ("SQUALİFICA PER DUE GARE\nİ AMMONIZIONE DIFFIDA\nGİRONE B - 2 Giornata\n"
+                "ROSSI MARIO (NOCETO)\nⅣⅣⅣ Rossi mario (NOCETO)\n"
+                "CALCIATORI\u00a0ESPULSI\nNOCETO\u2003-\u2003FIDENZA 1 - ٣\n"
+                "II\u3000AMMONIZIONE\nROSSİ MARİO (NOCETO)")
+        self.assertSameAsLegacy(text)
+        parsed = parse_cu_text(text)
+        self.assertEqual([(s["kind"], s["detail"]) for s in parsed["sanctions"]],
+                         [("AMMONIZIONE", "İ_DIFFIDA")])
+        self.assertEqual([(r["girone"], r["away_goals"]) for r in parsed["results"]], [("B", 3)])
+
+
 class StoreTestCase(unittest.TestCase):
     def setUp(self):
         self.store = CUStore(":memory:")
@@ -198,6 +235,92 @@ class StoreTestCase(unittest.TestCase):
         self.assertEqual(row["giornate_distinte"], 2)
 
 
+def _legacy_diffidati(conn):
+    """La finestra su tutta cu_sanctions di prima dello stato materializzato."""
+    return [dict(r) for r in conn.execute(
+        "SELECT person, club, detail, match_date, cu_number FROM ("
+        "  SELECT *, ROW_NUMBER() OVER ("
+        "    PARTITION BY person, club ORDER BY match_date DESC, cu_number DESC"
+        "  ) AS rn FROM cu_sanctions WHERE role='CALCIATORI' OR role IS NULL"
+        ") WHERE rn = 1 AND kind='AMMONIZIONE' AND detail LIKE '%DIFFIDA' "
+        "ORDER BY club, person")]
+
+
+def _legacy_presence(conn):
+    return [dict(r) for r in conn.execute(
+        "SELECT person, club, COUNT(*) AS provvedimenti, "
+        "COUNT(DISTINCT match_date) AS giornate_distinte "
+        "FROM cu_sanctions WHERE role IS NULL OR role='CALCIATORI' "
+        "GROUP BY person, club ORDER BY giornate_distinte DESC, provvedimenti DESC")]
+
+
+def _by_key(rows):
+    return sorted(rows, key=lambda r: (r["club"], r["person"]))
+
+
+def _random_cu(rnd, number):
+    """Un CU finto: ogni tesserato al più una volta, data gara propria."""
+    kinds = [("I AMMONIZIONE DIFFIDA", 3), ("II AMMONIZIONE", 3),
+             ("SQUALIFICA PER UNA GARA EFFETTIVA", 1), ("SQUALIFICA FINO AL 1/ 6/2026", 1)]
+    surnames = ["ROSSI", "BIANCHI", "VERDI", "NERI", "GALLI", "CONTI",
+                "MARINI", "FERRARI", "COSTA", "FONTANA", "RIZZI", "LOMBARDI"]
+    people = rnd.sample([f"{name} LUCA ({club})" for name in surnames
+                         for club in ("NOCETO", "FIDENZA")], 8)
+    day = 1 + number % 28
+    lines = [f"COMUNICATO UFFICIALE N. {number} DEL {day}/3/2026",
+             f"GARE DEL {day}/ 3/2026", rnd.choice(["CALCIATORI", "DIRIGENTI"])]
+    for header, k in kinds:
+        if people:
+            lines += [header] + [people.pop() for _ in range(min(k, len(people)))]
+    return parse_cu_text("\n".join(lines))
+
+
+class DisciplineStateTestCase(unittest.TestCase):
+    """Lo stato materializzato risponde come le query su tutta la tabella."""
+
+    def test_stesso_esito_delle_query_complete_in_qualunque_ordine(self):
+        rnd = random.Random(44)
+        cus = [_random_cu(rnd, n) for n in range(1, 29)]
+        rnd.shuffle(cus)                     # il backfill ingerisce anche all'indietro
+        store = CUStore(":memory:")
+        for i in range(0, len(cus), 5):
+            store.ingest_many(cus[i:i + 5])
+            self.assertEqual(store.diffidati(), _legacy_diffidati(store.conn))
+            # A pari presenze l'ordine della GROUP BY non era definito.
+            self.assertEqual(_by_key(store.presence_index()), _by_key(_legacy_presence(store.conn)))
+        self.assertTrue(store.diffidati())
+        store.close()
+
+    def test_db_di_prima_dello_stato_si_ricostruisce(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "ob1.db"
+            store = CUStore(db)
+            store.ingest(parse_cu_text(CU_REALE))
+            atteso = store.diffidati()
+            store.conn.execute("DROP TABLE player_discipline_state")
+            store.close()
+            store = CUStore(db)
+            self.assertEqual(store.diffidati(), atteso)
+            self.assertTrue(atteso)
+            store.close()
+
+    def test_le_domande_del_brief_usano_gli_indici(self):
+        store = CUStore(":memory:")
+
+        def plan(sql, args):
+            return " ".join(r[-1] for r in store.conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM player_discipline_state WHERE club = ?", ("NOCETO",)))
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM cu_sanctions WHERE club = ? AND kind = 'SQUALIFICA_GARE'",
+            ("NOCETO",)))
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM cu_sanctions WHERE kind = 'SQUALIFICA_FINO_AL' AND detail >= ?",
+            ("2026-04-01",)))
+        store.close()
+
+
 class ResolveClubTestCase(unittest.TestCase):
     """
     La tolleranza sta tutta qui, in un punto solo: squalificati()/diffidati()
@@ -313,6 +436,89 @@ class PersistenceTestCase(unittest.TestCase):
         self.assertEqual(rebuilt.import_facts(self.facts), totale)
         rebuilt.close()
 
+    def _secondo_cu(self):
+        return parse_cu_text(CU_REALE.replace("N. 146 DEL 13/4/2026", "N. 152 DEL 20/4/2026")
+                                     .replace("GARE DEL 11/ 4/2026", "GARE DEL 18/ 4/2026"))
+
+    def test_l_export_scrive_solo_le_righe_nuove(self):
+        store = CUStore(":memory:")
+        store.ingest(self.parsed)
+        store.export_facts(self.facts)
+        primo = json.loads(self.facts.read_text(encoding="utf-8"))["segments"]
+        self.assertEqual([seg["file"].split("/")[1][:8] for seg in primo], ["2026-W16"])
+
+        store.ingest(self._secondo_cu())
+        store.export_facts(self.facts)
+        manifest = json.loads(self.facts.read_text(encoding="utf-8"))
+        self.assertEqual(manifest["format"], 2)
+        self.assertEqual(manifest["segments"][:1], primo)     # append-only
+        secondo = manifest["segments"][1]
+        self.assertTrue(secondo["file"].startswith("cu_facts/2026-W17."))
+        righe = json.loads((self.facts.parent / secondo["file"]).read_text(encoding="utf-8"))
+        self.assertEqual({r["cu_number"] for r in righe["sanctions"]}, {152})
+        self.assertEqual(sum(seg["sanctions"] for seg in manifest["segments"]),
+                         store._totals()["sanctions"])
+
+        # Niente di nuovo: il manifest non si riscrive (il commit resta vuoto).
+        prima = self.facts.read_bytes()
+        store.export_facts(self.facts)
+        self.assertEqual(self.facts.read_bytes(), prima)
+        store.close()
+
+    def test_l_import_legge_solo_i_segmenti_che_mancano(self):
+        store = CUStore(":memory:")
+        store.ingest(self.parsed)
+        store.export_facts(self.facts)
+        ci = CUStore(":memory:")                 # il db del runner, in cache
+        prima = ci.import_facts(self.facts)
+
+        store.ingest(self._secondo_cu())
+        store.export_facts(self.facts)
+        store.close()
+        dopo = ci.import_facts(self.facts)
+        self.assertGreater(prima["sanctions"], 0)
+        self.assertEqual(dopo["sanctions"], prima["sanctions"])   # solo il CU 152
+        # Le righe importate non si riesportano: nessun segmento in più.
+        n = len(json.loads(self.facts.read_text(encoding="utf-8"))["segments"])
+        ci.export_facts(self.facts)
+        self.assertEqual(len(json.loads(self.facts.read_text(encoding="utf-8"))["segments"]), n)
+        ci.close()
+
+    def test_un_segmento_alterato_non_si_carica(self):
+        store = CUStore(":memory:")
+        store.ingest(self.parsed)
+        store.export_facts(self.facts)
+        store.close()
+        seg = json.loads(self.facts.read_text(encoding="utf-8"))["segments"][0]
+        path = self.facts.parent / seg["file"]
+        path.write_text(path.read_text(encoding="utf-8").replace("NOCETO", "NOCET0"),
+                        encoding="utf-8")
+        rebuilt = CUStore(":memory:")
+        with self.assertRaises(ValueError):
+            rebuilt.import_facts(self.facts)
+        self.assertEqual(rebuilt._totals(), {"sanctions": 0, "results": 0})
+        rebuilt.close()
+
+    def test_il_formato_inline_si_migra_al_primo_export(self):
+        store = CUStore(":memory:")
+        store.ingest(self.parsed)
+        legacy = {"_meta": {"purpose": "vecchio formato"},
+                  "sanctions": [dict(r) for r in store.conn.execute("SELECT * FROM cu_sanctions")],
+                  "results": [dict(r) for r in store.conn.execute("SELECT * FROM cu_results")]}
+        totale = store._totals()
+        store.close()
+        self.facts.write_text(json.dumps(legacy), encoding="utf-8")
+
+        migrated = CUStore(":memory:")
+        self.assertEqual(migrated.import_facts(self.facts), totale)
+        self.assertEqual(migrated.export_facts(self.facts), totale)
+        self.assertNotIn("sanctions", json.loads(self.facts.read_text(encoding="utf-8")))
+        migrated.close()
+
+        rebuilt = CUStore(":memory:")
+        self.assertEqual(rebuilt.import_facts(self.facts), totale)
+        rebuilt.close()
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test offline dell'estrazione a pagine dei CU (src/cu_pdf.py).
+
+Il PDF è costruito qui, a mano, con le righe del CU 146: pypdf lo legge come
+un CU vero. In parallelo o in serie, dalla cache o no, il parser deve vedere
+lo stesso testo; le pagine senza marcatori non arrivano.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_pdf -v
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "tests"))
+
+import src.cu_pdf as cu_pdf  # noqa: E402
+from src.cu_parser import parse_cu_pages, parse_cu_text  # noqa: E402
+from test_cu_parser import CU_REALE  # noqa: E402
+
+PROSA = ["Circolare n. 12 della Lega Nazionale Dilettanti",
+         "Si ricorda alle societa' che le iscrizioni si chiudono a fine mese."]
+
+
+def _pdf(pages):
+    """PDF minimo: una pagina per lista di righe, Helvetica, nient'altro."""
+    def esc(s):
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 9 Tf 12 TL 40 800 Td " + " ".join(f"({esc(l)}) Tj T*" for l in lines) + " ET"
+        objs.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objs)} 0 R >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out, offsets = b"%PDF-1.4\n", []
+    for i, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class PdfPagesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        lines = CU_REALE.splitlines()
+        # Il CU spezzato su sei pagine, con due pagine di sola prosa in mezzo.
+        pages = [lines[:8], PROSA, lines[8:16], lines[16:24], PROSA, lines[24:]]
+        self.pdf = self.dir / "cu146.pdf"
+        self.pdf.write_bytes(_pdf(pages))
+        self.cache = self.dir / "cache"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _pages(self, **kw):
+        kw.setdefault("cache_dir", self.cache)
+        return list(cu_pdf.pdf_pages(str(self.pdf), **kw))
+
+    def test_le_pagine_di_sola_prosa_non_arrivano(self):
+        pages = self._pages(workers=1)
+        self.assertEqual(len(pages), 4)
+        self.assertFalse(any("Circolare" in p for p in pages))
+        self.assertEqual(len(self._pages(workers=1, prescan=False)), 6)
+        self.assertFalse(cu_pdf.has_markers("\n".join(PROSA)))
+
+    def test_il_parser_a_pagine_vede_il_cu_intero(self):
+        self.assertEqual(parse_cu_pages(cu_pdf.pdf_pages(str(self.pdf), workers=1,
+                                                         cache_dir=self.cache)),
+                         parse_cu_text(CU_REALE))
+
+    def test_parallelo_uguale_al_seriale_e_in_ordine(self):
+        serial = self._pages(workers=1, cache_dir=self.dir / "a")
+        with mock.patch.object(cu_pdf, "PAGE_CHUNK", 1):
+            parallel = self._pages(workers=3, cache_dir=self.dir / "b")
+        self.assertEqual(parallel, serial)
+
+    def test_il_secondo_giro_non_riestrae(self):
+        first = self._pages(workers=1)
+        self.assertEqual(len(list(self.cache.glob("*.jsonl.gz"))), 1)
+        with mock.patch.object(cu_pdf, "_extract", side_effect=AssertionError("riestratto")):
+            self.assertEqual(self._pages(workers=1), first)
+            # Stesso contenuto, altro nome: stessa voce di cache.
+            copy = self.dir / "altro_nome.pdf"
+            copy.write_bytes(self.pdf.read_bytes())
+            self.assertEqual(list(cu_pdf.pdf_pages(str(copy), cache_dir=self.cache)), first)
+
+    def test_lettura_interrotta_non_lascia_cache(self):
+        pages = cu_pdf.pdf_pages(str(self.pdf), workers=1, cache_dir=self.cache)
+        next(pages)
+        pages.close()
+        self.assertEqual(list(self.cache.glob("*")), [])
+
+    def test_cache_spenta(self):
+        with mock.patch.dict(os.environ, {"OB1_CU_TEXT_CACHE": "0"}):
+            self._pages(workers=1)
+        self.assertFalse(self.cache.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
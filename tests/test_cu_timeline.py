@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test offline della stagione per tesserato (src/cu_timeline.py).
+
+Il caso guida: un calciatore squalificato per due giornate in un CU, e i
+risultati delle gare successive della sua squadra che arrivano con i CU
+delle settimane dopo — scritti con un nome di società diverso da quello
+della giustizia sportiva. Le giornate saltate devono comparire quando
+arrivano le gare, senza ricalcolare il db intero.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_cu_timeline -v
+"""
+
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cu_parser import CUStore
+from src.cu_timeline import gare_count, season_of
+
+CAT = "ECCELLENZA"
+
+
+def _cu(number, sanctions=(), results=()):
+    return {"meta": {"cu_number": number, "cu_date": "2026-04-13"},
+            "sanctions": [{"category": CAT, "role": "CALCIATORI", "reason": None,
+                           "match_date": day, "kind": kind, "detail": detail,
+                           "person": person, "club": club}
+                          for day, kind, detail, person, club in sanctions],
+            "results": [{"category": cat, "match_date": day, "girone": "A", "giornata": g,
+                         "home": home, "away": away, "home_goals": 1, "away_goals": 0,
+                         "note": None}
+                        for day, g, home, away, cat in results]}
+
+
+# Il calendario della Vianese: nei risultati senza sigla societaria.
+CALENDARIO = [("2026-04-11", 28, "VIANESE CALCIO", "NOCETO", CAT),
+              ("2026-04-18", 29, "SAVIGNANESE", "VIANESE CALCIO", CAT),
+              ("2026-04-25", 30, "VIANESE CALCIO", "FIDENZA", CAT),
+              ("2026-05-02", 31, "CASTENASO CALCIO", "VIANESE CALCIO", CAT),
+              ("2026-04-22", 5, "VIANESE CALCIO", "NOCETO", "JUNIORES")]
+
+
+class HelpersTestCase(unittest.TestCase):
+    def test_la_stagione_parte_a_luglio(self):
+        self.assertEqual(season_of("2026-04-11"), "2025-26")
+        self.assertEqual(season_of("2026-07-01"), "2026-27")
+        self.assertEqual(season_of("1999-09-05"), "1999-00")
+
+    def test_giornate_di_squalifica(self):
+        self.assertEqual(gare_count("DUE"), 2)
+        self.assertEqual(gare_count("una"), 1)
+        self.assertEqual(gare_count("3"), 3)
+        self.assertEqual(gare_count("MOLTE"), 0)
+
+
+class TimelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = CUStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+
+    def _row(self, person):
+        return next(r for r in self.store.season_timeline() if r["person"] == person)
+
+    def test_le_giornate_saltate_arrivano_con_i_risultati(self):
+        self.store.ingest(_cu(146, sanctions=[
+            ("2026-04-11", "SQUALIFICA_GARE", "DUE", "PELLEGRI FILIPPO", "VIANESE CALCIO SSDARL")]))
+        row = self._row("PELLEGRI FILIPPO")
+        self.assertEqual((row["appearances"], row["matched"], row["missed"]), (1, 0, 0))
+
+        self.store.ingest(_cu(152, results=CALENDARIO))
+        row = self._row("PELLEGRI FILIPPO")
+        self.assertEqual((row["appearances"], row["matched"], row["missed"],
+                          row["club_fixtures"]), (1, 1, 2, 4))
+        eventi = [(e["match_date"], e["event"], e["opponent"])
+                  for e in self.store.timeline_events("PELLEGRI FILIPPO")]
+        self.assertEqual(eventi, [("2026-04-11", "presenza", "NOCETO"),
+                                  ("2026-04-18", "squalificato", "SAVIGNANESE"),
+                                  ("2026-04-25", "squalificato", "FIDENZA")])
+
+    def test_squalifica_a_termine_conta_le_gare_fino_alla_data(self):
+        self.store.ingest_many([
+            _cu(152, results=CALENDARIO),
+            _cu(146, sanctions=[("2026-04-11", "SQUALIFICA_FINO_AL", "2026-04-30",
+                                 "ROSSI MARIO", "VIANESE CALCIO SSDARL")])])
+        self.assertEqual(self._row("ROSSI MARIO")["missed"], 2)   # 18/4 e 25/4, non la Juniores
+
+    def test_le_presenze_sono_le_gare_distinte_con_un_provvedimento(self):
+        self.store.ingest_many([
+            _cu(152, results=CALENDARIO),
+            _cu(146, sanctions=[
+                ("2026-04-11", "AMMONIZIONE", "I", "NERI LUCA", "VIANESE CALCIO SSDARL"),
+                ("2026-04-18", "AMMONIZIONE", "II", "NERI LUCA", "VIANESE CALCIO SSDARL"),
+                ("2026-04-18", "AMMENDA", "", "NERI LUCA", "VIANESE CALCIO SSDARL"),
+                ("2026-05-09", "AMMONIZIONE", "III", "NERI LUCA", "VIANESE CALCIO SSDARL")])])
+        row = self._row("NERI LUCA")
+        # Il 9/5 non è ancora fra i risultati: presenza sì, ritrovata no.
+        self.assertEqual((row["appearances"], row["matched"], row["first_match"],
+                          row["last_match"]), (3, 2, "2026-04-11", "2026-05-09"))
+
+    def test_densita_del_calendario(self):
+        self.store.ingest(_cu(152, results=CALENDARIO))
+        rows = self.store.fixture_density("Vianese Calcio SSDARL", season="2025-26")
+        self.assertEqual([(r["category"], r["fixtures"], r["per_week"]) for r in rows],
+                         [(CAT, 4, 1.0), ("JUNIORES", 1, 1.0)])
+
+    def test_stessa_chiave_societa_diverse_un_calendario_a_testa(self):
+        self.store.ingest_many([
+            _cu(152, results=[("2026-04-11", 28, "POL. SAN MAURO", "NOCETO", CAT),
+                              ("2026-04-18", 29, "FIDENZA", "POL. SAN MAURO", CAT),
+                              ("2026-04-12", 28, "US SAN MAURO", "RIMINI", CAT)]),
+            _cu(146, sanctions=[
+                ("2026-04-11", "SQUALIFICA_GARE", "DUE", "ROSSI MARIO", "POL. SAN MAURO"),
+                ("2026-04-12", "AMMONIZIONE", "I", "BIANCHI LUCA", "US SAN MAURO")])])
+        rossi, bianchi = self._row("ROSSI MARIO"), self._row("BIANCHI LUCA")
+        self.assertEqual((rossi["club_fixtures"], rossi["missed"]), (2, 1))
+        self.assertEqual((bianchi["club_fixtures"], bianchi["matched"]), (1, 1))
+        self.assertEqual([r["fixtures"] for r in self.store.fixture_density("US SAN MAURO")], [1])
+
+    def test_chiave_ambigua_nessun_calendario_preso_in_prestito(self):
+        self.store.ingest_many([
+            _cu(152, results=[("2026-04-11", 28, "VIRTUS 1907", "NOCETO", CAT),
+                              ("2026-04-18", 29, "VIRTUS 2015", "FIDENZA", CAT),
+                              ("2026-04-11", 28, "SAN MAURO", "RIMINI", CAT)]),
+            _cu(146, sanctions=[
+                ("2026-04-04", "SQUALIFICA_GARE", "DUE", "ROSSI MARIO", "VIRTUS"),
+                ("2026-04-04", "SQUALIFICA_GARE", "DUE", "NERI LUCA", "POL. SAN MAURO"),
+                ("2026-04-04", "SQUALIFICA_GARE", "DUE", "GALLI PAOLO", "US SAN MAURO")])])
+        for person in ("ROSSI MARIO", "NERI LUCA", "GALLI PAOLO"):
+            row = self._row(person)
+            self.assertEqual((row["club_fixtures"], row["missed"]), (0, 0), person)
+        self.assertEqual(self.store.fixture_density("VIRTUS"), [])
+
+    def test_in_qualunque_ordine_come_un_ricalcolo_da_capo(self):
+        rnd = random.Random(50)
+        clubs = ["VIANESE CALCIO SSDARL", "NOCETO", "FIDENZA 1922"]
+        people = [f"{s} LUCA" for s in ("ROSSI", "BIANCHI", "VERDI", "NERI", "GALLI")]
+        days = [f"2026-0{m}-{d:02d}" for m in (3, 4) for d in (1, 8, 15, 22)]
+        cus = []
+        for n, day in enumerate(days, start=1):
+            results = [(day, n, "VIANESE CALCIO", "NOCETO", CAT), (day, n, "FIDENZA", "RIMINI", CAT)]
+            sanctions = [(day, rnd.choice(["AMMONIZIONE", "SQUALIFICA_GARE"]),
+                          rnd.choice(["I", "UNA", "DUE"]), rnd.choice(people), rnd.choice(clubs))
+                         for _ in range(4)]
+            # Risultati e sanzioni della stessa giornata anche in CU diversi.
+            cus += [_cu(n, sanctions=sanctions), _cu(100 + n, results=results)]
+        rnd.shuffle(cus)
+        for i in range(0, len(cus), 3):
+            self.store.ingest_many(cus[i:i + 3])
+        incrementale = (self.store.season_timeline(), self.store.fixture_density(),
+                        [self.store.timeline_events(p) for p in people])
+        with self.store.conn:
+            self.store.timeline.rebuild()
+        self.assertEqual(incrementale, (self.store.season_timeline(), self.store.fixture_density(),
+                                        [self.store.timeline_events(p) for p in people]))
+        self.assertTrue(any(r["missed"] for r in incrementale[0]))
+
+    def test_una_data_illeggibile_non_ferma_l_ingest(self):
+        # Il parser lascia passare "GARE DEL 11/4" così com'è.
+        self.store.ingest_many([
+            _cu(152, results=CALENDARIO + [("11/4", 28, "VIANESE CALCIO", "RIMINI", CAT)]),
+            _cu(146, sanctions=[
+                ("11/4", "AMMONIZIONE", "I", "NERI LUCA", "VIANESE CALCIO SSDARL"),
+                ("2026-04-11", "SQUALIFICA_FINO_AL", "30/4", "ROSSI MARIO",
+                 "VIANESE CALCIO SSDARL")])])
+        self.assertEqual(self.store.conn.execute(
+            "SELECT COUNT(*) FROM cu_sanctions WHERE match_date = '11/4'").fetchone()[0], 1)
+        self.assertEqual((self._row("ROSSI MARIO")["appearances"],
+                          self._row("ROSSI MARIO")["missed"]), (1, 0))
+        self.assertFalse(any(r["person"] == "NERI LUCA" for r in self.store.season_timeline()))
+        with self.store.conn:
+            self.store.timeline.rebuild()          # come all'apertura di un db che la contiene
+        self.assertEqual(self._row("ROSSI MARIO")["club_fixtures"], 4)
+
+    def test_db_di_prima_della_stagione_si_ricostruisce(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "ob1.db"
+            store = CUStore(db)
+            store.ingest_many([_cu(152, results=CALENDARIO), _cu(146, sanctions=[
+                ("2026-04-11", "SQUALIFICA_GARE", "DUE", "PELLEGRI FILIPPO",
+                 "VIANESE CALCIO SSDARL")])])
+            atteso = store.season_timeline()
+            with store.conn:
+                for table in ("club_fixtures", "club_season", "player_timeline", "player_season"):
+                    store.conn.execute(f"DROP TABLE {table}")
+            store.close()
+            store = CUStore(db)
+            self.assertEqual(store.season_timeline(), atteso)
+            self.assertEqual(atteso[0]["missed"], 2)
+            store.close()
+
+    def test_le_domande_dello_scouting_usano_gli_indici(self):
+        def plan(sql, args):
+            return " ".join(r[-1] for r in self.store.conn.execute(
+                "EXPLAIN QUERY PLAN " + sql, args))
+
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM player_season WHERE season = ? AND appearances >= ? "
+            "ORDER BY appearances DESC", ("2025-26", 5)))
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM player_season WHERE person = ?", ("ROSSI MARIO",)))
+        self.assertIn("PRIMARY KEY", plan(
+            "SELECT * FROM club_fixtures WHERE team = ?", ("VIANESE CALCIO",)))
+        self.assertIn("USING INDEX", plan(
+            "SELECT * FROM club_fixtures WHERE team_key = ?", ("vianese calcio",)))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test offline della pubblicazione del feed (src/data_feed.py).
+
+Un delta applicato alla versione precedente ridà esattamente la nuova; il
+manifest tiene la catena delle ultime versioni; i file vecchi spariscono.
+Le shard ricompongono il documento intero: indice + dettagli + segmenti.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_data_feed -v
+"""
+
+import copy
+import gzip
+import json
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.data_feed as data_feed
+from src.data_feed import (DATED_FIELDS, INDEX_FIELDS, apply_patch, compact, diff, publish,
+                           publish_shards)
+
+
+def _doc(n=40, update="2026-03-01T10:00:00"):
+    opps = [{"id": f"opp_{i}", "player_name": f"Giocatore {i}", "ob1_score": 100 - i,
+             "classification": "hot" if i < 5 else "warm" if i < 20 else "cold",
+             "previous_clubs": ["A", "B"], "intel": {"signals": []}} for i in range(n)]
+    return {"opportunities": opps, "stats": {"total": n}, "last_update": update}
+
+
+class DiffTestCase(unittest.TestCase):
+    def test_random_edits_round_trip(self):
+        rnd = random.Random(7)
+        base = _doc()
+        for trial in range(100):
+            new = copy.deepcopy(base)
+            opps = new["opportunities"]
+            for _ in range(rnd.randint(0, 4)):
+                opps.pop(rnd.randrange(len(opps)))
+            for k in range(rnd.randint(0, 4)):
+                opps.insert(rnd.randrange(len(opps) + 1), {"id": f"new_{trial}_{k}", "ob1_score": 1})
+            for o in rnd.sample(opps, 5):
+                o["ob1_score"] = rnd.randint(0, 100)
+                o.pop("previous_clubs", None)
+            opps.sort(key=lambda o: o["ob1_score"], reverse=True)
+            new["last_update"] = str(trial)
+            self.assertEqual(apply_patch(base, diff(base, new)), new, trial)
+
+    def test_one_record_dropping_costs_two_moves_not_a_cascade(self):
+        base = _doc()
+        new = copy.deepcopy(base)
+        moved = new["opportunities"].pop(2)
+        moved["ob1_score"] = 50
+        new["opportunities"].insert(30, moved)
+        ops = diff(base, new)
+        self.assertEqual([o["op"] for o in ops].count("move"), 2)
+        self.assertEqual(apply_patch(base, ops), new)
+
+    def test_types_are_not_confused(self):
+        self.assertEqual(diff({"a": 1}, {"a": True}),
+                         [{"op": "replace", "path": "/a", "value": True}])
+        self.assertEqual(diff({"a/b": 1}, {"a/b": 2})[0]["path"], "/a~1b")
+
+    def test_failed_test_op_rejects_the_patch(self):
+        with self.assertRaises(ValueError):
+            apply_patch(_doc(), [{"op": "test", "path": "/last_update", "value": "altro"}])
+
+
+class PublishTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.docs = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read(self, name):
+        return json.loads((self.docs / "feed" / name).read_text(encoding="utf-8"))
+
+    def test_versions_deltas_and_pruning(self):
+        docs = [_doc(update=f"2026-03-0{i}T10:00:00") for i in range(1, 5)]
+        docs[2]["opportunities"][3]["ob1_score"] = 7
+        manifests = [publish(self.docs, d) for d in docs]
+
+        last = manifests[-1]
+        self.assertEqual([d["to"] for d in last["deltas"]],
+                         [m["version"] for m in manifests[:0:-1]])
+        # Dalla prima versione alla corrente seguendo la catena.
+        doc, have = docs[0], manifests[0]["version"]
+        while have != last["version"]:
+            step = next(d for d in last["deltas"] if d["from"] == have)
+            doc, have = apply_patch(doc, self._read(step["file"])), step["to"]
+        self.assertEqual(doc, docs[-1])
+
+        self.assertEqual(self._read(last["file"]), docs[-1])
+        self.assertEqual(json.loads(gzip.decompress((self.docs / "data.json.gz").read_bytes())),
+                         docs[-1])
+        self.assertEqual((self.docs / "data.json").read_bytes(), compact(docs[-1]))
+        versions = sorted(p.name for p in (self.docs / "feed").glob("data.*"))
+        self.assertEqual(versions, [last["file"], last["file"] + ".gz"])
+
+    def test_same_content_keeps_the_chain(self):
+        first = publish(self.docs, _doc(update="a"))
+        second = publish(self.docs, _doc(update="b"))
+        again = publish(self.docs, _doc(update="b"))
+        self.assertEqual(again, second)
+        self.assertEqual(again["deltas"][0]["from"], first["version"])
+
+    def test_delta_bigger_than_half_the_feed_is_skipped(self):
+        publish(self.docs, _doc(update="a"))
+        with mock.patch.object(data_feed, "DELTA_MAX_RATIO", 0.0):
+            manifest = publish(self.docs, _doc(update="b"))
+        self.assertEqual(manifest["deltas"], [])
+        self.assertEqual(list((self.docs / "feed").glob("delta.*")), [])
+
+
+class ShardsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.shards = Path(self.tmp.name) / "shards"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read(self, name):
+        return json.loads((self.shards / name).read_text(encoding="utf-8"))
+
+    def _merge(self, index, row, facts):
+        """Come withDetail in docs/app.js: dettaglio, segmento datato, riga; intel fuso."""
+        dated = self._read(index["dated"]).get(row["detail"], {}) if index.get("dated") else {}
+        full = {**facts, **dated, **{k: v for k, v in row.items() if k != "detail"}}
+        if "intel" in facts or "intel" in dated:
+            full["intel"] = {**facts.get("intel", {}), **dated.get("intel", {})}
+        return full
+
+    def test_index_details_and_segments_rebuild_the_document(self):
+        doc = _doc()
+        manifest = publish_shards(Path(self.tmp.name), doc)
+        index = self._read(manifest["file"])
+        self.assertEqual(index["stats"], doc["stats"])
+        for row in index["opportunities"]:
+            self.assertLessEqual(set(row) - {"detail"}, set(INDEX_FIELDS))
+        self.assertEqual([self._merge(index, r, self._read(r["detail"]))
+                          for r in index["opportunities"]],
+                         doc["opportunities"])
+        hot = self._read(index["segments"]["hot"])
+        self.assertEqual([self._merge(index, r, hot[r["detail"]])
+                          for r in index["opportunities"][:5]],
+                         doc["opportunities"][:5])
+        self.assertEqual(set(index["segments"]), {"hot", "warm", "cold"})
+
+    def test_a_new_day_does_not_change_the_details(self):
+        doc = _doc()
+        for o in doc["opportunities"]:
+            o.update(score_breakdown={"freshness": 10, "age": 20}, days_without_contract=3,
+                     assessment={"why": ["3 giorni senza contratto"]}, reported_date="2026-03-01")
+            o["intel"] = {"roi": "alto", "signals": ["scade tra 90 giorni"]}
+        first = self._read(publish_shards(Path(self.tmp.name), doc)["file"])
+        # Il giorno dopo: cambiano solo i campi datati.
+        doc2 = copy.deepcopy(doc)
+        for o in doc2["opportunities"]:
+            o["ob1_score"] -= 1
+            o["score_breakdown"]["freshness"] = 9
+            o["days_without_contract"] = 4
+            o["assessment"] = {"why": ["4 giorni senza contratto"]}
+            o["intel"]["signals"] = ["scade tra 89 giorni"]
+        doc2["last_update"] = "domani"
+        second = self._read(publish_shards(Path(self.tmp.name), doc2)["file"])
+        self.assertEqual([r["detail"] for r in first["opportunities"]],
+                         [r["detail"] for r in second["opportunities"]])
+        # I pesanti stanno nel segmento datato, non nell'indice.
+        for row in second["opportunities"]:
+            self.assertFalse({"score_breakdown", "assessment", "intel"} & set(row))
+        self.assertNotEqual(first["dated"], second["dated"])
+        self.assertEqual(set(DATED_FIELDS) - set(INDEX_FIELDS) - {"stale_free_agent"},
+                         set(self._read(second["dated"])[second["opportunities"][0]["detail"]])
+                         - {"intel"})
+        self.assertEqual(self._merge(second, second["opportunities"][0],
+                                     self._read(second["opportunities"][0]["detail"])),
+                         doc2["opportunities"][0])
+        # Un fatto nuovo sì.
+        doc2["opportunities"][0]["intel"]["roi"] = "basso"
+        third = self._read(publish_shards(Path(self.tmp.name), doc2)["file"])
+        self.assertNotEqual(third["opportunities"][0]["detail"],
+                            second["opportunities"][0]["detail"])
+
+    def test_stale_details_are_removed_and_the_index_gets_a_delta(self):
+        doc = _doc()
+        publish_shards(Path(self.tmp.name), doc)
+        doc2 = copy.deepcopy(doc)
+        doc2["opportunities"][0]["ob1_score"] = 99
+        doc2["last_update"] = "dopo"
+        manifest = publish_shards(Path(self.tmp.name), doc2)
+        details = {p.name for p in self.shards.glob("p.*.json")}
+        self.assertEqual(details, {r["detail"] for r in self._read(manifest["file"])["opportunities"]})
+        self.assertEqual(len(manifest["deltas"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
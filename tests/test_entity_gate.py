@@ -13,9 +13,9 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from src.entity_gate import (JUNK, OUT_OF_SCOPE, PLAYER, classify,
-                             classify_name, find_particle_duplicates,
-                             is_player_name)
+from src.entity_gate import (JUNK, OUT_OF_SCOPE, PLAYER, SCOPE_TITLES, JunkMatcher,
+                             classify, classify_name, find_particle_duplicates,
+                             is_player_name, junk_match, load_junk_vocabulary)
 
 
 class TestJunkRejected(unittest.TestCase):
@@ -119,6 +119,36 @@ class TestScope(unittest.TestCase):
         self.assertEqual(v.kind, JUNK)
 
 
+class TestJunkVocabulary(unittest.TestCase):
+    """config/junk_terms.txt: un file, una regex, la regola che ha scattato."""
+
+    def test_rule_and_term_are_reported(self):
+        hit = junk_match("Sky Sport  News")
+        self.assertEqual((hit.rule, hit.term), ("media", "sky sport"))
+        self.assertIsNone(junk_match("Cosimo Patierno"))
+
+    def test_longest_term_wins(self):
+        self.assertEqual(junk_match("Spareggi Nazionali Lnd").term, "spareggi nazionali")
+        m = JunkMatcher({"sub-20": "a", "sub-23": "b", "sub": "c"})
+        self.assertEqual(m.match("Mundial Sub-23").rule, "b")
+        self.assertEqual(m.match("Sub 21").rule, "c")
+
+    def test_titles_scope_keeps_market_articles(self):
+        """Nei titoli "calciomercato" è ovunque: scartano solo le pagine elenco."""
+        self.assertIsNone(junk_match("Calciomercato: Rossi firma col Pescara", SCOPE_TITLES))
+        self.assertEqual(junk_match("Ecco gli svincolati di luglio", SCOPE_TITLES).rule,
+                         "listing")
+        self.assertIsNotNone(junk_match("Calciomercato Rossi"))
+
+    def test_every_title_term_is_also_a_name_term(self):
+        vocab = load_junk_vocabulary()
+        self.assertTrue(set(vocab[SCOPE_TITLES]) <= set(vocab["nomi"]))
+
+    def test_missing_file_gives_an_empty_matcher(self):
+        self.assertEqual(load_junk_vocabulary("/nonexistent/junk.txt"), {})
+        self.assertIsNone(JunkMatcher({}).match("Sky Sport"))
+
+
 class TestParticleDuplicates(unittest.TestCase):
     def test_preposition_artifact_is_linked_to_the_canonical_name(self):
         dupes = find_particle_duplicates(
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Test offline della risoluzione delle identità (src/entity_resolution.py).
+
+Le grafie della stessa persona devono finire sullo stesso id; due persone
+diverse no, nemmeno quando si assomigliano ("Marco" / "Mario") o si chiamano
+uguale ma hanno id Transfermarkt diversi.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_entity_resolution -v
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.entity_resolution import (PlayerRegistry, blocking_keys, find_duplicates,
+                                   name_tokens, phonetic, record_tm_id, score_pair)
+from src.cu_parser import CUStore, parse_cu_text
+from src.merge_index import OppIndex
+
+
+class KeysTestCase(unittest.TestCase):
+    def test_tokens_ignore_case_accents_and_apostrophes(self):
+        self.assertEqual(name_tokens("Nicolò D'Angelo"), ["nicolo", "dangelo"])
+        self.assertEqual(name_tokens("ROSSI M."), ["rossi", "m"])
+
+    def test_phonetic_keeps_vowels(self):
+        self.assertEqual(phonetic("mattia"), phonetic("matia"))
+        self.assertEqual(phonetic("mirko"), phonetic("mirco"))
+        self.assertNotEqual(phonetic("marco"), phonetic("mario"))
+
+    def test_order_variants_share_a_block(self):
+        self.assertTrue(set(blocking_keys(name_tokens("Mattia Rossi")))
+                        & set(blocking_keys(name_tokens("ROSSI MATTIA"))))
+
+    def test_scores(self):
+        t = name_tokens
+        self.assertEqual(score_pair(t("Mattia Rossi"), t("Rossi Mattia"))[1], "ordine/accenti")
+        self.assertEqual(score_pair(t("Matia Rossi"), t("Mattia Rossi"))[1], "fonetica")
+        self.assertEqual(score_pair(t("Da Mattia Rossi"), t("Mattia Rossi"))[1], "preposizione")
+        self.assertEqual(score_pair(t("M. Rossi"), t("Mattia Rossi"))[1], "iniziale")
+        self.assertEqual(score_pair(t("Marco Rossi"), t("Mario Rossi"))[0], 0.0)
+
+
+class RegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.reg = PlayerRegistry(":memory:")
+        self.addCleanup(self.reg.close)
+
+    def test_every_variant_resolves_to_one_id(self):
+        pid = self.reg.resolve("Mattia Rossi")
+        for variant in ("Rossi Mattia", "ROSSI MATTIA", "Mattìa Rossi", "Matia Rossi",
+                        "M. Rossi", "Da Mattia Rossi"):
+            self.assertEqual(self.reg.resolve(variant), pid, variant)
+        # "ROSSI MATTIA" e "Mattìa Rossi" normalizzano su varianti già note
+        self.assertEqual(len(self.reg.variants(pid)), 5)
+
+    def test_different_people_stay_apart(self):
+        self.assertNotEqual(self.reg.resolve("Marco Rossi"), self.reg.resolve("Mario Rossi"))
+
+    def test_ambiguous_initial_is_not_merged(self):
+        self.reg.resolve("Marco Rossi")
+        self.reg.resolve("Mattia Rossi")
+        self.assertIsNone(self.reg.match("M. Rossi"))
+
+    def test_tm_id_separates_namesakes_and_unifies_spellings(self):
+        a = self.reg.resolve("Mattia Rossi", tm_player_id="111")
+        b = self.reg.resolve("Mattia Rossi", tm_player_id="222")
+        self.assertNotEqual(a, b)
+        self.assertEqual(self.reg.resolve("Rossi M.", tm_player_id="222"), b)
+        self.assertEqual(self.reg.player(a)["tm_player_id"], "111")
+
+    def test_dirty_tm_id_does_not_merge_unrelated_names(self):
+        a = self.reg.resolve("Mattia Rossi", tm_player_id="939000")
+        b = self.reg.resolve("Luca Verdi", tm_player_id="939000")
+        self.assertNotEqual(a, b)
+
+    def test_tm_id_only_when_the_profile_matches_the_name(self):
+        url = "https://www.transfermarkt.it/mattia-rossi/profil/spieler/939000"
+        self.assertEqual(record_tm_id({"player_name": "Rossi Mattia", "tm_url": url}), "939000")
+        self.assertIsNone(record_tm_id({"player_name": "Luca Verdi", "tm_url": url}))
+
+    def test_known_variant_is_a_direct_lookup(self):
+        pid = self.reg.resolve("Rossi Mattia")
+        self.assertEqual(self.reg.lookup("rossi  mattia"), pid)
+        self.assertIsNone(self.reg.lookup("Luca Verdi"))
+
+    def test_ids_survive_a_new_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / "ob1.db"
+            with PlayerRegistry(db) as reg:
+                pid = reg.resolve("Cosimo Patierno", tm_player_id="340000")
+            with PlayerRegistry(db) as reg:
+                self.assertEqual(reg.resolve("PATIERNO COSIMO"), pid)
+                self.assertEqual(reg.by_tm_id(340000), pid)
+
+
+class AnagrafeTestCase(unittest.TestCase):
+    """Il registro come anagrafe condivisa: enrichment, CU, report."""
+
+    CU = """COMUNICATO UFFICIALE N. 150 DEL 20/4/2026
+
+GARE DEL 18/ 4/2026
+
+CALCIATORI NON ESPULSI
+I AMMONIZIONE DIFFIDA
+ROSSI MATTIA (NOCETO)    VERDI LUCA (NOCETO)
+
+DIRIGENTI
+I AMMONIZIONE DIFFIDA
+BIANCHI CARLO (NOCETO)
+"""
+
+    def setUp(self):
+        self.reg = PlayerRegistry(":memory:")
+        self.addCleanup(self.reg.close)
+
+    def test_enrichment_is_reused_under_another_spelling(self):
+        self.reg.record_enrichment("Mattia Rossi", {
+            "tm_url": "https://www.transfermarkt.it/mattia-rossi/profil/spieler/939000",
+            "birth_date": "2005-02-01", "current_club": "Ternana"})
+        self.reg.resolve("Rossi Mattia")
+        tm = self.reg.known_enrichment("ROSSI MATTIA")
+        self.assertEqual(tm["tm_player_id"], "939000")
+        self.assertEqual(tm["current_club"], "Ternana")
+        self.assertIsNone(self.reg.known_enrichment("Luca Verdi"))
+
+    def test_stale_or_anonymous_enrichment_is_not_reused(self):
+        self.reg.record_enrichment("Luca Verdi", {"birth_date": "2004-01-01"})
+        self.assertIsNone(self.reg.known_enrichment("Luca Verdi"))   # senza id TM
+        self.reg.record_enrichment("Mattia Rossi", {"tm_player_id": "1",
+                                                    "birth_date": "2005-02-01"})
+        self.reg.conn.execute("UPDATE players SET last_enriched = '2020-01-01T00:00:00+00:00'")
+        self.assertIsNone(self.reg.known_enrichment("Mattia Rossi"))
+
+    def test_cu_ingest_links_players_and_joins_their_sanctions(self):
+        store = CUStore(":memory:")
+        self.addCleanup(store.close)
+        store.ingest(parse_cu_text(self.CU))
+        store.players.record_enrichment("Mattia Rossi", {"tm_player_id": "939000",
+                                                         "current_club": "Parma"})
+        presence = store.players.cu_presence("Mattia Rossi")
+        self.assertEqual([(s["person"], s["club"]) for s in presence],
+                         [("ROSSI MATTIA", "NOCETO")])
+        self.assertIsNone(store.players.known("Bianchi Carlo"))      # dirigente
+        # L'enrichment è di oggi: il club del CU di aprile non lo sovrascrive.
+        self.assertEqual(store.players.known("Mattia Rossi")["club"], "Parma")
+        self.assertEqual(store.players.known("Luca Verdi")["club"], "NOCETO")
+
+    def test_a_namesake_in_the_cu_does_not_become_the_professional(self):
+        pro = self.reg.record_enrichment("Mario Rossi", {"tm_player_id": "501",
+                                                         "current_club": "Pescara"})
+        dilettante = self.reg.link_cu("ROSSI MARIO", "ASD VIRTUS CASTELFRANCO", "2099-01-01")
+        self.assertNotEqual(dilettante, pro)
+        self.assertEqual(self.reg.known_enrichment("Mario Rossi")["current_club"], "Pescara")
+        self.assertEqual(self.reg.resolve("Mario Rossi"), pro)
+        # Lo stesso dilettante in un'altra società resta la stessa identità.
+        self.assertEqual(self.reg.link_cu("ROSSI MARIO", "US FORMIGINE", "2099-02-01"), dilettante)
+        # Con la stessa società invece è lui: il CU si lega, il club resta quello di TM.
+        self.assertEqual(self.reg.link_cu("ROSSI MARIO", "DELFINO PESCARA 1936", "2099-03-01"), pro)
+        self.assertEqual(self.reg.player(pro)["club"], "Pescara")
+
+    def test_a_cu_link_made_before_the_tm_anchor_moves_away(self):
+        first = self.reg.link_cu("ROSSI MARIO", "ASD VIRTUS CASTELFRANCO", "2026-04-18")
+        self.reg.record_enrichment("Mario Rossi", {"tm_player_id": "501",
+                                                   "current_club": "Pescara"})
+        again = self.reg.link_cu("ROSSI MARIO", "ASD VIRTUS CASTELFRANCO", "2099-01-01")
+        self.assertNotEqual(again, first)
+        self.assertEqual(self.reg.player(first)["club"], "Pescara")
+
+    def test_reusing_the_registry_does_not_refresh_its_date(self):
+        """Un dato riusato invecchia lo stesso: la finestra di freschezza deve scadere."""
+        import io
+        import json
+        from contextlib import redirect_stdout
+        from datetime import datetime, timedelta, timezone
+        from unittest import mock
+
+        import scripts.run_enrichment as runner
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data = Path(tmp) / "opportunities.json"
+            data.write_text(json.dumps([{"id": 1, "player_name": "Rossi Mattia"}]),
+                            encoding="utf-8")
+            stamp = (datetime.now(timezone.utc) - timedelta(days=10)).isoformat(
+                timespec="seconds")
+            with PlayerRegistry(Path(tmp) / "ob1.db") as reg:
+                reg.record_enrichment("Mattia Rossi", {"tm_player_id": "939000",
+                                                       "birth_date": "2005-02-01"})
+                with reg.conn:
+                    reg.conn.execute("UPDATE players SET last_enriched = ?", (stamp,))
+            with mock.patch.object(runner, "DATA_FILE", data), \
+                    mock.patch.object(runner, "METRICS_FILE", Path(tmp) / "metrics.jsonl"):
+                with redirect_stdout(io.StringIO()):
+                    runner.main()
+            self.assertTrue(json.loads(data.read_text(encoding="utf-8"))[0]["tm_enriched"])
+            with PlayerRegistry(Path(tmp) / "ob1.db") as reg:
+                self.assertEqual(reg.known("Mattia Rossi")["last_enriched"], stamp)
+
+    def test_reuse_brings_the_whole_tm_record_and_counts_no_fact(self):
+        from scripts.run_enrichment import apply_tm_data
+        from src.metrics import get_metrics, reset_metrics
+
+        reset_metrics()
+        first = {"player_name": "Mattia Rossi"}
+        apply_tm_data(first, {"tm_player_id": "939000", "birth_date": "2005-02-01",
+                              "market_value": 150000, "appearances": 21,
+                              "contract_expires": "2027-06-30"}, self.reg)
+        facts = get_metrics().facts
+        again = {"player_name": "ROSSI MATTIA"}
+        self.assertTrue(apply_tm_data(again, self.reg.known_enrichment("ROSSI MATTIA"),
+                                      reused=True))
+        self.assertEqual((again["market_value"], again["appearances"],
+                          again["contract_expires"]), (150000, 21, "2027-06-30"))
+        self.assertEqual(get_metrics().facts, facts)
+        # Registrato prima che il dizionario TM si salvasse: non si riusa a metà.
+        self.reg.conn.execute("UPDATE players SET tm_payload = NULL")
+        self.assertIsNone(self.reg.known_enrichment("ROSSI MATTIA"))
+
+    def test_the_main_batch_path_writes_the_registry(self):
+        import io
+        import json
+        from contextlib import redirect_stdout
+        from unittest import mock
+
+        import scripts.run_enrichment as runner
+
+        class _Enricher:
+            stalled = False
+
+            def enrich_players_batch(self, names):
+                return {n: {"tm_url": "https://www.transfermarkt.it/mattia-rossi/profil/spieler/939000",
+                            "birth_date": "2005-02-01", "market_value": 150000}
+                        for n in names}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data = Path(tmp) / "opportunities.json"
+            data.write_text(json.dumps([{"id": 1, "player_name": "Mattia Rossi"}]),
+                            encoding="utf-8")
+            with mock.patch.object(runner, "DATA_FILE", data), \
+                    mock.patch.object(runner, "METRICS_FILE", Path(tmp) / "metrics.jsonl"), \
+                    mock.patch.object(runner, "TransfermarktEnricher", _Enricher), \
+                    mock.patch.object(runner, "DELAY_BETWEEN_BATCHES", 0):
+                with redirect_stdout(io.StringIO()):
+                    runner.main()
+            with PlayerRegistry(Path(tmp) / "ob1.db") as reg:
+                tm = reg.known_enrichment("Rossi Mattia")
+        self.assertEqual((tm["tm_player_id"], tm["market_value"]), ("939000", 150000))
+
+    def test_scouting_reports_join_cu_presence(self):
+        from scripts.generate_scouting_reports import attach_cu_presence
+
+        store = CUStore(":memory:")
+        self.addCleanup(store.close)
+        store.ingest(parse_cu_text(self.CU))
+        players = [{"player_name": "Mattia Rossi"}, {"player_name": "Marco Neri"}]
+        self.assertEqual(attach_cu_presence(players, store.players), 1)
+        self.assertEqual(players[0]["cu_presence"],
+                         {"provvedimenti": 1, "ultimo": "2026-04-18", "club": "NOCETO",
+                          "tipo": "AMMONIZIONE"})
+        self.assertNotIn("cu_presence", players[1])
+
+    def test_apply_tm_data_writes_the_registry(self):
+        from scripts.run_enrichment import apply_tm_data
+        opp = {"player_name": "Mattia Rossi"}
+        self.assertTrue(apply_tm_data(opp, {"tm_player_id": 7, "birth_date": "2005-02-01"},
+                                      self.reg))
+        self.assertEqual(self.reg.known("Rossi Mattia")["tm_player_id"], "7")
+
+
+class CallersTestCase(unittest.TestCase):
+    def test_find_duplicates_points_to_the_first_spelling(self):
+        dupes = find_duplicates(["Mattia Rossi", "ROSSI MATTIA", "Da Bernardo Silva",
+                                 "Bernardo Silva", "Marco Rossi"])
+        self.assertEqual(dupes, {
+            "ROSSI MATTIA": ("Mattia Rossi", "ordine/accenti"),
+            "Da Bernardo Silva": ("Bernardo Silva", "preposizione"),
+        })
+
+    def test_merge_index_with_registry_keys(self):
+        reg = PlayerRegistry(":memory:")
+        self.addCleanup(reg.close)
+        index = OppIndex(
+            [{"id": "1", "player_name": "Mattia Rossi"},
+             {"id": "2", "player_name": "ROSSI MATTIA", "market_value": "100k"},
+             {"id": "3", "player_name": "Luca Verdi"}],
+            key=lambda rec: reg.resolve(rec["player_name"]))
+        self.assertEqual([r["id"] for r in index], ["2", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test offline del build incrementale della dashboard (scripts/generate_dashboard.py).
+
+Una riga che arriva dalla cache, giorni dopo, deve essere identica a quella
+ricalcolata da zero oggi; un record cambiato va ricalcolato.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_generate_dashboard -v
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "scripts"))
+
+import generate_dashboard as gd  # noqa: E402
+
+NOW = datetime(2026, 3, 10, 12, 0)
+SAMPLE = [
+    {"id": "a", "player_name": "Marco Rossi", "age": 21, "opportunity_type": "svincolato",
+     "discovered_at": "2026-03-01T08:00:00", "source_name": "TuttoC",
+     "current_club": "Cavese", "appearances": 24, "goals": 3},
+    {"id": "b", "player_name": "Luca Bianchi", "age": 27, "opportunity_type": "mercato",
+     "discovered_at": "2026-02-20", "source_name": "TMW", "current_club": "Pescara",
+     "contract_expires": "2026-06-30", "market_value": 200000},
+    # Svincolato con un contratto che scade dopo il 2026-03-20: il gate lo
+    # riclassifica a 'mercato' solo finché la scadenza è nel futuro.
+    {"id": "c", "player_name": "Paolo Verdi", "age": 19, "opportunity_type": "rescissione",
+     "source_name": "Gazzetta", "current_club": "Trento", "contract_expires": "2026-03-20"},
+]
+
+
+def _dump(rows):
+    return json.dumps(rows, sort_keys=True, ensure_ascii=False)
+
+
+class IncrementalBuildTestCase(unittest.TestCase):
+    def test_cached_rows_equal_a_full_rebuild_days_later(self):
+        cache = {}
+        gd.build_rows(SAMPLE, cache, now=NOW)
+        cache = json.loads(json.dumps(cache))          # come dopo un giro su disco
+        for days in (0, 1, 15, 40):
+            later = NOW + timedelta(days=days)
+            self.assertEqual(_dump(gd.build_rows(SAMPLE, dict(cache), now=later)),
+                             _dump(gd.build_rows(SAMPLE, None, now=later)), days)
+
+    def test_only_changed_records_are_rebuilt(self):
+        cache = {}
+        gd.build_rows(SAMPLE, cache, now=NOW)
+        before = dict(cache)
+        changed = [dict(SAMPLE[0], appearances=30)] + SAMPLE[1:2]
+        rows = gd.build_rows(changed, cache, now=NOW)
+        self.assertEqual(rows[0]["appearances"], 30)
+        self.assertEqual(len(set(cache) - set(before)), 1)
+        # Il record sparito esce dalla cache; quello invariato è lo stesso oggetto.
+        self.assertEqual(len(cache), 2)
+        fp = gd.record_fingerprint(SAMPLE[1])
+        self.assertIs(cache[fp], before[fp])
+
+    def test_contract_expiry_changes_the_fingerprint(self):
+        cache = {}
+        early = gd.build_rows(SAMPLE[2:], cache, now=NOW)[0]
+        late = gd.build_rows(SAMPLE[2:], cache, now=NOW + timedelta(days=30))[0]
+        self.assertEqual((early["opportunity_type"], late["opportunity_type"]),
+                         ("mercato", "rescissione"))
+
+    def test_cache_of_another_version_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dashboard_rows.json"
+            cache = {}
+            gd.build_rows(SAMPLE, cache, now=NOW)
+            gd.save_rows_cache(path, "v1", cache)
+            self.assertEqual(gd.load_rows_cache(path, "v1").keys(), cache.keys())
+            self.assertEqual(gd.load_rows_cache(path, "v2"), {})
+            path.write_text("{rotto", encoding="utf-8")
+            self.assertEqual(gd.load_rows_cache(path, "v1"), {})
+        self.assertNotEqual(gd.rows_cache_salt(NOW), gd.rows_cache_salt(NOW.replace(year=2027)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -196,6 +196,15 @@ class TestRouting(GatewayTestCase):
         sent = gw.transport.calls[0]["payload"]["messages"][1]["content"]
         self.assertLessEqual(len(sent), 500 + 20)
 
+    def test_input_budget_is_the_tightest_route(self):
+        cfg = json.loads(json.dumps(CONFIG))
+        cfg["providers"][1]["models"][0]["max_input_chars"] = 300
+        gw = LLMGateway(registry=Registry(cfg), ledger=QuotaLedger(self.root / "l.json"),
+                        cache=ResponseCache(self.root / "c", enabled=False),
+                        transport=FakeTransport({}), verbose=False)
+        self.assertEqual(gw.input_budget("extract"), 300)
+        self.assertEqual(gw.input_budget("extract", exclude_providers={"secondary"}), 500)
+
 
 class TestCache(GatewayTestCase):
     def test_second_identical_call_is_free(self):
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test offline dell'indice di merge delle opportunità (src/merge_index.py).
+
+L'indice deve dare lo stesso risultato della vecchia dedup a scansione — stessi
+record, stesso ordine — e in più dire cosa ha fatto.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_merge_index -v
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.merge_index import (ADDED, DUP_ID, DUP_NAME, REPLACED, SINGLE, OppIndex,
+                             normalize_player_name, richness)
+
+
+def _legacy_dedup(opps):
+    """La dedup di ouroboros_run prima dell'indice, come riferimento."""
+    valid = [o for o in opps if len((o.get('player_name') or '').strip().split()) >= 2]
+    groups = {}
+    for o in valid:
+        key = normalize_player_name(o.get('player_name', ''))
+        if key not in groups or richness(o) > richness(groups[key]):
+            groups[key] = o
+    return list(groups.values())
+
+
+def _opp(name, opp_id=None, **extra):
+    rec = {"id": opp_id or f"id-{name}", "player_name": name, "description": ""}
+    rec.update(extra)
+    return rec
+
+
+class OppIndexTestCase(unittest.TestCase):
+    def test_same_result_as_the_legacy_scan(self):
+        rng = random.Random(7)
+        names = ["Mario Rossi", "Nicolò Bertolà", "Nicolo Bertola", "Luca  Verdi",
+                 "Rossi", "Marco De Luca", "marco de luca"]
+        opps = []
+        for i in range(400):
+            extra = {}
+            if rng.random() < 0.3:
+                extra["market_value"] = "200k"
+            if rng.random() < 0.3:
+                extra["goals"] = rng.randint(1, 9)
+            opps.append(_opp(rng.choice(names), opp_id=f"id{i}",
+                             description="x" * rng.randint(0, 300), **extra))
+        self.assertEqual(OppIndex(opps).records, _legacy_dedup(opps))
+
+    def test_richer_duplicate_replaces_in_place(self):
+        index = OppIndex([_opp("Mario Rossi"), _opp("Luca Verdi")])
+        outcome = index.add(_opp("Mario  Rossi", opp_id="nuovo", market_value="300k"))
+        self.assertEqual(outcome, REPLACED)
+        self.assertEqual(index.records[0]["id"], "nuovo")
+        self.assertIn("nuovo", index)
+        self.assertNotIn("id-Mario Rossi", index)
+
+    def test_poorer_duplicate_and_same_id_are_dropped(self):
+        index = OppIndex([_opp("Mario Rossi", market_value="300k")])
+        self.assertEqual(index.add(_opp("Mario Rossi", opp_id="altro")), DUP_NAME)
+        self.assertEqual(index.add(_opp("Mario Rossi", description="y" * 5000)), DUP_ID)
+        self.assertEqual(len(index), 1)
+
+    def test_stats_count_every_outcome(self):
+        index = OppIndex()
+        index.add(_opp("Mario Rossi"))
+        index.add(_opp("Rossi"))
+        index.add(_opp("Mario Rossi"))
+        index.add(_opp("mario rossi", opp_id="x"))
+        self.assertEqual(index.stats, {ADDED: 1, SINGLE: 1, DUP_ID: 1, DUP_NAME: 1,
+                                       REPLACED: 0})
+        self.assertIn("1 nuovi", index.summary())
+
+    def test_lookup_by_name_ignores_accents_and_spacing(self):
+        index = OppIndex([_opp("Nicolò Bertolà")])
+        self.assertEqual(index.get_by_name("nicolo  bertola")["player_name"], "Nicolò Bertolà")
+        self.assertIsNone(index.get_by_name("Luca Verdi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test offline del ciclo ouroboros: leghe in parallelo, stesso risultato.
+
+Quello che conta non è la velocità ma che il parallelismo non si veda
+nell'output: stesso ordine di merge a prescindere da quale lega finisce prima,
+e una lega rotta che non si porta dietro le altre.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_ouroboros_run -v
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_ROOT))
+sys.path.insert(0, str(_ROOT / "scripts"))
+
+import ouroboros_run  # noqa: E402
+from src.entity_resolution import PlayerRegistry  # noqa: E402
+from src.models import MarketOpportunity, OpportunityType  # noqa: E402
+
+
+class _FakeScraper:
+    """Tre leghe; la prima è la più lenta, la seconda esplode."""
+
+    DELAYS = {"italy_serie_c": 0.15, "italy_serie_d": 0.0, "brazil_serie_b": 0.05}
+
+    def __init__(self, *_a, **_kw):
+        self.leagues = {lid: {"name": lid} for lid in self.DELAYS}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.closed = True
+
+    def scrape_league(self, league_id):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.DELAYS[league_id])
+            if league_id == "italy_serie_d":
+                raise RuntimeError("feed rotto")
+            return [MarketOpportunity(
+                league_id=league_id, opportunity_type=OpportunityType.SVINCOLATO,
+                player_name=f"Mario {league_id.split('_')[0].title()} {'Rossi' if i else 'Bianchi'}",
+                description="svincolato, parametro zero",
+                source_url=f"https://www.tuttoc.com/{league_id}/{i}",
+                source_name="tuttoc.com") for i in range(2)]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class ParallelLeaguesTestCase(unittest.TestCase):
+    def run_cycle(self, workers):
+        os.environ["OB1_LEAGUE_WORKERS"] = str(workers)
+        self.addCleanup(lambda: os.environ.pop("OB1_LEAGUE_WORKERS", None))
+        saved, scrapers = [], []
+
+        def make_scraper(*a, **kw):
+            scrapers.append(_FakeScraper())
+            return scrapers[-1]
+
+        notifier = mock.Mock()
+        with mock.patch.object(ouroboros_run, "GlobalScraper", side_effect=make_scraper), \
+                mock.patch.object(ouroboros_run, "TelegramNotifier", return_value=notifier), \
+                mock.patch.object(ouroboros_run, "load_existing_opps", return_value=[]), \
+                mock.patch.object(ouroboros_run, "PlayerRegistry",
+                                  side_effect=lambda: PlayerRegistry(":memory:")), \
+                mock.patch.object(ouroboros_run, "is_valid_player_name", return_value=True), \
+                mock.patch.object(ouroboros_run, "save_opps", side_effect=saved.append):
+            ouroboros_run.run_ouroboros()
+        return saved[0], notifier, scrapers[0]
+
+    def test_merge_order_follows_the_config_not_the_finish_line(self):
+        serial, _n, _s = self.run_cycle(1)
+        parallel, _n, scraper = self.run_cycle(4)
+        self.assertGreater(scraper.max_in_flight, 1)
+        self.assertEqual([o["id"] for o in parallel], [o["id"] for o in serial])
+        self.assertEqual([o["league_id"] for o in parallel][:2], ["italy_serie_c"] * 2)
+        self.assertTrue(scraper.closed)          # la memoria condivisa si chiude una volta
+
+    def test_a_broken_league_is_isolated_and_alerted(self):
+        opps, notifier, _s = self.run_cycle(4)
+        leagues = {o["league_id"] for o in opps}
+        self.assertEqual(leagues, {"italy_serie_c", "brazil_serie_b"})
+        notifier.admin_alert.assert_called_once_with(
+            "ERROR", "ouroboros/italy_serie_d", "feed rotto")
+
+    def test_worker_knob_falls_back_on_garbage(self):
+        os.environ["OB1_LEAGUE_WORKERS"] = "tanti"
+        self.addCleanup(lambda: os.environ.pop("OB1_LEAGUE_WORKERS", None))
+        self.assertEqual(ouroboros_run.league_workers(), ouroboros_run.DEFAULT_LEAGUE_WORKERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
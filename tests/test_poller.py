@@ -251,6 +251,21 @@ class TestNewItemsOnly(PollerTestCase):
         fresh = poll_new_items([self.source], seen=seen, poller=p2, verbose=False)
         self.assertEqual([i.url for i in fresh], ["https://www.tuttoc.com/cesena-nuovo"])
 
+    def test_syndicated_copy_is_collapsed_before_triage(self):
+        """Stessa notizia riscritta da un altro sito: non arriva al triage."""
+        seen = self.store()
+        copia = RSS_BODY.replace("</channel>", """<item>
+            <title>Ufficiale: Patierno all'Avellino a parametro zero</title>
+            <link>https://www.tuttolegapro.com/patierno-avellino</link>
+            <description>Firma l'attaccante dopo la rescissione</description>
+            <pubDate>%s</pubDate></item></channel>""" % _rfc822(NOW))
+        p = self.poller([FakeResponse(200, copia)])
+        items = poll_new_items([self.source], seen=seen, poller=p, verbose=False)
+        urls = [i.url for i in items]
+        self.assertIn("https://www.tuttoc.com/avellino-patierno", urls)
+        self.assertNotIn("https://www.tuttolegapro.com/patierno-avellino", urls)
+        self.assertIn("https://www.tuttoc.com/cremonese-tosi", urls)
+
     def test_no_sources_means_no_work(self):
         self.assertEqual(poll_new_items([], verbose=False), [])
 
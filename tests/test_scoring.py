@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test offline dello scoring batch (src/scoring.py).
+
+`score_batch` deve dare esattamente quello che dà `score` record per record —
+stesso intero, stessa classe, stesso breakdown — con e senza NumPy.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_scoring -v
+"""
+
+import json
+import sys
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.scoring as scoring
+from src.scoring import FACTORS, OB1Scorer, score_opportunities
+
+DATA = Path(__file__).resolve().parent.parent / "data" / "opportunities.json"
+
+TODAY = date.today()
+SAMPLE = [
+    {"player_name": "Marco Rossi", "age": 25, "opportunity_type": "Svincolato",
+     "reported_date": TODAY.isoformat(), "source_name": "TuttoC",
+     "current_club": "Ex Pescara", "previous_clubs": ["Pescara", "Reggiana"],
+     "appearances": 80, "summary": "svincolato dopo esperienza in Serie B"},
+    {"player_name": "Luca Bianchi", "age": 34, "opportunity_type": "mercato",
+     "discovered_at": (TODAY - timedelta(days=40)).isoformat() + "T10:00:00",
+     "source_name": "Blog Sconosciuto", "market_value": 120000},
+    {"player_name": "Paolo Verdi", "age": None, "reported_date": "non è una data",
+     "source_name": None, "current_club": "Promozione Maia Alta",
+     "source_url": "https://x.it/serie-d-girone", "market_value": 0},
+    {"player_name": "Ugo Neri", "opportunity_type": "rescissione",
+     "discovered_at": (TODAY - timedelta(days=90)).isoformat(),
+     "source_name": "gazzetta.it", "age": 20, "market_value": 500000,
+     "previous_clubs": ["A", "B", "C"], "appearances": 120},
+]
+
+
+class ScoreBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.scorer = OB1Scorer()
+
+    def _assert_identical(self, records):
+        expected = [self.scorer.score(o) for o in records]
+        self.assertEqual(self.scorer.score_batch(records, today=TODAY), expected)
+
+    def test_batch_equals_single_scores(self):
+        self._assert_identical(SAMPLE)
+
+    def test_pure_python_path_is_identical(self):
+        with mock.patch.object(scoring, "np", None):
+            self._assert_identical(SAMPLE)
+
+    @unittest.skipUnless(DATA.exists(), "data/opportunities.json assente")
+    def test_batch_equals_single_scores_on_the_real_history(self):
+        records = json.loads(DATA.read_text(encoding="utf-8"))
+        self._assert_identical(records)
+        with mock.patch.object(scoring, "np", None):
+            self._assert_identical(records)
+
+    def test_breakdown_on_demand(self):
+        lean = self.scorer.score_batch(SAMPLE, breakdown=False)
+        self.assertNotIn("score_breakdown", lean[0])
+        table = self.scorer.columns(SAMPLE)
+        self.assertEqual(tuple(table.breakdown(0)), FACTORS)
+        self.assertEqual(table.breakdown(3), self.scorer.score(SAMPLE[3])["score_breakdown"])
+
+    def test_new_weights_without_rereading_records(self):
+        table = self.scorer.columns(SAMPLE)
+        only_age = {k: (1.0 if k == "age" else 0.0) for k in FACTORS}
+        self.assertEqual(table.totals(only_age), [90, 25, 60, 100])
+        self.assertEqual(table.totals(OB1Scorer.WEIGHTS),
+                         [r["ob1_score"] for r in self.scorer.score_batch(SAMPLE)])
+
+    def test_score_opportunities_sorts_by_score(self):
+        scored = score_opportunities(SAMPLE)
+        self.assertEqual([o["ob1_score"] for o in scored],
+                         sorted((o["ob1_score"] for o in scored), reverse=True))
+        self.assertEqual(len(scored), len(SAMPLE))
+
+
+if __name__ == "__main__":
+    unittest.main()
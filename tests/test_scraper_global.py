@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Test offline del pre-triage e dell'impacchettamento dei prompt di triage in
+`GlobalScraper`.
+
+Il triage LLM è la voce di costo della discovery: quello che il pre-triage
+scarta non deve mai essere un articolo di mercato, quello che lascia passare
+non deve essere una cronaca o una classifica, e ogni articolo che arriva alla
+rotta deve arrivarci intero.
+
+    PYTHONIOENCODING=utf-8 python -m unittest tests.test_scraper_global -v
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import scraper_global
+from src.metrics import reset_metrics
+from src.scraper_global import GlobalScraper
+from src.watch import SeenStore
+from src.watch.poller import Item, PollResult, Source
+
+
+def _item(title, content="", url="https://www.tuttoc.com/news/articolo"):
+    return {"title": title, "url": url, "content": content, "source": "feed:tuttoc"}
+
+
+class PretriageTestCase(unittest.TestCase):
+    def setUp(self):
+        os.environ.pop("OB1_PRETRIAGE", None)
+        # Nessuna config né client: il pre-triage non ne ha bisogno.
+        self.scraper = GlobalScraper.__new__(GlobalScraper)
+        self.metrics = reset_metrics()
+
+    def verdict(self, item):
+        return self.scraper._pretriage(item)[1]
+
+    def test_transfer_keyword_alone_goes_to_triage(self):
+        self.assertEqual(self.verdict(_item(
+            "Avellino, preso Patierno a parametro zero")), "")
+
+    def test_name_plus_market_term_goes_to_triage(self):
+        self.assertEqual(self.verdict(_item(
+            "Ufficiale: Marco Rossi firma con il Cesena")), "")
+
+    def test_two_weak_signals_go_to_triage(self):
+        self.assertEqual(self.verdict(_item(
+            "Cremonese, si muove Tosi", "Il giovane difensore piace in Serie C")), "")
+
+    def test_match_report_is_dropped(self):
+        self.assertEqual(self.verdict(_item(
+            "Pagelle Avellino-Potenza 2-1: Marco Rossi decisivo")), "nessun_segnale")
+
+    def test_listing_pages_are_dropped_before_scoring(self):
+        self.assertEqual(self.verdict(_item(
+            "Parametro zero: gli svincolati di Serie C")), "titolo_listing")
+        self.assertEqual(self.verdict(_item(
+            "Svincolato", url="https://www.transfermarkt.it/x/transfers/wettbewerb/IT3A")),
+            "url_listing")
+
+    def test_press_release_without_market_signal_is_dropped(self):
+        self.assertEqual(self.verdict(_item(
+            "Avellino, aperta la prevendita per la gara con il Crotone")), "nessun_segnale")
+
+    def test_terms_match_whole_words_only(self):
+        # 'piace' in "Piacenza", 'under' in "underdog": nessun segnale di mercato.
+        self.assertEqual(self.verdict(_item(
+            "Piacenza, la squadra underdog del girone")), "nessun_segnale")
+        self.assertEqual(self.scraper._pretriage(_item(
+            "Il Piacenza si muove, Marco Rossi piace"))[0], 3)
+        # 'diretta' in "indiretta" non è cronaca.
+        self.assertEqual(self.verdict(_item(
+            "Cremonese, si muove Tosi", "Il giovane difensore, punizione indiretta")), "")
+        self.assertEqual(self.verdict(_item(
+            "Cremonese, si muove Tosi", "Il giovane difensore in diretta")), "nessun_segnale")
+
+    def test_stems_still_match_their_forms(self):
+        self.assertEqual(self.verdict(_item(
+            "Cremonese, acquisti e rinnovi per la classe 2006")), "")
+
+    def test_dropped_items_are_counted_by_reason(self):
+        items = [_item("Avellino, preso Patierno a parametro zero"),
+                 _item("Pagelle Avellino-Potenza 2-1"),
+                 _item("Classifica Girone C dopo la 10a giornata")]
+        kept = self.scraper._prefilter_feed_items(items)
+        self.assertEqual([i["title"] for i in kept], [items[0]["title"]])
+        self.assertEqual(self.metrics.items_skipped, 2)
+        self.assertEqual(self.metrics.items_skipped_by_reason,
+                         {"pretriage_nessun_segnale": 1, "pretriage_titolo_listing": 1})
+
+    def test_can_be_switched_off(self):
+        os.environ["OB1_PRETRIAGE"] = "0"
+        self.addCleanup(lambda: os.environ.pop("OB1_PRETRIAGE", None))
+        items = [_item("Pagelle Avellino-Potenza 2-1")]
+        self.assertEqual(self.scraper._prefilter_feed_items(items), items)
+
+    def test_detect_type_still_uses_the_same_keywords(self):
+        self.assertEqual(self.scraper._detect_type("Risoluzione consensuale"),
+                         scraper_global.OpportunityType.RESCISSIONE)
+        self.assertEqual(self.scraper._detect_type("Nuovo talento"),
+                         scraper_global.OpportunityType.TALENT)
+
+    def test_only_plausible_items_reach_the_llm(self):
+        feed_items = [mock.Mock(as_search_result=mock.Mock(return_value=i)) for i in (
+            _item("Avellino, preso Patierno a parametro zero"),
+            _item("Tabellino Avellino-Potenza 2-1"),
+        )]
+        with mock.patch.object(scraper_global, "feeds_enabled", return_value=True), \
+                mock.patch.object(scraper_global, "load_sources", return_value=["src"]), \
+                mock.patch.object(scraper_global, "poll_new_items", return_value=feed_items), \
+                mock.patch.object(GlobalScraper, "feed_poller", return_value=None), \
+                mock.patch.object(GlobalScraper, "seen_store", return_value=None), \
+                mock.patch.object(GlobalScraper, "_extract_players",
+                                  return_value=[]) as extract:
+            self.scraper.discover_from_feeds("italy_serie_c_d")
+        sent = [r["title"] for call in extract.call_args_list for r in call.args[0]]
+        self.assertEqual(sent, ["Avellino, preso Patierno a parametro zero"])
+
+
+class TriagePackingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.scraper = GlobalScraper.__new__(GlobalScraper)
+        self.scraper.gemini_client = None
+
+    def test_prompts_are_filled_up_to_the_budget(self):
+        items = [_item(f"Titolo {i}", "x" * 150, url=f"https://x.test/{i}")
+                 for i in range(40)]
+        corpora = self.scraper._pack_triage(items, 6000)
+        self.assertTrue(all(len(c) <= 6000 for c in corpora))
+        # Nessun articolo perso o tagliato: tutti interi, in ordine.
+        joined = "\n\n".join(corpora)
+        self.assertEqual(joined.count("ESTRATTO: " + "x" * 150), 40)
+        self.assertLess(len(corpora), 40 // 8)  # meno chiamate dei blocchi da 8
+
+    def test_an_item_that_does_not_fit_spills_into_the_next_prompt(self):
+        items = [_item("A", "a" * 400), _item("B", "b" * 400)]
+        corpora = self.scraper._pack_triage(items, 600)
+        self.assertEqual(len(corpora), 2)
+        self.assertIn("a" * 400, corpora[0])
+        self.assertIn("b" * 400, corpora[1])
+
+    def test_each_excerpt_is_capped(self):
+        corpora = self.scraper._pack_triage([_item("Lungo", "z" * 5000)], 10**6)
+        self.assertIn("z" * scraper_global.TRIAGE_EXCERPT_CHARS, corpora[0])
+        self.assertNotIn("z" * (scraper_global.TRIAGE_EXCERPT_CHARS + 1), corpora[0])
+
+    def test_only_an_item_longer_than_the_budget_is_shortened_further(self):
+        corpora = self.scraper._pack_triage([_item("Lungo", "z" * 5000)], 300)
+        self.assertEqual(len(corpora), 1)
+        self.assertEqual(len(corpora[0]), 300)
+
+    def test_item_cap_per_prompt(self):
+        items = [_item(str(i)) for i in range(scraper_global.TRIAGE_MAX_ITEMS + 1)]
+        self.assertEqual(len(self.scraper._pack_triage(items, 10**6)), 2)
+
+    def test_prompts_sent_to_the_llm_never_exceed_the_route_budget(self):
+        items = [_item(f"Titolo {i}", "y" * 700, url=f"https://x.test/{i}")
+                 for i in range(12)]
+        prompts = []
+
+        def fake_llm(system, user, **kw):
+            prompts.append(user)
+            return []
+
+        with mock.patch.object(scraper_global, "has_any_llm", return_value=True), \
+                mock.patch.object(scraper_global, "llm_input_budget", return_value=3000), \
+                mock.patch.object(scraper_global, "llm_complete_json", side_effect=fake_llm):
+            self.scraper._extract_players(items, "mercato test")
+        self.assertGreater(len(prompts), 1)
+        self.assertTrue(all(len(p) <= 3000 for p in prompts))
+        self.assertEqual(sum(p.count("y" * scraper_global.TRIAGE_EXCERPT_CHARS)
+                             for p in prompts), 12)
+        self.assertFalse(any("y" * (scraper_global.TRIAGE_EXCERPT_CHARS + 1) in p
+                             for p in prompts))
+
+
+class SharedSeenStoreTestCase(unittest.TestCase):
+    """Leghe in parallelo con feed in comune: un SeenStore, ogni articolo nuovo una volta sola."""
+
+    def setUp(self):
+        os.environ.pop("OB1_WATCH", None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = Path(self.tmp.name) / "ob1.db"
+        self.scraper = GlobalScraper.__new__(GlobalScraper)
+        self.scraper._poller_lock = threading.Lock()
+        self.scraper._seen = None
+
+    def test_two_leagues_in_parallel_on_one_db(self):
+        # Stessi 30 articoli per le due leghe (un feed condiviso), 10 in più per la seconda.
+        common = [Item(url=f"https://x.test/{i}", title=f"Articolo {i}") for i in range(30)]
+        own = {"italy_serie_c": common,
+               "italy_serie_d": common + [Item(url=f"https://y.test/{i}", title=f"Altro {i}")
+                                          for i in range(10)]}
+        start = threading.Barrier(2)
+
+        class Poller:
+            def poll(self, source):
+                start.wait(timeout=5)              # le due leghe insieme sullo stesso db
+                return PollResult(source_id=source.id, items=own[source.league_id], status=200)
+
+            def save(self):
+                pass
+
+        got = {}
+
+        def extract(results, _query):
+            got[results[0]["url"] if results else None] = results
+            return [{"url": r["url"]} for r in results]
+
+        stores = []
+
+        def make_store():
+            stores.append(SeenStore(self.db))
+            return stores[-1]
+
+        with mock.patch.object(scraper_global, "feeds_enabled", return_value=True), \
+                mock.patch.object(scraper_global, "SeenStore", side_effect=make_store), \
+                mock.patch.object(scraper_global, "load_sources", side_effect=lambda league_id: [
+                    Source(id=league_id, url=f"https://feed.test/{league_id}",
+                           league_id=league_id)]), \
+                mock.patch.object(GlobalScraper, "feed_poller", return_value=Poller()), \
+                mock.patch.object(GlobalScraper, "_prefilter_feed_items", side_effect=lambda r: r), \
+                mock.patch.object(GlobalScraper, "_extract_players", side_effect=extract):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                found = list(pool.map(lambda lid: self.scraper.discover_from_feeds(lid), own))
+            self.scraper.close()
+
+        self.assertEqual(len(stores), 1)
+        urls = [r["url"] for league in found for r in league]
+        self.assertEqual(len(urls), len(set(urls)))          # nessun articolo a due leghe
+        self.assertEqual(set(urls), {i.url for i in own["italy_serie_d"]})
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.count(), 40)
+            self.assertFalse(any(store.see_batch((i.url, i.content) for i in own["italy_serie_d"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
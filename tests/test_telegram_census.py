@@ -10,13 +10,18 @@ attivo. Il verdetto deve uscire dalle prove, con regole ricalcolabili.
 """
 
 import sys
+import tempfile
+import threading
+import time
 import unittest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from scripts.telegram_census import classify, parse_preview, verdict
+from scripts.telegram_census import (PreviewCache, census, classify, load_registry, parse_preview,
+                                     verdict, write_registry)
 
 NOW = datetime(2026, 8, 7, tzinfo=timezone.utc)
 
@@ -107,5 +112,89 @@ class ClassifyTestCase(unittest.TestCase):
         self.assertEqual(classify(parse_preview(page)), "news_generiche")
 
 
+
+class CensusTestCase(unittest.TestCase):
+    """In parallelo, con la cache e i ricontrolli lenti: nessuna rete vera."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PreviewCache(Path(self.tmp.name) / "previews.json")
+        self.calls = []
+        self.in_flight = self.peak = 0
+        self.lock = threading.Lock()
+        self.quiet = mock.patch("builtins.print")
+        self.quiet.start()
+
+    def tearDown(self):
+        self.quiet.stop()
+        self.tmp.cleanup()
+
+    def _fetch(self, handle):
+        with self.lock:
+            self.calls.append(handle)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)                     # un canale lento
+        with self.lock:
+            self.in_flight -= 1
+        if handle.startswith("morto"):
+            return 200, _page(_msg("2025-01-01T10:00:00+00:00", "vecchio"))
+        if handle.startswith("nessuno"):
+            return 0, ""                     # timeout, rete giù
+        if handle.startswith("privato"):
+            return 200, "<html>t.me/privato1</html>"   # risposta vera, senza anteprima
+        return 200, _page(_msg("2026-08-05T10:00:00+00:00", CU_LINK))
+
+    def test_parallelo_con_un_tetto(self):
+        handles = [f"canale{i}" for i in range(12)]
+        t0 = time.perf_counter()
+        rows = census(handles, fetch=self._fetch, workers=4, now=NOW)
+        self.assertLess(time.perf_counter() - t0, 12 * 0.05)
+        self.assertLessEqual(self.peak, 4)
+        self.assertEqual(list(rows), handles)
+        self.assertTrue(all(r["verdict"] == "attivo" for r in rows.values()))
+
+    def test_la_cache_evita_la_rete_finche_e_fresca(self):
+        census(["canale1"], fetch=self._fetch, cache=self.cache, now=NOW)
+        census(["canale1"], fetch=self._fetch, cache=self.cache, now=NOW + timedelta(hours=5))
+        self.assertEqual(self.calls, ["canale1"])
+        census(["canale1"], fetch=self._fetch, cache=self.cache, now=NOW + timedelta(hours=7))
+        self.assertEqual(self.calls, ["canale1", "canale1"])
+
+    def test_la_cache_sopravvive_al_processo(self):
+        census(["canale1"], fetch=self._fetch, cache=self.cache, now=NOW)
+        self.cache.save()
+        again = PreviewCache(self.cache.path)
+        rows = census(["canale1"], fetch=self._fetch, cache=again, now=NOW)
+        self.assertEqual(self.calls, ["canale1"])
+        self.assertEqual(rows["canale1"]["verdict"], "attivo")
+
+    def test_morti_e_inesistenti_si_ricontrollano_con_calma(self):
+        handles = ["morto1", "privato1", "canale1"]
+        first = census(handles, fetch=self._fetch, now=NOW)
+        self.assertEqual([r["verdict"] for r in first.values()],
+                         ["morto", "inesistente", "attivo"])
+        self.calls.clear()
+        census(handles, previous=first, fetch=self._fetch, now=NOW + timedelta(days=2))
+        self.assertEqual(self.calls, ["canale1"])
+        self.calls.clear()
+        census(handles, previous=first, fetch=self._fetch, now=NOW + timedelta(days=4))
+        self.assertEqual(sorted(self.calls), ["canale1", "privato1"])
+
+    def test_una_richiesta_fallita_non_e_una_prova(self):
+        first = census(["nessuno1"], fetch=self._fetch, cache=self.cache, now=NOW)
+        self.assertEqual(first["nessuno1"]["verdict"], "inesistente")
+        self.assertIsNone(self.cache.get("nessuno1", NOW))
+        census(["nessuno1"], previous=first, fetch=self._fetch, cache=self.cache,
+               now=NOW + timedelta(hours=1))
+        self.assertEqual(self.calls, ["nessuno1", "nessuno1"])
+
+    def test_registro_riletto_uguale(self):
+        rows = census(["canale1", "morto1"], fetch=self._fetch, now=NOW)
+        path = Path(self.tmp.name) / "channels.json"
+        self.assertEqual(write_registry(rows, path), {"attivo": 1, "morto": 1})
+        self.assertEqual(load_registry(path), rows)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -99,6 +99,189 @@ class SeenStoreTestCase(unittest.TestCase):
         self.assertEqual(normalize_content(None), "")
 
 
+class SeenBatchTestCase(unittest.TestCase):
+    """
+    Il lotto deve rispondere esattamente come una sequenza di see(): stesso
+    ordine, stessi contatori. Cambia solo quante volte si tocca il disco.
+    """
+
+    def setUp(self):
+        os.environ.pop("OB1_WATCH", None)
+        os.environ.pop("OB1_SEEN_BLOOM", None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = Path(self.tmp.name) / "seen.db"
+
+    def test_batch_matches_sequential_see(self):
+        batch = [("https://x.test/1", "uno"), ("https://x.test/2", "due"),
+                 ("https://x.test/1", "uno"), ("https://x.test/3", "tre")]
+        with SeenStore(":memory:") as a, SeenStore(":memory:") as b:
+            a.see("https://x.test/2", "due")
+            b.see("https://x.test/2", "due")
+            sequential = [a.see(u, c) for u, c in batch]
+            self.assertEqual(b.see_batch(batch), sequential)
+            self.assertEqual(b.see_batch(batch), [a.see(u, c) for u, c in batch])
+            key = content_key("https://x.test/1", "uno")
+            self.assertEqual(b.info(key)["times_seen"], a.info(key)["times_seen"])
+
+    def test_batch_is_one_transaction(self):
+        """Centinaia di URL di sitemap: un commit solo, non uno per articolo."""
+        batch = [(f"https://x.test/{i}", f"articolo {i}") for i in range(300)]
+        with SeenStore(self.db) as store:
+            commits = []
+            store.conn.set_trace_callback(
+                lambda sql: commits.append(sql) if sql.strip().upper() == "COMMIT" else None)
+            self.assertEqual(sum(store.see_batch(batch)), 300)
+            self.assertEqual(len(commits), 1)
+
+    def test_bloom_survives_a_new_process(self):
+        batch = [(f"https://x.test/{i}", "testo") for i in range(50)]
+        with SeenStore(self.db) as store:
+            store.see_batch(batch)
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.see_batch(batch), [False] * 50)
+            self.assertEqual(store.see_batch([("https://x.test/nuovo", "x")]), [True])
+
+    def test_rows_written_behind_the_filter_are_not_missed(self):
+        """Un insert che il filtro salvato non copre: il filtro si ricostruisce."""
+        with SeenStore(self.db) as store:
+            store.see_batch([("https://x.test/a", "a")])
+        with SeenStore(self.db) as store, store.conn:
+            store.conn.execute(
+                "INSERT INTO seen (key, first_seen, last_seen) VALUES (?, 'x', 'x')",
+                (content_key("https://x.test/b", "b"),))
+            store._bloom = None  # scrittore che non conosce il filtro
+        with SeenStore(self.db) as store:
+            self.assertFalse(store.see("https://x.test/b", "b"))
+
+    def test_two_stores_on_one_file_keep_each_others_keys(self):
+        """Due SeenStore sullo stesso db: il filtro salvato per ultimo non perde le chiavi dell'altro."""
+        first = [(f"https://x.test/a{i}", "a") for i in range(20)]
+        second = [(f"https://x.test/b{i}", "b") for i in range(20)]
+        a, b = SeenStore(self.db), SeenStore(self.db)
+        self.assertEqual(a.see_batch(first), [True] * 20)
+        self.assertEqual(b.see_batch(second), [True] * 20)
+        a.close()
+        b.close()
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.see_batch(first + second), [False] * 40)
+            self.assertFalse(store.see("https://x.test/a0", "a"))
+
+    def test_a_stale_filter_never_breaks_ingest(self):
+        """Il filtro in memoria non sa dell'altro scrittore: decide l'insert, senza eccezioni."""
+        with SeenStore(self.db) as a, SeenStore(self.db) as b:
+            a.see_batch([("https://x.test/1", "uno")])
+            self.assertEqual(b.see_batch([("https://x.test/1", "uno"), ("https://x.test/2", "due")]),
+                             [False, True])
+            a.see_batch([("https://x.test/3", "tre")])
+            self.assertFalse(b.see("https://x.test/3", "tre"))
+            self.assertEqual(b.info(content_key("https://x.test/1", "uno"))["times_seen"], 2)
+
+    def test_bloom_off_gives_the_same_answers(self):
+        os.environ["OB1_SEEN_BLOOM"] = "0"
+        self.addCleanup(lambda: os.environ.pop("OB1_SEEN_BLOOM", None))
+        batch = [("https://x.test/1", "uno"), ("https://x.test/1", "uno")]
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.see_batch(batch), [True, False])
+            self.assertEqual(store.see_many(batch), [])
+
+    def test_pruned_keys_are_new_again(self):
+        with SeenStore(self.db) as store:
+            store.see("https://x.test/a", "contenuto")
+            with store.conn:
+                store.conn.execute("UPDATE seen SET last_seen = '2020-01-01T00:00:00+00:00'")
+            self.assertEqual(store.prune(60), 1)
+            self.assertEqual(store.see_batch([("https://x.test/a", "contenuto")]), [True])
+
+
+class NearDuplicateTestCase(unittest.TestCase):
+    """
+    La stessa notizia da tre redazioni diverse arriva al triage una volta sola;
+    una notizia diversa sulla stessa squadra no.
+    """
+
+    VARIANTI = [
+        ("https://www.tuttoc.com/avellino-patierno",
+         "Avellino, preso Patierno a parametro zero. L'attaccante classe 2006 "
+         "firma un contratto triennale dopo la rescissione con il Sorrento."),
+        ("https://www.tuttolegapro.com/avellino-ufficiale-patierno",
+         "Ufficiale: l'Avellino ha preso Patierno a parametro zero. Dopo la "
+         "rescissione con il Sorrento l'attaccante classe 2006 firma un triennale."),
+        ("https://www.tuttomercatoweb.com/serie-c/patierno-avellino",
+         "Serie C, Patierno all'Avellino a parametro zero: l'attaccante classe "
+         "2006 ha firmato un contratto triennale, rescissione col Sorrento."),
+    ]
+    ALTRA = ("https://www.tuttoc.com/avellino-rossi",
+             "Avellino, Marco Rossi va in prestito alla Salernitana. Il "
+             "centrocampista saluta dopo due stagioni e cerca minuti in Serie B.")
+
+    def setUp(self):
+        for var in ("OB1_WATCH", "OB1_NEARDUP", "OB1_NEARDUP_THRESHOLD"):
+            os.environ.pop(var, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db = Path(self.tmp.name) / "seen.db"
+
+    def test_syndicated_rewrites_collapse_onto_the_first(self):
+        with SeenStore(self.db) as store:
+            dupes = store.near_duplicates(self.VARIANTI + [self.ALTRA])
+        first = self.VARIANTI[0][0]
+        self.assertEqual(dupes, [None, first, first, None])
+
+    def test_duplicate_of_an_article_from_a_past_run(self):
+        with SeenStore(self.db) as store:
+            store.near_duplicates(self.VARIANTI[:1])
+        with SeenStore(self.db) as store:
+            dupes = store.near_duplicates(self.VARIANTI[1:])
+        self.assertEqual(dupes, [self.VARIANTI[0][0]] * 2)
+
+    def test_threshold_is_configurable(self):
+        os.environ["OB1_NEARDUP_THRESHOLD"] = "1.0"
+        self.addCleanup(lambda: os.environ.pop("OB1_NEARDUP_THRESHOLD", None))
+        with SeenStore(":memory:") as store:
+            self.assertEqual(store.near_duplicates(self.VARIANTI), [None] * 3)
+
+    def test_same_template_different_player_is_not_merged(self):
+        """Stesso club, stesso comunicato-modello, un altro giocatore: è un'altra notizia."""
+        template = ("UFFICIALE: il Pineto ingaggia il difensore {}. Il giocatore arriva "
+                    "dal Teramo con un contratto annuale e si aggrega subito al gruppo.")
+        items = [("https://x.test/rossi", template.format("Mario Rossi")),
+                 ("https://x.test/bianchi", template.format("Luca Bianchi")),
+                 ("https://y.test/rossi", template.format("Mario Rossi") + " Domani le visite.")]
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.near_duplicates(items), [None, None, items[0][0]])
+        avellino = [("https://x.test/a", "Avellino, ecco l'arrivo del centrocampista Marco "
+                                         "Verdi: contratto biennale e subito a disposizione."),
+                    ("https://x.test/b", "Avellino, ecco l'arrivo del centrocampista Paolo "
+                                         "Neri: contratto biennale e subito a disposizione.")]
+        with SeenStore(self.db) as store:
+            self.assertEqual(store.near_duplicates(avellino), [None, None])
+
+    def test_short_titles_are_never_merged(self):
+        """Un titolo da sitemap non basta per dire "stessa notizia"."""
+        items = [("https://x.test/1", "Mercato Avellino colpo"),
+                 ("https://x.test/2", "Mercato Avellino colpo")]
+        with SeenStore(":memory:") as store:
+            self.assertEqual(store.near_duplicates(items), [None, None])
+
+    def test_can_be_switched_off(self):
+        os.environ["OB1_NEARDUP"] = "0"
+        self.addCleanup(lambda: os.environ.pop("OB1_NEARDUP", None))
+        with SeenStore(":memory:") as store:
+            self.assertEqual(store.near_duplicates(self.VARIANTI), [None] * 3)
+
+    def test_old_stories_are_forgotten_by_prune(self):
+        with SeenStore(self.db) as store:
+            store.near_duplicates(self.VARIANTI[:1])
+            with store.conn:
+                store.conn.execute(
+                    "UPDATE seen_near SET first_seen = '2020-01-01T00:00:00+00:00'")
+            store.prune(60)
+            self.assertEqual(store.conn.execute(
+                "SELECT COUNT(*) FROM seen_near_bands").fetchone()[0], 0)
+            self.assertEqual(store.near_duplicates(self.VARIANTI[1:2]), [None])
+
+
 class _FakeResponse:
     def __init__(self, status_code, text="", headers=None):
         self.status_code = status_code